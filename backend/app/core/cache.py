@@ -0,0 +1,231 @@
+"""
+Bounded in-process cache with LRU eviction and per-entry TTL.
+
+Used for read-mostly data that changes a few times a day (size charts, fit
+maps) and is read on every recommendation.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class TTLLRUCache:
+    """
+    Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``None`` is a valid cached value, so negative lookups (e.g. a brand with
+    no size chart) are cached too.
+
+    Keys being loaded by ``get_or_load``/``get_or_load_async`` carry a
+    generation that every invalidation of the key bumps; a load that finishes
+    after its key was invalidated returns its value but does not store it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before LRU eviction
+            ttl: Default time-to-live per entry in seconds
+            clock: Monotonic time source (injectable for tests)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Key -> loads in flight, and the key's generation while it has any
+        self._loading: Dict[Hashable, int] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, or ``default`` on miss or expiry."""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one if full."""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(
+        self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return a cached entry or compute, store and return it.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable producing the value on a miss
+            ttl: Optional per-entry TTL override
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            generation = self._begin_load(key)
+            try:
+                value = loader()
+            except BaseException:
+                self._end_load(key)
+                raise
+            self._end_load(key, generation, value, ttl)
+        return value
+
+    async def get_or_load_async(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Async variant of ``get_or_load`` for coroutine loaders.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument coroutine function producing the value on a miss
+            ttl: Optional per-entry TTL override
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            generation = self._begin_load(key)
+            try:
+                value = await loader()
+            except BaseException:
+                self._end_load(key)
+                raise
+            self._end_load(key, generation, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry. Returns True if it was present."""
+        with self._lock:
+            self._bump(key)
+            removed = self._data.pop(key, _MISSING) is not _MISSING
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``. Returns the count."""
+        with self._lock:
+            for key in [key for key in self._loading if predicate(key)]:
+                self._bump(key)
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            for key in self._loading:
+                self._bump(key)
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_loads": self.stale_loads,
+            }
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        """Store an entry and evict down to ``maxsize``; caller holds the lock."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (expires_at, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _bump(self, key: Hashable) -> None:
+        """Invalidate in-flight loads of ``key``; caller holds the lock."""
+        if key in self._loading:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _begin_load(self, key: Hashable) -> int:
+        """Register a load of ``key`` and return its current generation."""
+        with self._lock:
+            self._loading[key] = self._loading.get(key, 0) + 1
+            return self._generations.get(key, 0)
+
+    def _end_load(
+        self,
+        key: Hashable,
+        generation: Optional[int] = None,
+        value: Any = _MISSING,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Store a loaded value unless ``key`` was invalidated since ``generation``."""
+        with self._lock:
+            if value is not _MISSING:
+                if self._generations.get(key, 0) == generation:
+                    self._store(key, value, ttl)
+                else:
+                    self.stale_loads += 1
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._generations.pop(key, None)
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Return the live value for ``key`` or ``_MISSING``, updating counters."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
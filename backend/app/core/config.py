@@ -3,6 +3,7 @@ Configuration module for loading environment variables.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -24,7 +25,33 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 @dataclass
 class Settings:
     env: str = os.getenv("ENV", "dev")
+    api_key: str = API_KEY
     vendor_mode: str = os.getenv("VENDOR_MODE", "stub")
+    fit_cache_max_entries: int = int(os.getenv("FIT_CACHE_MAX_ENTRIES", "2048"))
+    fit_cache_ttl_seconds: float = float(os.getenv("FIT_CACHE_TTL_SECONDS", "900"))
+    catalog_fit_ttl_seconds: float = float(os.getenv("CATALOG_FIT_TTL_SECONDS", "300"))
+    db_pool_max_connections: int = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "200"))
+    db_pool_max_keepalive: int = int(os.getenv("DB_POOL_MAX_KEEPALIVE", "50"))
+    db_timeout_seconds: float = float(os.getenv("DB_TIMEOUT_SECONDS", "30"))
+    catalog_import_batch_size: int = int(os.getenv("CATALOG_IMPORT_BATCH_SIZE", "500"))
+    catalog_import_workers: int = int(os.getenv("CATALOG_IMPORT_WORKERS", "2"))
+    catalog_spool_dir: str = os.getenv(
+        "CATALOG_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "fittwin-catalog")
+    )
+    landmark_writer_enabled: bool = os.getenv("LANDMARK_WRITER_ENABLED", "true").lower() in ("1", "true", "yes")
+    landmark_writer_batch_size: int = int(os.getenv("LANDMARK_WRITER_BATCH_SIZE", "256"))
+    landmark_writer_flush_interval: float = float(os.getenv("LANDMARK_WRITER_FLUSH_INTERVAL", "1.0"))
+    landmark_writer_max_pending: int = int(os.getenv("LANDMARK_WRITER_MAX_PENDING", "10000"))
+    landmark_store_json: bool = os.getenv("LANDMARK_STORE_JSON", "false").lower() in ("1", "true", "yes")
+    measurement_cache_max_entries: int = int(os.getenv("MEASUREMENT_CACHE_MAX_ENTRIES", "4096"))
+    measurement_cache_ttl_seconds: float = float(os.getenv("MEASUREMENT_CACHE_TTL_SECONDS", "600"))
+    measurement_cache_dir: str = os.getenv("MEASUREMENT_CACHE_DIR", "")
+    recommend_batch_max_size: int = int(os.getenv("RECOMMEND_BATCH_MAX_SIZE", "64"))
+    recommend_batch_max_wait_ms: float = float(os.getenv("RECOMMEND_BATCH_MAX_WAIT_MS", "2"))
+    recommendation_writer_enabled: bool = os.getenv("RECOMMENDATION_WRITER_ENABLED", "true").lower() in ("1", "true", "yes")
+    recommendation_writer_batch_size: int = int(os.getenv("RECOMMENDATION_WRITER_BATCH_SIZE", "256"))
+    recommendation_writer_flush_interval: float = float(os.getenv("RECOMMENDATION_WRITER_FLUSH_INTERVAL", "1.0"))
+    recommendation_writer_max_pending: int = int(os.getenv("RECOMMENDATION_WRITER_MAX_PENDING", "10000"))
 
 
 settings = Settings()
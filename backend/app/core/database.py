@@ -0,0 +1,70 @@
+"""
+Shared async Supabase client.
+
+Services take an ``AsyncClient`` and ``await`` every PostgREST call, so a
+single worker keeps many database round trips in flight instead of blocking
+the event loop on each one. One client (and one pooled HTTP connection set)
+is created lazily per process and closed on application shutdown.
+"""
+
+import asyncio
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+
+from app.core.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, settings
+
+
+_client: Optional[AsyncClient] = None
+_http_client: Optional[httpx.AsyncClient] = None
+_lock = asyncio.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client shared by all PostgREST requests."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.db_pool_max_connections,
+            max_keepalive_connections=settings.db_pool_max_keepalive,
+        ),
+        timeout=httpx.Timeout(settings.db_timeout_seconds),
+    )
+
+
+async def get_supabase() -> AsyncClient:
+    """
+    Get the process-wide async Supabase client, creating it on first use.
+
+    Usable directly or as a FastAPI dependency.
+
+    Returns:
+        Shared async Supabase client
+    """
+    global _client, _http_client
+    if _client is not None:
+        return _client
+
+    async with _lock:
+        if _client is None:
+            _http_client = _build_http_client()
+            _client = await acreate_client(
+                SUPABASE_URL,
+                SUPABASE_SERVICE_ROLE_KEY,
+                options=AsyncClientOptions(
+                    httpx_client=_http_client,
+                    postgrest_client_timeout=settings.db_timeout_seconds,
+                    auto_refresh_token=False,
+                    persist_session=False,
+                ),
+            )
+    return _client
+
+
+async def close_supabase() -> None:
+    """Close pooled connections and drop the shared client."""
+    global _client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _client = None
+    _http_client = None
@@ -0,0 +1,280 @@
+"""
+Vectorized landmark-to-measurement engine.
+
+Stores MediaPipe Pose landmarks as ``(33, 4)`` float arrays (x, y, z,
+visibility) and evaluates every distance, depth and circumference from
+``docs/measurement_formulas.md`` with a handful of NumPy operations.
+
+All functions accept arbitrary leading batch dimensions, so a single session
+(``(33, 4)``) and a stack of sessions (``(N, 33, 4)``) share the same code path.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas.measure_schema import MediaPipeLandmarks
+
+
+NUM_LANDMARKS = 33
+REFERENCE_HEIGHT_CM = 170.0
+MODEL_VERSION = "v1.0-mediapipe"
+
+# Output columns of ``compute_measurement_matrix``, in response order
+MEASUREMENT_FIELDS: Tuple[str, ...] = (
+    "height_cm",
+    "neck_cm",
+    "shoulder_cm",
+    "chest_cm",
+    "underbust_cm",
+    "waist_natural_cm",
+    "sleeve_cm",
+    "bicep_cm",
+    "forearm_cm",
+    "hip_low_cm",
+    "thigh_cm",
+    "knee_cm",
+    "calf_cm",
+    "ankle_cm",
+    "front_rise_cm",
+    "back_rise_cm",
+    "inseam_cm",
+    "outseam_cm",
+)
+
+# MediaPipe Pose landmark indices
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW = 13
+LEFT_WRIST = 15
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE = 25
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Front-view segments measured as 3D Euclidean distances, one column each:
+# shoulder, hip, inseam, sleeve, upper arm, forearm, thigh, calf
+_SEGMENT_A = np.array([
+    LEFT_SHOULDER, LEFT_HIP, LEFT_ANKLE, LEFT_SHOULDER,
+    LEFT_SHOULDER, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE,
+])
+_SEGMENT_B = np.array([
+    RIGHT_SHOULDER, RIGHT_HIP, LEFT_HIP, LEFT_WRIST,
+    LEFT_ELBOW, LEFT_WRIST, LEFT_KNEE, LEFT_ANKLE,
+])
+# Side-view depth pairs (z only): shoulders, hips
+_DEPTH_A = np.array([LEFT_SHOULDER, LEFT_HIP])
+_DEPTH_B = np.array([RIGHT_SHOULDER, RIGHT_HIP])
+
+# Key landmarks used for pose-quality accuracy heuristics
+KEY_LANDMARKS = np.array([11, 12, 23, 24, 25, 26, 27, 28])
+
+
+def landmarks_to_array(landmarks: MediaPipeLandmarks) -> np.ndarray:
+    """
+    Pack a landmark set into a ``(33, 4)`` float array.
+
+    The compact encodings (``points`` and ``points_f32``) are converted in
+    one NumPy call; only the verbose encoding is walked landmark by landmark.
+
+    Args:
+        landmarks: MediaPipe landmarks for a single photo
+
+    Returns:
+        Array of ``[x, y, z, visibility]`` rows in landmark index order
+    """
+    packed = landmarks.packed_points
+    if packed is not None:
+        return np.frombuffer(packed, dtype="<f4").astype(np.float64).reshape(-1, 4)
+    if landmarks.points is not None:
+        return np.array(landmarks.points, dtype=np.float64).reshape(-1, 4)
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmarks],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+
+
+def image_dims(landmarks: MediaPipeLandmarks) -> np.ndarray:
+    """Return ``[image_width, image_height]`` for a landmark set."""
+    return np.array([landmarks.image_width, landmarks.image_height], dtype=np.float64)
+
+
+def stack_sessions(
+    sessions: Sequence[Tuple[MediaPipeLandmarks, MediaPipeLandmarks]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack front/side landmark pairs into batch tensors.
+
+    Args:
+        sessions: ``(front, side)`` landmark pairs, each with 33 landmarks
+
+    Returns:
+        Tuple of landmarks ``(N, 2, 33, 4)`` and image dims ``(N, 2, 2)``
+    """
+    points = np.empty((len(sessions), 2, NUM_LANDMARKS, 4), dtype=np.float64)
+    dims = np.empty((len(sessions), 2, 2), dtype=np.float64)
+    for i, (front, side) in enumerate(sessions):
+        points[i, 0] = landmarks_to_array(front)
+        points[i, 1] = landmarks_to_array(side)
+        dims[i, 0] = image_dims(front)
+        dims[i, 1] = image_dims(side)
+    return points, dims
+
+
+def _denormalize(points: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    """Scale normalized x/y/z to pixels (z shares the width scale)."""
+    width = dims[..., 0, None]
+    height = dims[..., 1, None]
+    scale = np.stack([width, height, width], axis=-1)
+    return points[..., :3] * scale
+
+
+def compute_measurement_matrix(
+    front: np.ndarray,
+    side: np.ndarray,
+    front_dims: np.ndarray,
+    side_dims: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculate anthropometric measurements for one or many sessions.
+
+    Args:
+        front: Front-view landmarks, shape ``(..., 33, 4)``
+        side: Side-view landmarks, shape ``(..., 33, 4)``
+        front_dims: Front image ``[width, height]``, shape ``(..., 2)``
+        side_dims: Side image ``[width, height]``, shape ``(..., 2)``
+
+    Returns:
+        Measurements in centimeters, shape ``(..., len(MEASUREMENT_FIELDS))``
+    """
+    front_px = _denormalize(np.asarray(front, dtype=np.float64), np.asarray(front_dims, dtype=np.float64))
+    side_px = _denormalize(np.asarray(side, dtype=np.float64), np.asarray(side_dims, dtype=np.float64))
+
+    fy = front_px[..., 1]
+    ankle_y = (fy[..., LEFT_ANKLE] + fy[..., RIGHT_ANKLE]) / 2
+    waist_y = (
+        fy[..., LEFT_SHOULDER] + fy[..., RIGHT_SHOULDER] + fy[..., LEFT_HIP] + fy[..., RIGHT_HIP]
+    ) / 4
+    height_px = np.abs(ankle_y - fy[..., NOSE])
+
+    # Reference-height scaling; degenerate poses fall back to 1 px/cm
+    px_per_cm = np.where(height_px > 0, height_px / REFERENCE_HEIGHT_CM, 1.0)
+
+    segments = front_px[..., _SEGMENT_A, :] - front_px[..., _SEGMENT_B, :]
+    lengths = np.sqrt(np.sum(segments * segments, axis=-1)) / px_per_cm[..., None]
+    shoulder, hip_w, inseam, sleeve, upper_arm, forearm_len, thigh_len, calf_len = np.moveaxis(
+        lengths, -1, 0
+    )
+
+    depths_px = np.abs(side_px[..., _DEPTH_A, 2] - side_px[..., _DEPTH_B, 2])
+    chest_depth_px = depths_px[..., 0]
+    hip_depth_px = depths_px[..., 1]
+    waist_depth_px = hip_depth_px * 0.8
+
+    # Chest: widened shoulder span, side depth floored at half the width
+    chest_w = shoulder * 1.05
+    chest_d = np.where(chest_depth_px > 0, chest_depth_px / px_per_cm, shoulder * 0.5)
+    chest_d = np.maximum(chest_d, chest_w * 0.5)
+    chest = np.pi * (chest_w + chest_d) / 2
+
+    waist_w = hip_w * 0.85
+    waist_d = np.where(waist_depth_px > 0, waist_depth_px / px_per_cm, waist_w * 0.5)
+    waist = np.pi * (waist_w + waist_d) / 2
+
+    hip_d = np.where(hip_depth_px > 0, hip_depth_px / px_per_cm, hip_w * 0.55)
+    hip = np.pi * (hip_w + hip_d) / 2
+
+    thigh = thigh_len * 1.3
+    calf = calf_len * 0.9
+    front_rise = np.abs(waist_y - fy[..., LEFT_HIP]) / px_per_cm
+
+    return np.stack(
+        [
+            height_px / px_per_cm,
+            shoulder * 0.4,
+            shoulder,
+            chest,
+            (chest + waist) / 2 * 0.95,
+            waist,
+            sleeve,
+            upper_arm * 0.9,
+            forearm_len * 0.85,
+            hip,
+            thigh,
+            thigh * 0.7,
+            calf,
+            calf * 0.65,
+            front_rise,
+            front_rise * 1.2,
+            inseam,
+            np.abs(ankle_y - waist_y) / px_per_cm,
+        ],
+        axis=-1,
+    )
+
+
+def measurement_dict(row: np.ndarray) -> Dict[str, float]:
+    """Convert one row of ``compute_measurement_matrix`` into a named dict."""
+    return dict(zip(MEASUREMENT_FIELDS, row.tolist()))
+
+
+# Measurement formulas by model version. Live requests use ``MODEL_VERSION``;
+# the landmark replay re-scores stored sessions with any registered version.
+FORMULAS: Dict[str, Callable[..., np.ndarray]] = {
+    MODEL_VERSION: compute_measurement_matrix,
+}
+
+
+def get_formula(version: str) -> Callable[..., np.ndarray]:
+    """
+    Look up a registered measurement formula.
+
+    Args:
+        version: Model version, e.g. ``MODEL_VERSION``
+
+    Returns:
+        Function with the signature of ``compute_measurement_matrix``
+
+    Raises:
+        ValueError: If no formula is registered for ``version``
+    """
+    try:
+        return FORMULAS[version]
+    except KeyError:
+        raise ValueError(
+            f"Unknown formula version: {version} (registered: {', '.join(sorted(FORMULAS))})"
+        ) from None
+
+
+def estimate_accuracy_array(front: np.ndarray, side: np.ndarray) -> np.ndarray:
+    """
+    Visibility-based accuracy estimate for one or many sessions.
+
+    Mirrors ``estimate_accuracy`` in ``app.core.validation``.
+
+    Args:
+        front: Front-view landmarks, shape ``(..., 33, 4)``
+        side: Side-view landmarks, shape ``(..., 33, 4)``
+
+    Returns:
+        Accuracy estimates on a 0-1 scale, shape ``(...)``
+    """
+    front_vis = np.asarray(front, dtype=np.float64)[..., 3]
+    side_vis = np.asarray(side, dtype=np.float64)[..., 3]
+    avg_visibility = (front_vis.sum(axis=-1) + side_vis.sum(axis=-1)) / (
+        front_vis.shape[-1] + side_vis.shape[-1]
+    )
+    key_visibility = (
+        front_vis[..., KEY_LANDMARKS].mean(axis=-1) + side_vis[..., KEY_LANDMARKS].mean(axis=-1)
+    ) / 2
+
+    return np.select(
+        [
+            (avg_visibility > 0.85) & (key_visibility > 0.9),
+            (avg_visibility > 0.7) & (key_visibility > 0.75),
+            (avg_visibility > 0.5) & (key_visibility > 0.6),
+        ],
+        [0.95, 0.90, 0.85],
+        default=0.80,
+    )
@@ -9,10 +9,21 @@ from __future__ import annotations
 
 import math
 import uuid
-from typing import Dict
+from typing import Any, Dict, List, Sequence, Union
 
+import numpy as np
 from fastapi import HTTPException
+from pydantic import ValidationError
 
+from app.core.landmark_engine import (
+    NUM_LANDMARKS,
+    compute_measurement_matrix,
+    estimate_accuracy_array,
+    image_dims,
+    landmarks_to_array,
+    measurement_dict,
+    stack_sessions,
+)
 from app.schemas.errors import ErrorDetail, ErrorResponse
 from app.schemas.measure_schema import (
     MeasurementInput,
@@ -20,6 +31,8 @@ from app.schemas.measure_schema import (
     MediaPipeLandmarks,
     Unit,
 )
+from app.services.landmark_store import LandmarkRecord, landmark_writer
+from app.services.measurement_cache import landmark_digest, measurement_cache
 
 
 CANONICAL_FIELDS = {
@@ -59,6 +72,15 @@ ALLOWED_META_FIELDS = {
     "device_id",
 }
 
+# Parts of a landmark-derived result kept in the measurement cache
+CACHED_RESULT_FIELDS = {
+    "session_id",
+    "measurements",
+    "accuracy",
+    "front_landmarks_id",
+    "side_landmarks_id",
+}
+
 
 def inches_to_cm(inches: float) -> float:
     """Convert inches to centimeters."""
@@ -91,7 +113,8 @@ def calculate_measurements_from_landmarks(
     
     This function implements geometric equations to estimate body measurements
     from 3D landmark coordinates. The equations are based on anthropometric
-    research and MediaPipe Pose Landmarker v3.1 (33 landmarks).
+    research and MediaPipe Pose Landmarker v3.1 (33 landmarks). The math runs
+    in ``app.core.landmark_engine`` over packed ``(33, 4)`` arrays.
     
     MediaPipe Pose Landmarks (indices 0-32):
     - 0: nose, 11-12: shoulders, 13-14: elbows, 15-16: wrists
@@ -104,197 +127,12 @@ def calculate_measurements_from_landmarks(
     Returns:
         Dictionary of measurement names to values in centimeters
     """
-    # Convert landmarks to list of dicts for easier access
-    front_pts = [{'x': lm.x, 'y': lm.y, 'z': lm.z, 'visibility': lm.visibility} 
-                 for lm in front_landmarks.landmarks]
-    side_pts = [{'x': lm.x, 'y': lm.y, 'z': lm.z, 'visibility': lm.visibility} 
-                for lm in side_landmarks.landmarks]
-    
-    # MediaPipe coordinates are normalized (0-1 range)
-    # We need to scale them to real-world measurements
-    # Using image dimensions to get pixel-based distances, then scale to cm
-    
-    # Get image dimensions for scaling
-    img_height_front = front_landmarks.image_height
-    img_width_front = front_landmarks.image_width
-    img_height_side = side_landmarks.image_height
-    img_width_side = side_landmarks.image_width
-    
-    # Calculate pixel-based distances by denormalizing coordinates
-    def denormalize_point(pt: Dict[str, float], img_width: int, img_height: int) -> Dict[str, float]:
-        """Convert normalized coordinates to pixel coordinates."""
-        return {
-            'x': pt['x'] * img_width,
-            'y': pt['y'] * img_height,
-            'z': pt['z'] * img_width,  # z is in same scale as width
-            'visibility': pt['visibility']
-        }
-    
-    # Denormalize all points
-    front_px = [denormalize_point(pt, img_width_front, img_height_front) for pt in front_pts]
-    side_px = [denormalize_point(pt, img_width_side, img_height_side) for pt in side_pts]
-    
-    # --- HEIGHT CALCULATION ---
-    # Height: Distance from ankle to top of head (nose is proxy for head top)
-    # Use average of left and right ankle
-    left_ankle = front_px[27]
-    right_ankle = front_px[28]
-    nose = front_px[0]
-    
-    ankle_y = (left_ankle['y'] + right_ankle['y']) / 2
-    head_y = nose['y']
-    height_pixels = abs(ankle_y - head_y)
-    
-    # Assume average person height is 170cm and use this as scaling factor
-    # This will be refined with user-provided height or calibration data
-    REFERENCE_HEIGHT_CM = 170.0
-    pixels_per_cm = height_pixels / REFERENCE_HEIGHT_CM if height_pixels > 0 else 1.0
-    
-    # --- SHOULDER WIDTH ---
-    left_shoulder = front_px[11]
-    right_shoulder = front_px[12]
-    shoulder_width_px = calculate_distance(left_shoulder, right_shoulder)
-    shoulder_width_cm = shoulder_width_px / pixels_per_cm
-    
-    # --- CHEST MEASUREMENT ---
-    # Chest circumference estimate: Use shoulder width from front + depth from side
-    # Simplified approach: chest_circumference ≈ π * average_diameter
-    left_shoulder_side = side_px[11]
-    right_shoulder_side = side_px[12]
-    chest_depth_px = abs(left_shoulder_side['z'] - right_shoulder_side['z'])
-    chest_depth_cm = chest_depth_px / pixels_per_cm if chest_depth_px > 0 else shoulder_width_cm * 0.5
-    
-    # Chest is typically at shoulder level, use shoulder measurements as proxy
-    chest_width_cm = shoulder_width_cm * 1.05  # Chest is slightly wider than shoulders
-    chest_depth_cm = max(chest_depth_cm, chest_width_cm * 0.5)  # Ensure reasonable depth
-    
-    # Simplified circumference: average of width and depth * π
-    chest_cm = math.pi * (chest_width_cm + chest_depth_cm) / 2
-    
-    # --- WAIST MEASUREMENT ---
-    # Waist is approximately midway between shoulders and hips
-    left_hip = front_px[23]
-    right_hip = front_px[24]
-    
-    waist_y = (left_shoulder['y'] + right_shoulder['y'] + left_hip['y'] + right_hip['y']) / 4
-    waist_width_px = calculate_distance(left_hip, right_hip) * 0.85  # Waist is narrower than hips
-    waist_width_cm = waist_width_px / pixels_per_cm
-    
-    # Get waist depth from side view
-    left_hip_side = side_px[23]
-    right_hip_side = side_px[24]
-    waist_depth_px = abs(left_hip_side['z'] - right_hip_side['z']) * 0.8
-    waist_depth_cm = waist_depth_px / pixels_per_cm if waist_depth_px > 0 else waist_width_cm * 0.5
-    
-    # Simplified circumference
-    waist_cm = math.pi * (waist_width_cm + waist_depth_cm) / 2
-    
-    # --- HIP MEASUREMENT ---
-    hip_width_px = calculate_distance(left_hip, right_hip)
-    hip_width_cm = hip_width_px / pixels_per_cm
-    
-    hip_depth_px = abs(left_hip_side['z'] - right_hip_side['z'])
-    hip_depth_cm = hip_depth_px / pixels_per_cm if hip_depth_px > 0 else hip_width_cm * 0.55
-    
-    # Simplified circumference
-    hip_cm = math.pi * (hip_width_cm + hip_depth_cm) / 2
-    
-    # --- INSEAM ---
-    # Distance from ankle to hip (crotch level)
-    left_ankle_front = front_px[27]
-    left_hip_front = front_px[23]
-    inseam_px = calculate_distance(left_ankle_front, left_hip_front)
-    inseam_cm = inseam_px / pixels_per_cm
-    
-    # --- OUTSEAM ---
-    # Distance from ankle to waist level
-    outseam_px = abs(ankle_y - waist_y)
-    outseam_cm = outseam_px / pixels_per_cm
-    
-    # --- SLEEVE LENGTH ---
-    # Distance from shoulder to wrist
-    left_wrist = front_px[15]
-    sleeve_px = calculate_distance(left_shoulder, left_wrist)
-    sleeve_cm = sleeve_px / pixels_per_cm
-    
-    # --- BICEP ---
-    # Distance from shoulder to elbow
-    left_elbow = front_px[13]
-    bicep_length_px = calculate_distance(left_shoulder, left_elbow)
-    bicep_length_cm = bicep_length_px / pixels_per_cm
-    # Bicep circumference is estimated from upper arm length
-    # Typical ratio: bicep_circumference ≈ 0.9 * upper_arm_length
-    bicep_cm = bicep_length_cm * 0.9
-    
-    # --- FOREARM ---
-    # Distance from elbow to wrist
-    forearm_length_px = calculate_distance(left_elbow, left_wrist)
-    forearm_length_cm = forearm_length_px / pixels_per_cm
-    # Forearm circumference is estimated from forearm length
-    # Typical ratio: forearm_circumference ≈ 0.85 * forearm_length
-    forearm_cm = forearm_length_cm * 0.85
-    
-    # --- THIGH ---
-    # Distance from hip to knee
-    left_knee = front_px[25]
-    thigh_length_px = calculate_distance(left_hip_front, left_knee)
-    thigh_length_cm = thigh_length_px / pixels_per_cm
-    # Thigh circumference is estimated from thigh length
-    # Typical ratio: thigh_circumference ≈ 1.3 * thigh_length
-    thigh_cm = thigh_length_cm * 1.3
-    
-    # --- KNEE ---
-    # Knee circumference estimated from thigh and calf
-    knee_cm = thigh_cm * 0.7  # Knee is ~70% of thigh circumference
-    
-    # --- CALF ---
-    # Distance from knee to ankle
-    calf_length_px = calculate_distance(left_knee, left_ankle_front)
-    calf_length_cm = calf_length_px / pixels_per_cm
-    # Calf circumference is estimated from calf length
-    # Typical ratio: calf_circumference ≈ 0.9 * calf_length
-    calf_cm = calf_length_cm * 0.9
-    
-    # --- ANKLE ---
-    # Ankle circumference estimated as smaller than calf
-    ankle_cm = calf_cm * 0.65  # Ankle is ~65% of calf circumference
-    
-    # --- NECK ---
-    # Neck is estimated from shoulder width
-    neck_cm = shoulder_width_cm * 0.4  # Neck is ~40% of shoulder width
-    
-    # --- UNDERBUST ---
-    # Underbust is between chest and waist
-    underbust_cm = (chest_cm + waist_cm) / 2 * 0.95
-    
-    # --- FRONT RISE & BACK RISE ---
-    # Rise measurements from hip to waist
-    front_rise_cm = abs(waist_y - left_hip['y']) / pixels_per_cm
-    back_rise_cm = front_rise_cm * 1.2  # Back rise is typically longer
-    
-    # Return all measurements in centimeters
-    measurements = {
-        "height_cm": height_pixels / pixels_per_cm,
-        "neck_cm": neck_cm,
-        "shoulder_cm": shoulder_width_cm,
-        "chest_cm": chest_cm,
-        "underbust_cm": underbust_cm,
-        "waist_natural_cm": waist_cm,
-        "sleeve_cm": sleeve_cm,
-        "bicep_cm": bicep_cm,
-        "forearm_cm": forearm_cm,
-        "hip_low_cm": hip_cm,
-        "thigh_cm": thigh_cm,
-        "knee_cm": knee_cm,
-        "calf_cm": calf_cm,
-        "ankle_cm": ankle_cm,
-        "front_rise_cm": front_rise_cm,
-        "back_rise_cm": back_rise_cm,
-        "inseam_cm": inseam_cm,
-        "outseam_cm": outseam_cm,
-    }
-    
-    return measurements
+    front = landmarks_to_array(front_landmarks)
+    side = landmarks_to_array(side_landmarks)
+    row = compute_measurement_matrix(
+        front, side, image_dims(front_landmarks), image_dims(side_landmarks)
+    )
+    return measurement_dict(row)
 
 
 def estimate_accuracy(
@@ -307,28 +145,12 @@ def estimate_accuracy(
 
     Uses visibility heuristics and pose quality checks.
     """
-    front_scores = [lm.visibility for lm in front_landmarks.landmarks]
-    side_scores = [lm.visibility for lm in side_landmarks.landmarks]
-    avg_visibility = (sum(front_scores) + sum(side_scores)) / (
-        len(front_scores) + len(side_scores)
+    return float(
+        estimate_accuracy_array(
+            landmarks_to_array(front_landmarks), landmarks_to_array(side_landmarks)
+        )
     )
 
-    # Check key landmarks visibility (shoulders, hips, knees, ankles)
-    key_indices = [11, 12, 23, 24, 25, 26, 27, 28]
-    key_visibility_front = sum(front_landmarks.landmarks[i].visibility for i in key_indices) / len(key_indices)
-    key_visibility_side = sum(side_landmarks.landmarks[i].visibility for i in key_indices) / len(key_indices)
-    key_visibility_avg = (key_visibility_front + key_visibility_side) / 2
-
-    # Accuracy estimation based on visibility
-    if avg_visibility > 0.85 and key_visibility_avg > 0.9:
-        return 0.95
-    elif avg_visibility > 0.7 and key_visibility_avg > 0.75:
-        return 0.90
-    elif avg_visibility > 0.5 and key_visibility_avg > 0.6:
-        return 0.85
-    else:
-        return 0.80
-
 
 def normalize_and_validate(
     input_data: MeasurementInput, raw_payload: Dict | None = None
@@ -378,6 +200,7 @@ def normalize_and_validate(
             status_code=422,
             detail=ErrorResponse(
                 type="validation_error",
+                code="unknown_field",
                 message="Invalid measurement field names",
                 errors=errors,
             ).model_dump(),
@@ -385,46 +208,247 @@ def normalize_and_validate(
     
     # Calculate measurements from MediaPipe landmarks if available
     if input_data.front_landmarks and input_data.side_landmarks:
-        measurements = calculate_measurements_from_landmarks(
-            input_data.front_landmarks,
-            input_data.side_landmarks
+        # Pack each view once and share the arrays between math and accuracy
+        front = landmarks_to_array(input_data.front_landmarks)
+        side = landmarks_to_array(input_data.side_landmarks)
+        front_dims = image_dims(input_data.front_landmarks)
+        side_dims = image_dims(input_data.side_landmarks)
+        digest = landmark_digest(front, side, front_dims, side_dims)
+        cached = measurement_cache.get(digest, input_data.platform)
+        if cached is not None:
+            return _cached_normalized(input_data, cached, front, side)
+
+        measurements = measurement_dict(
+            compute_measurement_matrix(front, side, front_dims, side_dims)
         )
-        source = "mediapipe"
-        accuracy = estimate_accuracy(
-            measurements, input_data.front_landmarks, input_data.side_landmarks
+        return _cache_result(
+            digest,
+            _mediapipe_normalized(
+                input_data, measurements, float(estimate_accuracy_array(front, side)), front, side
+            ),
         )
-        
-        # Store landmarks for provenance
-        front_landmarks_id = str(uuid.uuid4())
-        side_landmarks_id = str(uuid.uuid4())
-        # TODO: Store landmarks in database
-        
-    else:
-        # Use user-provided measurements and convert to cm
-        unit = input_data.unit or Unit.CM
-        measurements = {}
-        
-        for field in CANONICAL_FIELDS:
-            value = getattr(input_data, field, None)
-            if value is not None:
-                if unit == Unit.IN:
-                    measurements[f"{field}_cm"] = inches_to_cm(value)
-                else:
-                    measurements[f"{field}_cm"] = value
-        
-        source = "user_input"
-        accuracy = 1.0  # Assume user input is accurate
-        front_landmarks_id = None
-        side_landmarks_id = None
-    
-    # Create normalized measurement object
+
+    # Use user-provided measurements and convert to cm
+    unit = input_data.unit or Unit.CM
+    measurements = {}
+
+    for field in CANONICAL_FIELDS:
+        value = getattr(input_data, field, None)
+        if value is not None:
+            if unit == Unit.IN:
+                measurements[f"{field}_cm"] = inches_to_cm(value)
+            else:
+                measurements[f"{field}_cm"] = value
+
     return MeasurementNormalized(
         session_id=input_data.session_id or str(uuid.uuid4()),
         measurements=measurements,
-        source=source,
+        source="user_input",
+        accuracy=1.0,  # Assume user input is accurate
+        front_photo_url=input_data.front_photo_url,
+        side_photo_url=input_data.side_photo_url,
+    )
+
+
+def _mediapipe_normalized(
+    input_data: MeasurementInput,
+    measurements: Dict[str, float],
+    accuracy: float,
+    front: np.ndarray,
+    side: np.ndarray,
+) -> MeasurementNormalized:
+    """
+    Build the normalized result for a landmark-derived session and queue
+    its landmarks for provenance storage (written off the request path).
+    """
+    session_id = input_data.session_id or str(uuid.uuid4())
+    front_landmarks_id = str(uuid.uuid4())
+    side_landmarks_id = str(uuid.uuid4())
+    landmark_writer.submit([
+        _landmark_record(input_data, session_id, landmarks_id, view, points, landmarks)
+        for landmarks_id, view, points, landmarks in (
+            (front_landmarks_id, "front", front, input_data.front_landmarks),
+            (side_landmarks_id, "side", side, input_data.side_landmarks),
+        )
+    ])
+
+    return MeasurementNormalized(
+        session_id=session_id,
+        measurements=measurements,
+        source="mediapipe",
         accuracy=accuracy,
         front_photo_url=input_data.front_photo_url,
         side_photo_url=input_data.side_photo_url,
         front_landmarks_id=front_landmarks_id,
         side_landmarks_id=side_landmarks_id,
     )
+
+
+def _cached_normalized(
+    input_data: MeasurementInput,
+    cached: Dict[str, Any],
+    front: np.ndarray,
+    side: np.ndarray,
+) -> MeasurementNormalized:
+    """
+    Build the result for a session whose landmarks are cached.
+
+    A retry (the same ``session_id`` as the cached result) gets the original
+    response back, since its landmarks are already stored. Any other request
+    with identical landmarks, including one without a ``session_id``, only
+    reuses the measurements and gets new ids, a new session and its own
+    provenance records.
+    """
+    if input_data.session_id is not None and input_data.session_id == cached["session_id"]:
+        return MeasurementNormalized(
+            **cached,
+            source="mediapipe",
+            front_photo_url=input_data.front_photo_url,
+            side_photo_url=input_data.side_photo_url,
+        )
+    return _mediapipe_normalized(
+        input_data, cached["measurements"], cached["accuracy"], front, side
+    )
+
+
+def _cache_result(digest: str, result: MeasurementNormalized) -> MeasurementNormalized:
+    """Cache a landmark-derived result under its payload digest."""
+    measurement_cache.set(digest, result.model_dump(include=CACHED_RESULT_FIELDS))
+    return result
+
+
+def _landmark_record(
+    input_data: MeasurementInput,
+    session_id: str,
+    landmarks_id: str,
+    view: str,
+    points: np.ndarray,
+    landmarks: MediaPipeLandmarks,
+) -> LandmarkRecord:
+    return LandmarkRecord(
+        id=landmarks_id,
+        session_id=session_id,
+        view=view,
+        points=points,
+        image_width=landmarks.image_width,
+        image_height=landmarks.image_height,
+        source_type=input_data.source_type,
+        platform=input_data.platform,
+        device_id=input_data.device_id,
+    )
+
+
+BatchResult = Union[MeasurementNormalized, ErrorResponse]
+
+
+def _schema_error(exc: ValidationError, session_id: str | None) -> ErrorResponse:
+    """Convert a Pydantic validation error into the API error envelope."""
+    return ErrorResponse(
+        type="validation_error",
+        code="schema",
+        message="Invalid measurement session",
+        errors=[
+            ErrorDetail(field=".".join(str(part) for part in err["loc"]), message=err["msg"])
+            for err in exc.errors()
+        ],
+        session_id=session_id,
+    )
+
+
+def normalize_and_validate_batch(
+    items: Sequence[Union[MeasurementInput, Dict[str, Any]]],
+) -> List[BatchResult]:
+    """
+    Normalize many measurement sessions in one pass.
+
+    Sessions carrying both front and side landmarks are stacked into an
+    ``(N, 2, 33, 4)`` tensor and evaluated with a single vectorized call.
+    Sessions without landmarks fall back to ``normalize_and_validate``.
+    A bad session never fails the batch; it yields an ``ErrorResponse`` in
+    its slot instead.
+
+    Args:
+        items: Measurement inputs, either parsed models or raw payload dicts
+
+    Returns:
+        One ``MeasurementNormalized`` or ``ErrorResponse`` per input, in order
+    """
+    results: List[BatchResult | None] = [None] * len(items)
+    landmark_slots: List[int] = []
+    landmark_inputs: List[MeasurementInput] = []
+
+    for index, item in enumerate(items):
+        raw_payload = item if isinstance(item, dict) else None
+        try:
+            input_data = (
+                item
+                if isinstance(item, MeasurementInput)
+                else MeasurementInput.model_validate(item)
+            )
+        except ValidationError as exc:
+            session_id = raw_payload.get("session_id") if raw_payload else None
+            results[index] = _schema_error(exc, session_id)
+            continue
+
+        if input_data.front_landmarks and input_data.side_landmarks:
+            views = {
+                "front_landmarks": input_data.front_landmarks,
+                "side_landmarks": input_data.side_landmarks,
+            }
+            counts = {view: landmarks.landmark_count for view, landmarks in views.items()}
+            bad_views = [view for view, count in counts.items() if count != NUM_LANDMARKS]
+            if bad_views:
+                results[index] = ErrorResponse(
+                    type="validation_error",
+                    code="schema",
+                    message="Invalid landmark count",
+                    errors=[
+                        ErrorDetail(
+                            field=f"{view}.{views[view].encoding}",
+                            message=f"Expected {NUM_LANDMARKS} landmarks, got {counts[view]}",
+                        )
+                        for view in bad_views
+                    ],
+                    session_id=input_data.session_id,
+                )
+                continue
+            landmark_slots.append(index)
+            landmark_inputs.append(input_data)
+            continue
+
+        try:
+            results[index] = normalize_and_validate(input_data, raw_payload)
+        except HTTPException as exc:
+            detail = {**exc.detail, "session_id": input_data.session_id}
+            results[index] = ErrorResponse(**detail)
+
+    if landmark_inputs:
+        points, dims = stack_sessions(
+            [(data.front_landmarks, data.side_landmarks) for data in landmark_inputs]
+        )
+        digests = [
+            landmark_digest(points[i, 0], points[i, 1], dims[i, 0], dims[i, 1])
+            for i in range(len(landmark_inputs))
+        ]
+        misses: List[int] = []
+        for i, (slot, input_data, digest) in enumerate(zip(landmark_slots, landmark_inputs, digests)):
+            cached = measurement_cache.get(digest, input_data.platform)
+            if cached is None:
+                misses.append(i)
+            else:
+                results[slot] = _cached_normalized(input_data, cached, points[i, 0], points[i, 1])
+
+        if misses:
+            front, side = points[misses, 0], points[misses, 1]
+            matrix = compute_measurement_matrix(front, side, dims[misses, 0], dims[misses, 1])
+            accuracy = estimate_accuracy_array(front, side).tolist()
+
+            for i, row, acc in zip(misses, matrix, accuracy):
+                results[landmark_slots[i]] = _cache_result(
+                    digests[i],
+                    _mediapipe_normalized(
+                        landmark_inputs[i], measurement_dict(row), acc, points[i, 0], points[i, 1]
+                    ),
+                )
+
+    return results
@@ -10,6 +10,8 @@ This FastAPI application provides a unified platform combining:
 Designed for AI systems, online retailers, and direct-to-consumer commerce.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -19,6 +21,40 @@ from app.routers.cart import router as cart_router
 from app.routers.orders import router as orders_router
 from app.routers.brands import router as brands_router
 from app.routers.referrals import router as referrals_router
+from app.services.fit_data import fit_data_cache
+from app.services.catalog_jobs import CatalogImportPool, get_catalog_jobs
+from app.services.landmark_store import landmark_writer
+from app.services.measurement_cache import measurement_cache
+from app.services.recommend_batcher import recommend_batcher
+from app.services.recommendation_store import recommendation_writer
+from app.core.config import settings
+from app.core.database import close_supabase, get_supabase
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Run catalog import workers and the landmark provenance and size
+    recommendation writers, and release pooled connections on shutdown.
+    """
+    import_pool = None
+    if settings.catalog_import_workers > 0:
+        import_pool = CatalogImportPool(
+            get_catalog_jobs(), get_supabase, concurrency=settings.catalog_import_workers
+        )
+        await import_pool.start()
+    if settings.landmark_writer_enabled:
+        await landmark_writer.start()
+    if settings.recommendation_writer_enabled:
+        await recommendation_writer.start()
+    yield
+    if import_pool is not None:
+        await import_pool.stop()
+    if landmark_writer.running:
+        await landmark_writer.stop()
+    if recommendation_writer.running:
+        await recommendation_writer.stop()
+    await close_supabase()
 
 
 app = FastAPI(
@@ -36,6 +72,7 @@ app = FastAPI(
     license_info={
         "name": "Proprietary",
     },
+    lifespan=lifespan,
 )
 
 # CORS middleware for cross-origin requests
@@ -83,7 +120,14 @@ def health():
         "database": "connected",  # TODO: Add actual DB health check
         "mediapipe": "available",
         "stripe": "configured",  # TODO: Add actual Stripe health check
-        "version": "2.0.0-unified"
+        "version": "2.0.0-unified",
+        "caches": {
+            "fit_data": fit_data_cache.stats(),
+            "measurements": measurement_cache.stats(),
+        },
+        "landmark_writer": landmark_writer.stats(),
+        "recommend_batcher": recommend_batcher.stats(),
+        "recommendation_writer": recommendation_writer.stats(),
     }
 
 
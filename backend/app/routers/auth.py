@@ -8,21 +8,19 @@ Complete implementation with auth service integration.
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from supabase import create_client
+from supabase import AsyncClient
 
 from app.services.auth_service import AuthService
 from app.middleware.auth import get_current_user
-from app.core.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from app.core.database import get_supabase
 
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
-# Initialize Supabase client
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-
-# Initialize auth service
-auth_service = AuthService(supabase)
+async def get_auth_service(db: AsyncClient = Depends(get_supabase)) -> AuthService:
+    """Provide an AuthService bound to the shared async Supabase client."""
+    return AuthService(db)
 
 
 # Request/Response Models
@@ -53,7 +51,10 @@ class TokenResponse(BaseModel):
 
 
 @router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-async def signup(request: SignupRequest):
+async def signup(
+    request: SignupRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Register a new user.
 
@@ -81,7 +82,10 @@ async def signup(request: SignupRequest):
 
 
 @router.post("/signin", response_model=AuthResponse)
-async def signin(request: SigninRequest):
+async def signin(
+    request: SigninRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Sign in a user.
 
@@ -108,7 +112,10 @@ async def signin(request: SigninRequest):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(request: RefreshTokenRequest):
+async def refresh_token(
+    request: RefreshTokenRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Refresh access token using refresh token.
 
@@ -132,7 +139,10 @@ async def refresh_token(request: RefreshTokenRequest):
 
 
 @router.post("/signout", status_code=status.HTTP_204_NO_CONTENT)
-async def signout(request: RefreshTokenRequest):
+async def signout(
+    request: RefreshTokenRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Sign out a user by revoking refresh token.
 
@@ -146,7 +156,10 @@ async def signout(request: RefreshTokenRequest):
 
 
 @router.get("/me")
-async def get_current_user_info(user_id: str = Depends(get_current_user)):
+async def get_current_user_info(
+    user_id: str = Depends(get_current_user),
+    supabase: AsyncClient = Depends(get_supabase)
+):
     """
     Get current authenticated user information.
 
@@ -159,7 +172,7 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
     Raises:
         HTTPException: If user not found
     """
-    user_response = supabase.table("users")\
+    user_response = await supabase.table("users")\
         .select("id, email, name, role, created_at")\
         .eq("id", user_id)\
         .single()\
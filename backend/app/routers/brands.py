@@ -5,12 +5,14 @@ Adapted from fittwindev/fittwin brand.service.ts
 Provides B2B features for brand partners.
 """
 
+import asyncio
 from typing import List, Dict, Any
-from fastapi import APIRouter, Header, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, Header, HTTPException, status, UploadFile, File
 from pydantic import BaseModel, Field
 
 from app.core.config import settings
 from app.schemas.errors import ErrorResponse
+from app.services.catalog_jobs import CatalogJobQueue, get_catalog_jobs
 
 router = APIRouter(prefix="/brands", tags=["brands"])
 
@@ -168,34 +170,66 @@ async def create_product(
 async def upload_catalog(
     brand_id: str,
     file: UploadFile = File(..., description="CSV file with product catalog"),
-    x_api_key: str = Header(..., description="API key for authentication")
+    x_api_key: str = Header(..., description="API key for authentication"),
+    jobs: CatalogJobQueue = Depends(get_catalog_jobs)
 ):
     """
     Upload product catalog via CSV.
     
-    Validates schema and queues import job.
+    Spools the file to disk and queues a background import job. Poll
+    ``GET /brands/{brand_id}/catalog/jobs/{job_id}`` for progress.
     """
     if x_api_key != settings.api_key:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ErrorResponse(
-                error={"code": "UNAUTHORIZED", "message": "Invalid API key"}
+                type="authentication_error", code="UNAUTHORIZED", message="Invalid API key"
             ).dict()
         )
     
-    # TODO: Implement actual catalog upload
-    # 1. Verify brand exists and user has access
-    # 2. Validate CSV schema
-    # 3. Queue import job
-    # 4. Return job ID for status tracking
+    job = await jobs.submit(brand_id, file)
     
     return {
-        "job_id": "import-job-789",
-        "status": "queued",
+        "job_id": job.job_id,
+        "status": job.status,
+        "size_bytes": job.size_bytes,
+        "status_url": f"/brands/{brand_id}/catalog/jobs/{job.job_id}",
         "message": "Catalog import queued for processing"
     }
 
 
+@router.get("/{brand_id}/catalog/jobs/{job_id}")
+async def get_catalog_job(
+    brand_id: str,
+    job_id: str,
+    x_api_key: str = Header(..., description="API key for authentication"),
+    jobs: CatalogJobQueue = Depends(get_catalog_jobs)
+):
+    """
+    Get catalog import job status.
+    
+    Reports rows processed, throughput, created records and per-row errors.
+    """
+    if x_api_key != settings.api_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ErrorResponse(
+                type="authentication_error", code="UNAUTHORIZED", message="Invalid API key"
+            ).dict()
+        )
+    
+    job = await asyncio.to_thread(jobs.store.get, job_id)
+    if job is None or job.brand_id != brand_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorResponse(
+                type="not_found_error", code="JOB_NOT_FOUND", message="Catalog import job not found"
+            ).dict()
+        )
+    
+    return job.to_dict()
+
+
 @router.get("/{brand_id}/analytics", response_model=AnalyticsResponse)
 async def get_brand_analytics(
     brand_id: str,
@@ -1,15 +1,29 @@
 """
 Measurements router for validation and recommendation endpoints.
 
-This module implements the two main DMaaS API endpoints:
+This module implements the main DMaaS API endpoints:
 - /measurements/validate: Validate and normalize measurement input
+- /measurements/validate:batch: Validate many sessions in one vectorized pass
+- /measurements/stream: Validate and recommend for an NDJSON stream of sessions
 - /measurements/recommend: Generate size recommendations from normalized measurements
+- /measurements/shop: Best-fitting variants of every active catalog product
 """
 
 import os
 from dotenv import load_dotenv
-from typing import Optional
-from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from app.core.landmark_engine import MODEL_VERSION
+from app.core.validation import normalize_and_validate_batch
+from app.schemas.errors import ErrorResponse
+from app.schemas.measure_schema import MeasurementNormalized
+from app.services.catalog_fit import CatalogFitService, get_catalog_fit
+from app.services.fit_data import FitDataService, get_fit_data
+from app.services.fit_rules import RULES_VERSION, fit_rule_registry
+from app.services.measurement_stream import BodyReader, NDJSONStreamingResponse, stream_measurements
+from app.services.recommend_batcher import recommend_batcher
+from app.services.recommendation_store import recommendation_records, recommendation_writer
 
 # Load environment variables FIRST
 load_dotenv()
@@ -20,6 +34,13 @@ router = APIRouter(prefix="/measurements", tags=["measurements"])
 # Now load the API key
 VALID_API_KEY = os.getenv("API_KEY", "staging-secret-key")
 
+# Upper bound on sessions accepted by /validate:batch
+MAX_BATCH_SESSIONS = int(os.getenv("MEASUREMENT_BATCH_MAX", "5000"))
+
+# Sessions per vectorized pass and longest accepted line on /stream
+STREAM_CHUNK_SIZE = int(os.getenv("MEASUREMENT_STREAM_CHUNK_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("MEASUREMENT_STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+
 
 def verify_api_key(x_api_key: Optional[str] = Header(None)):
     """Verify API key for authentication."""
@@ -72,39 +93,132 @@ def validate_measurements(input_data: dict):
         )
 
 
+@router.post("/validate:batch", dependencies=[Depends(verify_api_key)])
+def validate_measurements_batch(payload: dict):
+    """
+    Validate and normalize many measurement sessions in one request.
+
+    Expects ``{"sessions": [MeasurementInput, ...]}``. Landmark sessions are
+    stacked and computed in a single vectorized pass. Each result carries its
+    input ``index``; invalid sessions return an error envelope in their slot
+    without failing the rest of the batch.
+    """
+    sessions = payload.get("sessions")
+    if not isinstance(sessions, list) or not sessions:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "type": "validation_error",
+                "code": "schema",
+                "message": "Request body must include a non-empty 'sessions' list",
+                "errors": [{"field": "sessions", "message": "Expected a non-empty list"}],
+            },
+        )
+    if len(sessions) > MAX_BATCH_SESSIONS:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "type": "validation_error",
+                "code": "batch_too_large",
+                "message": f"A batch may contain at most {MAX_BATCH_SESSIONS} sessions",
+                "errors": [{"field": "sessions", "message": f"Got {len(sessions)} sessions"}],
+            },
+        )
+
+    try:
+        results = normalize_and_validate_batch(sessions)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "type": "server_error",
+                "code": "internal",
+                "message": "An unexpected error occurred during batch validation",
+                "errors": [{"field": "", "message": str(e)}],
+            },
+        )
+
+    items = []
+    for index, result in enumerate(results):
+        if isinstance(result, ErrorResponse):
+            items.append({"index": index, "status": "error", "error": result.model_dump()})
+        else:
+            items.append({"index": index, "status": "validated", **result.model_dump()})
+
+    failed = sum(1 for item in items if item["status"] == "error")
+    return {
+        "results": items,
+        "summary": {
+            "total": len(items),
+            "validated": len(items) - failed,
+            "failed": failed,
+        },
+        "model_version": MODEL_VERSION,
+    }
+
+
+@router.post("/stream", dependencies=[Depends(verify_api_key)])
+async def stream_measurements_ndjson(request: Request, recommend: bool = True):
+    """
+    Validate an NDJSON body of measurement sessions and stream NDJSON back.
+
+    Each input line is one ``MeasurementInput``. Lines are validated in
+    chunks as the body arrives, and every chunk's results are streamed as
+    soon as it finishes. There is one result per line, in order, carrying its
+    0-based ``index`` and, with ``recommend``, fit-rule size recommendations.
+    A final ``summary`` line closes the stream. Memory use does not grow
+    with the body size. A record whose fit rules fail gets an error result.
+    """
+    # Start draining the body before the response takes over ``receive``
+    reader = BodyReader(request.stream())
+    return NDJSONStreamingResponse(
+        stream_measurements(
+            reader,
+            chunk_size=STREAM_CHUNK_SIZE,
+            max_line_bytes=STREAM_MAX_LINE_BYTES,
+            recommend=recommend,
+        ),
+        reader,
+    )
+
+
 @router.post("/recommend", dependencies=[Depends(verify_api_key)])
-def recommend_sizes(measurements: dict):
+async def recommend_sizes(
+    measurements: dict,
+    categories: Optional[List[str]] = Query(None),
+    brand_id: Optional[str] = None,
+    fit_data: FitDataService = Depends(get_fit_data),
+):
     """
     Generate size recommendations from normalized measurements.
-    
-    Returns recommendations with confidence scores, processed measurements,
-    and model version for API consumers.
+
+    Every requested category (all of tops, bottoms, dresses and outerwear by
+    default) is evaluated by the fit rule registry. With ``brand_id`` the
+    brand's size charts (cached by ``FitDataService``) replace the default
+    ladders for the categories the brand has charts for. Concurrent calls are
+    micro-batched: ``recommend_batcher`` scores every body that arrives
+    within a few milliseconds in one pass. Served recommendations are
+    recorded in ``size_recommendations`` in the background.
+
+    Returns recommendations with confidence scores, the requested categories
+    that lack measurements, processed measurements, and model version for
+    API consumers.
     """
     try:
-        # TODO: Import and use actual fit rules
-        # Placeholder implementation
-        recs = [
-            {
-                "category": "tops",
-                "size": "M",
-                "confidence": 0.9,
-                "rationale": "Based on chest and waist measurements"
+        charts = None
+        if brand_id:
+            charts = await fit_data.get_size_charts(brand_id, fit_rule_registry.resolve(categories))
+        result = await recommend_batcher.submit((measurements, categories, charts))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "type": "validation_error",
+                "code": "schema",
+                "message": str(e),
+                "errors": [{"field": "", "message": str(e)}],
             },
-            {
-                "category": "bottoms",
-                "size": "32",
-                "confidence": 0.85,
-                "rationale": "Based on waist and inseam measurements"
-            }
-        ]
-        
-        return {
-            "recommendations": recs,
-            "processed_measurements": measurements,
-            "model_version": "v1.0",
-            "session_id": measurements.get("session_id", "test-session")
-        }
-        
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -115,3 +229,50 @@ def recommend_sizes(measurements: dict):
                 "errors": [{"field": "", "message": str(e)}],
             },
         )
+
+    session_id = measurements.get("session_id")
+    recommendation_writer.submit(recommendation_records(session_id, result.recommendations))
+    return {
+        "recommendations": result.recommendations,
+        "unavailable_categories": result.unavailable,
+        "processed_measurements": measurements,
+        "model_version": RULES_VERSION,
+        "session_id": session_id or "test-session",
+    }
+
+
+@router.post("/shop", dependencies=[Depends(verify_api_key)])
+async def shop_your_size(
+    measurements: dict,
+    top_k: int = Query(1, ge=1, le=5),
+    in_stock_only: bool = True,
+    category: Optional[str] = None,
+    catalog_fit: CatalogFitService = Depends(get_catalog_fit),
+):
+    """
+    "Shop your size" feed across every active catalog product.
+
+    Takes the same normalized measurements as ``/recommend`` and returns,
+    best-fitting product first, the ``top_k`` variants of every product
+    whose size attributes are closest to the body.
+    """
+    session_id = measurements.get("session_id") or "test-session"
+    try:
+        feed = await catalog_fit.best_sizes(
+            MeasurementNormalized(session_id=session_id, measurements=measurements, source="user_input"),
+            top_k=top_k,
+            in_stock_only=in_stock_only,
+            category=category,
+        )
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "type": "validation_error",
+                "code": "schema",
+                "message": str(e),
+                "errors": [{"field": "", "message": str(e)}],
+            },
+        )
+
+    return {"products": feed, "session_id": session_id}
@@ -7,10 +7,12 @@ schema can serve both API responses and agent tooling.
 
 from __future__ import annotations
 
+import base64
+import binascii
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
 
 try:  # Pydantic v2 support
     from pydantic import ConfigDict  # type: ignore
@@ -34,14 +36,68 @@ class MediaPipeLandmark(BaseModel):
     visibility: float
 
 
-class MediaPipeLandmarks(BaseModel):
-    """Complete set of MediaPipe Pose landmarks."""
+# Accepted landmark encodings, verbose first
+LANDMARK_ENCODINGS = ("landmarks", "points", "points_f32")
+
+# Bytes per landmark in ``points_f32``: [x, y, z, visibility] as float32
+PACKED_LANDMARK_BYTES = 16
+
 
-    landmarks: List[MediaPipeLandmark]
+class MediaPipeLandmarks(BaseModel):
+    """
+    Complete set of MediaPipe Pose landmarks.
+
+    Exactly one encoding is sent: ``landmarks`` (one object per landmark),
+    ``points`` (flat ``[x, y, z, visibility, ...]`` floats) or ``points_f32``
+    (the same values as a base64 little-endian float32 buffer). The compact
+    encodings decode straight into NumPy without a model per landmark.
+    """
+
+    landmarks: Optional[List[MediaPipeLandmark]] = None
+    points: Optional[List[float]] = None
+    points_f32: Optional[str] = None
     timestamp: str
     image_width: int
     image_height: int
 
+    _packed: Optional[bytes] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _check_encoding(self) -> "MediaPipeLandmarks":
+        given = [name for name in LANDMARK_ENCODINGS if getattr(self, name) is not None]
+        if len(given) != 1:
+            raise ValueError("Provide exactly one of landmarks, points or points_f32")
+        if self.points is not None and len(self.points) % 4:
+            raise ValueError("points must hold 4 values (x, y, z, visibility) per landmark")
+        if self.points_f32 is not None:
+            try:
+                packed = base64.b64decode(self.points_f32, validate=True)
+            except binascii.Error:
+                raise ValueError("points_f32 must be base64-encoded") from None
+            if len(packed) % PACKED_LANDMARK_BYTES:
+                raise ValueError("points_f32 must hold 4 float32 values per landmark")
+            self._packed = packed
+        return self
+
+    @property
+    def encoding(self) -> str:
+        """Name of the field carrying the landmarks."""
+        return next(name for name in LANDMARK_ENCODINGS if getattr(self, name) is not None)
+
+    @property
+    def landmark_count(self) -> int:
+        """Number of landmarks sent, whatever the encoding."""
+        if self._packed is not None:
+            return len(self._packed) // PACKED_LANDMARK_BYTES
+        if self.points is not None:
+            return len(self.points) // 4
+        return len(self.landmarks)
+
+    @property
+    def packed_points(self) -> Optional[bytes]:
+        """Decoded ``points_f32`` buffer, if that encoding was sent."""
+        return self._packed
+
 
 class MeasurementInput(BaseModel):
     """Input schema for measurements with flexible units and MediaPipe data from all platforms."""
@@ -12,14 +12,14 @@ import secrets
 import jwt
 import httpx
 from passlib.context import CryptContext
-from supabase import Client
+from supabase import AsyncClient
 import os
 
 
 class AuthService:
     """Service for user authentication and security."""
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         """Initialize auth service."""
         self.db = supabase_client
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -49,7 +49,7 @@ class AuthService:
             ValueError: If email already exists or password is weak
         """
         # Check if user already exists
-        existing_user = self.db.table("users")\
+        existing_user = await self.db.table("users")\
             .select("id")\
             .eq("email", email)\
             .execute()
@@ -83,7 +83,7 @@ class AuthService:
             "role": "shopper"
         }
 
-        user_response = self.db.table("users")\
+        user_response = await self.db.table("users")\
             .insert(user_data)\
             .execute()
 
@@ -126,7 +126,7 @@ class AuthService:
             ValueError: If credentials are invalid
         """
         # Get user
-        user_response = self.db.table("users")\
+        user_response = await self.db.table("users")\
             .select("*")\
             .eq("email", email)\
             .execute()
@@ -197,7 +197,7 @@ class AuthService:
                 raise ValueError("Invalid token type")
 
             # Verify refresh token exists in database
-            token_response = self.db.table("refresh_tokens")\
+            token_response = await self.db.table("refresh_tokens")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .eq("token", refresh_token)\
@@ -237,7 +237,7 @@ class AuthService:
             user_id = payload.get("sub")
 
             # Revoke refresh token
-            self.db.table("refresh_tokens")\
+            await self.db.table("refresh_tokens")\
                 .update({"revoked": True})\
                 .eq("user_id", user_id)\
                 .eq("token", refresh_token)\
@@ -302,7 +302,7 @@ class AuthService:
     async def _store_refresh_token(self, user_id: str, token: str) -> None:
         """Store refresh token in database."""
         expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
-        self.db.table("refresh_tokens")\
+        await self.db.table("refresh_tokens")\
             .insert({
                 "user_id": user_id,
                 "token": token,
@@ -313,11 +313,11 @@ class AuthService:
 
     async def _increment_failed_attempts(self, user_id: str) -> None:
         """Increment failed login attempts."""
-        self.db.rpc("increment_failed_attempts", {"user_id": user_id}).execute()
+        await self.db.rpc("increment_failed_attempts", {"user_id": user_id}).execute()
 
     async def _reset_failed_attempts(self, user_id: str) -> None:
         """Reset failed login attempts."""
-        self.db.table("users")\
+        await self.db.table("users")\
             .update({"failed_attempts": 0})\
             .eq("id", user_id)\
             .execute()
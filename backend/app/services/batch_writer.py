@@ -0,0 +1,155 @@
+"""
+Batch Writer
+
+Best-effort background persistence off the request path. ``submit`` only
+appends to a bounded in-memory buffer (safe from any thread); a task on the
+event loop drains it in batches of ``batch_size`` at least every
+``flush_interval`` seconds. Records are dropped, and counted, when the buffer
+is full or a batch fails to write.
+"""
+
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from supabase import AsyncClient
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BatchWriter(ABC, Generic[T]):
+    """
+    Buffered, batching background writer.
+
+    Subclasses implement ``_write`` for one batch of records.
+    """
+
+    # Names the records in failure logs
+    label = "Record"
+
+    def __init__(
+        self,
+        db_provider: Callable[[], Awaitable[AsyncClient]],
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+    ):
+        """
+        Initialize the writer (records are accepted once ``start`` runs).
+
+        Args:
+            db_provider: Coroutine returning the Supabase client
+            batch_size: Records per bulk insert; a full batch flushes early
+            flush_interval: Longest time (seconds) a record waits to be written
+            max_pending: Buffered records kept before new ones are dropped
+        """
+        self.db_provider = db_provider
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._pending: Deque[T] = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    async def start(self) -> None:
+        """Start the background flush task on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write whatever is still buffered."""
+        task, self._task = self._task, None
+        if task is not None:
+            # Let an in-progress batch finish rather than cancelling it mid-write
+            self._wakeup.set()
+            await task
+        await self.flush()
+        self._loop = None
+
+    def submit(self, records: Sequence[T]) -> bool:
+        """
+        Queue records for writing. Safe to call from any thread; never blocks
+        on the database.
+
+        Returns:
+            False if any record was dropped (writer not running or buffer full)
+        """
+        loop = self._loop
+        if loop is None or self._task is None:
+            with self._lock:
+                self.dropped += len(records)
+            return False
+        with self._lock:
+            room = max(self.max_pending - len(self._pending), 0)
+            self._pending.extend(records[:room])
+            self.dropped += max(len(records) - room, 0)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        return len(records) <= room
+
+    async def flush(self) -> int:
+        """
+        Write every buffered record, a batch at a time.
+
+        Returns:
+            Records written
+        """
+        written = 0
+        while True:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                return written
+            try:
+                await self._write(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("%s batch of %d failed", self.label, len(batch))
+                continue
+            self.batches += 1
+            self.written += len(batch)
+            written += len(batch)
+
+    @abstractmethod
+    async def _write(self, batch: List[T]) -> None:
+        """Write one batch; raising counts every record in it as failed."""
+
+    async def _run(self) -> None:
+        while self._task is not None:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -4,17 +4,19 @@ Brand Service
 Handles brand onboarding, catalog management, and B2B portal operations.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Iterable, Union
 from datetime import datetime
-import csv
-import io
-from supabase import Client
+from supabase import AsyncClient
+
+from app.services.catalog_fit import invalidate_catalog_fit
+from app.services.catalog_import import CatalogImporter, ImportProgress
+from app.services.fit_data import invalidate_brand_fit_data
 
 
 class BrandService:
     """Service for managing brand operations."""
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         """Initialize brand service."""
         self.db = supabase_client
 
@@ -45,7 +47,7 @@ class BrandService:
             ValueError: If slug already exists
         """
         # Check if slug already exists
-        existing_brand = self.db.table("brands")\
+        existing_brand = await self.db.table("brands")\
             .select("id")\
             .eq("slug", slug)\
             .execute()
@@ -64,7 +66,7 @@ class BrandService:
             "status": "pending"
         }
 
-        brand_response = self.db.table("brands")\
+        brand_response = await self.db.table("brands")\
             .insert(brand_data)\
             .execute()
 
@@ -88,7 +90,7 @@ class BrandService:
         Raises:
             ValueError: If brand not found
         """
-        brand_response = self.db.table("brands")\
+        brand_response = await self.db.table("brands")\
             .select("*")\
             .eq("id", brand_id)\
             .single()\
@@ -116,11 +118,13 @@ class BrandService:
         """
         updates["updated_at"] = datetime.utcnow().isoformat()
 
-        updated_brand = self.db.table("brands")\
+        updated_brand = await self.db.table("brands")\
             .update(updates)\
             .eq("id", brand_id)\
             .execute()
 
+        invalidate_brand_fit_data(brand_id)
+
         return updated_brand.data[0]
 
     async def complete_onboarding(self, brand_id: str) -> Dict[str, Any]:
@@ -142,7 +146,9 @@ class BrandService:
     async def upload_catalog_csv(
         self,
         brand_id: str,
-        csv_content: str
+        csv_content: Union[str, Iterable[str]],
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[[ImportProgress], Any]] = None
     ) -> Dict[str, Any]:
         """
         Upload product catalog via CSV.
@@ -150,85 +156,24 @@ class BrandService:
         Expected CSV format:
         sku,name,description,category,price,currency,stock,size,chest_cm,waist_cm,hip_cm
 
+        Rows are streamed and bulk-written in batches (see ``CatalogImporter``).
+
         Args:
             brand_id: Brand ID
-            csv_content: CSV file content as string
+            csv_content: CSV file content as string, or an iterable of lines
+            batch_size: Rows per bulk write (defaults to CATALOG_IMPORT_BATCH_SIZE)
+            on_progress: Optional callback receiving ``ImportProgress`` per batch
 
         Returns:
             Import results
-
-        Raises:
-            ValueError: If CSV is invalid
         """
-        # Parse CSV
-        csv_file = io.StringIO(csv_content)
-        reader = csv.DictReader(csv_file)
-
-        products_created = 0
-        variants_created = 0
-        errors = []
-
-        # Group variants by product
-        products_map = {}
-
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Extract product info
-                product_key = row["name"].strip()
-
-                if product_key not in products_map:
-                    # Create product
-                    product_data = {
-                        "brand_id": brand_id,
-                        "name": row["name"].strip(),
-                        "description": row.get("description", "").strip(),
-                        "category": row.get("category", "").strip(),
-                        "active": True
-                    }
-
-                    product_response = self.db.table("products")\
-                        .insert(product_data)\
-                        .execute()
-
-                    product = product_response.data[0]
-                    products_map[product_key] = product["id"]
-                    products_created += 1
-
-                product_id = products_map[product_key]
-
-                # Create variant
-                variant_data = {
-                    "product_id": product_id,
-                    "sku": row["sku"].strip(),
-                    "label": row["size"].strip(),
-                    "price_cents": int(float(row["price"]) * 100),
-                    "currency": row.get("currency", "USD").strip().upper(),
-                    "stock": int(row["stock"]),
-                    "attributes": {
-                        "chest_cm": float(row.get("chest_cm", 0)) if row.get("chest_cm") else None,
-                        "waist_cm": float(row.get("waist_cm", 0)) if row.get("waist_cm") else None,
-                        "hip_cm": float(row.get("hip_cm", 0)) if row.get("hip_cm") else None
-                    }
-                }
-
-                self.db.table("product_variants")\
-                    .insert(variant_data)\
-                    .execute()
-
-                variants_created += 1
-
-            except Exception as e:
-                errors.append({
-                    "row": row_num,
-                    "error": str(e)
-                })
+        importer = CatalogImporter(self.db, batch_size=batch_size, on_progress=on_progress)
+        result = await importer.run(brand_id, csv_content)
 
-        return {
-            "success": len(errors) == 0,
-            "products_created": products_created,
-            "variants_created": variants_created,
-            "errors": errors
-        }
+        invalidate_brand_fit_data(brand_id)
+        invalidate_catalog_fit()
+
+        return result
 
     async def get_brand_products(
         self,
@@ -247,7 +192,7 @@ class BrandService:
         Returns:
             List of products with variants
         """
-        products_response = self.db.table("products")\
+        products_response = await self.db.table("products")\
             .select("*, product_variants(*)")\
             .eq("brand_id", brand_id)\
             .order("created_at", desc=True)\
@@ -276,7 +221,7 @@ class BrandService:
             List of orders
         """
         # Get products for this brand
-        products_response = self.db.table("products")\
+        products_response = await self.db.table("products")\
             .select("id")\
             .eq("brand_id", brand_id)\
             .execute()
@@ -296,7 +241,7 @@ class BrandService:
         if status:
             query = query.eq("status", status)
 
-        orders_response = query.execute()
+        orders_response = await query.execute()
 
         return orders_response.data
 
@@ -311,7 +256,7 @@ class BrandService:
             Analytics data
         """
         # Get total products
-        products_response = self.db.table("products")\
+        products_response = await self.db.table("products")\
             .select("id", count="exact")\
             .eq("brand_id", brand_id)\
             .execute()
@@ -319,7 +264,7 @@ class BrandService:
         total_products = products_response.count
 
         # Get total orders
-        product_ids_response = self.db.table("products")\
+        product_ids_response = await self.db.table("products")\
             .select("id")\
             .eq("brand_id", brand_id)\
             .execute()
@@ -327,7 +272,7 @@ class BrandService:
         product_ids = [p["id"] for p in product_ids_response.data]
 
         if product_ids:
-            orders_response = self.db.table("order_items")\
+            orders_response = await self.db.table("order_items")\
                 .select("order_id, quantity, unit_price_cents")\
                 .in_("product_id", product_ids)\
                 .execute()
@@ -357,13 +302,13 @@ class BrandService:
     async def _assign_brand_admin(self, brand_id: str, user_id: str) -> None:
         """Assign brand admin role to a user."""
         # Update user role
-        self.db.table("users")\
+        await self.db.table("users")\
             .update({"role": "brand"})\
             .eq("id", user_id)\
             .execute()
 
         # Create brand admin association
-        self.db.table("brand_admins")\
+        await self.db.table("brand_admins")\
             .insert({
                 "brand_id": brand_id,
                 "user_id": user_id
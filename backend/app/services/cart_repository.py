@@ -0,0 +1,139 @@
+"""
+Cart Repository
+
+Data-access layer for carts. Each public method is a single PostgREST round
+trip: reads use embedded selects (cart -> items -> product/variant) and
+add-to-cart runs the ``cart_add_item`` RPC from ``008_cart_rpc.sql``.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+from supabase import AsyncClient
+
+
+# Embedded product/variant columns needed to format a cart item
+ITEM_SELECT = (
+    "*, "
+    "products(id, name), "
+    "product_variants(id, sku, label, price_cents, currency, stock)"
+)
+
+
+def format_cart_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Format a joined cart item row for API responses.
+
+    Args:
+        item: ``cart_items`` row with embedded ``products`` and ``product_variants``
+
+    Returns:
+        Cart item in the API response shape
+    """
+    variant = item["product_variants"]
+    product = item["products"]
+
+    return {
+        "item_id": item["id"],
+        "product_id": product["id"],
+        "variant_sku": variant["sku"],
+        "name": product["name"],
+        "size_label": variant["label"],
+        "qty": item["quantity"],
+        "unit_price": variant["price_cents"],
+        "currency": variant["currency"],
+        "recommended": item.get("recommended", False),
+        "fit_summary": item.get("fit_summary", {})
+    }
+
+
+class CartRepository:
+    """Single-round-trip cart queries."""
+
+    def __init__(self, supabase_client: AsyncClient):
+        """Initialize cart repository with Supabase client."""
+        self.db = supabase_client
+
+    async def fetch_cart(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a user's cart with all items, products and variants.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Cart row with embedded ``cart_items``, or None if the user has no cart
+        """
+        response = await self.db.table("carts")\
+            .select(f"*, cart_items({ITEM_SELECT})")\
+            .eq("user_id", user_id)\
+            .order("created_at")\
+            .limit(1)\
+            .execute()
+
+        return response.data[0] if response.data else None
+
+    async def fetch_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one cart item with its product and variant.
+
+        Args:
+            item_id: Cart item ID
+
+        Returns:
+            Joined cart item row, or None if not found
+        """
+        response = await self.db.table("cart_items")\
+            .select(ITEM_SELECT)\
+            .eq("id", item_id)\
+            .limit(1)\
+            .execute()
+
+        return response.data[0] if response.data else None
+
+    async def add_item(
+        self,
+        user_id: str,
+        product_id: str,
+        variant_sku: str,
+        quantity: int,
+        recommended: bool,
+        fit_summary: Optional[Dict],
+        max_quantity: int,
+    ) -> Dict[str, Any]:
+        """
+        Add or increment a cart item via the ``cart_add_item`` RPC.
+
+        Args:
+            user_id: User ID
+            product_id: Product ID
+            variant_sku: Variant SKU
+            quantity: Quantity to add
+            recommended: Whether this was a recommended size
+            fit_summary: Fit analysis data
+            max_quantity: Per-item quantity cap
+
+        Returns:
+            Formatted cart item
+
+        Raises:
+            ValueError: If the variant is missing or inventory insufficient
+        """
+        try:
+            response = await self.db.rpc("cart_add_item", {
+                "p_user_id": user_id,
+                "p_product_id": product_id,
+                "p_variant_sku": variant_sku,
+                "p_quantity": quantity,
+                "p_recommended": recommended,
+                "p_fit_summary": fit_summary or {},
+                "p_max_quantity": max_quantity,
+            }).execute()
+        except APIError as e:
+            raise ValueError(e.message or "Unable to add item to cart")
+
+        return response.data
+
+    def cart_items(self, cart: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the formatted items of a cart fetched with ``fetch_cart``."""
+        return [format_cart_item(item) for item in cart.get("cart_items") or []]
@@ -7,9 +7,11 @@ inventory validation, and cart persistence.
 
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-from supabase import Client
+from supabase import AsyncClient
 import os
 
+from app.services.cart_repository import CartRepository, format_cart_item
+
 
 class CartService:
     """Service for managing shopping carts."""
@@ -17,9 +19,10 @@ class CartService:
     MAX_QUANTITY_PER_ITEM = 5
     FREE_SHIPPING_THRESHOLD = 10000  # cents
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         """Initialize cart service with Supabase client."""
         self.db = supabase_client
+        self.repo = CartRepository(supabase_client)
 
     async def get_cart(self, user_id: str) -> Dict[str, Any]:
         """
@@ -31,38 +34,13 @@ class CartService:
         Returns:
             Cart with items and totals
         """
-        # Get or create cart
-        cart = await self._ensure_cart(user_id)
-
-        # Get cart items with product and variant details
-        items_response = self.db.table("cart_items")\
-            .select("*, products(*), product_variants(*)")\
-            .eq("cart_id", cart["id"])\
-            .execute()
+        # Cart, items, products and variants in one embedded select
+        cart = await self.repo.fetch_cart(user_id)
+        if cart is None:
+            cart = await self._ensure_cart(user_id)
 
-        items = []
-        subtotal = 0
-
-        for item in items_response.data:
-            variant = item["product_variants"]
-            product = item["products"]
-
-            unit_price = variant["price_cents"]
-            line_total = unit_price * item["quantity"]
-            subtotal += line_total
-
-            items.append({
-                "item_id": item["id"],
-                "product_id": product["id"],
-                "variant_sku": variant["sku"],
-                "name": product["name"],
-                "size_label": variant["label"],
-                "qty": item["quantity"],
-                "unit_price": unit_price,
-                "currency": variant["currency"],
-                "recommended": item.get("recommended", False),
-                "fit_summary": item.get("fit_summary", {})
-            })
+        items = self.repo.cart_items(cart)
+        subtotal = sum(item["unit_price"] * item["qty"] for item in items)
 
         # Calculate totals
         tax = int(subtotal * 0.0825)  # 8.25% tax rate
@@ -110,63 +88,17 @@ class CartService:
         if quantity <= 0 or quantity > self.MAX_QUANTITY_PER_ITEM:
             raise ValueError(f"Quantity must be between 1 and {self.MAX_QUANTITY_PER_ITEM}")
 
-        # Get variant and check inventory
-        variant_response = self.db.table("product_variants")\
-            .select("*")\
-            .eq("sku", variant_sku)\
-            .eq("product_id", product_id)\
-            .single()\
-            .execute()
-
-        if not variant_response.data:
-            raise ValueError("Variant not found")
-
-        variant = variant_response.data
-
-        if variant["stock"] < quantity:
-            raise ValueError("Insufficient inventory")
-
-        # Get or create cart
-        cart = await self._ensure_cart(user_id)
-
-        # Check if item already exists in cart
-        existing_item_response = self.db.table("cart_items")\
-            .select("*")\
-            .eq("cart_id", cart["id"])\
-            .eq("variant_id", variant["id"])\
-            .execute()
-
-        if existing_item_response.data:
-            # Update existing item
-            existing_item = existing_item_response.data[0]
-            new_quantity = min(
-                existing_item["quantity"] + quantity,
-                self.MAX_QUANTITY_PER_ITEM
-            )
-
-            updated_item = self.db.table("cart_items")\
-                .update({
-                    "quantity": new_quantity,
-                    "updated_at": datetime.utcnow().isoformat()
-                })\
-                .eq("id", existing_item["id"])\
-                .execute()
-
-            return await self._format_cart_item(updated_item.data[0])
-        else:
-            # Create new cart item
-            new_item = self.db.table("cart_items")\
-                .insert({
-                    "cart_id": cart["id"],
-                    "product_id": product_id,
-                    "variant_id": variant["id"],
-                    "quantity": quantity,
-                    "recommended": recommended,
-                    "fit_summary": fit_summary or {}
-                })\
-                .execute()
-
-            return await self._format_cart_item(new_item.data[0])
+        # Variant lookup, inventory check, cart upsert and formatting run
+        # server-side in the cart_add_item RPC (one round trip)
+        return await self.repo.add_item(
+            user_id=user_id,
+            product_id=product_id,
+            variant_sku=variant_sku,
+            quantity=quantity,
+            recommended=recommended,
+            fit_summary=fit_summary,
+            max_quantity=self.MAX_QUANTITY_PER_ITEM,
+        )
 
     async def update_item(
         self,
@@ -193,7 +125,7 @@ class CartService:
         cart = await self._ensure_cart(user_id)
 
         # Get cart item
-        item_response = self.db.table("cart_items")\
+        item_response = await self.db.table("cart_items")\
             .select("*")\
             .eq("id", item_id)\
             .eq("cart_id", cart["id"])\
@@ -215,7 +147,7 @@ class CartService:
 
         # Update variant
         if variant_sku:
-            variant_response = self.db.table("product_variants")\
+            variant_response = await self.db.table("product_variants")\
                 .select("*")\
                 .eq("sku", variant_sku)\
                 .single()\
@@ -227,7 +159,7 @@ class CartService:
             update_data["variant_id"] = variant_response.data["id"]
 
         # Apply update
-        self.db.table("cart_items")\
+        await self.db.table("cart_items")\
             .update(update_data)\
             .eq("id", item_id)\
             .execute()
@@ -247,7 +179,7 @@ class CartService:
         """
         cart = await self._ensure_cart(user_id)
 
-        result = self.db.table("cart_items")\
+        result = await self.db.table("cart_items")\
             .delete()\
             .eq("id", item_id)\
             .eq("cart_id", cart["id"])\
@@ -265,7 +197,7 @@ class CartService:
         """
         cart = await self._ensure_cart(user_id)
 
-        self.db.table("cart_items")\
+        await self.db.table("cart_items")\
             .delete()\
             .eq("cart_id", cart["id"])\
             .execute()
@@ -281,7 +213,7 @@ class CartService:
             Cart record
         """
         # Try to get existing cart
-        cart_response = self.db.table("carts")\
+        cart_response = await self.db.table("carts")\
             .select("*")\
             .eq("user_id", user_id)\
             .execute()
@@ -290,7 +222,7 @@ class CartService:
             return cart_response.data[0]
 
         # Create new cart
-        new_cart = self.db.table("carts")\
+        new_cart = await self.db.table("carts")\
             .insert({"user_id": user_id})\
             .execute()
 
@@ -298,28 +230,7 @@ class CartService:
 
     async def _format_cart_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
         """Format a cart item with product and variant details."""
-        # Get product and variant details
-        variant = self.db.table("product_variants")\
-            .select("*")\
-            .eq("id", item["variant_id"])\
-            .single()\
-            .execute().data
-
-        product = self.db.table("products")\
-            .select("*")\
-            .eq("id", item["product_id"])\
-            .single()\
-            .execute().data
-
-        return {
-            "item_id": item["id"],
-            "product_id": product["id"],
-            "variant_sku": variant["sku"],
-            "name": product["name"],
-            "size_label": variant["label"],
-            "qty": item["quantity"],
-            "unit_price": variant["price_cents"],
-            "currency": variant["currency"],
-            "recommended": item.get("recommended", False),
-            "fit_summary": item.get("fit_summary", {})
-        }
+        # Rows from joined selects already embed product and variant
+        if "products" not in item or "product_variants" not in item:
+            item = await self.repo.fetch_item(item["id"])
+        return format_cart_item(item)
@@ -0,0 +1,319 @@
+"""
+Catalog Fit Service
+
+Scores every variant of every active product against one body at once for
+the "shop your size" feed. Variant ``attributes`` (``chest_cm``, ``waist_cm``,
+``hip_cm`` as written by ``BrandService.upload_catalog_csv``) are held in a
+columnar in-memory matrix, so a full-catalog query is a few array operations
+followed by a grouped top-k.
+
+The matrix is rebuilt when it is older than ``CATALOG_FIT_TTL_SECONDS`` or a
+catalog changed since it was loaded (``invalidate_catalog_fit``, called by
+the catalog import path). ``get_catalog_fit`` hands every request the same
+process-wide service, so the matrix is shared between requests.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from supabase import AsyncClient
+
+from app.core.config import settings
+from app.core.database import get_supabase
+from app.schemas.measure_schema import MeasurementNormalized
+from app.services.size_charts import CATEGORY_WEIGHTS
+
+
+# Variant attribute -> normalized measurement key, in matrix column order
+ATTRIBUTE_FIELDS = (
+    ("chest_cm", "chest_cm"),
+    ("waist_cm", "waist_natural_cm"),
+    ("hip_cm", "hip_low_cm"),
+)
+
+# Bumped whenever any catalog changes; matrices loaded earlier are stale
+_catalog_generation = 0
+
+
+def invalidate_catalog_fit() -> None:
+    """Mark every loaded variant matrix stale (called when a catalog changes)."""
+    global _catalog_generation
+    _catalog_generation += 1
+
+
+def _attribute(value: Any) -> float:
+    """A variant attribute in cm, or NaN when it is missing or not a finite number."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return number if math.isfinite(number) else np.nan
+
+
+@dataclass
+class VariantMatrix:
+    """
+    Columnar view of catalog variants.
+
+    Row ``i`` describes one variant; ``product_index[i]`` points into
+    ``product_ids``/``product_names``/``product_categories``.
+    ``attributes`` has shape ``(n_variants, len(ATTRIBUTE_FIELDS))`` in cm with
+    NaN where a variant does not specify a dimension.
+    """
+
+    product_ids: List[str]
+    product_names: List[str]
+    product_categories: List[str]
+    product_index: np.ndarray
+    skus: List[str]
+    labels: List[str]
+    stock: np.ndarray
+    price_cents: np.ndarray
+    attributes: np.ndarray
+    weights: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.skus)
+
+
+def build_variant_matrix(products: Iterable[Dict[str, Any]]) -> VariantMatrix:
+    """
+    Build a ``VariantMatrix`` from product rows with nested variants.
+
+    Args:
+        products: ``products`` rows selected with ``product_variants(*)``
+
+    Returns:
+        Columnar variant matrix
+    """
+    product_ids: List[str] = []
+    product_names: List[str] = []
+    product_categories: List[str] = []
+    product_index: List[int] = []
+    skus: List[str] = []
+    labels: List[str] = []
+    stock: List[int] = []
+    prices: List[int] = []
+    attributes: List[List[float]] = []
+    weights: List[List[float]] = []
+
+    for product in products:
+        variants = product.get("product_variants") or []
+        if not variants:
+            continue
+        position = len(product_ids)
+        category = product.get("category") or "other"
+        category_weights = CATEGORY_WEIGHTS.get(category, {})
+        row_weights = [category_weights.get(field, 1.0) for _, field in ATTRIBUTE_FIELDS]
+
+        product_ids.append(product["id"])
+        product_names.append(product.get("name", ""))
+        product_categories.append(category)
+
+        for variant in variants:
+            attrs = variant.get("attributes") or {}
+            product_index.append(position)
+            skus.append(variant["sku"])
+            labels.append(variant.get("label", ""))
+            stock.append(variant.get("stock") or 0)
+            prices.append(variant.get("price_cents") or 0)
+            attributes.append([_attribute(attrs.get(key)) for key, _ in ATTRIBUTE_FIELDS])
+            weights.append(row_weights)
+
+    width = len(ATTRIBUTE_FIELDS)
+    return VariantMatrix(
+        product_ids=product_ids,
+        product_names=product_names,
+        product_categories=product_categories,
+        product_index=np.array(product_index, dtype=np.int64),
+        skus=skus,
+        labels=labels,
+        stock=np.array(stock, dtype=np.int64),
+        price_cents=np.array(prices, dtype=np.int64),
+        attributes=np.array(attributes, dtype=np.float64).reshape(-1, width),
+        weights=np.array(weights, dtype=np.float64).reshape(-1, width),
+    )
+
+
+def score_variants(matrix: VariantMatrix, measurements: Dict[str, float]) -> np.ndarray:
+    """
+    Weighted relative fit distance of every variant (lower is better).
+
+    Args:
+        matrix: Catalog variant matrix
+        measurements: Normalized body measurements (``*_cm`` keys)
+
+    Returns:
+        Scores of shape ``(n_variants,)``; NaN where no dimension overlaps
+    """
+    body = np.array(
+        [measurements.get(field) or np.nan for _, field in ATTRIBUTE_FIELDS], dtype=np.float64
+    )
+    gap = (matrix.attributes - body) / body
+    specified = ~np.isnan(gap)
+    weighted = np.where(specified, matrix.weights * gap * gap, 0.0).sum(axis=1)
+    weight_sum = np.where(specified, matrix.weights, 0.0).sum(axis=1)
+    return np.sqrt(
+        np.divide(weighted, weight_sum, out=np.full(len(matrix), np.nan), where=weight_sum > 0)
+    )
+
+
+def top_k_per_product(
+    matrix: VariantMatrix, scores: np.ndarray, k: int = 1, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Select the ``k`` best-scoring variants of every product.
+
+    Args:
+        matrix: Catalog variant matrix
+        scores: Per-variant scores from ``score_variants``
+        k: Variants to keep per product
+        mask: Optional boolean filter of eligible variants
+
+    Returns:
+        Variant row indices grouped by product, best first within each product
+    """
+    eligible = ~np.isnan(scores)
+    if mask is not None:
+        eligible &= mask
+    rows = np.flatnonzero(eligible)
+    if rows.size == 0:
+        return rows
+
+    # Sort by product, then score; rank within each product run
+    order = rows[np.lexsort((scores[rows], matrix.product_index[rows]))]
+    products = matrix.product_index[order]
+    run_start = np.r_[0, np.flatnonzero(np.diff(products)) + 1]
+    run_lengths = np.diff(np.r_[run_start, len(order)])
+    rank = np.arange(len(order)) - np.repeat(run_start, run_lengths)
+    return order[rank < k]
+
+
+class CatalogFitService:
+    """Service for catalog-wide size recommendations."""
+
+    PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize catalog fit service.
+
+        Args:
+            supabase_client: Async Supabase client
+            ttl: Seconds a loaded matrix is reused (defaults to ``CATALOG_FIT_TTL_SECONDS``)
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.db = supabase_client
+        self.ttl = settings.catalog_fit_ttl_seconds if ttl is None else ttl
+        self._clock = clock
+        self.matrix: Optional[VariantMatrix] = None
+        self._loaded_at = 0.0
+        self._generation = -1
+
+    def is_stale(self) -> bool:
+        """Whether the matrix is missing, expired, or predates a catalog change."""
+        return (
+            self.matrix is None
+            or self._generation != _catalog_generation
+            or self._clock() - self._loaded_at >= self.ttl
+        )
+
+    async def refresh(self) -> VariantMatrix:
+        """
+        Load every active product and its variants into the variant matrix.
+
+        Returns:
+            The rebuilt variant matrix
+        """
+        # Read before loading: a change during the load leaves the matrix stale
+        generation = _catalog_generation
+        products: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = await self.db.table("products")\
+                .select("id, name, category, product_variants(sku, label, stock, price_cents, attributes)")\
+                .eq("active", True)\
+                .order("id")\
+                .range(offset, offset + self.PAGE_SIZE - 1)\
+                .execute()
+
+            products.extend(response.data)
+            if len(response.data) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+
+        self.matrix = build_variant_matrix(products)
+        self._loaded_at = self._clock()
+        self._generation = generation
+        return self.matrix
+
+    async def best_sizes(
+        self,
+        measurement: MeasurementNormalized,
+        top_k: int = 1,
+        in_stock_only: bool = True,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the best-fitting variants of every active product.
+
+        Args:
+            measurement: Normalized body measurements
+            top_k: Variants to return per product
+            in_stock_only: Skip variants without stock
+            category: Restrict to one product category (optional)
+
+        Returns:
+            One entry per product with its ``top_k`` variants, best product first
+        """
+        matrix = await self.refresh() if self.is_stale() else self.matrix
+
+        scores = score_variants(matrix, measurement.measurements)
+        mask = np.ones(len(matrix), dtype=bool)
+        if in_stock_only:
+            mask &= matrix.stock > 0
+        if category:
+            categories = np.array(matrix.product_categories, dtype=object)
+            mask &= categories[matrix.product_index] == category
+
+        feed: Dict[int, Dict[str, Any]] = {}
+        for row in top_k_per_product(matrix, scores, top_k, mask).tolist():
+            position = int(matrix.product_index[row])
+            entry = feed.setdefault(position, {
+                "product_id": matrix.product_ids[position],
+                "name": matrix.product_names[position],
+                "category": matrix.product_categories[position],
+                "variants": [],
+            })
+            score = float(scores[row])
+            entry["variants"].append({
+                "sku": matrix.skus[row],
+                "label": matrix.labels[row],
+                "price_cents": int(matrix.price_cents[row]),
+                "stock": int(matrix.stock[row]),
+                "fit_score": round(score, 4),
+                "confidence": round(max(0.5, 0.95 - 5.0 * score), 2),
+            })
+
+        return sorted(feed.values(), key=lambda entry: entry["variants"][0]["fit_score"])
+
+
+_service: Optional[CatalogFitService] = None
+
+
+async def get_catalog_fit() -> CatalogFitService:
+    """Process-wide catalog fit service (usable as a FastAPI dependency)."""
+    global _service
+    if _service is None:
+        _service = CatalogFitService(await get_supabase())
+    return _service
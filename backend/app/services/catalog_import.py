@@ -0,0 +1,354 @@
+"""
+Catalog Import
+
+Streaming bulk importer behind ``BrandService.upload_catalog_csv``. The CSV is
+parsed incrementally and handled in chunks of ``batch_size`` rows. Reading and
+parsing a chunk runs on a worker thread, so a large file never blocks the event
+loop; each chunk costs at most four PostgREST round trips (look up existing products, insert
+new products, look up existing SKUs, upsert variants) instead of one or two
+per row.
+
+SKUs are unique across all brands, so a row whose SKU already belongs to
+another brand's product is rejected rather than upserted over it.
+
+Expected CSV format:
+    sku,name,description,category,price,currency,stock,size,chest_cm,waist_cm,hip_cm
+"""
+
+import asyncio
+import csv
+import inspect
+import io
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from supabase import AsyncClient
+
+from app.core.config import settings
+
+
+# First data row of a CSV with a header line
+FIRST_ROW = 2
+
+REQUIRED_COLUMNS = ("sku", "name", "price", "stock", "size")
+
+
+@dataclass
+class ImportProgress:
+    """Running totals of a catalog import."""
+
+    rows_read: int = 0
+    rows_failed: int = 0
+    batches_written: int = 0
+    products_created: int = 0
+    variants_created: int = 0
+    variants_updated: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return progress as a JSON-serializable dict."""
+        return asdict(self)
+
+
+@dataclass
+class CatalogRow:
+    """One validated CSV row."""
+
+    row: int
+    product: Dict[str, Any]
+    variant: Dict[str, Any]
+
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    return float(value) if value not in (None, "") else None
+
+
+def parse_catalog_row(row_num: int, row: Dict[str, Optional[str]]) -> CatalogRow:
+    """
+    Validate and convert one CSV row.
+
+    Args:
+        row_num: 1-based line number in the CSV (header is line 1)
+        row: Raw ``csv.DictReader`` row
+
+    Returns:
+        Parsed product and variant data (without IDs)
+
+    Raises:
+        ValueError: If a required column is missing or a value is malformed
+    """
+    missing = [column for column in REQUIRED_COLUMNS if not (row.get(column) or "").strip()]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    product = {
+        "name": row["name"].strip(),
+        "description": (row.get("description") or "").strip(),
+        "category": (row.get("category") or "").strip(),
+        "active": True,
+    }
+    variant = {
+        "sku": row["sku"].strip(),
+        "label": row["size"].strip(),
+        "price_cents": int(round(float(row["price"]) * 100)),
+        "currency": (row.get("currency") or "USD").strip().upper(),
+        "stock": int(row["stock"]),
+        "attributes": {
+            "chest_cm": _optional_float(row.get("chest_cm")),
+            "waist_cm": _optional_float(row.get("waist_cm")),
+            "hip_cm": _optional_float(row.get("hip_cm")),
+        },
+    }
+    return CatalogRow(row=row_num, product=product, variant=variant)
+
+
+def iter_row_chunks(
+    source: Union[str, Iterable[str]], chunk_size: int
+) -> Iterator[List[Tuple[int, Dict[str, Optional[str]]]]]:
+    """
+    Lazily read CSV rows in chunks.
+
+    Args:
+        source: CSV text, or any iterable of lines (e.g. an open text file)
+        chunk_size: Rows per chunk
+
+    Yields:
+        Lists of ``(row_num, row)`` pairs
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    rows = enumerate(csv.DictReader(lines), start=FIRST_ROW)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CatalogImporter:
+    """Chunked, bulk-writing catalog CSV importer."""
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[[ImportProgress], Any]] = None,
+    ):
+        """
+        Initialize catalog importer.
+
+        Args:
+            supabase_client: Async Supabase client
+            batch_size: Rows per chunk (defaults to ``CATALOG_IMPORT_BATCH_SIZE``)
+            on_progress: Optional callback (sync or async) run after every chunk
+        """
+        self.db = supabase_client
+        self.batch_size = batch_size or settings.catalog_import_batch_size
+        self.on_progress = on_progress
+        self.progress = ImportProgress()
+
+    async def run(self, brand_id: str, source: Union[str, Iterable[str]]) -> Dict[str, Any]:
+        """
+        Import a catalog CSV for a brand.
+
+        Products are matched by name within the brand, so re-uploading a
+        catalog updates variants in place rather than duplicating products.
+
+        Args:
+            brand_id: Brand ID
+            source: CSV text or an iterable of CSV lines
+
+        Returns:
+            Import results with per-row errors
+        """
+        self.progress = ImportProgress()
+        product_ids: Dict[str, str] = {}
+        seen_skus: Dict[str, int] = {}
+
+        chunks = iter_row_chunks(source, self.batch_size)
+        while True:
+            rows = await asyncio.to_thread(self._read_chunk, chunks, seen_skus)
+            if rows is None:
+                break
+
+            if rows:
+                await self._write_chunk(brand_id, rows, product_ids)
+                self.progress.batches_written += 1
+
+            await self._report()
+
+        return {
+            "success": self.progress.rows_failed == 0,
+            "products_created": self.progress.products_created,
+            "variants_created": self.progress.variants_created,
+            "variants_updated": self.progress.variants_updated,
+            "rows_processed": self.progress.rows_read,
+            "errors": self.progress.errors,
+        }
+
+    def _read_chunk(
+        self,
+        chunks: Iterator[List[Tuple[int, Dict[str, Optional[str]]]]],
+        seen_skus: Dict[str, int],
+    ) -> Optional[List[CatalogRow]]:
+        """Read and parse the next chunk (blocking; run on a worker thread)."""
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        self.progress.rows_read += len(chunk)
+        rows: List[CatalogRow] = []
+
+        for row_num, raw in chunk:
+            try:
+                parsed = parse_catalog_row(row_num, raw)
+            except (ValueError, TypeError) as e:
+                self._row_error(row_num, str(e))
+                continue
+
+            sku = parsed.variant["sku"]
+            if sku in seen_skus:
+                self._row_error(row_num, f"Duplicate SKU {sku} (first seen on row {seen_skus[sku]})")
+                continue
+            seen_skus[sku] = row_num
+            rows.append(parsed)
+        return rows
+
+    async def _write_chunk(
+        self, brand_id: str, rows: List[CatalogRow], product_ids: Dict[str, str]
+    ) -> None:
+        """Resolve product IDs for a chunk and bulk-upsert its variants."""
+        try:
+            failed_products = await self._ensure_products(brand_id, rows, product_ids)
+        except APIError as e:
+            for row in rows:
+                self._row_error(row.row, e.message or "Failed to create product")
+            return
+
+        writable = []
+        for row in rows:
+            name = row.product["name"]
+            if name in failed_products:
+                self._row_error(row.row, failed_products[name])
+            else:
+                writable.append(row)
+        if not writable:
+            return
+
+        try:
+            owners = await self._sku_owners([row.variant["sku"] for row in writable])
+        except APIError as e:
+            for row in writable:
+                self._row_error(row.row, e.message or "Failed to look up SKU")
+            return
+
+        rows, variants, existing = [], [], []
+        for row in writable:
+            sku = row.variant["sku"]
+            if sku in owners and owners[sku] != str(brand_id):
+                self._row_error(row.row, f"SKU {sku} belongs to another brand")
+                continue
+            rows.append(row)
+            variants.append({**row.variant, "product_id": product_ids[row.product["name"]]})
+            existing.append(sku in owners)
+        if not variants:
+            return
+
+        try:
+            await self._upsert_variants(variants)
+            self._count_variants(existing)
+        except APIError:
+            # Isolate the offending rows so errors stay per row
+            for row, variant, updated in zip(rows, variants, existing):
+                try:
+                    await self._upsert_variants([variant])
+                    self._count_variants([updated])
+                except APIError as e:
+                    self._row_error(row.row, e.message or "Failed to write variant")
+
+    async def _ensure_products(
+        self, brand_id: str, rows: List[CatalogRow], product_ids: Dict[str, str]
+    ) -> Dict[str, str]:
+        """
+        Look up or bulk-create the products referenced by a chunk.
+
+        If the bulk insert is rejected, products are inserted one at a time
+        so only the offending ones fail.
+
+        Returns:
+            Error message per product name that could not be created
+        """
+        pending: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            name = row.product["name"]
+            if name not in product_ids and name not in pending:
+                pending[name] = {**row.product, "brand_id": brand_id}
+        if not pending:
+            return {}
+
+        existing = await self.db.table("products")\
+            .select("id, name")\
+            .eq("brand_id", brand_id)\
+            .in_("name", list(pending))\
+            .execute()
+
+        for product in existing.data:
+            product_ids.setdefault(product["name"], product["id"])
+            pending.pop(product["name"], None)
+        if not pending:
+            return {}
+
+        try:
+            created = (await self._insert_products(list(pending.values()))).data
+        except APIError:
+            created, failed = [], {}
+            for name, product in pending.items():
+                try:
+                    created.extend((await self._insert_products([product])).data)
+                except APIError as e:
+                    failed[name] = e.message or "Failed to create product"
+        else:
+            failed = {}
+
+        for product in created:
+            product_ids[product["name"]] = product["id"]
+        self.progress.products_created += len(created)
+        return failed
+
+    async def _insert_products(self, products: List[Dict[str, Any]]) -> Any:
+        return await self.db.table("products")\
+            .insert(products)\
+            .execute()
+
+    async def _sku_owners(self, skus: List[str]) -> Dict[str, str]:
+        """Map each already existing SKU to the brand that owns its product."""
+        response = await self.db.table("product_variants")\
+            .select("sku, products(brand_id)")\
+            .in_("sku", skus)\
+            .execute()
+
+        return {
+            row["sku"]: str((row.get("products") or {}).get("brand_id"))
+            for row in response.data
+        }
+
+    async def _upsert_variants(self, variants: List[Dict[str, Any]]) -> None:
+        await self.db.table("product_variants")\
+            .upsert(variants, on_conflict="sku", returning=ReturnMethod.minimal)\
+            .execute()
+
+    def _count_variants(self, updated: List[bool]) -> None:
+        self.progress.variants_updated += sum(updated)
+        self.progress.variants_created += len(updated) - sum(updated)
+
+    def _row_error(self, row_num: int, message: str) -> None:
+        self.progress.rows_failed += 1
+        self.progress.errors.append({"row": row_num, "error": message})
+
+    async def _report(self) -> None:
+        if self.on_progress is None:
+            return
+        result = self.on_progress(self.progress)
+        if inspect.isawaitable(result):
+            await result
@@ -0,0 +1,378 @@
+"""
+Catalog Import Jobs
+
+Background job subsystem behind ``POST /brands/{brand_id}/catalog/upload``.
+Uploads are spooled to disk and recorded in a SQLite job table; a pool of
+async workers claims queued jobs and streams each spooled CSV through
+``CatalogImporter``, writing progress back after every batch. The request
+only pays for the spool copy, never for the import itself.
+
+SQLite keeps the queue shareable between processes: any process pointed at
+the same ``CATALOG_SPOOL_DIR`` can run workers. Claims are atomic, and a
+running job whose heartbeat goes stale (its process died) is claimed again;
+re-running an import is safe because variants are upserted on SKU.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import UploadFile
+from supabase import AsyncClient
+
+from app.core.config import settings
+from app.services.brand_service import BrandService
+from app.services.catalog_import import ImportProgress
+
+
+# Cap on per-row errors kept per job (rows_failed always has the full count)
+MAX_STORED_ERRORS = 1000
+
+# A running job without a progress heartbeat for this long is reclaimed
+STALE_AFTER_SECONDS = 300.0
+
+SPOOL_CHUNK_BYTES = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_jobs (
+    job_id TEXT PRIMARY KEY,
+    brand_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT,
+    spool_path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    rows_failed INTEGER NOT NULL DEFAULT 0,
+    products_created INTEGER NOT NULL DEFAULT 0,
+    variants_created INTEGER NOT NULL DEFAULT 0,
+    variants_updated INTEGER NOT NULL DEFAULT 0,
+    errors TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_jobs_status ON catalog_jobs(status, created_at);
+"""
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+@dataclass
+class CatalogJob:
+    """One catalog import job."""
+
+    job_id: str
+    brand_id: str
+    status: str
+    spool_path: str
+    created_at: float
+    filename: Optional[str] = None
+    size_bytes: int = 0
+    rows_processed: int = 0
+    rows_failed: int = 0
+    products_created: int = 0
+    variants_created: int = 0
+    variants_updated: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "CatalogJob":
+        data = dict(row)
+        data["errors"] = json.loads(data["errors"])
+        return cls(**data)
+
+    def elapsed_seconds(self, now: Optional[float] = None) -> float:
+        """Seconds spent running (so far, if still running)."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at or (now if now is not None else time.time())
+        return max(end - self.started_at, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job status in the API response shape."""
+        elapsed = self.elapsed_seconds()
+        return {
+            "job_id": self.job_id,
+            "brand_id": self.brand_id,
+            "status": self.status,
+            "filename": self.filename,
+            "size_bytes": self.size_bytes,
+            "rows_processed": self.rows_processed,
+            "rows_failed": self.rows_failed,
+            "products_created": self.products_created,
+            "variants_created": self.variants_created,
+            "variants_updated": self.variants_updated,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors,
+            "error": self.error,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+        }
+
+
+class CatalogJobStore:
+    """SQLite-backed catalog job table."""
+
+    def __init__(self, path: str, stale_after: float = STALE_AFTER_SECONDS):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            path: SQLite database file
+            stale_after: Seconds without a heartbeat before a running job is reclaimed
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(catalog_jobs)")}
+        if "variants_updated" not in columns:
+            # Job databases created before updates were counted separately
+            self._conn.execute(
+                "ALTER TABLE catalog_jobs ADD COLUMN variants_updated INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def create(
+        self,
+        job_id: str,
+        brand_id: str,
+        spool_path: str,
+        filename: Optional[str] = None,
+        size_bytes: int = 0,
+    ) -> CatalogJob:
+        """Record a queued job for an already spooled upload."""
+        job = CatalogJob(
+            job_id=job_id,
+            brand_id=brand_id,
+            status="queued",
+            spool_path=spool_path,
+            filename=filename,
+            size_bytes=size_bytes,
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO catalog_jobs (job_id, brand_id, status, filename, spool_path, size_bytes, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.job_id, job.brand_id, job.status, job.filename, job.spool_path, job.size_bytes, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[CatalogJob]:
+        """Fetch a job by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM catalog_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return CatalogJob.from_row(row) if row else None
+
+    def claim_next(self) -> Optional[CatalogJob]:
+        """
+        Atomically claim the oldest queued (or stale running) job.
+
+        Returns:
+            The claimed job, now ``running``, or None if nothing is runnable
+        """
+        now = time.time()
+        stale_before = now - self.stale_after
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE catalog_jobs SET status = 'running', started_at = ?, heartbeat_at = ?"
+                " WHERE job_id = ("
+                "   SELECT job_id FROM catalog_jobs"
+                "   WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?)"
+                "   ORDER BY created_at LIMIT 1"
+                " ) AND (status = 'queued' OR heartbeat_at < ?)"
+                " RETURNING *",
+                (now, now, stale_before, stale_before),
+            ).fetchone()
+        return CatalogJob.from_row(row) if row else None
+
+    def record_progress(self, job_id: str, progress: ImportProgress) -> None:
+        """Write running totals for a job (doubles as its heartbeat)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE catalog_jobs SET rows_processed = ?, rows_failed = ?, products_created = ?,"
+                " variants_created = ?, variants_updated = ?, errors = ?, heartbeat_at = ? WHERE job_id = ?",
+                (
+                    progress.rows_read,
+                    progress.rows_failed,
+                    progress.products_created,
+                    progress.variants_created,
+                    progress.variants_updated,
+                    json.dumps(progress.errors[:MAX_STORED_ERRORS]),
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Mark a job ``succeeded``, ``completed_with_errors`` or ``failed``."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE catalog_jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CatalogJobQueue:
+    """Spools uploads to disk and enqueues import jobs."""
+
+    def __init__(self, store: CatalogJobStore, spool_dir: str):
+        """Initialize the job queue."""
+        self.store = store
+        self.spool_dir = spool_dir
+        self.wakeup = asyncio.Event()
+        os.makedirs(spool_dir, exist_ok=True)
+
+    async def submit(self, brand_id: str, upload: UploadFile) -> CatalogJob:
+        """
+        Spool an uploaded CSV and queue its import.
+
+        Args:
+            brand_id: Brand ID
+            upload: Uploaded CSV file
+
+        Returns:
+            The queued job
+        """
+        job_id = str(uuid.uuid4())
+        spool_path = os.path.join(self.spool_dir, f"{job_id}.csv")
+        size_bytes = await asyncio.to_thread(self._spool, upload.file, spool_path)
+
+        job = await asyncio.to_thread(
+            self.store.create, job_id, brand_id, spool_path, upload.filename, size_bytes
+        )
+        self.wakeup.set()
+        return job
+
+    @staticmethod
+    def _spool(source: Any, spool_path: str) -> int:
+        with open(spool_path, "wb") as out:
+            shutil.copyfileobj(source, out, SPOOL_CHUNK_BYTES)
+            return out.tell()
+
+
+class CatalogImportPool:
+    """Async worker pool that runs queued catalog imports."""
+
+    def __init__(
+        self,
+        queue: CatalogJobQueue,
+        db_provider: Callable[[], Awaitable[AsyncClient]],
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        batch_size: Optional[int] = None,
+    ):
+        """
+        Initialize the worker pool.
+
+        Args:
+            queue: Job queue to consume
+            db_provider: Coroutine returning the Supabase client
+            concurrency: Jobs run at the same time
+            poll_interval: Seconds between checks for jobs queued by other processes
+            batch_size: Rows per bulk write (defaults to CATALOG_IMPORT_BATCH_SIZE)
+        """
+        self.queue = queue
+        self.store = queue.store
+        self.db_provider = db_provider
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the workers."""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; interrupted jobs are reclaimed once stale."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self) -> Optional[CatalogJob]:
+        """Claim and run one queued job, if any."""
+        job = await asyncio.to_thread(self.store.claim_next)
+        if job is not None:
+            await self.run_job(job)
+        return job
+
+    async def run_job(self, job: CatalogJob) -> None:
+        """Import one claimed job and record the outcome."""
+        async def on_progress(progress: ImportProgress) -> None:
+            await asyncio.to_thread(self.store.record_progress, job.job_id, progress)
+
+        try:
+            db = await self.db_provider()
+            # The importer reads and parses the file on worker threads
+            source = await asyncio.to_thread(
+                open, job.spool_path, encoding="utf-8-sig", newline=""
+            )
+            try:
+                result = await BrandService(db).upload_catalog_csv(
+                    job.brand_id, source, batch_size=self.batch_size, on_progress=on_progress
+                )
+            finally:
+                await asyncio.to_thread(source.close)
+        except Exception as e:
+            await asyncio.to_thread(self.store.finish, job.job_id, "failed", str(e))
+        else:
+            status = "succeeded" if result["success"] else "completed_with_errors"
+            await asyncio.to_thread(self.store.finish, job.job_id, status)
+        # Finished jobs are never re-run, so their spool copy goes either way;
+        # a cancelled worker leaves it for the job to be reclaimed
+        await asyncio.to_thread(_remove_quietly, job.spool_path)
+
+    async def _worker(self) -> None:
+        while True:
+            if await self.run_once() is not None:
+                continue
+            self.queue.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.queue.wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=1)
+def get_catalog_jobs() -> CatalogJobQueue:
+    """Process-wide catalog job queue (usable as a FastAPI dependency)."""
+    os.makedirs(settings.catalog_spool_dir, exist_ok=True)
+    store = CatalogJobStore(os.path.join(settings.catalog_spool_dir, "jobs.sqlite3"))
+    return CatalogJobQueue(store, settings.catalog_spool_dir)
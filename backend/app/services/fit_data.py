@@ -0,0 +1,121 @@
+"""
+Fit Data Service
+
+Cached access to the brand ``size_charts`` and ``fit_maps`` rows read on
+every recommendation. Size charts are cached already compiled, so a hit skips
+both the PostgREST round trip and the JSON-to-array compilation.
+``/measurements/recommend`` reads a brand's charts through ``get_fit_data``
+when the request names a brand.
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, Optional
+
+from supabase import AsyncClient
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.database import get_supabase
+from app.services.size_charts import CompiledSizeChart, compile_size_chart
+
+
+# Process-wide cache shared by every FitDataService instance
+fit_data_cache = TTLLRUCache(
+    maxsize=settings.fit_cache_max_entries,
+    ttl=settings.fit_cache_ttl_seconds,
+)
+
+
+def invalidate_brand_fit_data(brand_id: str, cache: TTLLRUCache = fit_data_cache) -> int:
+    """
+    Drop every cached size chart and fit map for a brand.
+
+    Called whenever brand data or its catalog changes.
+
+    Args:
+        brand_id: Brand ID
+        cache: Cache to invalidate (defaults to the shared cache)
+
+    Returns:
+        Number of entries removed
+    """
+    return cache.invalidate_where(lambda key: key[1] == str(brand_id))
+
+
+class FitDataService:
+    """Service for cached size chart and fit map lookups."""
+
+    def __init__(self, supabase_client: AsyncClient, cache: TTLLRUCache = fit_data_cache):
+        """Initialize fit data service."""
+        self.db = supabase_client
+        self.cache = cache
+
+    async def get_size_chart(self, brand_id: str, category: str) -> Optional[CompiledSizeChart]:
+        """
+        Get the compiled size chart for a brand/category.
+
+        Args:
+            brand_id: Brand ID
+            category: Product category (tops, bottoms, dresses, outerwear, other)
+
+        Returns:
+            Compiled size chart, or None if the brand has none for the category
+        """
+        async def load() -> Optional[CompiledSizeChart]:
+            row = await self._latest("size_charts", brand_id, category)
+            return compile_size_chart(row) if row else None
+
+        return await self.cache.get_or_load_async(("size_chart", str(brand_id), category), load)
+
+    async def get_size_charts(self, brand_id: str, categories: Iterable[str]) -> Dict[str, CompiledSizeChart]:
+        """
+        Get a brand's compiled size charts for several categories concurrently.
+
+        Args:
+            brand_id: Brand ID
+            categories: Product categories
+
+        Returns:
+            Compiled chart per category; categories without a chart are left out
+        """
+        categories = list(categories)
+        charts = await asyncio.gather(*(self.get_size_chart(brand_id, category) for category in categories))
+        return {category: chart for category, chart in zip(categories, charts) if chart is not None}
+
+    async def get_fit_map(self, brand_id: str, category: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the fit map rules for a brand/category.
+
+        Args:
+            brand_id: Brand ID
+            category: Product category
+
+        Returns:
+            Fit map ``rules`` JSON, or None if the brand has none for the category
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            row = await self._latest("fit_maps", brand_id, category)
+            return row["rules"] if row else None
+
+        return await self.cache.get_or_load_async(("fit_map", str(brand_id), category), load)
+
+    def invalidate_brand(self, brand_id: str) -> int:
+        """Drop cached fit data for a brand."""
+        return invalidate_brand_fit_data(brand_id, self.cache)
+
+    async def _latest(self, table: str, brand_id: str, category: str) -> Optional[Dict[str, Any]]:
+        """Fetch the most recently updated row for a brand/category."""
+        response = await self.db.table(table)\
+            .select("*")\
+            .eq("brand_id", brand_id)\
+            .eq("category", category)\
+            .order("updated_at", desc=True)\
+            .limit(1)\
+            .execute()
+
+        return response.data[0] if response.data else None
+
+
+async def get_fit_data() -> FitDataService:
+    """Fit data service on the shared client (usable as a FastAPI dependency)."""
+    return FitDataService(await get_supabase())
@@ -0,0 +1,260 @@
+"""
+Fit Rule Registry
+
+Dispatches size recommendations by product category (the ``size_charts``
+categories: tops, bottoms, dresses, outerwear). Each category has one rule
+function from ``fit_rules_<category>`` and the measurements that rule reads
+without a brand size chart.
+
+The registry is compiled once at import (app startup): the union of every
+rule's measurements becomes one column order, and each rule's requirements a
+boolean mask over it. A batch of bodies is read once into a matrix of that
+order; coverage of every category is one array operation, and each category
+then sizes all of its covered bodies in one call to its column-wise
+``recommend_batch`` (a ``np.searchsorted`` ladder, or a batched chart
+distance query).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.fit_rules_bottoms import recommend_bottom, recommend_bottom_batch
+from app.services.fit_rules_dresses import recommend_dress, recommend_dress_batch
+from app.services.fit_rules_outerwear import recommend_outerwear, recommend_outerwear_batch
+from app.services.fit_rules_tops import recommend_top, recommend_top_batch
+from app.services.size_charts import CompiledSizeChart, MeasurementColumns
+
+
+# Version stamped on every recommendation
+RULES_VERSION = "v1.0"
+
+RuleFunction = Callable[[Dict[str, float], Optional[CompiledSizeChart]], Dict[str, Any]]
+BatchRuleFunction = Callable[
+    [MeasurementColumns, Optional[CompiledSizeChart]], List[Union[Dict[str, Any], Exception]]
+]
+
+
+@dataclass(frozen=True)
+class FitRule:
+    """
+    A category's rule and the measurements it needs without a chart.
+
+    ``recommend_batch`` sizes many bodies column-wise and returns one
+    recommendation (or exception) per body; rules without one fall back to
+    calling ``recommend`` per body.
+    """
+
+    category: str
+    required: Tuple[str, ...]
+    recommend: RuleFunction
+    recommend_batch: Optional[BatchRuleFunction] = None
+
+
+@dataclass
+class RuleResult:
+    """Recommendations for one body."""
+
+    recommendations: List[Dict[str, Any]] = field(default_factory=list)
+    # Category -> measurements it is missing
+    unavailable: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class FitRuleError(RuntimeError):
+    """A rule raised on measurements it accepted."""
+
+    def __init__(self, category: str, cause: Exception):
+        super().__init__(f"{category} rule failed: {type(cause).__name__}: {cause}")
+        self.category = category
+        self.cause = cause
+
+
+DEFAULT_RULES: Tuple[FitRule, ...] = (
+    FitRule("tops", ("chest_cm", "shoulder_cm", "sleeve_cm"), recommend_top, recommend_top_batch),
+    FitRule("bottoms", ("waist_natural_cm", "inseam_cm"), recommend_bottom, recommend_bottom_batch),
+    FitRule("dresses", ("chest_cm", "waist_natural_cm", "hip_low_cm"), recommend_dress, recommend_dress_batch),
+    FitRule("outerwear", ("chest_cm", "shoulder_cm"), recommend_outerwear, recommend_outerwear_batch),
+)
+
+
+class FitRuleRegistry:
+    """Category-dispatched fit rules, precompiled to a shared column order."""
+
+    def __init__(self, rules: Iterable[FitRule] = DEFAULT_RULES):
+        """
+        Compile the registry.
+
+        Args:
+            rules: One rule per category
+        """
+        self.rules: Dict[str, FitRule] = {rule.category: rule for rule in rules}
+        self.categories: Tuple[str, ...] = tuple(self.rules)
+        self.fields: Tuple[str, ...] = tuple(
+            dict.fromkeys(name for rule in self.rules.values() for name in rule.required)
+        )
+        # (categories, fields): which measurements each rule needs
+        self._required = np.array(
+            [[name in rule.required for name in self.fields] for rule in self.rules.values()],
+            dtype=bool,
+        ).reshape(len(self.categories), len(self.fields))
+
+    def resolve(self, categories: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+        """
+        Validate requested categories (all of them when None).
+
+        Raises:
+            ValueError: If a category has no rule
+        """
+        if not categories:
+            return self.categories
+        unknown = [category for category in categories if category not in self.rules]
+        if unknown:
+            raise ValueError(
+                f"No fit rule for {', '.join(unknown)} (supported: {', '.join(self.categories)})"
+            )
+        return tuple(dict.fromkeys(categories))
+
+    def stack(self, batch: Sequence[Mapping[str, Any]]) -> Tuple[np.ndarray, List[Optional[ValueError]]]:
+        """
+        Read measurement dicts into a ``(n, len(fields))`` matrix.
+
+        Args:
+            batch: Measurement dicts (``*_cm`` keys)
+
+        Returns:
+            Matrix with NaN for missing measurements, and per row the
+            ``ValueError`` for a non-numeric measurement (that row is all NaN)
+        """
+        matrix = np.full((len(batch), len(self.fields)), np.nan)
+        errors: List[Optional[ValueError]] = [None] * len(batch)
+        for row, measurements in enumerate(batch):
+            for column, name in enumerate(self.fields):
+                value = measurements.get(name)
+                if value is None:
+                    continue
+                try:
+                    matrix[row, column] = float(value)
+                except (TypeError, ValueError):
+                    errors[row] = ValueError(f"{name} must be a number, got {value!r}")
+                    matrix[row] = np.nan
+                    break
+        return matrix, errors
+
+    def evaluate_batch(
+        self,
+        batch: Sequence[Mapping[str, Any]],
+        categories: Optional[Sequence[Optional[Sequence[str]]]] = None,
+        charts: Optional[Mapping[str, CompiledSizeChart]] = None,
+    ) -> List[Union[RuleResult, Exception]]:
+        """
+        Evaluate the requested categories for many bodies at once.
+
+        Each category runs once over every body that requested it.
+
+        Args:
+            batch: Measurement dicts (``*_cm`` keys)
+            categories: Per body, the categories to evaluate (None for all)
+            charts: Brand size chart per category; a charted category has no
+                required measurements (the chart picks what it can match)
+
+        Returns:
+            Per body, a ``RuleResult``, or the ``ValueError`` (bad input or
+            unknown category) or ``FitRuleError`` for that body
+        """
+        charts = charts or {}
+        matrix, errors = self.stack(batch)
+        present = ~np.isnan(matrix) & (matrix > 0)
+        # (n, categories): every required measurement is present
+        covered = ~(self._required[None, :, :] & ~present[:, None, :]).any(axis=2)
+        columns = MeasurementColumns(
+            batch, {name: matrix[:, column] for column, name in enumerate(self.fields)}
+        )
+
+        results: List[Union[RuleResult, Exception]] = list(errors)
+        requested: Dict[int, Tuple[str, ...]] = {}
+        for row in range(len(batch)):
+            if results[row] is not None:
+                continue
+            try:
+                requested[row] = self.resolve(categories[row] if categories else None)
+                results[row] = RuleResult()
+            except ValueError as e:
+                results[row] = e
+
+        # Row -> category -> recommendation, reassembled in requested order
+        recommended: Dict[int, Dict[str, Dict[str, Any]]] = {row: {} for row in requested}
+        for index, category in enumerate(self.categories):
+            chart = charts.get(category)
+            rows = []
+            for row, wanted in requested.items():
+                if category not in wanted:
+                    continue
+                if chart is None and not covered[row, index]:
+                    results[row].unavailable[category] = [
+                        name for name, needed, have in zip(self.fields, self._required[index], present[row])
+                        if needed and not have
+                    ]
+                else:
+                    rows.append(row)
+            if not rows:
+                continue
+            for row, outcome in zip(rows, self._run_rule(self.rules[category], columns.take(rows), chart)):
+                if isinstance(outcome, Exception):
+                    results[row] = FitRuleError(category, outcome)
+                    requested.pop(row)
+                else:
+                    recommended[row][category] = {
+                        **outcome, "category": category, "model_version": RULES_VERSION
+                    }
+
+        for row, wanted in requested.items():
+            results[row].recommendations = [
+                recommended[row][category] for category in wanted if category in recommended[row]
+            ]
+        return results
+
+    @staticmethod
+    def _run_rule(
+        rule: FitRule, columns: MeasurementColumns, chart: Optional[CompiledSizeChart]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """Run a rule over a column subset; exceptions are returned per body."""
+        if rule.recommend_batch is not None:
+            try:
+                return rule.recommend_batch(columns, chart)
+            except Exception as e:
+                return [e] * len(columns)
+
+        outcomes: List[Union[Dict[str, Any], Exception]] = []
+        for position, measurements in enumerate(columns.rows):
+            values = {**measurements, **{
+                name: float(column[position]) for name, column in columns.parsed().items()
+                if not np.isnan(column[position])
+            }}
+            try:
+                outcomes.append(rule.recommend(values, chart))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def evaluate(
+        self,
+        measurements: Mapping[str, Any],
+        categories: Optional[Sequence[str]] = None,
+        charts: Optional[Mapping[str, CompiledSizeChart]] = None,
+    ) -> RuleResult:
+        """
+        Evaluate the requested categories for one body.
+
+        Raises:
+            ValueError: On a non-numeric measurement or unknown category
+            FitRuleError: If a rule fails
+        """
+        result = self.evaluate_batch([measurements], [categories], charts)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+# Compiled once when the app starts
+fit_rule_registry = FitRuleRegistry()
@@ -1,11 +1,42 @@
-from typing import Dict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from app.services.size_charts import CompiledSizeChart, MeasurementColumns
+
 INCH = 1/2.54
 
-def recommend_bottom(m: Dict) -> Dict:
-    waist = round(m["waist_natural_cm"] * INCH)
-    inseam = round(m["inseam_cm"] * INCH)
+def _fit_notes(cols: MeasurementColumns) -> List[str]:
+    thigh, hip, knee = cols["thigh_cm"], cols["hip_low_cm"], cols["knee_cm"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roomy = (thigh > 0) & (hip > 0) & (thigh / hip > 0.58)
+        taper = (knee > 0) & (thigh > 0) & (knee / thigh < 0.67)
     notes = []
-    if m["thigh_cm"]/m["hip_low_cm"] > 0.58: notes.append("roomy thigh")
-    if m["knee_cm"]/m["thigh_cm"] < 0.67: notes.append("strong knee taper")
-    rationale = ", ".join(notes) or "standard ease"
-    return {"category": "bottom", "size": f"{waist}x{inseam}", "confidence": 0.72, "rationale": rationale}
+    for is_roomy, is_tapered in zip(roomy, taper):
+        row = [note for note, flag in (("roomy thigh", is_roomy), ("strong knee taper", is_tapered)) if flag]
+        notes.append(", ".join(row) or "standard ease")
+    return notes
+
+def recommend_bottom_batch(
+    cols: MeasurementColumns, chart: Optional[CompiledSizeChart] = None
+) -> List[Union[Dict, Exception]]:
+    notes = _fit_notes(cols)
+    if chart is not None:
+        return [
+            match if isinstance(match, Exception) else
+            {"category": "bottom", "size": match.label, "confidence": match.confidence, "rationale": note}
+            for match, note in zip(chart.nearest_batch(cols), notes)
+        ]
+    waist = np.round(cols["waist_natural_cm"] * INCH)
+    inseam = np.round(cols["inseam_cm"] * INCH)
+    errors = cols.missing(("waist_natural_cm", "inseam_cm"))
+    return [
+        error or {"category": "bottom", "size": f"{w:.0f}x{i:.0f}", "confidence": 0.72, "rationale": note}
+        for error, w, i, note in zip(errors, waist, inseam, notes)
+    ]
+
+def recommend_bottom(m: Dict, chart: Optional[CompiledSizeChart] = None) -> Dict:
+    result = recommend_bottom_batch(MeasurementColumns([m]), chart)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
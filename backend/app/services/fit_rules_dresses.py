@@ -0,0 +1,49 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from app.services.size_charts import CompiledSizeChart, MeasurementColumns
+
+INCH = 1/2.54
+
+# Default ladders (inches); a dress is sized by its tightest dimension
+DRESS_LABELS = ("XS", "S", "M", "L", "XL", "XXL")
+BUST_BREAKPOINTS_IN = np.array([33, 35, 37, 40, 43])
+WAIST_BREAKPOINTS_IN = np.array([26, 28, 30, 33, 36])
+HIP_BREAKPOINTS_IN = np.array([36, 38, 40, 43, 46])
+
+def recommend_dress_batch(
+    cols: MeasurementColumns, chart: Optional[CompiledSizeChart] = None
+) -> List[Union[Dict, Exception]]:
+    if chart is not None:
+        return [
+            match if isinstance(match, Exception) else {
+                "category": "dress", "size": match.label, "confidence": match.confidence,
+                "rationale": f"Nearest chart size on {', '.join(f[:-3] for f in match.fields)}",
+            }
+            for match in chart.nearest_batch(cols)
+        ]
+    bust = np.round(cols["chest_cm"] * INCH)
+    waist = np.round(cols["waist_natural_cm"] * INCH)
+    hip = np.round(cols["hip_low_cm"] * INCH)
+    index = np.maximum.reduce([
+        np.searchsorted(BUST_BREAKPOINTS_IN, bust, side="left"),
+        np.searchsorted(WAIST_BREAKPOINTS_IN, waist, side="left"),
+        np.searchsorted(HIP_BREAKPOINTS_IN, hip, side="left"),
+    ])
+    errors = cols.missing(("chest_cm", "waist_natural_cm", "hip_low_cm"))
+    return [
+        error or {
+            "category": "dress",
+            "size": DRESS_LABELS[i],
+            "confidence": 0.68,
+            "rationale": f"Based on bust {b:.0f} in, waist {w:.0f} in, hip {h:.0f} in",
+        }
+        for error, i, b, w, h in zip(errors, index, bust, waist, hip)
+    ]
+
+def recommend_dress(m: Dict, chart: Optional[CompiledSizeChart] = None) -> Dict:
+    result = recommend_dress_batch(MeasurementColumns([m]), chart)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
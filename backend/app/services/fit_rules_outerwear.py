@@ -0,0 +1,45 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from app.services.size_charts import CompiledSizeChart, MeasurementColumns
+
+INCH = 1/2.54
+
+# Default ladders (inches), with room to layer over a top
+OUTERWEAR_LABELS = ("S", "M", "L", "XL")
+CHEST_BREAKPOINTS_IN = np.array([38, 42, 46])
+SHOULDER_BREAKPOINTS_IN = np.array([17, 18.5, 20])
+
+def recommend_outerwear_batch(
+    cols: MeasurementColumns, chart: Optional[CompiledSizeChart] = None
+) -> List[Union[Dict, Exception]]:
+    if chart is not None:
+        return [
+            match if isinstance(match, Exception) else {
+                "category": "outerwear", "size": match.label, "confidence": match.confidence,
+                "rationale": f"Nearest chart size on {', '.join(f[:-3] for f in match.fields)}",
+            }
+            for match in chart.nearest_batch(cols)
+        ]
+    chest_in = np.round(cols["chest_cm"] * INCH)
+    shoulder_in = np.round(cols["shoulder_cm"] * INCH, 1)
+    chest_index = np.searchsorted(CHEST_BREAKPOINTS_IN, chest_in, side="left")
+    shoulder_index = np.searchsorted(SHOULDER_BREAKPOINTS_IN, shoulder_in, side="left")
+    results: List[Union[Dict, Exception]] = []
+    errors = cols.missing(("chest_cm", "shoulder_cm"))
+    for error, chest, shoulder, c, s in zip(errors, chest_in, shoulder_in, chest_index, shoulder_index):
+        if error is not None:
+            results.append(error)
+            continue
+        rationale = f"Based on chest {chest:.0f} in, shoulder {shoulder:.1f} in"
+        if s > c:
+            rationale += " (sized up for shoulders)"
+        results.append({"category": "outerwear", "size": OUTERWEAR_LABELS[max(c, s)], "confidence": 0.7, "rationale": rationale})
+    return results
+
+def recommend_outerwear(m: Dict, chart: Optional[CompiledSizeChart] = None) -> Dict:
+    result = recommend_outerwear_batch(MeasurementColumns([m]), chart)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -1,14 +1,50 @@
-from typing import Dict
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from app.services.size_charts import CompiledSizeChart, MeasurementColumns
+
 INCH = 1/2.54
 
-def recommend_top(m: Dict) -> Dict:
-    chest_in = round(m["chest_cm"] * INCH)
-    shoulder_in = round(m["shoulder_cm"] * INCH)
-    sleeve_in = round(m["sleeve_cm"] * INCH)
-    # simple S/M/L mapping placeholder
-    if chest_in <= 36: size = "S"
-    elif chest_in <= 40: size = "M"
-    elif chest_in <= 44: size = "L"
-    else: size = "XL"
-    rationale = f"Based on chest {chest_in} in, shoulder {shoulder_in} in, sleeve {sleeve_in} in"
-    return {"category": "top", "size": size, "confidence": 0.7, "rationale": rationale}
+# Default chest ladder (inches): <=36 S, <=40 M, <=44 L, else XL
+CHEST_BREAKPOINTS_IN = np.array([36, 40, 44])
+CHEST_LABELS = ("S", "M", "L", "XL")
+
+def recommend_top_batch(
+    cols: MeasurementColumns, chart: Optional[CompiledSizeChart] = None
+) -> List[Union[Dict, Exception]]:
+    chest_in = np.round(cols["chest_cm"] * INCH)
+    shoulder_in = np.round(cols["shoulder_cm"] * INCH)
+    sleeve_in = np.round(cols["sleeve_cm"] * INCH)
+    if chart is not None:
+        results: List[Union[Dict, Exception]] = []
+        for match, *inches in zip(chart.nearest_batch(cols), chest_in, shoulder_in, sleeve_in):
+            if isinstance(match, Exception):
+                results.append(match)
+                continue
+            measured = ", ".join(
+                f"{name} {value:.0f} in"
+                for name, value in zip(("chest", "shoulder", "sleeve"), inches) if value > 0
+            )
+            rationale = f"Nearest chart size on {', '.join(f[:-3] for f in match.fields)}"
+            if measured:
+                rationale += f" ({measured})"
+            results.append({"category": "top", "size": match.label, "confidence": match.confidence, "rationale": rationale})
+        return results
+    sizes = np.searchsorted(CHEST_BREAKPOINTS_IN, chest_in, side="left")
+    errors = cols.missing(("chest_cm", "shoulder_cm", "sleeve_cm"))
+    return [
+        error or {
+            "category": "top",
+            "size": CHEST_LABELS[size],
+            "confidence": 0.7,
+            "rationale": f"Based on chest {chest:.0f} in, shoulder {shoulder:.0f} in, sleeve {sleeve:.0f} in",
+        }
+        for error, size, chest, shoulder, sleeve in zip(errors, sizes, chest_in, shoulder_in, sleeve_in)
+    ]
+
+def recommend_top(m: Dict, chart: Optional[CompiledSizeChart] = None) -> Dict:
+    result = recommend_top_batch(MeasurementColumns([m]), chart)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,335 @@
+"""
+Landmark Replay
+
+Re-scores stored sessions: streams the landmark sets in ``mediapipe_landmarks``
+out of the database in chunks, recomputes measurements with a registered
+formula version (``landmark_engine.FORMULAS``) and writes them to
+``measurements_mediapipe`` under that ``model_version``.
+
+Sessions are read in ``session_id`` order with keyset pagination, so a run
+never holds more than a few chunks in memory. Decoding and the vectorized
+math run on a process pool while the event loop fetches the next chunk and
+writes finished ones. After every chunk that is written (in order), the last
+session id goes to a checkpoint file, and an interrupted run resumes from
+there. Chunks are written delete-then-insert per ``(session, model_version)``
+so replaying a chunk twice leaves one row per session.
+
+A session uses its most recent front and side landmark sets. Rows written
+before the float32 blobs existed are decoded from their JSONB landmarks;
+sessions missing a view or the image dimensions are skipped.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from postgrest.types import ReturnMethod
+from supabase import AsyncClient
+
+from app.core.landmark_engine import (
+    MEASUREMENT_FIELDS,
+    estimate_accuracy_array,
+    get_formula,
+)
+from app.services.landmark_store import LANDMARK_FIELDS, pack_landmarks, unpack_landmarks
+
+
+LANDMARK_COLUMNS = "id, session_id, landmark_type, landmarks_f32, image_width, image_height"
+
+Blob = Union[bytes, str]
+
+
+@dataclass
+class ReplayProgress:
+    """Running totals of a replay."""
+
+    sessions_read: int = 0
+    sessions_scored: int = 0
+    sessions_skipped: int = 0
+    chunks_written: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return progress as a JSON-serializable dict."""
+        return asdict(self)
+
+
+@dataclass
+class ReplayChunk:
+    """Decodable landmark pairs of consecutive sessions."""
+
+    cursor: str
+    session_ids: List[str] = field(default_factory=list)
+    front: List[Blob] = field(default_factory=list)
+    side: List[Blob] = field(default_factory=list)
+    dims: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    skipped: int = 0
+
+
+class ReplayCheckpoint:
+    """Last fully written session id of a replay, kept in a JSON file."""
+
+    def __init__(self, path: Optional[str], model_version: str):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            path: Checkpoint file (None keeps no checkpoint)
+            model_version: Formula version being replayed; a checkpoint left
+                by another version is ignored
+        """
+        self.path = path
+        self.model_version = model_version
+
+    def load(self) -> Tuple[Optional[str], ReplayProgress]:
+        """Return the resume cursor and the progress recorded with it."""
+        if not self.path or not os.path.exists(self.path):
+            return None, ReplayProgress()
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("model_version") != self.model_version:
+            return None, ReplayProgress()
+        return state.get("cursor"), ReplayProgress(**state.get("progress", {}))
+
+    def save(self, cursor: str, progress: ReplayProgress) -> None:
+        """Atomically record ``cursor`` as the last written session."""
+        if not self.path:
+            return
+        state = {"model_version": self.model_version, "cursor": cursor, "progress": progress.to_dict()}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _json_blob(landmarks: Sequence[Dict[str, float]]) -> bytes:
+    """Pack a legacy JSONB landmark list the same way as a stored blob."""
+    return pack_landmarks(np.array([[lm[key] for key in LANDMARK_FIELDS] for lm in landmarks]))
+
+
+def score_sessions(
+    model_version: str,
+    front: Sequence[Blob],
+    side: Sequence[Blob],
+    dims: Sequence[Tuple[int, int, int, int]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode and score a chunk of sessions (runs in pool processes).
+
+    Args:
+        model_version: Registered formula version
+        front: Front-view landmark blobs, one per session
+        side: Side-view landmark blobs, one per session
+        dims: ``(front_width, front_height, side_width, side_height)`` per session
+
+    Returns:
+        Tuple of measurements ``(N, len(MEASUREMENT_FIELDS))`` and accuracy ``(N,)``
+    """
+    formula = get_formula(model_version)
+    front_points = np.stack([unpack_landmarks(blob) for blob in front]).astype(np.float64)
+    side_points = np.stack([unpack_landmarks(blob) for blob in side]).astype(np.float64)
+    image_dims = np.asarray(dims, dtype=np.float64).reshape(-1, 2, 2)
+    matrix = formula(front_points, side_points, image_dims[:, 0], image_dims[:, 1])
+    return matrix, estimate_accuracy_array(front_points, side_points)
+
+
+class LandmarkReplay:
+    """Chunked, checkpointed re-scoring of stored landmark sessions."""
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        model_version: str,
+        chunk_size: int = 1000,
+        executor: Optional[Executor] = None,
+        max_in_flight: int = 4,
+        checkpoint: Optional[str] = None,
+        on_progress: Optional[Callable[[ReplayProgress], Any]] = None,
+    ):
+        """
+        Initialize the replay.
+
+        Args:
+            supabase_client: Async Supabase client
+            model_version: Registered formula version to score with
+            chunk_size: Landmark rows fetched per page (two per session)
+            executor: Pool for decoding and scoring (None scores inline)
+            max_in_flight: Chunks being scored or written at once
+            checkpoint: Checkpoint file path, for resuming interrupted runs
+            on_progress: Optional callback (sync or async) run after every
+                written chunk
+
+        Raises:
+            ValueError: If ``model_version`` has no registered formula
+        """
+        get_formula(model_version)
+        self.db = supabase_client
+        self.model_version = model_version
+        self.chunk_size = max(chunk_size, 2)
+        self.executor = executor
+        self.max_in_flight = max(max_in_flight, 1)
+        self.checkpoint = ReplayCheckpoint(checkpoint, model_version)
+        self.on_progress = on_progress
+        self.progress = ReplayProgress()
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Replay every stored session after the checkpoint.
+
+        Returns:
+            Final progress totals
+        """
+        cursor, self.progress = self.checkpoint.load()
+        in_flight: Deque[Tuple[ReplayChunk, asyncio.Task]] = deque()
+
+        try:
+            async for chunk in self.chunks(cursor):
+                in_flight.append((chunk, asyncio.create_task(self._score_and_write(chunk))))
+                while len(in_flight) >= self.max_in_flight or (in_flight and in_flight[0][1].done()):
+                    await self._finish(*in_flight.popleft())
+            while in_flight:
+                await self._finish(*in_flight.popleft())
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+
+        return self.progress.to_dict()
+
+    async def chunks(self, cursor: Optional[str] = None):
+        """
+        Stream decodable sessions after ``cursor`` in ``session_id`` order.
+
+        Yields:
+            ``ReplayChunk`` per page of landmark rows
+        """
+        while True:
+            query = self.db.table("mediapipe_landmarks")\
+                .select(LANDMARK_COLUMNS)\
+                .order("session_id")\
+                .order("detected_at")\
+                .limit(self.chunk_size)
+            if cursor is not None:
+                query = query.gt("session_id", cursor)
+            rows = (await query.execute()).data
+            if not rows:
+                return
+
+            full_page = len(rows) == self.chunk_size
+            if full_page and rows[0]["session_id"] != rows[-1]["session_id"]:
+                # The last session may continue on the next page: leave it for then
+                last = rows[-1]["session_id"]
+                rows = [row for row in rows if row["session_id"] != last]
+            elif full_page:
+                rows = await self._session_rows(rows[0]["session_id"])
+
+            chunk = await self._decode(rows)
+            cursor = chunk.cursor
+            yield chunk
+
+    async def _session_rows(self, session_id: str) -> List[Dict[str, Any]]:
+        """All landmark rows of one session (when it alone fills a page)."""
+        response = await self.db.table("mediapipe_landmarks")\
+            .select(LANDMARK_COLUMNS)\
+            .eq("session_id", session_id)\
+            .order("detected_at")\
+            .execute()
+        return response.data
+
+    async def _decode(self, rows: List[Dict[str, Any]]) -> ReplayChunk:
+        """Pair the latest front/side rows per session and resolve their blobs."""
+        latest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in rows:
+            # Rows arrive oldest first, so later ones replace earlier ones
+            latest.setdefault(row["session_id"], {})[row["landmark_type"]] = row
+
+        legacy = [
+            row["id"]
+            for views in latest.values()
+            for row in views.values()
+            if not row.get("landmarks_f32")
+        ]
+        legacy_blobs: Dict[str, bytes] = {}
+        if legacy:
+            response = await self.db.table("mediapipe_landmarks")\
+                .select("id, landmarks")\
+                .in_("id", legacy)\
+                .execute()
+            for row in response.data:
+                if row.get("landmarks"):
+                    legacy_blobs[row["id"]] = _json_blob(row["landmarks"])
+
+        chunk = ReplayChunk(cursor=rows[-1]["session_id"])
+        for session_id, views in latest.items():
+            front, side = views.get("front"), views.get("side")
+            pair = [front, side] if front and side else []
+            blobs = [row.get("landmarks_f32") or legacy_blobs.get(row["id"]) for row in pair]
+            dims = [row.get(key) for row in pair for key in ("image_width", "image_height")]
+            if not pair or not all(blobs) or not all(dims):
+                chunk.skipped += 1
+                continue
+            chunk.session_ids.append(session_id)
+            chunk.front.append(blobs[0])
+            chunk.side.append(blobs[1])
+            chunk.dims.append(tuple(dims))
+        return chunk
+
+    async def _score_and_write(self, chunk: ReplayChunk) -> None:
+        if not chunk.session_ids:
+            return
+        loop = asyncio.get_running_loop()
+        if self.executor is None:
+            matrix, accuracy = score_sessions(self.model_version, chunk.front, chunk.side, chunk.dims)
+        else:
+            matrix, accuracy = await loop.run_in_executor(
+                self.executor, score_sessions, self.model_version, chunk.front, chunk.side, chunk.dims
+            )
+
+        rows = [
+            {
+                "session_id": session_id,
+                **dict(zip(MEASUREMENT_FIELDS, values)),
+                "accuracy_estimate": acc,
+                "model_version": self.model_version,
+            }
+            for session_id, values, acc in zip(chunk.session_ids, matrix.tolist(), accuracy.tolist())
+        ]
+        await self.db.table("measurements_mediapipe")\
+            .delete(returning=ReturnMethod.minimal)\
+            .in_("session_id", chunk.session_ids)\
+            .eq("model_version", self.model_version)\
+            .execute()
+        await self.db.table("measurements_mediapipe")\
+            .insert(rows, returning=ReturnMethod.minimal)\
+            .execute()
+
+    async def _finish(self, chunk: ReplayChunk, task: asyncio.Task) -> None:
+        """Wait for the oldest chunk, then advance the checkpoint past it."""
+        await task
+        self.progress.sessions_read += len(chunk.session_ids) + chunk.skipped
+        self.progress.sessions_scored += len(chunk.session_ids)
+        self.progress.sessions_skipped += chunk.skipped
+        self.progress.chunks_written += 1
+        self.checkpoint.save(chunk.cursor, self.progress)
+        if self.on_progress is not None:
+            result = self.on_progress(self.progress)
+            if inspect.isawaitable(result):
+                await result
+
+
+async def replay_landmarks(
+    db_provider: Callable[[], Awaitable[AsyncClient]],
+    model_version: str,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Run a ``LandmarkReplay`` against the client from ``db_provider``."""
+    return await LandmarkReplay(await db_provider(), model_version, **kwargs).run()
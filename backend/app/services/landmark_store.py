@@ -0,0 +1,180 @@
+"""
+Landmark Provenance Store
+
+Persists the MediaPipe landmarks behind every landmark-derived measurement
+to ``mediapipe_landmarks`` so sessions can be replayed and recalibrated.
+
+Each view is stored as a packed little-endian float32 ``(33, 4)`` blob of
+``[x, y, z, visibility]`` rows (528 bytes) in ``landmarks_f32``, about a
+fifth of the size of the same points as JSONB objects. The JSONB
+``landmarks`` column is only filled when ``LANDMARK_STORE_JSON`` is on, for
+consumers that still read it.
+
+Validation runs on request threads, so ``LandmarkWriter`` is a
+``BatchWriter``: ``submit`` only buffers, and a task on the event loop writes
+batches (one session upsert and one landmark insert per batch).
+Provenance is best effort: records are dropped, and counted, when the
+buffer is full or a batch fails to write.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import numpy as np
+from postgrest.types import ReturnMethod
+from supabase import AsyncClient
+
+from app.core.config import settings
+from app.core.database import get_supabase
+from app.core.landmark_engine import MODEL_VERSION, NUM_LANDMARKS
+from app.services.batch_writer import BatchWriter
+
+
+LANDMARK_DTYPE = np.dtype("<f4")
+
+# Packed size of one view: 33 landmarks x [x, y, z, visibility] x float32
+LANDMARK_BYTES = NUM_LANDMARKS * 4 * LANDMARK_DTYPE.itemsize
+
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+
+def pack_landmarks(points: np.ndarray) -> bytes:
+    """
+    Pack one view's landmarks into the stored float32 blob.
+
+    Args:
+        points: ``(33, 4)`` array of ``[x, y, z, visibility]`` rows
+
+    Returns:
+        ``LANDMARK_BYTES`` bytes, row-major little-endian float32
+
+    Raises:
+        ValueError: If ``points`` does not hold 33 landmarks
+    """
+    array = np.asarray(points)
+    if array.shape != (NUM_LANDMARKS, 4):
+        raise ValueError(f"Expected landmarks of shape ({NUM_LANDMARKS}, 4), got {array.shape}")
+    return array.astype(LANDMARK_DTYPE).tobytes()
+
+
+def unpack_landmarks(blob: Union[bytes, bytearray, memoryview, str]) -> np.ndarray:
+    """
+    Unpack a stored landmark blob.
+
+    Args:
+        blob: Raw bytes, or the ``\\x``-prefixed hex string PostgREST
+            returns for ``bytea`` columns
+
+    Returns:
+        ``(33, 4)`` float32 array
+
+    Raises:
+        ValueError: If the blob is not ``LANDMARK_BYTES`` long
+    """
+    if isinstance(blob, str):
+        blob = bytes.fromhex(blob[2:] if blob.startswith("\\x") else blob)
+    if len(blob) != LANDMARK_BYTES:
+        raise ValueError(f"Expected {LANDMARK_BYTES} landmark bytes, got {len(blob)}")
+    return np.frombuffer(blob, dtype=LANDMARK_DTYPE).reshape(NUM_LANDMARKS, 4)
+
+
+def to_bytea(blob: bytes) -> str:
+    """Encode bytes as a PostgREST ``bytea`` literal."""
+    return "\\x" + blob.hex()
+
+
+def landmarks_json(points: np.ndarray) -> List[Dict[str, float]]:
+    """The JSONB view of one view's landmarks (``{x, y, z, visibility}`` objects)."""
+    return [dict(zip(LANDMARK_FIELDS, row)) for row in np.asarray(points, dtype=np.float64).tolist()]
+
+
+@dataclass
+class LandmarkRecord:
+    """One view of a session's landmarks, waiting to be written."""
+
+    id: str
+    session_id: str
+    view: str
+    points: np.ndarray
+    image_width: int
+    image_height: int
+    source_type: str = "mediapipe_web"
+    platform: str = "web_mobile"
+    device_id: Optional[str] = None
+    model_version: str = MODEL_VERSION
+
+    def session_row(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "source_type": self.source_type,
+            "platform": self.platform,
+            "device_id": self.device_id,
+        }
+
+    def landmark_row(self, session_uuid: str, store_json: bool = False) -> Dict[str, Any]:
+        row = {
+            "id": self.id,
+            "session_id": session_uuid,
+            "landmark_type": self.view,
+            "landmarks_f32": to_bytea(pack_landmarks(self.points)),
+            "image_width": self.image_width,
+            "image_height": self.image_height,
+            "model_version": self.model_version,
+        }
+        if store_json:
+            row["landmarks"] = landmarks_json(self.points)
+        return row
+
+
+class LandmarkWriter(BatchWriter[LandmarkRecord]):
+    """Buffered, batching writer of landmark provenance."""
+
+    label = "Landmark provenance"
+
+    def __init__(
+        self,
+        db_provider: Callable[[], Awaitable[AsyncClient]],
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        store_json: bool = False,
+    ):
+        """
+        Initialize the writer (records are accepted once ``start`` runs).
+
+        Args:
+            db_provider: Coroutine returning the Supabase client
+            batch_size: Records per bulk insert; a full batch flushes early
+            flush_interval: Longest time (seconds) a record waits to be written
+            max_pending: Buffered records kept before new ones are dropped
+            store_json: Also fill the JSONB ``landmarks`` column
+        """
+        super().__init__(db_provider, batch_size, flush_interval, max_pending)
+        self.store_json = store_json
+
+    async def _write(self, batch: List[LandmarkRecord]) -> None:
+        db = await self.db_provider()
+        # Front and side share a session: upsert each session once per batch
+        sessions = {record.session_id: record.session_row() for record in batch}
+        upserted = await db.table("measurement_sessions")\
+            .upsert(list(sessions.values()), on_conflict="session_id")\
+            .execute()
+        session_uuids = {row["session_id"]: row["id"] for row in upserted.data}
+
+        rows = [
+            record.landmark_row(session_uuids[record.session_id], self.store_json)
+            for record in batch
+        ]
+        await db.table("mediapipe_landmarks")\
+            .insert(rows, returning=ReturnMethod.minimal)\
+            .execute()
+
+
+# Process-wide writer, started and stopped by the app lifespan
+landmark_writer = LandmarkWriter(
+    get_supabase,
+    batch_size=settings.landmark_writer_batch_size,
+    flush_interval=settings.landmark_writer_flush_interval,
+    max_pending=settings.landmark_writer_max_pending,
+    store_json=settings.landmark_store_json,
+)
@@ -0,0 +1,214 @@
+"""
+Measurement Result Cache
+
+Mobile clients retry ``/measurements/validate`` on flaky networks with the
+exact same landmark payload. Results of landmark-derived sessions are cached
+under a digest of the landmark arrays, image dimensions and formula version,
+so a repeat skips the measurement math, accuracy estimation and provenance
+write and gets the first response back (same landmark ids).
+
+The in-process tier is a ``TTLLRUCache``. With ``MEASUREMENT_CACHE_DIR`` set,
+entries are also kept in a SQLite file shared by every API process on the
+host, so a retry that lands on another worker still hits. Hit rates are
+counted per ``MeasurementInput.platform``; platforms outside ``PLATFORMS``
+share the ``"other"`` counters, so client-sent strings cannot grow them.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.landmark_engine import MODEL_VERSION
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurement_cache (
+    digest TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_measurement_cache_expires ON measurement_cache(expires_at);
+"""
+
+# Expired shared-tier rows are deleted once every this many writes
+PRUNE_EVERY = 256
+
+# Platforms with their own hit-rate counters; anything else counts as "other"
+PLATFORMS = frozenset({"ios", "android", "web_mobile", "web_desktop"})
+
+
+def landmark_digest(
+    front: np.ndarray,
+    side: np.ndarray,
+    front_dims: np.ndarray,
+    side_dims: np.ndarray,
+    model_version: str = MODEL_VERSION,
+) -> str:
+    """
+    Canonical digest of a landmark session.
+
+    Payloads that parse to the same floats (e.g. ``0.5`` and ``0.50``) share
+    a digest.
+
+    Args:
+        front: Front-view landmarks ``(33, 4)``
+        side: Side-view landmarks ``(33, 4)``
+        front_dims: Front image ``[width, height]``
+        side_dims: Side image ``[width, height]``
+        model_version: Formula version the result was computed with
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(model_version.encode("utf-8"))
+    for array in (front, side, front_dims, side_dims):
+        digest.update(np.ascontiguousarray(array, dtype="<f8").tobytes())
+    return digest.hexdigest()
+
+
+class SharedResultStore:
+    """SQLite tier of the measurement cache, shared between processes."""
+
+    def __init__(self, path: str, ttl: float, clock: Callable[[], float] = time.time):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM measurement_cache WHERE digest = ? AND expires_at > ?",
+                (digest, self._clock()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, digest: str, value: Dict[str, Any]) -> None:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO measurement_cache (digest, value, expires_at) VALUES (?, ?, ?)",
+                (digest, json.dumps(value, separators=(",", ":")), now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._conn.execute("DELETE FROM measurement_cache WHERE expires_at <= ?", (now,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MeasurementCache:
+    """Two-tier cache of normalized landmark results with per-platform hit rates."""
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 600.0,
+        shared: Optional[SharedResultStore] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: In-process entries kept before LRU eviction
+            ttl: Seconds an in-process entry stays valid
+            shared: Optional cross-process tier consulted on in-process misses
+        """
+        self.memory = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_hits = 0
+        self._platforms: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "MeasurementCache":
+        """Build the cache from ``MEASUREMENT_CACHE_*`` settings."""
+        shared = None
+        if settings.measurement_cache_dir:
+            os.makedirs(settings.measurement_cache_dir, exist_ok=True)
+            shared = SharedResultStore(
+                os.path.join(settings.measurement_cache_dir, "measurements.sqlite3"),
+                settings.measurement_cache_ttl_seconds,
+            )
+        return cls(
+            maxsize=settings.measurement_cache_max_entries,
+            ttl=settings.measurement_cache_ttl_seconds,
+            shared=shared,
+        )
+
+    def get(self, digest: str, platform: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result, promoting shared-tier hits into memory.
+
+        Args:
+            digest: ``landmark_digest`` of the session
+            platform: Client platform the lookup is counted under (unknown
+                platforms count as ``"other"``)
+
+        Returns:
+            The cached result dict, or None on a miss
+        """
+        value = self.memory.get(digest)
+        if value is None and self.shared is not None:
+            value = self.shared.get(digest)
+            if value is not None:
+                self.memory.set(digest, value)
+                with self._lock:
+                    self.shared_hits += 1
+        self._count(platform if platform in PLATFORMS else "other", value is not None)
+        return value
+
+    def set(self, digest: str, value: Dict[str, Any]) -> None:
+        """Store a result in every tier."""
+        self.memory.set(digest, value)
+        if self.shared is not None:
+            self.shared.set(digest, value)
+
+    def _count(self, platform: str, hit: bool) -> None:
+        with self._lock:
+            counters = self._platforms.setdefault(platform, {"hits": 0, "misses": 0})
+            counters["hits" if hit else "misses"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-process counters, shared-tier hits and hit rates per platform."""
+        with self._lock:
+            platforms = {
+                platform: {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / (counters["hits"] + counters["misses"]), 4),
+                }
+                for platform, counters in self._platforms.items()
+            }
+            shared_hits = self.shared_hits
+        return {
+            **self.memory.stats(),
+            "shared": self.shared is not None,
+            "shared_hits": shared_hits,
+            "platforms": platforms,
+        }
+
+
+# Process-wide cache used by ``normalize_and_validate``
+measurement_cache = MeasurementCache.from_settings()
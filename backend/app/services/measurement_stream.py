@@ -0,0 +1,271 @@
+"""
+Measurement Stream
+
+Backs ``POST /measurements/stream``: reads an NDJSON body of
+``MeasurementInput`` records as it arrives, validates them in chunks of
+``chunk_size`` through ``normalize_and_validate_batch`` (one vectorized pass
+per chunk), adds ``fit_rule_registry`` size recommendations and yields one NDJSON result
+line per record as each chunk finishes.
+
+Only the current chunk and one partial line are held in memory, so a
+multi-gigabyte upload streams through in constant space. A line that is not
+a JSON object, or is longer than ``max_line_bytes``, gets an error result in
+its slot instead of failing the stream. The last line is a summary.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive
+
+from app.core.landmark_engine import MODEL_VERSION
+from app.core.validation import BatchResult, normalize_and_validate_batch
+from app.schemas.errors import ErrorDetail, ErrorResponse
+from app.services.fit_rules import RuleResult, fit_rule_registry
+
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_MAX_LINE_BYTES = 1024 * 1024
+
+# Body chunks buffered between the request reader and the validator
+BODY_QUEUE_CHUNKS = 16
+
+_END = object()
+
+# (record, error) for one NDJSON line; exactly one is set
+ParsedLine = Tuple[Optional[Dict[str, Any]], Optional[ErrorResponse]]
+
+
+def _line_error(code: str, message: str) -> ErrorResponse:
+    return ErrorResponse(
+        type="validation_error",
+        code=code,
+        message=message,
+        errors=[ErrorDetail(field="", message=message)],
+    )
+
+
+def _parse_line(line: bytes) -> ParsedLine:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return None, _line_error("invalid_json", f"Line is not valid JSON: {e}")
+    if not isinstance(record, dict):
+        return None, _line_error("schema", "Each line must be a JSON object")
+    return record, None
+
+
+async def iter_ndjson(
+    chunks: AsyncIterable[bytes], max_line_bytes: int = DEFAULT_MAX_LINE_BYTES
+) -> AsyncIterator[ParsedLine]:
+    """
+    Split a byte stream into parsed NDJSON lines, skipping blank ones.
+
+    Args:
+        chunks: Request body chunks of any size
+        max_line_bytes: Longest accepted line; longer lines are discarded
+            as they arrive and yield a ``line_too_long`` error
+
+    Yields:
+        ``(record, error)`` per non-blank line
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while start <= len(chunk):
+            newline = chunk.find(b"\n", start)
+            end = len(chunk) if newline < 0 else newline
+            if not oversized:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    oversized = True
+                    buffer.clear()
+                    yield None, _line_error(
+                        "line_too_long", f"Line exceeds {max_line_bytes} bytes"
+                    )
+            if newline < 0:
+                break
+            if not oversized and buffer.strip():
+                yield _parse_line(bytes(buffer))
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+    if not oversized and buffer.strip():
+        yield _parse_line(bytes(buffer))
+
+
+def _result_item(
+    index: int, result: BatchResult, rules: Optional[Union[RuleResult, Exception]]
+) -> Dict[str, Any]:
+    if isinstance(result, ErrorResponse):
+        return {"index": index, "status": "error", "error": result.model_dump()}
+    if isinstance(rules, Exception):
+        error = ErrorResponse(
+            type="server_error",
+            code="recommendation_failed",
+            message="Size recommendation failed",
+            errors=[ErrorDetail(field="measurements", message=f"{type(rules).__name__}: {rules}")],
+            session_id=result.session_id,
+        )
+        return {"index": index, "status": "error", "error": error.model_dump()}
+    item = {"index": index, "status": "validated", **result.model_dump()}
+    if rules is not None:
+        item["recommendations"] = rules.recommendations
+        item["unavailable_categories"] = rules.unavailable
+    return item
+
+
+def _process_chunk(
+    chunk: List[Tuple[int, ParsedLine]], recommend: bool
+) -> List[Dict[str, Any]]:
+    """Validate (and recommend for) one chunk; runs on a worker thread."""
+    records = [record for _, (record, error) in chunk if error is None]
+    results = normalize_and_validate_batch(records) if records else []
+    rules: List[Optional[Union[RuleResult, Exception]]] = [None] * len(results)
+    if recommend:
+        validated = [i for i, result in enumerate(results) if not isinstance(result, ErrorResponse)]
+        evaluated = fit_rule_registry.evaluate_batch([results[i].measurements for i in validated])
+        for i, evaluation in zip(validated, evaluated):
+            rules[i] = evaluation
+    position = iter(range(len(results)))
+    items = []
+    for index, (_, error) in chunk:
+        if error is not None:
+            items.append(_result_item(index, error, None))
+        else:
+            i = next(position)
+            items.append(_result_item(index, results[i], rules[i]))
+    return items
+
+
+class BodyReader:
+    """
+    Drains a request body into a bounded queue on its own task.
+
+    The body must be read outside the response: on ASGI servers below spec
+    2.4 a ``StreamingResponse`` listens for disconnects on the same
+    ``receive`` channel and would swallow body messages. The queue bound
+    keeps reading in step with validation, so memory stays constant.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes], max_chunks: int = BODY_QUEUE_CHUNKS):
+        """
+        Start reading.
+
+        Args:
+            chunks: Request body chunks (e.g. ``request.stream()``)
+            max_chunks: Chunks buffered before reading pauses
+        """
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+        self.disconnected = False
+        self._error: Optional[Exception] = None
+        self.task = asyncio.create_task(self._read(chunks))
+
+    async def _read(self, chunks: AsyncIterable[bytes]) -> None:
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    await self.queue.put(chunk)
+        except Exception as e:
+            self._error = e
+            await self.queue.put(e)
+        finally:
+            await self.queue.put(_END)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            item = await self.queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def wait(self) -> bool:
+        """
+        Wait until the whole body has been read (or reading stopped).
+
+        Returns:
+            False if the client disconnected before the body ended
+        """
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.disconnected = isinstance(self._error, ClientDisconnect)
+        return not self.disconnected
+
+    def close(self) -> None:
+        self.task.cancel()
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    ``StreamingResponse`` for results of a body read by a ``BodyReader``.
+
+    Disconnect listening only starts once the reader has consumed the body,
+    so the two never compete for ``http.request`` messages.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, content: AsyncIterable[bytes], reader: BodyReader, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.reader = reader
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        if not await self.reader.wait():
+            return
+        await super().listen_for_disconnect(receive)
+
+
+async def stream_measurements(
+    chunks: AsyncIterable[bytes],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+    recommend: bool = True,
+) -> AsyncIterator[bytes]:
+    """
+    Validate an NDJSON stream of measurement sessions chunk by chunk.
+
+    Args:
+        chunks: Request body chunks
+        chunk_size: Records validated per vectorized pass
+        max_line_bytes: Longest accepted NDJSON line
+        recommend: Add fit-rule recommendations to validated records (a
+            rule that fails turns that record into an error result)
+
+    Yields:
+        NDJSON bytes: one result line per record (with its 0-based
+        ``index``), then a ``summary`` line
+    """
+    summary = {"total": 0, "validated": 0, "failed": 0}
+    pending: List[Tuple[int, ParsedLine]] = []
+
+    async def flush() -> bytes:
+        items = await asyncio.to_thread(_process_chunk, pending, recommend)
+        pending.clear()
+        failed = sum(1 for item in items if item["status"] == "error")
+        summary["total"] += len(items)
+        summary["failed"] += failed
+        summary["validated"] += len(items) - failed
+        return b"".join(
+            json.dumps(item, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+            for item in items
+        )
+
+    index = 0
+    try:
+        async for parsed in iter_ndjson(chunks, max_line_bytes):
+            pending.append((index, parsed))
+            index += 1
+            if len(pending) >= chunk_size:
+                yield await flush()
+        if pending:
+            yield await flush()
+    finally:
+        if isinstance(chunks, BodyReader):
+            chunks.close()
+
+    yield json.dumps({"summary": summary, "model_version": MODEL_VERSION}).encode("utf-8") + b"\n"
@@ -7,7 +7,7 @@ Handles order creation, lifecycle management, and payment processing.
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from enum import Enum
-from supabase import Client
+from supabase import AsyncClient
 import stripe
 import os
 
@@ -27,7 +27,7 @@ class OrderStatus(str, Enum):
 class OrderService:
     """Service for managing orders."""
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         """Initialize order service."""
         self.db = supabase_client
         stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -59,7 +59,7 @@ class OrderService:
             ValueError: If cart is empty or payment fails
         """
         # Get cart items
-        cart_items_response = self.db.table("cart_items")\
+        cart_items_response = await self.db.table("cart_items")\
             .select("*, product_variants(*), products(*)")\
             .eq("cart_id", cart_id)\
             .execute()
@@ -108,7 +108,7 @@ class OrderService:
             "rid": rid
         }
 
-        order_response = self.db.table("orders")\
+        order_response = await self.db.table("orders")\
             .insert(order_data)\
             .execute()
 
@@ -132,12 +132,12 @@ class OrderService:
             }
             order_items.append(order_item)
 
-        self.db.table("order_items")\
+        await self.db.table("order_items")\
             .insert(order_items)\
             .execute()
 
         # Clear cart
-        self.db.table("cart_items")\
+        await self.db.table("cart_items")\
             .delete()\
             .eq("cart_id", cart_id)\
             .execute()
@@ -172,7 +172,7 @@ class OrderService:
         Raises:
             ValueError: If order not found
         """
-        order_response = self.db.table("orders")\
+        order_response = await self.db.table("orders")\
             .select("*")\
             .eq("id", order_id)\
             .eq("user_id", user_id)\
@@ -185,7 +185,7 @@ class OrderService:
         order = order_response.data
 
         # Get order items
-        items_response = self.db.table("order_items")\
+        items_response = await self.db.table("order_items")\
             .select("*, products(*), product_variants(*)")\
             .eq("order_id", order_id)\
             .execute()
@@ -238,7 +238,7 @@ class OrderService:
         Returns:
             List of orders
         """
-        orders_response = self.db.table("orders")\
+        orders_response = await self.db.table("orders")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -261,7 +261,7 @@ class OrderService:
         Raises:
             ValueError: If order cannot be cancelled
         """
-        order_response = self.db.table("orders")\
+        order_response = await self.db.table("orders")\
             .select("*")\
             .eq("id", order_id)\
             .eq("user_id", user_id)\
@@ -288,7 +288,7 @@ class OrderService:
                 raise ValueError(f"Refund failed: {str(e)}")
 
         # Update order status
-        updated_order = self.db.table("orders")\
+        updated_order = await self.db.table("orders")\
             .update({
                 "status": OrderStatus.CANCELLED.value,
                 "updated_at": datetime.utcnow().isoformat()
@@ -328,7 +328,7 @@ class OrderService:
         if estimated_delivery_date:
             update_data["estimated_delivery_date"] = estimated_delivery_date
 
-        updated_order = self.db.table("orders")\
+        updated_order = await self.db.table("orders")\
             .update(update_data)\
             .eq("id", order_id)\
             .execute()
@@ -342,7 +342,7 @@ class OrderService:
         amount_cents: int
     ) -> None:
         """Track referral conversion event."""
-        self.db.table("referral_events")\
+        await self.db.table("referral_events")\
             .insert({
                 "rid": rid,
                 "event_type": "conversion",
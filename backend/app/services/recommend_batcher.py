@@ -0,0 +1,159 @@
+"""
+Recommendation Micro-Batcher
+
+Under load ``/measurements/recommend`` receives many concurrent single-body
+calls. ``MicroBatcher`` holds each call for at most ``max_wait_ms`` (or until
+``max_batch_size`` calls are waiting), scores the whole batch in one pass
+on a worker thread and resolves every caller's future with
+its own result. Callers keep the one-request-one-response API.
+
+``score_size_batch`` is the batch scorer: the bodies are stacked into one
+matrix and ``fit_rule_registry`` sizes each category for every body in the
+batch with one column-wise rule call, so the work per batch grows with the
+number of categories, not the number of callers. Callers sized against the
+same brand size charts share one pass.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Generic, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+
+from app.core.config import settings
+from app.services.fit_rules import RuleResult, fit_rule_registry
+from app.services.size_charts import CompiledSizeChart
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# (measurements, categories, brand size chart per category) for one caller
+SizeRequest = Tuple[Dict[str, Any], Optional[Sequence[str]], Optional[Mapping[str, CompiledSizeChart]]]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects concurrent calls into batches for one scoring pass each.
+
+    ``score_batch`` receives the batched items and returns one result per
+    item, in order. A result that is an ``Exception`` is raised to that
+    caller only; if ``score_batch`` itself raises, every caller in the batch
+    gets the error.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[List[T]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            score_batch: Scores a list of items (runs on a worker thread)
+            max_batch_size: Items that trigger an immediate flush
+            max_wait_ms: Longest time the first item of a batch waits
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batches = 0
+        self.items = 0
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: T) -> R:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: One unit of work for ``score_batch``
+
+        Returns:
+            The item's result
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        """Hand the pending items to a flush task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.to_thread(self.score_batch, [item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters and the mean batch size."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "pending": len(self._pending),
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+def score_size_batch(batch: List[SizeRequest]) -> List[Union[RuleResult, Exception]]:
+    """
+    Evaluate the fit rule registry for a batch of bodies, column-wise.
+
+    Callers with the same charts (the same cached ``CompiledSizeChart``
+    objects, or none) are evaluated together in one registry pass.
+
+    Args:
+        batch: ``(measurements, categories, charts)`` per caller; None
+            categories means every registered category, None charts the
+            default ladders
+
+    Returns:
+        Per caller, its ``RuleResult`` or the exception for that caller
+    """
+    groups: Dict[Tuple[Tuple[str, int], ...], List[int]] = {}
+    for index, (_, _, charts) in enumerate(batch):
+        key = tuple(sorted((category, id(chart)) for category, chart in (charts or {}).items()))
+        groups.setdefault(key, []).append(index)
+
+    results: List[Union[RuleResult, Exception]] = [None] * len(batch)
+    for indices in groups.values():
+        outcomes = fit_rule_registry.evaluate_batch(
+            [batch[index][0] for index in indices],
+            [batch[index][1] for index in indices],
+            batch[indices[0]][2],
+        )
+        for index, outcome in zip(indices, outcomes):
+            results[index] = outcome
+    return results
+
+
+# Process-wide batcher behind ``/measurements/recommend``
+recommend_batcher: MicroBatcher[SizeRequest, RuleResult] = MicroBatcher(
+    score_size_batch,
+    max_batch_size=settings.recommend_batch_max_size,
+    max_wait_ms=settings.recommend_batch_max_wait_ms,
+)
@@ -0,0 +1,91 @@
+"""
+Recommendation Store
+
+Persists the size recommendations served by ``/measurements/recommend`` to
+``size_recommendations`` off the request path. ``RecommendationWriter`` is a
+``BatchWriter``: the response never waits on the database, records are
+written in batches, and are dropped (and counted) when the buffer is full or
+a batch fails.
+
+A recommendation is linked to its ``measurement_sessions`` row when the
+client's ``session_id`` is known; it is never used to create a session.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from postgrest.types import ReturnMethod
+
+from app.core.config import settings
+from app.core.database import get_supabase
+from app.services.batch_writer import BatchWriter
+
+
+@dataclass
+class RecommendationRecord:
+    """One served recommendation, queued for ``size_recommendations``."""
+
+    session_id: Optional[str]
+    category: str
+    size: str
+    confidence: float
+    rationale: Optional[str]
+    model_version: str
+
+    def row(self, session_uuid: Optional[str]) -> Dict[str, Any]:
+        return {
+            "session_id": session_uuid,
+            "category": self.category,
+            "size": self.size,
+            "confidence": self.confidence,
+            "rationale": self.rationale,
+            "model_version": self.model_version,
+        }
+
+
+def recommendation_records(
+    session_id: Optional[str], recommendations: List[Dict[str, Any]]
+) -> List[RecommendationRecord]:
+    """Build writer records from a response's recommendations."""
+    return [
+        RecommendationRecord(
+            session_id=session_id,
+            category=rec["category"],
+            size=rec["size"],
+            confidence=rec["confidence"],
+            rationale=rec.get("rationale"),
+            model_version=rec.get("model_version", "v1.0"),
+        )
+        for rec in recommendations
+    ]
+
+
+class RecommendationWriter(BatchWriter[RecommendationRecord]):
+    """Buffered, batching writer of served size recommendations."""
+
+    label = "Size recommendation"
+
+    async def _write(self, batch: List[RecommendationRecord]) -> None:
+        db = await self.db_provider()
+        session_ids = sorted({record.session_id for record in batch if record.session_id})
+        session_uuids: Dict[str, str] = {}
+        if session_ids:
+            known = await db.table("measurement_sessions")\
+                .select("id, session_id")\
+                .in_("session_id", session_ids)\
+                .execute()
+            session_uuids = {row["session_id"]: row["id"] for row in known.data}
+
+        rows = [record.row(session_uuids.get(record.session_id)) for record in batch]
+        await db.table("size_recommendations")\
+            .insert(rows, returning=ReturnMethod.minimal)\
+            .execute()
+
+
+# Process-wide writer, started and stopped by the app lifespan
+recommendation_writer = RecommendationWriter(
+    get_supabase,
+    batch_size=settings.recommendation_writer_batch_size,
+    flush_interval=settings.recommendation_writer_flush_interval,
+    max_pending=settings.recommendation_writer_max_pending,
+)
@@ -9,7 +9,7 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import secrets
 import hashlib
-from supabase import Client
+from supabase import AsyncClient
 
 
 class ReferralService:
@@ -17,7 +17,7 @@ class ReferralService:
 
     RID_BYTES = 16  # 128-bit RID for security
 
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         """Initialize referral service."""
         self.db = supabase_client
 
@@ -35,7 +35,7 @@ class ReferralService:
         rid = secrets.token_urlsafe(self.RID_BYTES)
 
         # Store referral
-        self.db.table("referrals")\
+        await self.db.table("referrals")\
             .insert({
                 "rid": rid,
                 "referrer_user_id": user_id,
@@ -68,7 +68,7 @@ class ReferralService:
             user_agent: User agent string
         """
         # Verify RID exists
-        referral_response = self.db.table("referrals")\
+        referral_response = await self.db.table("referrals")\
             .select("id")\
             .eq("rid", rid)\
             .eq("active", True)\
@@ -78,7 +78,7 @@ class ReferralService:
             return  # Invalid or inactive RID
 
         # Track click event
-        self.db.table("referral_events")\
+        await self.db.table("referral_events")\
             .insert({
                 "rid": rid,
                 "event_type": "click",
@@ -98,7 +98,7 @@ class ReferralService:
             new_user_id: ID of newly signed up user
         """
         # Verify RID exists
-        referral_response = self.db.table("referrals")\
+        referral_response = await self.db.table("referrals")\
             .select("*")\
             .eq("rid", rid)\
             .eq("active", True)\
@@ -114,7 +114,7 @@ class ReferralService:
             return
 
         # Track signup event
-        self.db.table("referral_events")\
+        await self.db.table("referral_events")\
             .insert({
                 "rid": rid,
                 "event_type": "signup",
@@ -124,7 +124,7 @@ class ReferralService:
             .execute()
 
         # Update referral stats
-        self.db.rpc("increment_referral_signups", {"referral_rid": rid}).execute()
+        await self.db.rpc("increment_referral_signups", {"referral_rid": rid}).execute()
 
     async def track_referral_conversion(
         self,
@@ -141,7 +141,7 @@ class ReferralService:
             amount_cents: Order amount in cents
         """
         # Verify RID exists
-        referral_response = self.db.table("referrals")\
+        referral_response = await self.db.table("referrals")\
             .select("*")\
             .eq("rid", rid)\
             .eq("active", True)\
@@ -153,7 +153,7 @@ class ReferralService:
         referral = referral_response.data[0]
 
         # Track conversion event
-        self.db.table("referral_events")\
+        await self.db.table("referral_events")\
             .insert({
                 "rid": rid,
                 "event_type": "conversion",
@@ -164,7 +164,7 @@ class ReferralService:
             .execute()
 
         # Update referral stats
-        self.db.rpc("increment_referral_conversions", {
+        await self.db.rpc("increment_referral_conversions", {
             "referral_rid": rid,
             "amount": amount_cents
         }).execute()
@@ -188,7 +188,7 @@ class ReferralService:
             Referral performance stats
         """
         # Get user's referrals
-        referrals_response = self.db.table("referrals")\
+        referrals_response = await self.db.table("referrals")\
             .select("*")\
             .eq("referrer_user_id", user_id)\
             .execute()
@@ -206,7 +206,7 @@ class ReferralService:
         rids = [r["rid"] for r in referrals_response.data]
 
         # Get event counts
-        events_response = self.db.table("referral_events")\
+        events_response = await self.db.table("referral_events")\
             .select("event_type, amount_cents")\
             .in_("rid", rids)\
             .execute()
@@ -226,7 +226,7 @@ class ReferralService:
                 revenue_cents += event.get("amount_cents", 0)
 
         # Get total rewards earned
-        rewards_response = self.db.table("referral_rewards")\
+        rewards_response = await self.db.table("referral_rewards")\
             .select("amount_cents")\
             .eq("user_id", user_id)\
             .execute()
@@ -260,7 +260,7 @@ class ReferralService:
         Returns:
             List of rewards
         """
-        rewards_response = self.db.table("referral_rewards")\
+        rewards_response = await self.db.table("referral_rewards")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -289,7 +289,7 @@ class ReferralService:
         reward_cents = min(int(order_amount_cents * 0.10), 5000)
 
         # Create reward record
-        self.db.table("referral_rewards")\
+        await self.db.table("referral_rewards")\
             .insert({
                 "user_id": referrer_user_id,
                 "rid": rid,
@@ -0,0 +1,379 @@
+"""
+Size Chart Index
+
+Compiles brand ``size_charts.measurements`` JSONB into sorted NumPy
+breakpoint arrays so size lookup is a bisect or a vectorized distance query
+instead of per-request JSON walking.
+
+A chart row looks like::
+
+    {"id": "...", "brand_id": "...", "category": "tops", "unit": "in",
+     "measurements": {"S": {"chest": [34, 36], "waist": 30}, "M": {...}}}
+
+Each dimension value may be a single number or a ``[min, max]`` range.
+
+``MeasurementColumns`` holds many bodies column-wise, so a chart (or a fit
+rule's default ladder) can size a whole batch in one array pass.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from supabase import AsyncClient
+
+
+INCH_TO_CM = 2.54
+
+# Size chart dimension name -> normalized measurement key
+CHART_DIMENSION_FIELDS: Dict[str, str] = {
+    "chest": "chest_cm",
+    "bust": "chest_cm",
+    "underbust": "underbust_cm",
+    "neck": "neck_cm",
+    "shoulder": "shoulder_cm",
+    "sleeve": "sleeve_cm",
+    "waist": "waist_natural_cm",
+    "hip": "hip_low_cm",
+    "hips": "hip_low_cm",
+    "thigh": "thigh_cm",
+    "inseam": "inseam_cm",
+    "outseam": "outseam_cm",
+    "rise": "front_rise_cm",
+    "height": "height_cm",
+}
+
+# Relative weight of each measurement when ranking sizes, by category
+CATEGORY_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "tops": {"chest_cm": 3.0, "waist_natural_cm": 1.0, "shoulder_cm": 1.5, "sleeve_cm": 1.0},
+    "bottoms": {"waist_natural_cm": 3.0, "hip_low_cm": 2.0, "inseam_cm": 1.5, "thigh_cm": 1.0},
+    "dresses": {"chest_cm": 2.0, "waist_natural_cm": 2.0, "hip_low_cm": 2.0},
+    "outerwear": {"chest_cm": 3.0, "shoulder_cm": 2.0, "sleeve_cm": 1.5},
+}
+
+# Dimension used to order sizes and answer single-dimension bisect queries
+PRIMARY_FIELD: Dict[str, str] = {
+    "tops": "chest_cm",
+    "bottoms": "waist_natural_cm",
+    "dresses": "chest_cm",
+    "outerwear": "chest_cm",
+}
+
+
+def _field_for(dimension: str) -> str:
+    """Map a chart dimension name (``chest``, ``waist_cm``...) to a measurement key."""
+    name = dimension.strip().lower()
+    if name.endswith("_cm") or name.endswith("_in"):
+        name = name[:-3]
+    return CHART_DIMENSION_FIELDS.get(name, f"{name}_cm")
+
+
+def _bounds(value: Any) -> Tuple[float, float]:
+    """Parse a chart cell (number or ``[min, max]``) into a (low, high) pair."""
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise ValueError(f"Range must have two values, got {value!r}")
+        low, high = float(value[0]), float(value[1])
+        return (low, high) if low <= high else (high, low)
+    number = float(value)
+    return number, number
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class MeasurementColumns:
+    """
+    Measurements of many bodies, one float array per ``*_cm`` key.
+
+    Columns are read from the measurement dicts on first access (missing or
+    non-numeric values become NaN) unless supplied precomputed.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Mapping[str, Any]],
+        columns: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        Initialize the columns.
+
+        Args:
+            rows: Measurement dicts, one per body
+            columns: Already parsed columns (aligned with ``rows``)
+        """
+        self.rows = rows
+        self._columns: Dict[str, np.ndarray] = dict(columns or {})
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = np.array([_number(row.get(name)) for row in self.rows], dtype=np.float64)
+            self._columns[name] = column
+        return column
+
+    def missing(self, names: Sequence[str]) -> List[Optional[ValueError]]:
+        """Per body, a ``ValueError`` naming the absent ``names`` (None if all present)."""
+        present = np.column_stack([self[name] > 0 for name in names]).reshape(len(self), len(names))
+        return [
+            None if row.all() else ValueError(
+                f"Missing measurement(s): {', '.join(name for name, have in zip(names, row) if not have)}"
+            )
+            for row in present
+        ]
+
+    def parsed(self) -> Dict[str, np.ndarray]:
+        """Columns read so far, by measurement key."""
+        return dict(self._columns)
+
+    def take(self, indices: Sequence[int]) -> "MeasurementColumns":
+        """Return the columns of a subset of bodies."""
+        positions = np.asarray(indices, dtype=np.int64)
+        return MeasurementColumns(
+            [self.rows[i] for i in indices],
+            {name: column[positions] for name, column in self._columns.items()},
+        )
+
+
+@dataclass(frozen=True)
+class SizeMatch:
+    """Result of a nearest-size query."""
+
+    label: str
+    distance: float
+    confidence: float
+    fields: Tuple[str, ...]
+    alternatives: Tuple[Tuple[str, float], ...]
+
+
+@dataclass(frozen=True)
+class CompiledSizeChart:
+    """
+    A size chart compiled into dense arrays (all values in cm).
+
+    ``low`` and ``high`` have shape ``(n_sizes, n_fields)`` with NaN where a
+    size does not specify a dimension. Rows are ordered by the category's
+    primary dimension so neighbouring rows are neighbouring sizes.
+    """
+
+    chart_id: Optional[str]
+    brand_id: Optional[str]
+    category: str
+    labels: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    low: np.ndarray
+    high: np.ndarray
+    weights: np.ndarray
+
+    def size_for(self, field: str, value_cm: float) -> Optional[str]:
+        """
+        Bisect for the smallest size whose upper bound fits ``value_cm``.
+
+        Args:
+            field: Measurement key, e.g. ``chest_cm``
+            value_cm: Body measurement in centimeters
+
+        Returns:
+            Size label; the largest size if the body exceeds every bound, or
+            None if no size gives a value for ``field``
+
+        Raises:
+            ValueError: If the chart does not specify ``field``
+        """
+        if field not in self.fields:
+            raise ValueError(f"Size chart has no {field} dimension")
+        highs = self.high[:, self.fields.index(field)]
+        known = np.flatnonzero(~np.isnan(highs))
+        if not len(known):
+            return None
+        order = known[np.argsort(highs[known], kind="stable")]
+        position = int(np.searchsorted(highs[order], value_cm, side="left"))
+        return self.labels[order[min(position, len(order) - 1)]]
+
+    def nearest(self, measurements: Dict[str, float], top_k: int = 3) -> SizeMatch:
+        """
+        Rank every size against a body in one vectorized pass.
+
+        The per-dimension gap is zero inside a size's range and the distance
+        to the nearest bound outside it, relative to the body measurement.
+
+        Args:
+            measurements: Normalized measurements (``*_cm`` keys)
+            top_k: Number of ranked alternatives to return
+
+        Returns:
+            Best matching size with confidence and runner-up sizes
+
+        Raises:
+            ValueError: If the body shares no dimension with the chart
+        """
+        match = self.nearest_batch(MeasurementColumns([measurements]), top_k)[0]
+        if isinstance(match, ValueError):
+            raise match
+        return match
+
+    def nearest_batch(
+        self, bodies: MeasurementColumns, top_k: int = 3
+    ) -> List[Union[SizeMatch, ValueError]]:
+        """
+        Rank every size against many bodies at once.
+
+        Args:
+            bodies: Body measurements, column-wise
+            top_k: Number of ranked alternatives per body
+
+        Returns:
+            Per body, its ``SizeMatch``, or a ``ValueError`` if the body
+            shares no dimension with the chart
+        """
+        body = np.column_stack([bodies[field] for field in self.fields]).reshape(len(bodies), len(self.fields))
+        usable = ~np.isnan(body) & (body > 0)
+        # (bodies, 1, fields) against (sizes, fields); unusable dimensions are NaN
+        target = np.where(usable, body, np.nan)[:, None, :]
+
+        gap = (np.maximum(self.low - target, 0.0) + np.maximum(target - self.high, 0.0)) / target
+        specified = ~np.isnan(gap)
+        weighted = np.where(specified, self.weights * gap * gap, 0.0).sum(axis=2)
+        weight_sum = np.where(specified, self.weights, 0.0).sum(axis=2)
+        scores = np.sqrt(
+            np.divide(weighted, weight_sum, out=np.full(weighted.shape, np.inf), where=weight_sum > 0)
+        )
+        ranked = np.argsort(scores, axis=1, kind="stable")[:, :max(top_k, 1)]
+
+        matches: List[Union[SizeMatch, ValueError]] = []
+        for row in range(len(bodies)):
+            if not usable[row].any():
+                matches.append(ValueError(
+                    f"No overlapping measurements for {self.category} size chart "
+                    f"(needs one of: {', '.join(self.fields)})"
+                ))
+                continue
+            best = int(ranked[row, 0])
+            distance = float(scores[row, best])
+            matches.append(SizeMatch(
+                label=self.labels[best],
+                distance=distance,
+                confidence=round(max(0.5, 0.95 - 5.0 * distance), 2),
+                fields=tuple(field for field, keep in zip(self.fields, usable[row]) if keep),
+                alternatives=tuple((self.labels[i], float(scores[row, i])) for i in ranked[row, 1:]),
+            ))
+        return matches
+
+
+def compile_size_chart(chart: Dict[str, Any]) -> CompiledSizeChart:
+    """
+    Compile a ``size_charts`` row into a ``CompiledSizeChart``.
+
+    Args:
+        chart: Row with ``category``, ``unit`` and ``measurements`` JSONB
+
+    Returns:
+        Compiled chart with values converted to centimeters
+
+    Raises:
+        ValueError: If the chart is empty or a cell is malformed
+    """
+    sizes: Dict[str, Dict[str, Any]] = chart.get("measurements") or {}
+    if not sizes:
+        raise ValueError("Size chart has no sizes")
+
+    category = chart.get("category", "other")
+    scale = INCH_TO_CM if chart.get("unit", "cm") == "in" else 1.0
+
+    fields: List[str] = []
+    for dims in sizes.values():
+        for dimension in dims:
+            field = _field_for(dimension)
+            if field not in fields:
+                fields.append(field)
+
+    labels = list(sizes)
+    low = np.full((len(labels), len(fields)), np.nan)
+    high = np.full((len(labels), len(fields)), np.nan)
+    for row, label in enumerate(labels):
+        for dimension, value in sizes[label].items():
+            if value is None:
+                continue
+            column = fields.index(_field_for(dimension))
+            low[row, column], high[row, column] = _bounds(value)
+    low *= scale
+    high *= scale
+
+    # Order rows by the primary dimension (midpoint), keeping chart order for ties
+    primary = PRIMARY_FIELD.get(category)
+    if primary in fields:
+        column = fields.index(primary)
+        midpoint = (low[:, column] + high[:, column]) / 2
+        order = np.argsort(np.where(np.isnan(midpoint), np.inf, midpoint), kind="stable")
+        labels = [labels[i] for i in order]
+        low, high = low[order], high[order]
+
+    category_weights = CATEGORY_WEIGHTS.get(category, {})
+    weights = np.array([category_weights.get(field, 1.0) for field in fields])
+
+    return CompiledSizeChart(
+        chart_id=chart.get("id"),
+        brand_id=chart.get("brand_id"),
+        category=category,
+        labels=tuple(labels),
+        fields=tuple(fields),
+        low=low,
+        high=high,
+        weights=weights,
+    )
+
+
+class SizeChartIndex:
+    """Registry of compiled size charts keyed by (brand_id, category)."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._charts: Dict[Tuple[str, str], CompiledSizeChart] = {}
+
+    def add(self, chart: Dict[str, Any]) -> CompiledSizeChart:
+        """Compile a ``size_charts`` row and register it."""
+        compiled = compile_size_chart(chart)
+        self._charts[(str(compiled.brand_id), compiled.category)] = compiled
+        return compiled
+
+    def add_all(self, charts: Iterable[Dict[str, Any]]) -> None:
+        """Compile and register many ``size_charts`` rows."""
+        for chart in charts:
+            self.add(chart)
+
+    def get(self, brand_id: str, category: str) -> Optional[CompiledSizeChart]:
+        """Return the compiled chart for a brand/category, if any."""
+        return self._charts.get((str(brand_id), category))
+
+    def remove_brand(self, brand_id: str) -> None:
+        """Drop every compiled chart for a brand."""
+        for key in [key for key in self._charts if key[0] == str(brand_id)]:
+            del self._charts[key]
+
+    async def load_brand(self, db: AsyncClient, brand_id: str) -> None:
+        """
+        Fetch and compile all size charts for a brand.
+
+        Args:
+            db: Supabase client
+            brand_id: Brand ID
+        """
+        response = await db.table("size_charts")\
+            .select("*")\
+            .eq("brand_id", brand_id)\
+            .execute()
+
+        self.remove_brand(brand_id)
+        self.add_all(response.data)
+
+    def __len__(self) -> int:
+        return len(self._charts)
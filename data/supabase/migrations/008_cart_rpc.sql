@@ -0,0 +1,88 @@
+-- Cart RPC Migration
+-- Collapses add-to-cart into a single round trip and enables joined cart reads
+
+-- Columns written by CartService but missing from 003_commerce_tables.sql
+ALTER TABLE cart_items ADD COLUMN IF NOT EXISTS recommended BOOLEAN DEFAULT FALSE;
+ALTER TABLE cart_items ADD COLUMN IF NOT EXISTS fit_summary JSONB DEFAULT '{}'::jsonb;
+
+-- Foreign keys so PostgREST can embed products(*) / product_variants(*)
+-- (products is created in 004, after cart_items)
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_cart_items_product') THEN
+    ALTER TABLE cart_items
+      ADD CONSTRAINT fk_cart_items_product
+      FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE;
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'fk_cart_items_variant') THEN
+    ALTER TABLE cart_items
+      ADD CONSTRAINT fk_cart_items_variant
+      FOREIGN KEY (variant_id) REFERENCES product_variants(id) ON DELETE CASCADE;
+  END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_cart_items_cart_variant ON cart_items(cart_id, variant_id);
+
+-- Add (or increment) a cart item and return it formatted with product and
+-- variant details. Raises 'Variant not found' / 'Insufficient inventory'.
+CREATE OR REPLACE FUNCTION cart_add_item(
+  p_user_id UUID,
+  p_product_id UUID,
+  p_variant_sku TEXT,
+  p_quantity INTEGER,
+  p_recommended BOOLEAN DEFAULT FALSE,
+  p_fit_summary JSONB DEFAULT '{}'::jsonb,
+  p_max_quantity INTEGER DEFAULT 5
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_variant product_variants%ROWTYPE;
+  v_product products%ROWTYPE;
+  v_cart_id UUID;
+  v_item cart_items%ROWTYPE;
+BEGIN
+  SELECT * INTO v_variant
+  FROM product_variants
+  WHERE sku = p_variant_sku AND product_id = p_product_id;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Variant not found';
+  END IF;
+
+  IF v_variant.stock < p_quantity THEN
+    RAISE EXCEPTION 'Insufficient inventory';
+  END IF;
+
+  SELECT * INTO v_product FROM products WHERE id = p_product_id;
+
+  SELECT id INTO v_cart_id FROM carts WHERE user_id = p_user_id ORDER BY created_at LIMIT 1;
+  IF v_cart_id IS NULL THEN
+    INSERT INTO carts (user_id) VALUES (p_user_id) RETURNING id INTO v_cart_id;
+  END IF;
+
+  UPDATE cart_items
+  SET quantity = LEAST(quantity + p_quantity, p_max_quantity),
+      updated_at = NOW()
+  WHERE cart_id = v_cart_id AND variant_id = v_variant.id
+  RETURNING * INTO v_item;
+
+  IF NOT FOUND THEN
+    INSERT INTO cart_items (cart_id, product_id, variant_id, variant_sku, quantity, recommended, fit_summary)
+    VALUES (v_cart_id, p_product_id, v_variant.id, v_variant.sku, p_quantity, p_recommended, COALESCE(p_fit_summary, '{}'::jsonb))
+    RETURNING * INTO v_item;
+  END IF;
+
+  RETURN jsonb_build_object(
+    'item_id', v_item.id,
+    'product_id', v_product.id,
+    'variant_sku', v_variant.sku,
+    'name', v_product.name,
+    'size_label', v_variant.label,
+    'qty', v_item.quantity,
+    'unit_price', v_variant.price_cents,
+    'currency', v_variant.currency,
+    'recommended', COALESCE(v_item.recommended, FALSE),
+    'fit_summary', COALESCE(v_item.fit_summary, '{}'::jsonb)
+  );
+END;
+$$ LANGUAGE plpgsql;
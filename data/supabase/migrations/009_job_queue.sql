@@ -0,0 +1,34 @@
+-- Job Queue Migration
+-- Shared work queue for background workers (workers/runtime PostgresQueue).
+-- Workers claim rows with FOR UPDATE SKIP LOCKED; a reserved row's
+-- visible_at is its visibility deadline.
+
+CREATE TABLE IF NOT EXISTS job_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    queue TEXT NOT NULL,
+    body JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    visible_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_queue_visible ON job_queue(queue, visible_at);
+
+-- Messages that exhausted their retries
+CREATE TABLE IF NOT EXISTS job_queue_dead (
+    id UUID PRIMARY KEY,
+    queue TEXT NOT NULL,
+    body JSONB NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    failed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_dead_queue ON job_queue_dead(queue, failed_at);
+
+-- Only the service role (workers) touches the queue
+ALTER TABLE job_queue ENABLE ROW LEVEL SECURITY;
+ALTER TABLE job_queue_dead ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE job_queue IS 'Background worker queue (avatar, render, notification jobs)';
+COMMENT ON TABLE job_queue_dead IS 'Dead-lettered background jobs';
@@ -0,0 +1,25 @@
+-- Landmark Blob Migration
+-- Stores each view's MediaPipe landmarks as a packed little-endian float32
+-- (33, 4) blob of [x, y, z, visibility] rows (528 bytes) written by the API's
+-- landmark provenance writer. The JSONB landmarks column becomes optional
+-- and is only filled when LANDMARK_STORE_JSON is on.
+
+ALTER TABLE mediapipe_landmarks ADD COLUMN IF NOT EXISTS landmarks_f32 BYTEA;
+ALTER TABLE mediapipe_landmarks ADD COLUMN IF NOT EXISTS image_width INT;
+ALTER TABLE mediapipe_landmarks ADD COLUMN IF NOT EXISTS image_height INT;
+ALTER TABLE mediapipe_landmarks ALTER COLUMN landmarks DROP NOT NULL;
+
+ALTER TABLE mediapipe_landmarks DROP CONSTRAINT IF EXISTS mediapipe_landmarks_payload;
+ALTER TABLE mediapipe_landmarks ADD CONSTRAINT mediapipe_landmarks_payload
+    CHECK (landmarks_f32 IS NOT NULL OR landmarks IS NOT NULL);
+ALTER TABLE mediapipe_landmarks DROP CONSTRAINT IF EXISTS mediapipe_landmarks_f32_length;
+ALTER TABLE mediapipe_landmarks ADD CONSTRAINT mediapipe_landmarks_f32_length
+    CHECK (landmarks_f32 IS NULL OR octet_length(landmarks_f32) = 528);
+
+-- Replay reads sessions' landmark pairs in order
+CREATE INDEX IF NOT EXISTS idx_mediapipe_landmarks_session ON mediapipe_landmarks(session_id, landmark_type);
+
+COMMENT ON COLUMN mediapipe_landmarks.landmarks_f32 IS
+    'Packed little-endian float32 (33, 4) [x, y, z, visibility] rows';
+COMMENT ON COLUMN mediapipe_landmarks.landmarks IS
+    'Optional JSONB view of the landmarks (see LANDMARK_STORE_JSON)';
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Count PostgREST round trips per CartService operation.
+
+Runs each cart operation against the backend tests' in-memory client
+(``tests/backend/conftest.py``) and prints how many ``execute()`` calls it
+issued, plus the wall time per operation. No database is needed.
+
+Usage:
+    python scripts/bench_cart_round_trips.py [--iterations 1000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+sys.path.insert(0, str(REPO_ROOT))
+
+from app.services.cart_service import CartService  # noqa: E402
+from tests.backend.conftest import FakeSupabase  # noqa: E402
+
+
+PRODUCT = {"id": "prod-1", "name": "Oxford Shirt"}
+VARIANT = {"id": "var-1", "sku": "OX-M", "label": "M", "price_cents": 4200, "currency": "USD", "stock": 10}
+ITEM = {
+    "id": "item-1",
+    "cart_id": "cart-1",
+    "product_id": "prod-1",
+    "variant_id": "var-1",
+    "quantity": 1,
+    "recommended": True,
+    "fit_summary": {},
+    "products": PRODUCT,
+    "product_variants": VARIANT,
+}
+CART = {"id": "cart-1", "user_id": "user-1", "cart_items": [ITEM]}
+RPC_ITEM = {
+    "item_id": "item-1", "product_id": "prod-1", "variant_sku": "OX-M", "name": "Oxford Shirt",
+    "size_label": "M", "qty": 1, "unit_price": 4200, "currency": "USD",
+    "recommended": True, "fit_summary": {},
+}
+
+
+OPERATIONS: List[Tuple[str, Callable[[CartService], Any]]] = [
+    ("get_cart", lambda svc: svc.get_cart("user-1")),
+    ("add_item", lambda svc: svc.add_item("user-1", "prod-1", "OX-M", 1, recommended=True)),
+    ("_format_cart_item (joined row)", lambda svc: svc._format_cart_item(ITEM)),
+    ("_format_cart_item (bare row)", lambda svc: svc._format_cart_item({"id": "item-1"})),
+]
+
+
+def measure(iterations: int) -> List[Tuple[str, int, float]]:
+    """Return (operation, round trips, microseconds per call) rows."""
+    rows = []
+    for label, operation in OPERATIONS:
+        client = FakeSupabase(responses={
+            "carts": [CART],
+            "cart_items": [ITEM],
+            "rpc:cart_add_item": RPC_ITEM,
+        })
+        service = CartService(client)
+
+        asyncio.run(operation(service))
+        trips = len(client.round_trips)
+
+        async def loop() -> None:
+            for _ in range(iterations):
+                await operation(service)
+
+        start = time.perf_counter()
+        asyncio.run(loop())
+        elapsed_us = (time.perf_counter() - start) / iterations * 1e6
+        rows.append((label, trips, elapsed_us))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'operation':<34} {'round trips':>11} {'us/call':>10}")
+    for label, trips, elapsed_us in measure(args.iterations):
+        print(f"{label:<34} {trips:>11} {elapsed_us:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
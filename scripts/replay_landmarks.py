@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Re-score stored landmark sessions with a measurement formula version.
+
+Streams ``mediapipe_landmarks`` in chunks, recomputes measurements on a
+process pool and writes them to ``measurements_mediapipe`` under the given
+``model_version``. Progress is checkpointed after every written chunk; rerun
+the same command to resume an interrupted replay.
+
+Usage:
+    python scripts/replay_landmarks.py --model-version v1.0-mediapipe \\
+        [--chunk-size 1000] [--processes 8] [--checkpoint replay.json] [--restart]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from app.core.database import close_supabase, get_supabase  # noqa: E402
+from app.core.landmark_engine import MODEL_VERSION  # noqa: E402
+from app.services.landmark_replay import LandmarkReplay, ReplayProgress  # noqa: E402
+
+
+async def replay(args: argparse.Namespace) -> dict:
+    started = time.perf_counter()
+
+    def report(progress: ReplayProgress) -> None:
+        rate = progress.sessions_read / max(time.perf_counter() - started, 1e-9)
+        print(
+            f"chunk {progress.chunks_written}: {progress.sessions_scored} scored, "
+            f"{progress.sessions_skipped} skipped ({rate:,.0f} sessions/s)",
+            flush=True,
+        )
+
+    executor = ProcessPoolExecutor(max_workers=args.processes) if args.processes > 1 else None
+    try:
+        engine = LandmarkReplay(
+            await get_supabase(),
+            args.model_version,
+            chunk_size=args.chunk_size,
+            executor=executor,
+            max_in_flight=args.in_flight or args.processes + 1,
+            checkpoint=args.checkpoint,
+            on_progress=report,
+        )
+        if args.restart:
+            engine.checkpoint.clear()
+        return await engine.run()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        await close_supabase()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-version", default=MODEL_VERSION, help="Registered formula version")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Landmark rows per page")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Scoring processes")
+    parser.add_argument("--in-flight", type=int, default=0, help="Chunks scored/written at once (default processes + 1)")
+    parser.add_argument("--checkpoint", default="landmark-replay.json", help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(replay(args))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"done: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Shared fixtures for backend tests: an in-memory Supabase/PostgREST stand-in
+(``supabase``) and MediaPipe pose factories (``make_pose``,
+``landmark_payload``).
+"""
+
+import asyncio
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+
+class FakeResponse:
+    """What ``execute()`` returns: ``data`` (and ``count``)."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """
+    Chainable query builder recording what it would send.
+
+    Filters, ordering and limits are applied by ``FakeSupabase`` when the
+    query runs against its in-memory tables; unknown builder methods chain
+    as no-ops.
+    """
+
+    def __init__(self, client: "FakeSupabase", target: str, params: Optional[Dict[str, Any]] = None):
+        self.client = client
+        self.target = target
+        self.params = params
+        self.op = "rpc" if params is not None else "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.kwargs: Dict[str, Any] = {}
+        self.filters: Dict[str, Any] = {}
+        self._predicates: List[Callable[[Dict[str, Any]], bool]] = []
+        self.sort: List[tuple] = []
+        self.bounds: Optional[tuple] = None
+
+    def __getattr__(self, name: str) -> Callable[..., "FakeQuery"]:
+        return lambda *args, **kwargs: self
+
+    def _write(self, op: str, payload: Any = None, **kwargs: Any) -> "FakeQuery":
+        self.op, self.payload, self.kwargs = op, payload, kwargs
+        return self
+
+    def select(self, columns: str = "*", **kwargs: Any) -> "FakeQuery":
+        self.columns = columns
+        return self
+
+    def insert(self, payload: Any, **kwargs: Any) -> "FakeQuery":
+        return self._write("insert", payload, **kwargs)
+
+    def upsert(self, payload: Any, **kwargs: Any) -> "FakeQuery":
+        return self._write("upsert", payload, **kwargs)
+
+    def update(self, payload: Any, **kwargs: Any) -> "FakeQuery":
+        return self._write("update", payload, **kwargs)
+
+    def delete(self, **kwargs: Any) -> "FakeQuery":
+        return self._write("delete", **kwargs)
+
+    def _filter(self, column: str, value: Any, test: Callable[[Any], bool]) -> "FakeQuery":
+        self.filters[column] = value
+        self._predicates.append(lambda row: column in row and test(row[column]))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, value, lambda cell: cell == value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, value, lambda cell: cell != value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, value, lambda cell: cell > value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, value, lambda cell: cell < value)
+
+    def in_(self, column: str, values: Any) -> "FakeQuery":
+        values = list(values)
+        return self._filter(column, values, lambda cell: cell in values)
+
+    def order(self, column: str, desc: bool = False, **kwargs: Any) -> "FakeQuery":
+        self.sort.append((column, desc))
+        return self
+
+    def limit(self, n: int, **kwargs: Any) -> "FakeQuery":
+        self.bounds = (0, n)
+        return self
+
+    def range(self, start: int, end: int, **kwargs: Any) -> "FakeQuery":
+        self.bounds = (start, end + 1)
+        return self
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        return all(predicate(row) for predicate in self._predicates)
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """The write payload as a list of rows."""
+        if self.payload is None:
+            return []
+        return [self.payload] if isinstance(self.payload, dict) else list(self.payload)
+
+    @property
+    def minimal(self) -> bool:
+        returning = self.kwargs.get("returning")
+        return getattr(returning, "value", returning) == "minimal"
+
+    async def execute(self) -> FakeResponse:
+        return await self.client.execute(self)
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the async Supabase client.
+
+    Each executed query is one round trip. It is answered, in order of
+    precedence, by:
+
+    * ``error``: raised by every query (a database outage)
+    * ``handler(query)``: returns the response data, or None to fall through
+    * ``responses[target]``: fixed data (or an exception to raise) per table
+      or ``"rpc:<name>"``
+    * ``tables``: in-memory rows that selects filter, order and page, and
+      inserts, upserts, updates and deletes modify
+    """
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        responses: Optional[Dict[str, Any]] = None,
+        handler: Optional[Callable[[FakeQuery], Any]] = None,
+        latency: float = 0.0,
+    ):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.responses = dict(responses or {})
+        self.handler = handler
+        self.latency = latency
+        self.error: Optional[Exception] = None
+        self.queries: List[FakeQuery] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def round_trips(self) -> List[str]:
+        return [query.target for query in self.queries]
+
+    def calls(self, op: Optional[str] = None, target: Optional[str] = None) -> List[FakeQuery]:
+        """Executed queries, optionally only one operation and/or table."""
+        return [
+            query for query in self.queries
+            if (op is None or query.op == op) and (target is None or query.target == target)
+        ]
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> FakeQuery:
+        return FakeQuery(self, f"rpc:{name}", params)
+
+    async def execute(self, query: FakeQuery) -> FakeResponse:
+        self.queries.append(query)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.error is not None:
+                raise self.error
+            data = self.handler(query) if self.handler is not None else None
+            if data is None and query.target in self.responses:
+                data = self.responses[query.target]
+            if isinstance(data, Exception):
+                raise data
+            if data is None:
+                data = self._run(query)
+            return FakeResponse(data)
+        finally:
+            self.in_flight -= 1
+
+    def _run(self, query: FakeQuery) -> List[Dict[str, Any]]:
+        rows = self.tables.setdefault(query.target, [])
+        if query.op == "insert":
+            rows.extend(dict(row) for row in query.rows)
+            return [] if query.minimal else query.rows
+        if query.op == "upsert":
+            keys = [key.strip() for key in (query.kwargs.get("on_conflict") or "id").split(",")]
+            for row in query.rows:
+                existing = next((r for r in rows if all(r.get(k) == row.get(k) for k in keys)), None)
+                if existing is None:
+                    rows.append(dict(row))
+                else:
+                    existing.update(row)
+            return [] if query.minimal else query.rows
+        matching = [row for row in rows if query.matches(row)]
+        if query.op == "update":
+            for row in matching:
+                row.update(query.payload)
+            return matching
+        if query.op == "delete":
+            self.tables[query.target] = [row for row in rows if not query.matches(row)]
+            return matching
+        for column, desc in reversed(query.sort):
+            matching.sort(key=lambda row: row[column], reverse=desc)
+        if query.bounds is not None:
+            matching = matching[query.bounds[0]:query.bounds[1]]
+        columns = [column.strip() for column in query.columns.split(",")]
+        if query.columns == "*" or not all(re.fullmatch(r"\w+", column) for column in columns):
+            return [dict(row) for row in matching]
+        return [{column: row.get(column) for column in columns} for row in matching]
+
+
+def random_pose(seed: int = 0, visibility: float = 0.95) -> np.ndarray:
+    """A reproducible random ``(33, 4)`` MediaPipe pose with a fixed visibility."""
+    rng = np.random.default_rng(seed)
+    pose = np.empty((33, 4))
+    pose[:, :2] = rng.uniform(0.1, 0.9, size=(33, 2))
+    pose[:, 2] = rng.uniform(-0.2, 0.2, size=33)
+    pose[:, 3] = visibility
+    return pose
+
+
+def pose_payload(pose: np.ndarray, width: int = 1080, height: int = 1920) -> Dict[str, Any]:
+    """A ``MediaPipeLandmarks`` request body for a pose."""
+    return {
+        "landmarks": [dict(zip(("x", "y", "z", "visibility"), row)) for row in pose.tolist()],
+        "timestamp": "2025-01-01T00:00:00Z",
+        "image_width": width,
+        "image_height": height,
+    }
+
+
+@pytest.fixture
+def supabase() -> Callable[..., FakeSupabase]:
+    """Factory for ``FakeSupabase`` clients."""
+    return FakeSupabase
+
+
+@pytest.fixture
+def make_pose() -> Callable[..., np.ndarray]:
+    """Factory for reproducible MediaPipe poses (``random_pose``)."""
+    return random_pose
+
+
+@pytest.fixture
+def landmark_payload() -> Callable[..., Dict[str, Any]]:
+    """``MediaPipeLandmarks`` body for a seeded pose: ``landmark_payload(seed, width=1080)``."""
+    def build(seed: int, width: int = 1080) -> Dict[str, Any]:
+        return pose_payload(random_pose(seed), width)
+    return build
@@ -0,0 +1,78 @@
+"""
+Tests for CartService round trips against the in-memory Supabase stand-in.
+"""
+
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError
+
+from backend.app.services.cart_service import CartService
+
+
+ITEM = {
+    "id": "item-1",
+    "quantity": 2,
+    "recommended": True,
+    "fit_summary": {"confidence": 88},
+    "products": {"id": "prod-1", "name": "Oxford Shirt"},
+    "product_variants": {"id": "var-1", "sku": "OX-M", "label": "M", "price_cents": 4200, "currency": "USD"},
+}
+
+
+class TestCartRoundTrips:
+    """Each cart operation should cost a single PostgREST round trip."""
+
+    def test_get_cart_single_embedded_select(self, supabase):
+        """Cart, items, products and variants come back in one select."""
+        client = supabase(responses={"carts": [{"id": "cart-1", "cart_items": [ITEM]}]})
+
+        cart = asyncio.run(CartService(client).get_cart("user-1"))
+
+        assert client.round_trips == ["carts"]
+        assert cart["items"][0]["variant_sku"] == "OX-M"
+        assert cart["totals"]["subtotal"] == 8400
+
+    def test_add_item_single_rpc(self, supabase):
+        """Add-to-cart is one RPC call that returns the formatted item."""
+        formatted = {"item_id": "item-1", "variant_sku": "OX-M", "qty": 1}
+        client = supabase(responses={"rpc:cart_add_item": formatted})
+
+        item = asyncio.run(CartService(client).add_item("user-1", "prod-1", "OX-M", 1))
+
+        assert client.round_trips == ["rpc:cart_add_item"]
+        assert item == formatted
+        assert client.queries[-1].params["p_max_quantity"] == CartService.MAX_QUANTITY_PER_ITEM
+
+    def test_add_item_maps_rpc_errors(self, supabase):
+        """Database-side inventory errors surface as ValueError."""
+        client = supabase(responses={"rpc:cart_add_item": APIError({"message": "Insufficient inventory"})})
+
+        with pytest.raises(ValueError, match="Insufficient inventory"):
+            asyncio.run(CartService(client).add_item("user-1", "prod-1", "OX-M", 1))
+
+    def test_format_joined_item_without_lookups(self, supabase):
+        """Joined rows are formatted with zero extra queries."""
+        client = supabase()
+
+        item = asyncio.run(CartService(client)._format_cart_item(ITEM))
+
+        assert client.round_trips == []
+        assert item["name"] == "Oxford Shirt"
+
+
+class TestConcurrency:
+    """Database calls must not block the event loop."""
+
+    def test_concurrent_requests_overlap(self, supabase):
+        """Concurrent cart reads are all in flight at once."""
+        client = supabase(responses={"carts": [{"id": "cart-1", "cart_items": [ITEM]}]}, latency=0.05)
+        service = CartService(client)
+
+        async def run():
+            return await asyncio.gather(*(service.get_cart(f"user-{i}") for i in range(100)))
+
+        carts = asyncio.run(run())
+
+        assert len(carts) == 100
+        assert client.max_in_flight == 100
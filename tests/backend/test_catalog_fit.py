@@ -0,0 +1,155 @@
+"""
+Tests for the catalog-wide size recommender.
+"""
+
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.schemas.measure_schema import MeasurementNormalized
+from backend.app.services.catalog_fit import (
+    CatalogFitService,
+    build_variant_matrix,
+    invalidate_catalog_fit,
+    score_variants,
+    top_k_per_product,
+)
+# Routers import through ``app.*``; override the dependency object they use
+from app.services.catalog_fit import get_catalog_fit
+
+
+def variant(sku, label, chest=None, waist=None, hip=None, stock=5):
+    return {
+        "sku": sku,
+        "label": label,
+        "stock": stock,
+        "price_cents": 4200,
+        "attributes": {"chest_cm": chest, "waist_cm": waist, "hip_cm": hip},
+    }
+
+
+PRODUCTS = [
+    {
+        "id": "tee",
+        "name": "Tee",
+        "category": "tops",
+        "active": True,
+        "product_variants": [
+            variant("TEE-S", "S", chest=90),
+            variant("TEE-M", "M", chest=100),
+            variant("TEE-L", "L", chest=110),
+        ],
+    },
+    {
+        "id": "chino",
+        "name": "Chino",
+        "category": "bottoms",
+        "active": True,
+        "product_variants": [
+            variant("CH-32", "32", waist=81, hip=101, stock=0),
+            variant("CH-34", "34", waist=86, hip=106),
+        ],
+    },
+    {"id": "empty", "name": "No variants", "category": "tops", "active": True, "product_variants": []},
+]
+
+BODY = {"chest_cm": 99.0, "waist_natural_cm": 82.0, "hip_low_cm": 100.0}
+
+
+class TestCatalogFit:
+    """Test columnar scoring and grouped top-k selection."""
+
+    def test_matrix_is_columnar(self):
+        """Variants are flattened into aligned arrays."""
+        matrix = build_variant_matrix(PRODUCTS)
+
+        assert len(matrix) == 5
+        assert matrix.product_ids == ["tee", "chino"]
+        assert matrix.attributes.shape == (5, 3)
+        assert np.isnan(matrix.attributes[0, 1])
+
+    def test_non_numeric_attributes_are_unspecified(self):
+        """Attributes that are not finite numbers become NaN instead of failing the load."""
+        products = [{
+            "id": "tee", "name": "Tee", "category": "tops",
+            "product_variants": [
+                {"sku": "TEE-M", "attributes": {"chest_cm": "100", "waist_cm": "n/a", "hip_cm": "inf"}},
+            ],
+        }]
+
+        matrix = build_variant_matrix(products)
+
+        assert matrix.attributes[0, 0] == 100.0
+        assert np.isnan(matrix.attributes[0, 1:]).all()
+
+    def test_top_k_per_product(self):
+        """Each product keeps its best k variants in score order."""
+        matrix = build_variant_matrix(PRODUCTS)
+        scores = score_variants(matrix, BODY)
+
+        best = top_k_per_product(matrix, scores, k=1)
+        assert [matrix.skus[i] for i in best] == ["TEE-M", "CH-32"]
+
+        best_two = top_k_per_product(matrix, scores, k=2)
+        assert [matrix.skus[i] for i in best_two] == ["TEE-M", "TEE-S", "CH-32", "CH-34"]
+
+    def test_best_sizes_skips_out_of_stock(self, supabase):
+        """The feed filters out-of-stock variants and ranks products by fit."""
+        service = CatalogFitService(supabase(tables={"products": PRODUCTS}))
+        measurement = MeasurementNormalized(session_id="s", measurements=BODY, source="user_input")
+
+        feed = asyncio.run(service.best_sizes(measurement))
+
+        assert [entry["product_id"] for entry in feed] == ["tee", "chino"]
+        assert feed[0]["variants"][0]["label"] == "M"
+        assert feed[1]["variants"][0]["sku"] == "CH-34"
+
+    def test_matrix_reloads_after_ttl_or_catalog_change(self, supabase):
+        """A loaded matrix is reused until it expires or a catalog import invalidates it."""
+        now = [0.0]
+        db = supabase(tables={"products": PRODUCTS})
+        service = CatalogFitService(db, ttl=60, clock=lambda: now[0])
+        measurement = MeasurementNormalized(session_id="s", measurements=BODY, source="user_input")
+
+        asyncio.run(service.best_sizes(measurement))
+        asyncio.run(service.best_sizes(measurement))
+        assert len(db.round_trips) == 1
+
+        db.tables["products"] = PRODUCTS[1:]
+        invalidate_catalog_fit()
+        feed = asyncio.run(service.best_sizes(measurement))
+        assert len(db.round_trips) == 2
+        assert [entry["product_id"] for entry in feed] == ["chino"]
+
+        now[0] = 61.0
+        asyncio.run(service.best_sizes(measurement))
+        assert len(db.round_trips) == 3
+
+
+class TestShopYourSizeRoute:
+    """Test the ``/measurements/shop`` feed endpoint."""
+
+    def test_feed_ranks_products_for_the_body(self, supabase):
+        """The endpoint returns the best in-stock variants, filtered by category."""
+        service = CatalogFitService(supabase(tables={"products": PRODUCTS}))
+        app.dependency_overrides[get_catalog_fit] = lambda: service
+        client = TestClient(app)
+        headers = {"X-API-Key": "staging-secret-key"}
+        try:
+            response = client.post("/measurements/shop", json=BODY, headers=headers)
+            assert response.status_code == 200
+            assert [entry["product_id"] for entry in response.json()["products"]] == ["tee", "chino"]
+
+            tops = client.post(
+                "/measurements/shop", params={"category": "tops", "top_k": 2}, json=BODY, headers=headers
+            )
+            products = tops.json()["products"]
+            assert [entry["product_id"] for entry in products] == ["tee"]
+            assert [variant["sku"] for variant in products[0]["variants"]] == ["TEE-M", "TEE-S"]
+
+            bad = client.post("/measurements/shop", json={"chest_cm": "wide"}, headers=headers)
+            assert bad.status_code == 400
+        finally:
+            app.dependency_overrides.clear()
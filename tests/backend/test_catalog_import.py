@@ -0,0 +1,175 @@
+"""
+Tests for the streaming bulk catalog importer.
+"""
+
+import asyncio
+import threading
+
+from postgrest.exceptions import APIError
+
+from backend.app.services.catalog_import import (
+    CatalogImporter,
+    iter_row_chunks,
+    parse_catalog_row,
+)
+
+
+HEADER = "sku,name,description,category,price,currency,stock,size,chest_cm,waist_cm,hip_cm\n"
+
+
+def catalog(rows):
+    return HEADER + "".join(f"{row}\n" for row in rows)
+
+
+def catalog_db(supabase, existing=(), rejected_skus=(), skus=None):
+    """
+    Fake client for the importer: ``existing`` products of brand-1, product
+    inserts that reject unknown categories, variant upserts that reject
+    ``rejected_skus``, and ``skus`` mapping existing SKUs to their brand.
+    """
+    skus = dict(skus or {})
+    rejected_skus = set(rejected_skus)
+
+    def handler(query):
+        if query.target == "product_variants" and query.op == "select":
+            return [
+                {"sku": sku, "products": {"brand_id": brand}}
+                for sku, brand in skus.items() if sku in query.filters["sku"]
+            ]
+        if query.target == "products" and query.op == "insert":
+            bad = [p for p in query.rows if p["category"] not in ("tops", "bottoms")]
+            if bad:
+                return APIError({"message": f"invalid category {bad[0]['category']}"})
+            return [{**p, "id": f"prod-{p['name']}"} for p in query.rows]
+        if query.op == "upsert":
+            bad = [v for v in query.rows if v["sku"] in rejected_skus]
+            if bad:
+                return APIError({"message": f"rejected {bad[0]['sku']}"})
+        return None
+
+    products = [{**product, "brand_id": "brand-1"} for product in existing]
+    return supabase(tables={"products": products}, handler=handler)
+
+
+class TestParsing:
+    """Test row validation and chunked reading."""
+
+    def test_parse_row(self):
+        """Rows are converted to product and variant payloads."""
+        row = parse_catalog_row(2, {
+            "sku": " TEE-M ", "name": "Tee", "price": "19.99", "stock": "4",
+            "size": "M", "currency": "usd", "chest_cm": "100", "waist_cm": "",
+        })
+
+        assert row.product["name"] == "Tee"
+        assert row.variant["sku"] == "TEE-M"
+        assert row.variant["price_cents"] == 1999
+        assert row.variant["currency"] == "USD"
+        assert row.variant["attributes"] == {"chest_cm": 100.0, "waist_cm": None, "hip_cm": None}
+
+    def test_chunks_keep_line_numbers(self):
+        """Chunks are bounded and rows keep their CSV line numbers."""
+        text = catalog(f"S{i},Tee,,tops,10,USD,1,M,,," for i in range(5))
+        chunks = list(iter_row_chunks(text, 2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert chunks[-1][0][0] == 6
+
+
+class TestCatalogImporter:
+    """Test bulk writes and per-row error reporting."""
+
+    def test_bulk_writes_per_chunk(self, supabase):
+        """Each chunk costs two lookups, one product insert and one variant upsert."""
+        rows = [f"TEE-{i},Tee,,tops,10,USD,1,M,,," for i in range(4)]
+        rows += [f"CHINO-{i},Chino,,bottoms,30,USD,1,32,,," for i in range(4)]
+        db = catalog_db(supabase)
+        progress = []
+
+        importer = CatalogImporter(db, batch_size=4, on_progress=lambda p: progress.append(p.rows_read))
+
+        result = asyncio.run(importer.run("brand-1", catalog(rows)))
+
+        assert result["success"] is True
+        assert result["products_created"] == 2
+        assert result["variants_created"] == 8
+        assert [query.op for query in db.queries] == ["select", "insert", "select", "upsert"] * 2
+        assert db.calls("upsert")[0].kwargs["on_conflict"] == "sku"
+        assert progress == [4, 8]
+
+    def test_existing_products_are_reused(self, supabase):
+        """Products already in the brand catalog are not recreated."""
+        db = catalog_db(supabase, existing=[{"id": "prod-old", "name": "Tee"}])
+
+        result = asyncio.run(CatalogImporter(db).run("brand-1", catalog(["TEE-M,Tee,,tops,10,USD,1,M,,,"])))
+
+        assert result["products_created"] == 0
+        assert db.queries[-1].rows[0]["product_id"] == "prod-old"
+
+    def test_row_errors(self, supabase):
+        """Invalid rows, duplicate SKUs and rejected writes are reported per row."""
+        rows = [
+            "TEE-S,Tee,,tops,10,USD,1,S,,,",
+            "TEE-M,Tee,,tops,abc,USD,1,M,,,",
+            "TEE-S,Tee,,tops,10,USD,1,S,,,",
+            "TEE-L,Tee,,tops,10,USD,1,L,,,",
+        ]
+        db = catalog_db(supabase, rejected_skus={"TEE-L"})
+
+        result = asyncio.run(CatalogImporter(db).run("brand-1", catalog(rows)))
+
+        assert result["success"] is False
+        assert result["variants_created"] == 1
+        assert [error["row"] for error in result["errors"]] == [3, 4, 5]
+        assert "Duplicate SKU" in result["errors"][1]["error"]
+        assert result["errors"][2]["error"] == "rejected TEE-L"
+
+    def test_skus_of_other_brands_are_not_overwritten(self, supabase):
+        """A SKU owned by another brand is a row error; own SKUs count as updates."""
+        rows = [
+            "TEE-S,Tee,,tops,10,USD,1,S,,,",
+            "TEE-M,Tee,,tops,10,USD,1,M,,,",
+            "TEE-L,Tee,,tops,10,USD,1,L,,,",
+        ]
+        db = catalog_db(supabase, skus={"TEE-S": "brand-1", "TEE-M": "brand-2"})
+
+        result = asyncio.run(CatalogImporter(db).run("brand-1", catalog(rows)))
+
+        assert result["variants_created"] == 1
+        assert result["variants_updated"] == 1
+        assert result["errors"] == [{"row": 3, "error": "SKU TEE-M belongs to another brand"}]
+        upserted = [variant["sku"] for query in db.calls("upsert") for variant in query.rows]
+        assert upserted == ["TEE-S", "TEE-L"]
+
+    def test_bad_product_fails_only_its_rows(self, supabase):
+        """A rejected bulk product insert falls back to one insert per product."""
+        rows = [
+            "TEE-S,Tee,,tops,10,USD,1,S,,,",
+            "HAT-1,Hat,,hats,10,USD,1,OS,,,",
+            "CHINO-32,Chino,,bottoms,30,USD,1,32,,,",
+        ]
+        db = catalog_db(supabase)
+
+        result = asyncio.run(CatalogImporter(db).run("brand-1", catalog(rows)))
+
+        assert result["products_created"] == 2
+        assert result["variants_created"] == 2
+        assert result["errors"] == [{"row": 3, "error": "invalid category hats"}]
+
+    def test_source_is_read_off_the_event_loop(self, supabase):
+        """File reads and row parsing run on worker threads, not the loop thread."""
+        readers = set()
+
+        def lines():
+            for line in catalog(["TEE-S,Tee,,tops,10,USD,1,S,,,", "TEE-M,Tee,,tops,10,USD,1,M,,,"]).splitlines(True):
+                readers.add(threading.get_ident())
+                yield line
+
+        async def scenario():
+            result = await CatalogImporter(catalog_db(supabase), batch_size=1).run("brand-1", lines())
+            return result, threading.get_ident()
+
+        result, loop_thread = asyncio.run(scenario())
+
+        assert result["variants_created"] == 2
+        assert readers and loop_thread not in readers
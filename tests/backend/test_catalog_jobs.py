@@ -0,0 +1,134 @@
+"""
+Tests for background catalog import jobs.
+"""
+
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.core.config import settings
+# Routers import through ``app.*``; override the dependency object they use
+from app.services.catalog_jobs import (
+    CatalogImportPool,
+    CatalogJobQueue,
+    CatalogJobStore,
+    get_catalog_jobs,
+)
+
+
+CSV = (
+    "sku,name,description,category,price,currency,stock,size,chest_cm,waist_cm,hip_cm\n"
+    "TEE-S,Tee,,tops,10,USD,1,S,90,,\n"
+    "TEE-M,Tee,,tops,10,USD,1,M,100,,\n"
+    "TEE-L,Tee,,tops,oops,USD,1,L,110,,\n"
+)
+
+
+def new_product_ids(query):
+    """Products inserts come back with ids; every other query falls through."""
+    if query.target == "products" and query.op == "insert":
+        return [{**p, "id": f"prod-{p['name']}"} for p in query.rows]
+    return None
+
+
+@pytest.fixture
+def queue(tmp_path):
+    store = CatalogJobStore(str(tmp_path / "jobs.sqlite3"))
+    yield CatalogJobQueue(store, str(tmp_path / "spool"))
+    store.close()
+
+
+def upload(text, filename="catalog.csv"):
+    return type("Upload", (), {"file": io.BytesIO(text.encode()), "filename": filename})()
+
+
+class TestCatalogJobStore:
+    """Test job lifecycle in the SQLite store."""
+
+    def test_claim_is_exclusive(self, queue):
+        """A queued job is handed to exactly one worker."""
+        job = asyncio.run(queue.submit("brand-1", upload(CSV)))
+
+        claimed = queue.store.claim_next()
+
+        assert claimed.job_id == job.job_id
+        assert claimed.status == "running"
+        assert queue.store.claim_next() is None
+
+    def test_stale_running_job_is_reclaimed(self, tmp_path):
+        """Jobs whose worker stopped heartbeating are claimed again."""
+        store = CatalogJobStore(str(tmp_path / "jobs.sqlite3"), stale_after=-1)
+        store.create("job-1", "brand-1", "/tmp/none.csv")
+
+        assert store.claim_next().job_id == "job-1"
+        assert store.claim_next().job_id == "job-1"
+
+
+class TestCatalogImportPool:
+    """Test running spooled imports."""
+
+    def test_run_job_records_progress(self, queue, supabase):
+        """The worker imports the spooled CSV and records totals and errors."""
+        job = asyncio.run(queue.submit("brand-1", upload(CSV)))
+
+        async def db_provider():
+            return supabase(handler=new_product_ids)
+
+        pool = CatalogImportPool(queue, db_provider, batch_size=2)
+        asyncio.run(pool.run_once())
+
+        done = queue.store.get(job.job_id).to_dict()
+        assert done["status"] == "completed_with_errors"
+        assert done["rows_processed"] == 3
+        assert done["variants_created"] == 2
+        assert done["products_created"] == 1
+        assert [error["row"] for error in done["errors"]] == [4]
+        assert not os.path.exists(job.spool_path)
+
+    def test_failed_job_removes_its_spool_file(self, queue, supabase):
+        """A job that errors out is marked failed and its upload is deleted."""
+        job = asyncio.run(queue.submit("brand-1", upload(CSV)))
+        db = supabase()
+        db.error = RuntimeError("database unavailable")
+
+        async def db_provider():
+            return db
+
+        asyncio.run(CatalogImportPool(queue, db_provider).run_once())
+
+        failed = queue.store.get(job.job_id).to_dict()
+        assert failed["status"] == "failed"
+        assert "database unavailable" in failed["error"]
+        assert not os.path.exists(job.spool_path)
+
+
+class TestCatalogJobRoutes:
+    """Test upload and job status endpoints."""
+
+    def test_upload_then_poll(self, queue):
+        """Uploads return immediately with a job that can be polled."""
+        app.dependency_overrides[get_catalog_jobs] = lambda: queue
+        client = TestClient(app)
+        headers = {"X-API-Key": settings.api_key}
+        try:
+            response = client.post(
+                "/brands/brand-1/catalog/upload",
+                files={"file": ("catalog.csv", CSV, "text/csv")},
+                headers=headers,
+            )
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            status = client.get(f"/brands/brand-1/catalog/jobs/{job_id}", headers=headers)
+            assert status.status_code == 200
+            assert status.json()["status"] == "queued"
+            assert status.json()["size_bytes"] == len(CSV)
+
+            other_brand = client.get(f"/brands/brand-2/catalog/jobs/{job_id}", headers=headers)
+            assert other_brand.status_code == 404
+        finally:
+            app.dependency_overrides.clear()
@@ -0,0 +1,145 @@
+"""
+Tests for the TTL/LRU cache and cached fit data lookups.
+"""
+
+import asyncio
+
+from backend.app.core.cache import TTLLRUCache
+from backend.app.services.fit_data import FitDataService, invalidate_brand_fit_data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+SIZE_CHART = {
+    "brand_id": "brand-1",
+    "category": "tops",
+    "updated_at": "2025-01-01T00:00:00Z",
+    "unit": "cm",
+    "measurements": {"S": {"chest": 90}, "M": {"chest": 100}},
+}
+
+
+class TestTTLLRUCache:
+    """Test eviction, expiry and counters."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = TTLLRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Entries expire after their TTL and count as misses."""
+        clock = FakeClock()
+        cache = TTLLRUCache(maxsize=4, ttl=10, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+    def test_get_or_load_caches_none(self):
+        """Negative results are cached so the loader runs once."""
+        cache = TTLLRUCache()
+        calls = []
+
+        for _ in range(3):
+            assert cache.get_or_load("k", lambda: calls.append(1)) is None
+
+        assert len(calls) == 1
+
+    def test_load_invalidated_midway_is_not_stored(self):
+        """A value loaded across an invalidation of its key is returned but not cached."""
+        cache = TTLLRUCache()
+
+        def stale_load():
+            cache.invalidate("k")
+            return "old"
+
+        assert cache.get_or_load("k", stale_load) == "old"
+        assert "k" not in cache
+        assert cache.get_or_load("k", lambda: "new") == "new"
+        assert cache.get("k") == "new"
+        assert cache.stats()["stale_loads"] == 1
+
+    def test_async_load_invalidated_by_predicate_is_not_stored(self):
+        """invalidate_where also reaches keys whose load is still awaiting."""
+        cache = TTLLRUCache()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await release.wait()
+            return "old"
+
+        async def scenario():
+            load = asyncio.create_task(cache.get_or_load_async(("chart", "brand-1"), slow_load))
+            await started.wait()
+            assert cache.invalidate_where(lambda key: key[1] == "brand-1") == 0
+            release.set()
+            return await load
+
+        assert asyncio.run(scenario()) == "old"
+        assert ("chart", "brand-1") not in cache
+
+    def test_failed_load_releases_the_key(self):
+        """A loader error leaves no in-flight state behind."""
+        cache = TTLLRUCache()
+
+        def broken():
+            raise RuntimeError("database unavailable")
+
+        try:
+            cache.get_or_load("k", broken)
+        except RuntimeError:
+            pass
+        assert cache.get_or_load("k", lambda: 1) == 1
+        assert cache.get("k") == 1
+
+
+class TestFitDataService:
+    """Test cached size chart and fit map reads."""
+
+    def test_size_chart_is_compiled_once(self, supabase):
+        """Repeated lookups hit the cache instead of the database."""
+        db = supabase(tables={"size_charts": [SIZE_CHART]})
+        service = FitDataService(db, TTLLRUCache())
+
+        first = asyncio.run(service.get_size_chart("brand-1", "tops"))
+        second = asyncio.run(service.get_size_chart("brand-1", "tops"))
+
+        assert first is second
+        assert first.labels == ("S", "M")
+        assert db.round_trips == ["size_charts"]
+
+    def test_invalidate_brand(self, supabase):
+        """Invalidation drops only the brand's entries."""
+        fit_map = {"brand_id": "brand-1", "category": "tops", "updated_at": "2025-01-01T00:00:00Z", "rules": {"ease": 2}}
+        db = supabase(tables={"size_charts": [SIZE_CHART], "fit_maps": [fit_map]})
+        cache = TTLLRUCache()
+        service = FitDataService(db, cache)
+        asyncio.run(service.get_size_chart("brand-1", "tops"))
+        asyncio.run(service.get_fit_map("brand-1", "tops"))
+        asyncio.run(service.get_fit_map("brand-2", "tops"))
+
+        assert invalidate_brand_fit_data("brand-1", cache) == 2
+        assert len(cache) == 1
+
+        asyncio.run(service.get_size_chart("brand-1", "tops"))
+        assert db.round_trips.count("size_charts") == 2
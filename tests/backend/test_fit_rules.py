@@ -0,0 +1,160 @@
+"""
+Tests for the fit rule registry and recommendation persistence.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.fit_rules import FitRule, FitRuleError, FitRuleRegistry, fit_rule_registry
+from app.services.fit_rules_bottoms import recommend_bottom
+from app.services.fit_rules_dresses import recommend_dress
+from app.services.fit_rules_outerwear import recommend_outerwear
+from app.services.fit_rules_tops import recommend_top
+from app.services.recommendation_store import RecommendationWriter, recommendation_records
+from app.services.size_charts import compile_size_chart
+
+
+BODY = {
+    "chest_cm": 101.6, "shoulder_cm": 46.0, "sleeve_cm": 64.0,
+    "waist_natural_cm": 81.28, "inseam_cm": 81.0,
+    "thigh_cm": 58.0, "hip_low_cm": 101.6, "knee_cm": 40.0,
+}
+
+
+class TestFitRuleRegistry:
+    def test_covers_every_size_chart_category(self):
+        assert fit_rule_registry.categories == ("tops", "bottoms", "dresses", "outerwear")
+
+    def test_one_pass_over_requested_categories(self):
+        calls = []
+
+        def rule(category):
+            def recommend(measurements, chart=None):
+                calls.append(category)
+                return {"category": category, "size": "M", "confidence": 0.7, "rationale": ""}
+            return recommend
+
+        registry = FitRuleRegistry([
+            FitRule("tops", ("chest_cm",), rule("tops")),
+            FitRule("dresses", ("chest_cm", "hip_low_cm"), rule("dresses")),
+            FitRule("outerwear", ("chest_cm",), rule("outerwear")),
+        ])
+
+        result = registry.evaluate({"chest_cm": 100}, ["dresses", "tops"])
+
+        assert calls == ["tops"]
+        assert [rec["category"] for rec in result.recommendations] == ["tops"]
+        assert result.unavailable == {"dresses": ["hip_low_cm"]}
+
+    def test_batch_rules_run_once_per_category(self):
+        calls = []
+
+        def recommend_batch(columns, chart=None):
+            calls.append(len(columns))
+            return [
+                {"category": "tops", "size": "L" if chest > 100 else "M", "confidence": 0.7, "rationale": ""}
+                for chest in columns["chest_cm"]
+            ]
+
+        registry = FitRuleRegistry([FitRule("tops", ("chest_cm",), None, recommend_batch)])
+        bodies = [{"chest_cm": 90 + 5 * i} for i in range(6)] + [{"waist_natural_cm": 80}]
+
+        results = registry.evaluate_batch(bodies)
+
+        assert calls == [6]
+        assert [r.recommendations[0]["size"] for r in results[:6]] == ["M"] * 3 + ["L"] * 3
+        assert results[6].unavailable == {"tops": ["chest_cm"]}
+
+    def test_batched_ladders_match_single_bodies(self):
+        rng = np.random.default_rng(7)
+        bodies = [
+            {
+                "chest_cm": float(rng.uniform(80, 125)), "shoulder_cm": float(rng.uniform(38, 54)),
+                "sleeve_cm": float(rng.uniform(55, 70)), "waist_natural_cm": float(rng.uniform(62, 105)),
+                "inseam_cm": float(rng.uniform(70, 90)), "hip_low_cm": float(rng.uniform(85, 125)),
+                "thigh_cm": float(rng.uniform(48, 70)), "knee_cm": float(rng.uniform(34, 44)),
+            }
+            for _ in range(50)
+        ]
+        singles = [
+            {
+                "tops": recommend_top(body), "bottoms": recommend_bottom(body),
+                "dresses": recommend_dress(body), "outerwear": recommend_outerwear(body),
+            }
+            for body in bodies
+        ]
+
+        for result, single in zip(fit_rule_registry.evaluate_batch(bodies), singles):
+            for rec in result.recommendations:
+                assert (rec["size"], rec["rationale"]) == (single[rec["category"]]["size"], single[rec["category"]]["rationale"])
+
+    def test_dress_is_sized_by_its_tightest_dimension(self):
+        # Bust and waist say S, hip says L
+        body = {"chest_cm": 88.0, "waist_natural_cm": 70.0, "hip_low_cm": 106.0}
+
+        assert recommend_dress(body)["size"] == "L"
+        assert fit_rule_registry.evaluate(body, ["dresses"]).recommendations[0]["size"] == "L"
+
+    def test_outerwear_sizes_up_for_shoulders(self):
+        broad = recommend_outerwear({"chest_cm": 98.0, "shoulder_cm": 50.0})
+
+        assert broad["size"] == "L" and "shoulders" in broad["rationale"]
+
+    def test_charts_replace_the_default_ladders(self):
+        chart = compile_size_chart({
+            "category": "dresses", "unit": "in",
+            "measurements": {"4": {"bust": [33, 35], "waist": [26, 28]}, "8": {"bust": [37, 39], "waist": [30, 32]}},
+        })
+
+        result = fit_rule_registry.evaluate({"chest_cm": 96.0}, ["dresses"], charts={"dresses": chart})
+
+        assert result.recommendations[0]["size"] == "8"
+
+    def test_charted_tops_need_only_chart_measurements(self):
+        chart = compile_size_chart({
+            "category": "tops", "measurements": {"M": {"chest": [94, 102]}, "L": {"chest": [102, 110]}},
+        })
+
+        result = fit_rule_registry.evaluate({"chest_cm": 97.0}, ["tops"], charts={"tops": chart})
+
+        assert result.recommendations[0]["size"] == "M"
+        assert result.unavailable == {}
+
+    def test_rule_errors_and_bad_input_surface(self):
+        def broken(measurements, chart=None):
+            raise KeyError("knee_cm")
+
+        registry = FitRuleRegistry([FitRule("bottoms", ("waist_natural_cm",), broken)])
+
+        with pytest.raises(FitRuleError, match="bottoms rule failed: KeyError"):
+            registry.evaluate({"waist_natural_cm": 80})
+        with pytest.raises(ValueError):
+            registry.evaluate({"waist_natural_cm": "eighty"})
+        with pytest.raises(ValueError):
+            registry.evaluate({"waist_natural_cm": 80}, ["tops"])
+
+
+class TestRecommendationWriter:
+    def test_links_known_sessions_and_never_creates_them(self, supabase):
+        db = supabase(tables={"measurement_sessions": [{"id": "uuid-sess-1", "session_id": "sess-1"}]})
+
+        async def provider():
+            return db
+
+        writer = RecommendationWriter(provider, batch_size=10)
+        recommendations = fit_rule_registry.evaluate(BODY).recommendations
+
+        async def scenario():
+            await writer.start()
+            writer.submit(recommendation_records("sess-1", recommendations))
+            writer.submit(recommendation_records("unknown", recommendations[:1]))
+            await writer.stop()
+
+        asyncio.run(scenario())
+
+        assert writer.written == 5
+        inserted = db.tables["size_recommendations"]
+        assert [row["session_id"] for row in inserted] == ["uuid-sess-1"] * 4 + [None]
+        assert inserted[2]["category"] == "dresses" and inserted[2]["model_version"] == "v1.0"
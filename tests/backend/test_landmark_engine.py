@@ -0,0 +1,123 @@
+"""
+Tests for the vectorized landmark-to-measurement engine.
+"""
+
+import base64
+import math
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from backend.app.core.landmark_engine import (
+    MEASUREMENT_FIELDS,
+    compute_measurement_matrix,
+    estimate_accuracy_array,
+    landmarks_to_array,
+    measurement_dict,
+)
+from backend.app.core.validation import normalize_and_validate_batch
+from backend.app.schemas.measure_schema import MediaPipeLandmarks
+
+
+DIMS = np.array([1080.0, 1920.0])
+
+
+class TestLandmarkEngine:
+    """Test measurement math over packed landmark arrays."""
+
+    def test_height_is_scaled_to_reference(self, make_pose):
+        """Height always resolves to the 170 cm reference."""
+        row = compute_measurement_matrix(make_pose(1), make_pose(2), DIMS, DIMS)
+        result = measurement_dict(row)
+
+        assert list(result) == list(MEASUREMENT_FIELDS)
+        assert result["height_cm"] == pytest.approx(170.0)
+
+    def test_shoulder_matches_scalar_formula(self, make_pose):
+        """Shoulder width equals the denormalized 3D distance over px/cm."""
+        front, side = make_pose(3), make_pose(4)
+        result = measurement_dict(compute_measurement_matrix(front, side, DIMS, DIMS))
+
+        scale = np.array([DIMS[0], DIMS[1], DIMS[0]])
+        px = front[:, :3] * scale
+        height_px = abs((px[27, 1] + px[28, 1]) / 2 - px[0, 1])
+        expected = math.dist(px[11], px[12]) / (height_px / 170.0)
+
+        assert result["shoulder_cm"] == pytest.approx(expected)
+        assert result["neck_cm"] == pytest.approx(expected * 0.4)
+
+    def test_batch_matches_single_session(self, make_pose):
+        """Stacked sessions produce the same rows as one-at-a-time calls."""
+        fronts = np.stack([make_pose(i) for i in range(5)])
+        sides = np.stack([make_pose(i + 10) for i in range(5)])
+        dims = np.tile(DIMS, (5, 1))
+
+        batch = compute_measurement_matrix(fronts, sides, dims, dims)
+
+        assert batch.shape == (5, len(MEASUREMENT_FIELDS))
+        for i in range(5):
+            single = compute_measurement_matrix(fronts[i], sides[i], DIMS, DIMS)
+            np.testing.assert_allclose(batch[i], single)
+
+    def test_accuracy_tiers(self, make_pose):
+        """Visibility tiers map to the documented accuracy estimates."""
+        fronts = np.stack([make_pose(0, v) for v in (0.95, 0.8, 0.65, 0.2)])
+        sides = fronts.copy()
+
+        np.testing.assert_allclose(
+            estimate_accuracy_array(fronts, sides), [0.95, 0.90, 0.85, 0.80]
+        )
+
+
+def encoded(pose: np.ndarray, encoding: str) -> dict:
+    """Landmark payload for ``pose`` in one of the accepted encodings."""
+    payload = {"timestamp": "2025-10-30T12:00:00Z", "image_width": 1080, "image_height": 1920}
+    if encoding == "landmarks":
+        payload["landmarks"] = [dict(zip(("x", "y", "z", "visibility"), row)) for row in pose.tolist()]
+    elif encoding == "points":
+        payload["points"] = pose.ravel().tolist()
+    else:
+        payload["points_f32"] = base64.b64encode(pose.astype("<f4").tobytes()).decode("ascii")
+    return payload
+
+
+class TestCompactEncodings:
+    """Test the flat and packed landmark wire formats."""
+
+    @pytest.mark.parametrize("encoding", ["landmarks", "points", "points_f32"])
+    def test_encodings_decode_to_the_same_array(self, encoding, make_pose):
+        """Every encoding yields the same (33, 4) array (float32-exact poses)."""
+        pose = make_pose(5).astype(np.float32).astype(np.float64)
+        landmarks = MediaPipeLandmarks.model_validate(encoded(pose, encoding))
+
+        assert landmarks.encoding == encoding
+        assert landmarks.landmark_count == 33
+        np.testing.assert_array_equal(landmarks_to_array(landmarks), pose)
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {"points": [0.5] * 132},  # two encodings at once
+            {"landmarks": None},  # none
+            {"landmarks": None, "points": [0.5] * 131},
+            {"landmarks": None, "points_f32": "not base64!"},
+            {"landmarks": None, "points_f32": base64.b64encode(b"\0" * 20).decode("ascii")},
+        ],
+    )
+    def test_rejects_malformed_payloads(self, changes, make_pose):
+        payload = {**encoded(make_pose(1), "landmarks"), **changes}
+        payload = {key: value for key, value in payload.items() if value is not None}
+
+        with pytest.raises(ValidationError):
+            MediaPipeLandmarks.model_validate(payload)
+
+    def test_batch_reports_count_errors_under_the_sent_field(self, make_pose):
+        """A short compact payload fails its own session with a field-level error."""
+        short = encoded(make_pose(2)[:30], "points_f32")
+        results = normalize_and_validate_batch(
+            [{"session_id": "short", "front_landmarks": short, "side_landmarks": encoded(make_pose(3), "points")}]
+        )
+
+        assert results[0].errors[0].field == "front_landmarks.points_f32"
+        assert "got 30" in results[0].errors[0].message
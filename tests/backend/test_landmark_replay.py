@@ -0,0 +1,131 @@
+"""
+Tests for the landmark replay engine.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.core.landmark_engine import (
+    MODEL_VERSION,
+    compute_measurement_matrix,
+    estimate_accuracy_array,
+)
+from app.services.landmark_replay import LandmarkReplay
+from app.services.landmark_store import landmarks_json, pack_landmarks, to_bytea
+
+
+DIMS = (1080, 1920)
+
+
+@pytest.fixture
+def stored_pose(make_pose):
+    """``make_pose`` at the float32 precision ``landmarks_f32`` keeps."""
+    return lambda seed: make_pose(seed).astype(np.float32).astype(np.float64)
+
+
+def seed_landmarks(db, make_pose, sessions, legacy=(), missing_side=()):
+    rows = []
+    for n in range(sessions):
+        session = f"session-{n:04d}"
+        for offset, view in enumerate(("front", "side")):
+            if view == "side" and n in missing_side:
+                continue
+            points = make_pose(2 * n + offset)
+            row = {
+                "id": f"lm-{n}-{view}",
+                "session_id": session,
+                "landmark_type": view,
+                "landmarks_f32": to_bytea(pack_landmarks(points)),
+                "landmarks": None,
+                "image_width": DIMS[0],
+                "image_height": DIMS[1],
+                "detected_at": f"2025-01-01T00:00:{offset:02d}",
+            }
+            if n in legacy:
+                row["landmarks_f32"], row["landmarks"] = None, landmarks_json(points)
+            rows.append(row)
+    db.tables["mediapipe_landmarks"] = rows
+
+
+def expected(make_pose, n):
+    front, side = make_pose(2 * n), make_pose(2 * n + 1)
+    dims = np.array(DIMS, dtype=np.float64)
+    return compute_measurement_matrix(front, side, dims, dims), float(estimate_accuracy_array(front, side))
+
+
+def scored(db):
+    return {row["session_id"]: row for row in db.tables.get("measurements_mediapipe", [])}
+
+
+class TestLandmarkReplay:
+    def test_rescores_every_session_in_chunks(self, supabase, stored_pose):
+        db = supabase()
+        seed_landmarks(db, stored_pose, 25, legacy={3}, missing_side={7})
+
+        progress = asyncio.run(LandmarkReplay(db, MODEL_VERSION, chunk_size=9).run())
+
+        rows = scored(db)
+        assert progress["sessions_scored"] == 24 and progress["sessions_skipped"] == 1
+        assert len(rows) == 24 and "session-0007" not in rows
+        assert len(db.calls("select")) > 5
+        for n in (0, 3, 24):
+            matrix, accuracy = expected(stored_pose, n)
+            row = rows[f"session-{n:04d}"]
+            assert row["model_version"] == MODEL_VERSION
+            assert row["height_cm"] == pytest.approx(matrix[0])
+            assert row["chest_cm"] == pytest.approx(matrix[3])
+            assert row["accuracy_estimate"] == pytest.approx(accuracy)
+
+    def test_resumes_from_checkpoint_without_duplicates(self, tmp_path, supabase, stored_pose):
+        db = supabase()
+        seed_landmarks(db, stored_pose, 12)
+        checkpoint = str(tmp_path / "replay.json")
+
+        first = LandmarkReplay(db, MODEL_VERSION, chunk_size=6, max_in_flight=1, checkpoint=checkpoint)
+
+        async def interrupted():
+            async def stop_after_two(progress):
+                if progress.chunks_written == 2:
+                    raise KeyboardInterrupt
+            first.on_progress = stop_after_two
+            with pytest.raises(KeyboardInterrupt):
+                await first.run()
+
+        asyncio.run(interrupted())
+        written_before = len(db.tables["measurements_mediapipe"])
+
+        resumed = asyncio.run(
+            LandmarkReplay(db, MODEL_VERSION, chunk_size=6, checkpoint=checkpoint).run()
+        )
+
+        assert 0 < written_before < 12
+        assert resumed["sessions_scored"] == 12
+        assert len(db.tables["measurements_mediapipe"]) == 12
+
+    def test_replaying_again_replaces_rows(self, supabase, stored_pose):
+        db = supabase()
+        seed_landmarks(db, stored_pose, 5)
+
+        asyncio.run(LandmarkReplay(db, MODEL_VERSION).run())
+        asyncio.run(LandmarkReplay(db, MODEL_VERSION).run())
+
+        assert len(db.tables["measurements_mediapipe"]) == 5
+
+    def test_scores_on_a_process_pool(self, supabase, stored_pose):
+        db = supabase()
+        seed_landmarks(db, stored_pose, 20)
+
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("fork")) as pool:
+            progress = asyncio.run(LandmarkReplay(db, MODEL_VERSION, chunk_size=8, executor=pool).run())
+
+        assert progress["sessions_scored"] == 20
+        matrix, _ = expected(stored_pose, 11)
+        assert scored(db)["session-0011"]["waist_natural_cm"] == pytest.approx(matrix[5])
+
+    def test_unknown_formula_version(self, supabase):
+        with pytest.raises(ValueError):
+            LandmarkReplay(supabase(), "v9-unknown")
@@ -0,0 +1,176 @@
+"""
+Tests for landmark provenance storage.
+"""
+
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+# Validation imports through ``app.*``; use the same module objects
+from app.core import validation
+from app.core.validation import normalize_and_validate, normalize_and_validate_batch
+from app.schemas.measure_schema import MeasurementInput
+from app.services import landmark_store
+from app.services.landmark_store import (
+    LANDMARK_BYTES,
+    LandmarkRecord,
+    LandmarkWriter,
+    landmarks_json,
+    pack_landmarks,
+    to_bytea,
+    unpack_landmarks,
+)
+from app.services.measurement_cache import MeasurementCache
+
+
+@pytest.fixture
+def record(make_pose):
+    """Factory for landmark records whose points are ``make_pose(n)``."""
+    def build(n: int, session: str = "s1", view: str = "front") -> LandmarkRecord:
+        return LandmarkRecord(
+            id=f"lm-{n}", session_id=session, view=view, points=make_pose(n),
+            image_width=1080, image_height=1920,
+        )
+    return build
+
+
+def session_ids(query):
+    """Session upserts come back with generated ids; other writes fall through."""
+    if query.target == "measurement_sessions":
+        return [{**row, "id": f"uuid-{row['session_id']}"} for row in query.rows]
+    return None
+
+
+def writer_for(db, **kwargs) -> LandmarkWriter:
+    async def provider():
+        return db
+    return LandmarkWriter(provider, **kwargs)
+
+
+def written(db, table):
+    return [query.rows for query in db.calls(target=table)]
+
+
+class TestCodec:
+    def test_round_trip_through_bytea(self, make_pose):
+        points = make_pose(1)
+        blob = pack_landmarks(points)
+
+        assert len(blob) == LANDMARK_BYTES == 528
+        np.testing.assert_array_equal(unpack_landmarks(blob), points.astype(np.float32))
+        np.testing.assert_array_equal(unpack_landmarks(to_bytea(blob)), points.astype(np.float32))
+
+    def test_blob_is_a_fraction_of_the_json_view(self, make_pose):
+        points = make_pose(2)
+        json_bytes = len(json.dumps(landmarks_json(points)).encode("utf-8"))
+
+        assert json_bytes / LANDMARK_BYTES > 4
+
+    def test_rejects_wrong_shapes(self):
+        with pytest.raises(ValueError):
+            pack_landmarks(np.zeros((32, 4)))
+        with pytest.raises(ValueError):
+            unpack_landmarks(b"\x00" * 100)
+
+
+class TestLandmarkWriter:
+    def test_batches_sessions_and_landmarks(self, supabase, record):
+        db = supabase(handler=session_ids)
+        writer = writer_for(db, batch_size=4, store_json=True)
+
+        async def scenario():
+            await writer.start()
+            sessions = [
+                [record(2 * i, f"s{i}", "front"), record(2 * i + 1, f"s{i}", "side")] for i in range(3)
+            ]
+            threads = [threading.Thread(target=writer.submit, args=(records,)) for records in sessions]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            await writer.stop()
+
+        asyncio.run(scenario())
+
+        sessions = written(db, "measurement_sessions")
+        landmarks = written(db, "mediapipe_landmarks")
+        assert writer.written == 6 and writer.dropped == 0
+        assert sum(len(rows) for rows in landmarks) == 6
+        # Front and side of one session upsert the session once per batch
+        assert all(len({row["session_id"] for row in rows}) == len(rows) for rows in sessions)
+        row = landmarks[0][0]
+        assert row["session_id"].startswith("uuid-")
+        assert row["landmarks_f32"].startswith("\\x") and len(row["landmarks_f32"]) == 2 + 2 * LANDMARK_BYTES
+        assert len(row["landmarks"]) == 33
+
+    def test_json_view_is_optional(self, supabase, record):
+        db = supabase(handler=session_ids)
+        writer = writer_for(db)
+
+        async def scenario():
+            await writer.start()
+            writer.submit([record(0)])
+            await writer.stop()
+
+        asyncio.run(scenario())
+
+        rows = written(db, "mediapipe_landmarks")[0]
+        assert "landmarks" not in rows[0]
+
+    def test_drops_when_stopped_or_full(self, supabase, record):
+        db = supabase(handler=session_ids)
+        writer = writer_for(db, batch_size=100, max_pending=2)
+
+        assert writer.submit([record(0)]) is False
+
+        async def scenario():
+            await writer.start()
+            assert writer.submit([record(1), record(2), record(3)]) is False
+            assert writer.pending() == 2
+            await writer.stop()
+
+        asyncio.run(scenario())
+        assert writer.dropped == 2
+        assert writer.written == 2
+
+    def test_failed_batches_are_counted(self, caplog, supabase, record):
+        db = supabase()
+        db.error = RuntimeError("database unavailable")
+        writer = writer_for(db)
+
+        async def scenario():
+            await writer.start()
+            writer.submit([record(0), record(1)])
+            await writer.stop()
+
+        with caplog.at_level("ERROR", logger="app.services.batch_writer"):
+            asyncio.run(scenario())
+        assert writer.failed == 2 and writer.written == 0
+        assert "Landmark provenance batch of 2 failed" in caplog.text
+        assert "database unavailable" in caplog.text
+
+
+class TestValidationHook:
+    def test_landmark_sessions_queue_both_views(self, monkeypatch, make_pose, landmark_payload):
+        submitted = []
+        monkeypatch.setattr(landmark_store.landmark_writer, "submit", submitted.extend)
+        payload = {
+            "session_id": "sess-1",
+            "front_landmarks": landmark_payload(1),
+            "side_landmarks": landmark_payload(2),
+        }
+
+        # Fresh result caches, so neither call is a cached repeat
+        monkeypatch.setattr(validation, "measurement_cache", MeasurementCache())
+        single = normalize_and_validate(MeasurementInput.model_validate(payload))
+        monkeypatch.setattr(validation, "measurement_cache", MeasurementCache())
+        batch = normalize_and_validate_batch([payload])
+
+        assert [r.view for r in submitted] == ["front", "side", "front", "side"]
+        assert submitted[0].id == single.front_landmarks_id
+        assert submitted[3].id == batch[0].side_landmarks_id
+        assert {r.session_id for r in submitted} == {"sess-1"}
+        np.testing.assert_allclose(submitted[1].points[:, :3], make_pose(2)[:, :3])
@@ -0,0 +1,139 @@
+"""
+Tests for the measurement result cache.
+"""
+
+import numpy as np
+import pytest
+
+from app.core import validation
+from app.core.validation import normalize_and_validate, normalize_and_validate_batch
+from app.schemas.measure_schema import MeasurementInput
+from app.services import landmark_store
+from app.services.measurement_cache import MeasurementCache, SharedResultStore, landmark_digest
+
+
+@pytest.fixture
+def session(landmark_payload):
+    """Factory for ``MeasurementInput`` bodies with seeded front and side poses."""
+    def build(session_id=None, platform="ios", seed=1, width=1080) -> dict:
+        payload = {
+            "platform": platform,
+            "front_landmarks": landmark_payload(seed, width),
+            "side_landmarks": landmark_payload(seed + 1),
+        }
+        if session_id:
+            payload["session_id"] = session_id
+        return payload
+    return build
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MeasurementCache(maxsize=16, ttl=60)
+    monkeypatch.setattr(validation, "measurement_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    records = []
+    monkeypatch.setattr(landmark_store.landmark_writer, "submit", records.extend)
+    return records
+
+
+def validate(payload):
+    return normalize_and_validate(MeasurementInput.model_validate(payload))
+
+
+class TestLandmarkDigest:
+    def test_same_floats_share_a_digest(self):
+        front, side = np.zeros((33, 4)), np.ones((33, 4))
+        dims = np.array([1080.0, 1920.0])
+
+        assert landmark_digest(front, side, dims, dims) == landmark_digest(
+            front.astype(np.float32), side, dims.astype(int), dims
+        )
+
+    def test_dims_and_version_change_the_digest(self):
+        front, side = np.zeros((33, 4)), np.ones((33, 4))
+        dims = np.array([1080.0, 1920.0])
+        base = landmark_digest(front, side, dims, dims)
+
+        assert landmark_digest(front, side, dims + 1, dims) != base
+        assert landmark_digest(front, side, dims, dims, "v2") != base
+
+
+class TestMeasurementCache:
+    def test_retry_returns_the_first_response(self, cache, submitted, session):
+        first = validate(session("sess-1"))
+        retry = validate(session("sess-1"))
+
+        assert retry == first
+        assert len(submitted) == 2  # provenance written once
+        assert cache.stats()["platforms"]["ios"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_other_session_reuses_measurements_only(self, cache, submitted, session):
+        first = validate(session("sess-1"))
+        other = validate(session("sess-2", platform="android"))
+
+        assert other.session_id == "sess-2"
+        assert other.measurements == first.measurements
+        assert other.front_landmarks_id != first.front_landmarks_id
+        assert len(submitted) == 4
+        assert cache.stats()["platforms"]["android"]["hits"] == 1
+
+    def test_anonymous_repeat_is_a_new_session(self, cache, submitted, session):
+        first = validate(session())
+        repeat = validate(session())
+
+        assert repeat.session_id != first.session_id
+        assert repeat.front_landmarks_id != first.front_landmarks_id
+        assert repeat.measurements == first.measurements
+        assert len(submitted) == 4
+        assert cache.stats()["platforms"]["ios"]["hits"] == 1
+
+    def test_unknown_platforms_share_one_counter(self, cache, submitted, session):
+        validate(session("sess-1", platform="ios"))
+        validate(session("sess-2", platform="smart-fridge"))
+        validate(session("sess-3", platform="x" * 500))
+
+        platforms = cache.stats()["platforms"]
+        assert set(platforms) == {"ios", "other"}
+        assert platforms["other"] == {"hits": 2, "misses": 0, "hit_rate": 1.0}
+
+    def test_different_dims_miss(self, cache, submitted, session):
+        validate(session("sess-1"))
+        validate(session("sess-1", width=720))
+
+        assert cache.stats()["platforms"]["ios"]["hits"] == 0
+
+    def test_batch_computes_only_misses(self, cache, submitted, session):
+        first = validate(session("sess-1"))
+
+        results = normalize_and_validate_batch([session("sess-1"), session("sess-3", seed=5)])
+
+        assert results[0] == first
+        assert results[1].session_id == "sess-3"
+        assert len(submitted) == 4
+        assert validate(session("sess-3", seed=5)) == results[1]
+
+    def test_shared_tier_serves_other_processes(self, tmp_path):
+        path = str(tmp_path / "measurements.sqlite3")
+        writer = MeasurementCache(shared=SharedResultStore(path, ttl=60))
+        reader = MeasurementCache(shared=SharedResultStore(path, ttl=60))
+
+        writer.set("abc", {"session_id": "s", "measurements": {"height_cm": 170.0}})
+
+        assert reader.get("abc", "web_mobile")["measurements"] == {"height_cm": 170.0}
+        assert reader.stats()["shared_hits"] == 1
+        # Promoted into the reader's memory tier
+        assert reader.get("abc", "web_mobile") is not None
+        assert reader.stats()["shared_hits"] == 1
+
+    def test_shared_tier_entries_expire(self, tmp_path):
+        now = [1000.0]
+        store = SharedResultStore(str(tmp_path / "m.sqlite3"), ttl=10, clock=lambda: now[0])
+        store.set("abc", {"value": 1})
+        now[0] += 11
+
+        assert store.get("abc") is None
@@ -0,0 +1,142 @@
+"""
+Tests for the NDJSON measurement stream.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from app.services.fit_rules import FitRule, fit_rule_registry
+from app.services.measurement_stream import BodyReader, iter_ndjson, stream_measurements
+
+
+client = TestClient(app)
+
+
+def make_landmarks(offset: float = 0.0) -> dict:
+    points = [
+        {"x": 0.5 + 0.01 * (i % 7) + offset, "y": 0.1 + 0.025 * i, "z": 0.01 * (i % 5), "visibility": 0.95}
+        for i in range(33)
+    ]
+    return {"landmarks": points, "timestamp": "2025-10-30T12:00:00Z", "image_width": 1080, "image_height": 1920}
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def parse(lines):
+    return [json.loads(line) for line in b"".join(lines).splitlines()]
+
+
+class TestNdjsonParsing:
+    @pytest.mark.parametrize("size", [1, 3, 7, 1000])
+    def test_lines_survive_any_chunking(self, size):
+        body = b'{"a": 1}\n\n  \n{"b": 2}\r\n{"c": 3}'
+
+        parsed = asyncio.run(collect(iter_ndjson(chunked(body, size))))
+
+        assert [record for record, _ in parsed] == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+    def test_bad_and_oversized_lines_get_errors(self):
+        body = b'{"a": 1}\nnot json\n[1, 2]\n{"pad": "' + b"x" * 100 + b'"}\n{"b": 2}\n'
+
+        parsed = asyncio.run(collect(iter_ndjson(chunked(body, 16), max_line_bytes=64)))
+
+        assert [error.code if error else record for record, error in parsed] == [
+            {"a": 1}, "invalid_json", "schema", "line_too_long", {"b": 2},
+        ]
+
+
+class TestMeasurementStream:
+    def test_results_stream_per_chunk_in_order(self):
+        records = [
+            {"session_id": f"lm-{i}", "front_landmarks": make_landmarks(0.01 * i), "side_landmarks": make_landmarks()}
+            for i in range(5)
+        ]
+        records.insert(2, {"session_id": "user-1", "waist_natural": 32, "unit": "in"})
+        body = b"".join(json.dumps(record).encode() + b"\n" for record in records) + b"oops\n"
+
+        chunks = asyncio.run(collect(stream_measurements(chunked(body, 100), chunk_size=2)))
+        items = parse(chunks)
+
+        # 7 records in chunks of 2, plus the summary
+        assert len(chunks) == 5
+        assert [item.get("index") for item in items[:-1]] == list(range(7))
+        assert items[0]["session_id"] == "lm-0" and items[0]["source"] == "mediapipe"
+        assert {rec["category"] for rec in items[0]["recommendations"]} >= {"tops", "bottoms"}
+        # User input without chest/inseam names what each category is missing
+        assert items[2]["status"] == "validated" and items[2]["recommendations"] == []
+        assert "chest_cm" in items[2]["unavailable_categories"]["tops"]
+        assert "inseam_cm" in items[2]["unavailable_categories"]["bottoms"]
+        assert items[6]["error"]["code"] == "invalid_json"
+        assert items[-1]["summary"] == {"total": 7, "validated": 6, "failed": 1}
+
+    def test_failing_rule_is_a_per_line_error(self, monkeypatch):
+        def broken(measurements, chart=None):
+            return measurements["chest_cm"] / 0
+
+        monkeypatch.setitem(fit_rule_registry.rules, "tops", FitRule("tops", ("chest_cm",), broken))
+        body = json.dumps(
+            {"session_id": "lm-0", "front_landmarks": make_landmarks(), "side_landmarks": make_landmarks(0.02)}
+        ).encode() + b"\n"
+
+        items = parse(asyncio.run(collect(stream_measurements(chunked(body, 64)))))
+
+        assert items[0]["status"] == "error"
+        assert items[0]["error"]["code"] == "recommendation_failed"
+        assert items[0]["error"]["session_id"] == "lm-0"
+        assert "ZeroDivisionError" in items[0]["error"]["errors"][0]["message"]
+        assert items[-1]["summary"] == {"total": 1, "validated": 0, "failed": 1}
+
+    def test_body_reader_is_bounded(self):
+        async def scenario():
+            sent = []
+
+            async def body():
+                for n in range(10):
+                    sent.append(n)
+                    yield b"x\n"
+
+            reader = BodyReader(body(), max_chunks=2)
+            await asyncio.sleep(0.01)
+            buffered = len(sent)
+            received = await collect(reader)
+            return buffered, received
+
+        buffered, received = asyncio.run(scenario())
+
+        assert buffered <= 4
+        assert received == [b"x\n"] * 10
+
+    def test_endpoint_streams_ndjson(self):
+        body = "\n".join(
+            json.dumps({"session_id": f"s-{i}", "front_landmarks": make_landmarks(), "side_landmarks": make_landmarks(0.02)})
+            for i in range(3)
+        )
+
+        response = client.post(
+            "/measurements/stream?recommend=false",
+            content=body,
+            headers={"X-API-Key": "staging-secret-key", "Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        items = [json.loads(line) for line in response.text.splitlines()]
+        assert [item["session_id"] for item in items[:-1]] == ["s-0", "s-1", "s-2"]
+        assert "recommendations" not in items[0]
+        assert items[-1]["summary"]["validated"] == 3
+
+    def test_endpoint_requires_api_key(self):
+        response = client.post("/measurements/stream", content="{}")
+
+        assert response.status_code == 401
@@ -70,3 +70,79 @@ class TestSizeRecommendation:
         data = response.json()
         assert "recommended_size" in data
         assert "confidence" in data
+
+
+def make_landmarks(offset: float = 0.0, count: int = 33) -> dict:
+    """Build a MediaPipe landmark payload with a plausible standing pose."""
+    points = [
+        {"x": 0.5 + 0.01 * (i % 7) + offset, "y": 0.1 + 0.025 * i, "z": 0.01 * (i % 5), "visibility": 0.95}
+        for i in range(count)
+    ]
+    return {
+        "landmarks": points,
+        "timestamp": "2025-10-30T12:00:00Z",
+        "image_width": 1080,
+        "image_height": 1920,
+    }
+
+
+class TestBatchValidation:
+    """Test batch measurement validation endpoint."""
+
+    def test_validate_batch_mixed_sessions(self):
+        """Landmark, user-input and invalid sessions each get their own result."""
+        payload = {
+            "sessions": [
+                {"session_id": "lm-1", "front_landmarks": make_landmarks(), "side_landmarks": make_landmarks(0.02)},
+                {"session_id": "user-1", "waist_natural": 32, "unit": "in"},
+                {"session_id": "bad-count", "front_landmarks": make_landmarks(count=10), "side_landmarks": make_landmarks()},
+                {"session_id": "unknown", "waist": 80},
+                {"session_id": "lm-2", "front_landmarks": make_landmarks(0.05), "side_landmarks": make_landmarks()},
+            ]
+        }
+
+        response = client.post(
+            "/measurements/validate:batch",
+            json=payload,
+            headers={"X-API-Key": "staging-secret-key"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        statuses = [item["status"] for item in data["results"]]
+        assert statuses == ["validated", "validated", "error", "error", "validated"]
+        assert data["summary"] == {"total": 5, "validated": 3, "failed": 2}
+
+        first = data["results"][0]
+        assert first["session_id"] == "lm-1"
+        assert first["source"] == "mediapipe"
+        assert first["measurements"]["height_cm"] == pytest.approx(170.0)
+        assert data["results"][1]["measurements"]["waist_natural_cm"] == pytest.approx(81.28)
+        assert data["results"][2]["error"]["errors"][0]["field"] == "front_landmarks.landmarks"
+        assert data["results"][3]["error"]["code"] == "unknown_field"
+
+    def test_validate_batch_matches_single_session(self):
+        """Vectorized batch results equal the per-session normalizer."""
+        from backend.app.core.validation import normalize_and_validate, normalize_and_validate_batch
+        from backend.app.schemas.measure_schema import MeasurementInput
+
+        sessions = [
+            {"front_landmarks": make_landmarks(0.01 * i), "side_landmarks": make_landmarks(0.02 * i)}
+            for i in range(4)
+        ]
+        batch = normalize_and_validate_batch(sessions)
+
+        for raw, result in zip(sessions, batch):
+            single = normalize_and_validate(MeasurementInput(**raw))
+            assert result.measurements == pytest.approx(single.measurements)
+            assert result.accuracy == single.accuracy
+
+    def test_validate_batch_requires_sessions(self):
+        """An empty batch is rejected."""
+        response = client.post(
+            "/measurements/validate:batch",
+            json={"sessions": []},
+            headers={"X-API-Key": "staging-secret-key"}
+        )
+
+        assert response.status_code == 422
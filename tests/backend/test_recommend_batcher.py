@@ -0,0 +1,185 @@
+"""
+Tests for the recommendation micro-batcher.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from app.core.cache import TTLLRUCache
+# Routers import through ``app.*``; override the dependency object they use
+from app.services.fit_data import FitDataService, get_fit_data
+from app.services.fit_rules_bottoms import recommend_bottom
+from app.services.fit_rules_tops import recommend_top
+from app.services.recommend_batcher import MicroBatcher, score_size_batch
+from app.services.size_charts import compile_size_chart
+
+
+client = TestClient(app)
+
+BODY = {
+    "chest_cm": 101.6, "shoulder_cm": 46.0, "sleeve_cm": 64.0,
+    "waist_natural_cm": 81.28, "inseam_cm": 81.0,
+    "thigh_cm": 58.0, "hip_low_cm": 101.6, "knee_cm": 40.0,
+}
+
+TOPS_CHART = {
+    "id": "chart-tops",
+    "brand_id": "brand-1",
+    "category": "tops",
+    "unit": "cm",
+    "updated_at": "2025-01-01T00:00:00Z",
+    "measurements": {"M": {"chest": [94, 102]}, "L": {"chest": [102, 110]}, "XL": {"chest": [110, 118]}},
+}
+
+
+def recording_scorer(batches):
+    def score(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+    return score
+
+
+class TestMicroBatcher:
+    def test_concurrent_calls_share_one_pass(self):
+        batches = []
+        batcher = MicroBatcher(recording_scorer(batches), max_batch_size=100, max_wait_ms=20)
+
+        async def scenario():
+            return await asyncio.gather(*(batcher.submit(n) for n in range(10)))
+
+        results = asyncio.run(scenario())
+
+        assert results == [n * 10 for n in range(10)]
+        assert batches == [list(range(10))]
+        assert batcher.stats()["mean_batch_size"] == 10
+
+    def test_full_batches_flush_without_waiting(self):
+        batches = []
+        batcher = MicroBatcher(recording_scorer(batches), max_batch_size=4, max_wait_ms=60_000)
+
+        async def scenario():
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(n) for n in range(8))), 5)
+
+        assert asyncio.run(scenario()) == [n * 10 for n in range(8)]
+        assert [len(batch) for batch in batches] == [4, 4]
+
+    def test_errors_reach_only_their_caller(self):
+        def score(items):
+            return [ValueError("bad") if item < 0 else item for item in items]
+
+        batcher = MicroBatcher(score, max_wait_ms=1)
+
+        async def scenario():
+            return await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+
+        good, bad = asyncio.run(scenario())
+        assert good == 1 and isinstance(bad, ValueError)
+
+    def test_scorer_failure_fails_the_batch(self):
+        def score(items):
+            raise RuntimeError("scorer down")
+
+        batcher = MicroBatcher(score, max_wait_ms=1)
+
+        async def scenario():
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+class TestScoreSizeBatch:
+    def test_matches_the_fit_rules(self):
+        bodies = [dict(BODY, chest_cm=chest) for chest in (85.0, 95.0, 101.6, 120.0)]
+
+        results = score_size_batch([(body, ["tops", "bottoms"], None) for body in bodies])
+
+        for body, result in zip(bodies, results):
+            tops, bottoms = result.recommendations
+            assert tops["size"] == recommend_top(body)["size"]
+            assert bottoms["size"] == recommend_bottom(body)["size"]
+
+    def test_bad_requests_fail_alone(self):
+        results = score_size_batch([(BODY, None, None), ({"chest_cm": "wide"}, None, None), (BODY, ["swimwear"], None)])
+
+        assert len(results[0].recommendations) == 4
+        assert isinstance(results[1], ValueError)
+        assert isinstance(results[2], ValueError)
+
+    def test_callers_are_sized_against_their_own_charts(self):
+        chart = compile_size_chart(TOPS_CHART)
+        body = dict(BODY, chest_cm=112.0)
+
+        results = score_size_batch([
+            (body, ["tops"], {"tops": chart}), (body, ["tops"], None), (body, ["tops"], {"tops": chart}),
+        ])
+
+        sizes = [result.recommendations[0]["size"] for result in results]
+        assert sizes == ["XL", recommend_top(body)["size"], "XL"]
+
+
+class TestRecommendEndpoint:
+    def test_recommends_from_measurements(self):
+        response = client.post(
+            "/measurements/recommend",
+            json={**BODY, "session_id": "sess-9"},
+            headers={"X-API-Key": "staging-secret-key"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["session_id"] == "sess-9"
+        assert [rec["category"] for rec in data["recommendations"]] == ["tops", "bottoms", "dresses", "outerwear"]
+        assert data["recommendations"][0]["size"] == "M"
+        assert data["unavailable_categories"] == {}
+
+    def test_requested_categories_only(self):
+        response = client.post(
+            "/measurements/recommend?categories=dresses&categories=tops",
+            json={"chest_cm": 92.0, "waist_natural_cm": 72.0, "hip_low_cm": 99.0},
+            headers={"X-API-Key": "staging-secret-key"},
+        )
+
+        data = response.json()
+        assert [rec["category"] for rec in data["recommendations"]] == ["dresses"]
+        assert data["unavailable_categories"] == {"tops": ["shoulder_cm", "sleeve_cm"]}
+
+    def test_unknown_category_is_a_400(self):
+        response = client.post(
+            "/measurements/recommend?categories=swimwear",
+            json=BODY,
+            headers={"X-API-Key": "staging-secret-key"},
+        )
+
+        assert response.status_code == 400
+
+    def test_non_numeric_measurement_is_a_400(self):
+        response = client.post(
+            "/measurements/recommend",
+            json={"chest_cm": "wide"},
+            headers={"X-API-Key": "staging-secret-key"},
+        )
+
+        assert response.status_code == 400
+
+    def test_brand_charts_replace_the_default_ladders(self, supabase):
+        db = supabase(tables={"size_charts": [TOPS_CHART]})
+        app.dependency_overrides[get_fit_data] = lambda: FitDataService(db, TTLLRUCache())
+        try:
+            response = client.post(
+                "/measurements/recommend",
+                params={"brand_id": "brand-1", "categories": ["tops", "bottoms"]},
+                json={"chest_cm": 112.0, "waist_natural_cm": 81.28, "inseam_cm": 81.0},
+                headers={"X-API-Key": "staging-secret-key"},
+            )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        tops, bottoms = response.json()["recommendations"]
+        assert tops["size"] == "XL"
+        assert bottoms["size"] == recommend_bottom({"waist_natural_cm": 81.28, "inseam_cm": 81.0})["size"]
+        # One chart lookup per requested category
+        assert len(db.calls("select", "size_charts")) == 2
@@ -0,0 +1,132 @@
+"""
+Tests for the compiled size-chart index and chart-aware fit rules.
+"""
+
+import pytest
+
+from backend.app.services.fit_rules_bottoms import recommend_bottom
+from backend.app.services.fit_rules_tops import recommend_top
+from backend.app.services.size_charts import SizeChartIndex, compile_size_chart
+
+
+TOPS_CHART = {
+    "id": "chart-tops",
+    "brand_id": "brand-1",
+    "category": "tops",
+    "unit": "in",
+    "measurements": {
+        "L": {"chest": [41, 44], "waist": [35, 38]},
+        "S": {"chest": [34, 37], "waist": [28, 31]},
+        "M": {"chest": [37, 41], "waist": [31, 35]},
+        "XL": {"chest": [44, 48], "waist": [38, 42]},
+    },
+}
+
+BOTTOMS_CHART = {
+    "brand_id": "brand-1",
+    "category": "bottoms",
+    "unit": "cm",
+    "measurements": {
+        "30": {"waist": 76, "hip": 96, "inseam": 81},
+        "32": {"waist": 81, "hip": 101, "inseam": 81},
+        "34": {"waist": 86, "hip": 106, "inseam": 81},
+    },
+}
+
+BODY = {
+    "chest_cm": 99.0,
+    "shoulder_cm": 45.0,
+    "sleeve_cm": 62.0,
+    "waist_natural_cm": 82.0,
+    "hip_low_cm": 100.0,
+    "inseam_cm": 80.0,
+    "thigh_cm": 56.0,
+    "knee_cm": 39.0,
+}
+
+
+class TestCompiledSizeChart:
+    """Test size chart compilation and lookup."""
+
+    def test_compile_sorts_sizes_and_converts_units(self):
+        """Sizes are ordered by the primary dimension and stored in cm."""
+        chart = compile_size_chart(TOPS_CHART)
+
+        assert chart.labels == ("S", "M", "L", "XL")
+        assert chart.fields == ("chest_cm", "waist_natural_cm")
+        assert chart.low[0, 0] == pytest.approx(34 * 2.54)
+
+    def test_size_for_bisects_upper_bounds(self):
+        """Bisect returns the smallest size that fits, clamped to the largest."""
+        chart = compile_size_chart(TOPS_CHART)
+
+        assert chart.size_for("chest_cm", 36 * 2.54) == "S"
+        assert chart.size_for("chest_cm", 40 * 2.54) == "M"
+        assert chart.size_for("chest_cm", 60 * 2.54) == "XL"
+
+    def test_size_for_unspecified_column(self):
+        """A dimension no size gives a value for has no answer."""
+        chart = compile_size_chart({
+            "category": "tops",
+            "measurements": {"S": {"chest": 90, "sleeve": None}, "M": {"chest": 100, "sleeve": None}},
+        })
+
+        assert chart.size_for("sleeve_cm", 60.0) is None
+
+    def test_nearest_ranks_all_sizes(self):
+        """Nearest-size query picks the size whose ranges contain the body."""
+        match = compile_size_chart(TOPS_CHART).nearest(BODY)
+
+        assert match.label == "M"
+        assert match.distance == 0.0
+        assert [label for label, _ in match.alternatives] == ["S", "L"]
+
+    def test_index_lookup_by_brand_and_category(self):
+        """The index keys compiled charts by brand and category."""
+        index = SizeChartIndex()
+        index.add_all([TOPS_CHART, BOTTOMS_CHART])
+
+        assert len(index) == 2
+        assert index.get("brand-1", "bottoms").labels == ("30", "32", "34")
+        assert index.get("brand-2", "tops") is None
+
+
+class TestChartAwareFitRules:
+    """Test fit rules with and without a compiled chart."""
+
+    def test_recommend_top_default_ladder(self):
+        """Without a chart the chest ladder still applies."""
+        assert recommend_top(BODY)["size"] == "M"
+        assert recommend_top({**BODY, "chest_cm": 36 * 2.54})["size"] == "S"
+        assert recommend_top({**BODY, "chest_cm": 50 * 2.54})["size"] == "XL"
+
+    def test_recommend_with_charts(self):
+        """Compiled charts drive the recommended label."""
+        top = recommend_top(BODY, compile_size_chart(TOPS_CHART))
+        bottom = recommend_bottom(BODY, compile_size_chart(BOTTOMS_CHART))
+
+        assert top["size"] == "M"
+        assert bottom["size"] == "32"
+        assert bottom["category"] == "bottom"
+
+    def test_charted_bottom_needs_only_chart_measurements(self):
+        """With a chart, inseam and the fit-note ratios are optional."""
+        body = {"waist_natural_cm": 82.0, "hip_low_cm": 100.0}
+
+        bottom = recommend_bottom(body, compile_size_chart(BOTTOMS_CHART))
+
+        assert bottom["size"] == "32"
+        assert bottom["rationale"] == "standard ease"
+
+    def test_charted_top_needs_only_chart_measurements(self):
+        """With a chart, shoulder and sleeve are optional."""
+        body = {"chest_cm": 97.0}
+        chart = compile_size_chart({
+            "category": "tops",
+            "measurements": {"S": {"chest": [86, 94]}, "M": {"chest": [94, 102]}, "L": {"chest": [102, 110]}},
+        })
+
+        top = recommend_top(body, chart)
+
+        assert top["size"] == "M"
+        assert top["rationale"] == "Nearest chart size on chest (chest 38 in)"
@@ -0,0 +1,233 @@
+"""
+Tests for avatar mesh generation, levels of detail, caching and GLB output.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from workers.avatar import (
+    MeshCache,
+    build_lods,
+    decimate,
+    encode_glb,
+    fit_body,
+    generate_avatar,
+    parse_glb,
+    read_accessor,
+    write_glb,
+)
+from workers.avatar.body import LEFT_ELBOW, LEFT_SHOULDER, LEFT_WRIST, ellipse_axes
+
+
+WORKER_PATH = Path(__file__).resolve().parents[2] / "workers" / "avatar-processor" / "worker.py"
+
+
+def signed_volume(mesh) -> float:
+    p = mesh.positions.astype(np.float64)
+    f = mesh.indices
+    return float(np.einsum("ij,ij->i", p[f[:, 0]], np.cross(p[f[:, 1]], p[f[:, 2]])).sum() / 6)
+
+
+def t_pose_landmarks():
+    """33 visible landmarks with the left arm straight out sideways."""
+    points = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 0.99} for _ in range(33)]
+    points[LEFT_SHOULDER] = {"x": 0.6, "y": 0.3, "z": 0.0, "visibility": 0.99}
+    points[LEFT_ELBOW] = {"x": 0.75, "y": 0.3, "z": 0.0, "visibility": 0.99}
+    points[LEFT_WRIST] = {"x": 0.9, "y": 0.3, "z": 0.0, "visibility": 0.99}
+    return points
+
+
+class TestBodyFit:
+    """Test template fitting."""
+
+    def test_mesh_matches_height_and_is_closed_outward(self):
+        """The avatar spans the requested height with outward-facing faces."""
+        mesh = fit_body({"height_cm": 180.0, "chest_cm": 100.0})
+
+        low, high = mesh.bounds()
+        assert high[1] == np.float32(1.8)
+        assert low[1] > 0
+        assert mesh.indices.max() < mesh.vertex_count
+        assert signed_volume(mesh) > 0
+        assert np.allclose(np.linalg.norm(mesh.normals, axis=1), 1.0, atol=1e-4)
+
+    def test_larger_measurements_give_larger_volume(self):
+        """Circumferences drive cross-section size."""
+        slim = fit_body({"height_cm": 175, "chest_cm": 88, "waist_natural_cm": 72, "hip_low_cm": 90})
+        broad = fit_body({"height_cm": 175, "chest_cm": 112, "waist_natural_cm": 100, "hip_low_cm": 112})
+
+        assert signed_volume(broad) > signed_volume(slim) * 1.2
+
+    def test_landmarks_pose_the_limbs(self):
+        """A horizontal arm in the landmarks puts the hand far to the side."""
+        a_pose = fit_body({"height_cm": 170})
+        t_pose = fit_body({"height_cm": 170}, t_pose_landmarks())
+
+        assert t_pose.bounds()[1][0] > a_pose.bounds()[1][0] + 0.3
+
+    def test_ellipse_axes_reproduce_circumference(self):
+        """Semi-axes invert the ellipse perimeter for circles and ellipses."""
+        a, b = ellipse_axes(np.array([1.0, 1.0]), np.array([1.0, 0.5]))
+
+        assert np.isclose(a[0], 1 / (2 * np.pi))
+        assert np.isclose(b[1], a[1] * 0.5)
+
+
+class TestGLB:
+    """Test binary glTF output."""
+
+    def test_round_trip(self):
+        """Positions and indices survive encode/parse; accessors carry bounds."""
+        mesh = fit_body(segments=16, detail=0.5)
+        document, binary = parse_glb(encode_glb(mesh))
+
+        assert document["asset"]["version"] == "2.0"
+        assert document["accessors"][0]["count"] == mesh.vertex_count
+        assert np.allclose(document["accessors"][0]["max"], mesh.bounds()[1])
+        assert np.array_equal(read_accessor(document, binary, 0), mesh.positions)
+        assert np.array_equal(read_accessor(document, binary, 2), mesh.indices.reshape(-1))
+        assert len(binary) % 4 == 0
+
+    def test_streaming_writer_matches_in_memory_encoding(self, tmp_path):
+        """write_glb to a file produces exactly encode_glb's bytes."""
+        mesh = fit_body(segments=12, detail=0.5)
+        path = tmp_path / "a.glb"
+        with open(path, "wb") as handle:
+            written = write_glb(handle, mesh)
+
+        assert path.read_bytes() == encode_glb(mesh)
+        assert written == path.stat().st_size
+
+
+class TestLevelOfDetail:
+    """Test decimation into levels of detail."""
+
+    def test_levels_respect_budgets_and_keep_the_shape(self):
+        """Each level fits its face budget while keeping volume and extent."""
+        mesh = fit_body({"height_cm": 175})
+        lods = build_lods(mesh, (10000, 2500, 600))
+
+        assert [lod.face_count <= budget for lod, budget in zip(lods, (10000, 2500, 600))] == [True] * 3
+        assert lods[0].face_count > lods[1].face_count > lods[2].face_count > 400
+        for lod in lods:
+            assert lod.indices.max() < lod.vertex_count
+            assert abs(signed_volume(lod) / signed_volume(mesh) - 1) < 0.2
+            assert np.allclose(lod.bounds()[1], mesh.bounds()[1], atol=0.05)
+
+    def test_decimate_is_a_no_op_within_budget(self):
+        """Meshes already under the budget are returned unchanged."""
+        mesh = fit_body(segments=12, detail=0.5)
+
+        assert decimate(mesh, mesh.face_count) is mesh
+
+
+class TestMeshCache:
+    """Test the quantized mesh cache."""
+
+    def test_near_identical_bodies_share_a_mesh(self, tmp_path):
+        """Measurements within one bucket hit; a different bucket misses."""
+        cache = MeshCache(str(tmp_path / "cache"))
+
+        def run(job_id, chest):
+            return generate_avatar(
+                {"job_id": job_id, "user_id": job_id, "measurements": {"height_cm": 170, "chest_cm": chest}},
+                output_dir=str(tmp_path / "out"),
+                cache=cache,
+            )
+
+        first = run("a", 96.1)
+        second = run("b", 95.9)
+        third = run("c", 97.0)
+
+        assert [r["metadata"]["cache_hit"] for r in (first, second, third)] == [False, True, False]
+        assert first["metadata"]["mesh_key"] == second["metadata"]["mesh_key"]
+        assert second["metadata"]["vertices"] == first["metadata"]["vertices"]
+        assert "fit" not in second["metadata"]["timings_ms"]
+        assert (tmp_path / "out" / "a" / "a.glb").read_bytes() == (tmp_path / "out" / "b" / "b.glb").read_bytes()
+        assert (tmp_path / "out" / "b" / "b.lod2.glb").exists()
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Past the cap, the entries touched longest ago are deleted first."""
+        cache = MeshCache(str(tmp_path), max_bytes=300)
+        for n, key in enumerate(["aa01", "bb02", "cc03"]):
+            path = cache.put(key, b"x" * 100)
+            os.utime(path, (1000 + n, 1000 + n))
+        cache.get("aa01")  # recently read
+
+        cache.put("dd04", b"x" * 100)
+
+        assert cache.path("aa01").exists()
+        assert cache.path("dd04").exists()
+        assert not cache.path("bb02").exists()
+        assert not cache.path("cc03").exists()
+        assert cache.get("bb02") is None
+
+
+class TestAvatarPipeline:
+    """Test the job pipeline and process-pool execution."""
+
+    def test_generate_avatar_writes_glb_and_reports_counts(self, tmp_path):
+        """The job result points at a valid GLB and reports counts and timings."""
+        result = generate_avatar(
+            {"job_id": "j1", "user_id": "../u1", "measurements": {"height_cm": 165}},
+            output_dir=str(tmp_path),
+            base_url="https://cdn.example.com/avatars/",
+        )
+
+        path = tmp_path / "_u1" / "j1.glb"
+        document, _ = parse_glb(path.read_bytes())
+        assert result["avatar_url"] == "https://cdn.example.com/avatars/_u1/j1.glb"
+        assert result["preview_url"] == "https://cdn.example.com/avatars/_u1/j1.lod2.glb"
+        assert result["metadata"]["vertices"] == document["accessors"][0]["count"]
+        assert result["metadata"]["faces"] * 3 == document["accessors"][2]["count"]
+        assert [lod["level"] for lod in result["lods"]] == [2, 1, 0]
+        assert [lod["faces"] for lod in result["lods"]] == sorted(lod["faces"] for lod in result["lods"])
+        for lod in result["lods"]:
+            assert (tmp_path / "_u1" / lod["url"].rsplit("/", 1)[1]).stat().st_size == lod["file_size_bytes"]
+        assert set(result["metadata"]["timings_ms"]) == {"lookup", "fit", "decimate", "write"}
+
+    def test_process_job_runs_in_a_process_pool(self, tmp_path, monkeypatch):
+        """The worker's handler pickles into pool processes."""
+        monkeypatch.setenv("AVATAR_OUTPUT_DIR", str(tmp_path))
+        spec = importlib.util.spec_from_file_location("avatar_worker", WORKER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "avatar_worker", module)
+        spec.loader.exec_module(module)
+        processor = module.AvatarProcessor()
+
+        jobs = [{"job_id": f"j{n}", "user_id": "u", "measurements": {"height_cm": 160 + n}} for n in range(4)]
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("fork")) as pool:
+            results = list(pool.map(processor.process_job, jobs))
+
+        assert [r["status"] for r in results] == ["completed"] * 4
+        assert {f"j{n}.glb" for n in range(4)} <= {p.name for p in (tmp_path / "u").iterdir()}
+
+    def test_pool_processes_keep_their_mesh_cache(self, tmp_path, monkeypatch):
+        """Size accounting and counters survive across jobs in one pool process."""
+        monkeypatch.setenv("AVATAR_OUTPUT_DIR", str(tmp_path))
+        spec = importlib.util.spec_from_file_location("avatar_worker", WORKER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "avatar_worker", module)
+        spec.loader.exec_module(module)
+        processor = module.AvatarProcessor()
+
+        jobs = [{"job_id": f"j{n}", "user_id": "u", "measurements": {"height_cm": 160 + n}} for n in range(3)]
+        jobs.append({"job_id": "j3", "user_id": "u", "measurements": {"height_cm": 160}})
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=module.process_cache,
+            initargs=(str(tmp_path),),
+        ) as pool:
+            results = [pool.submit(processor.process_job, job).result() for job in jobs]
+
+        stats = results[-1]["metadata"]["process_cache"]
+        assert (stats["hits"], stats["misses"]) == (1, 3)
+        assert stats["scans"] == 1
@@ -0,0 +1,412 @@
+"""
+Tests for notification delivery: pooled SMTP, push batching, rate limits
+and per-recipient coalescing.
+"""
+
+import asyncio
+import importlib.util
+from email import message_from_bytes
+from pathlib import Path
+
+import pytest
+
+from workers.notifications import (
+    NotificationCoalescer,
+    OutgoingEmail,
+    PushBatcher,
+    PushNotification,
+    PushProvider,
+    RecipientRateLimiter,
+    SMTPPool,
+)
+
+
+WORKER_PATH = Path(__file__).resolve().parents[2] / "workers" / "notification-worker" / "worker.py"
+
+
+class FakeSMTPServer:
+    """Minimal aiosmtpd-style SMTP server; rejects recipients starting with 'bad'."""
+
+    def __init__(self, pipelining: bool = True, drop_after: int = 0):
+        self.pipelining = pipelining
+        # Close the first connection once this many messages were queued (0: never)
+        self.drop_after = drop_after
+        self.messages = []
+        self.connections = 0
+        self.auth = []
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        def reply(text):
+            writer.write(text.encode() + b"\r\n")
+
+        reply("220 fake ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                extensions = ["250-fake", "250-AUTH PLAIN"]
+                if self.pipelining:
+                    extensions.append("250-PIPELINING")
+                reply("\r\n".join(extensions + ["250 8BITMIME"]))
+            elif verb == "AUTH":
+                self.auth.append(command)
+                reply("235 ok")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip("<>"), []
+                reply("250 ok")
+            elif verb == "RCPT":
+                address = command[8:].strip("<>")
+                if address.startswith("bad"):
+                    reply("550 no such user")
+                else:
+                    recipients.append(address)
+                    reply("250 ok")
+            elif verb == "DATA":
+                if not recipients:
+                    reply("503 no valid recipients")
+                    continue
+                reply("354 go ahead")
+                await writer.drain()
+                data = b""
+                while True:
+                    chunk = await reader.readline()
+                    if chunk == b".\r\n":
+                        break
+                    data += chunk[1:] if chunk.startswith(b"..") else chunk
+                self.messages.append((sender, recipients, data))
+                reply("250 queued")
+                if len(self.messages) == self.drop_after:
+                    self.drop_after = 0
+                    await writer.drain()
+                    break
+            elif verb == "RSET":
+                sender, recipients = None, []
+                reply("250 ok")
+            elif verb == "QUIT":
+                reply("221 bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 unknown")
+            await writer.drain()
+        writer.close()
+
+
+def email(to: str, body: bytes = b"Subject: hi\r\n\r\nhello\r\n") -> OutgoingEmail:
+    return OutgoingEmail(sender="noreply@fittwin.com", recipients=[to], data=body)
+
+
+class TestSMTPPool:
+    """Test connection reuse, pipelining and per-message failures."""
+
+    def test_many_messages_share_persistent_connections(self):
+        """Hundreds of sends go out over at most ``size`` connections."""
+        async def scenario():
+            server = FakeSMTPServer()
+            port = await server.start()
+            pool = SMTPPool("127.0.0.1", port, username="u", password="p", size=3, pipeline_depth=20)
+            results = await asyncio.gather(*(pool.send(email(f"user{n}@example.com")) for n in range(200)))
+            await pool.close()
+            await server.stop()
+            return server, pool, results
+
+        server, pool, results = asyncio.run(scenario())
+
+        assert all(result.ok for result in results)
+        assert len(server.messages) == 200
+        assert server.connections == pool.connections_opened <= 3
+        assert len(server.auth) == server.connections
+
+    def test_rejected_recipient_does_not_break_the_pipeline(self):
+        """A rejected message fails alone; its neighbours are delivered."""
+        async def scenario(pipelining):
+            server = FakeSMTPServer(pipelining=pipelining)
+            port = await server.start()
+            pool = SMTPPool("127.0.0.1", port, size=1)
+            addresses = ["a@example.com", "bad@example.com", "b@example.com"]
+            results = await asyncio.gather(*(pool.send(email(address)) for address in addresses))
+            await pool.close()
+            await server.stop()
+            return server, results
+
+        for pipelining in (True, False):
+            server, results = asyncio.run(scenario(pipelining))
+
+            assert [result.ok for result in results] == [True, False, True]
+            assert results[1].code == 550 and not results[1].transient
+            assert [recipients for _, recipients, _ in server.messages] == [["a@example.com"], ["b@example.com"]]
+
+    def test_dropped_connection_resends_only_unaccepted_messages(self):
+        """Messages the server already queued are not sent again after a reconnect."""
+        async def scenario(pipelining):
+            server = FakeSMTPServer(pipelining=pipelining, drop_after=3)
+            port = await server.start()
+            pool = SMTPPool("127.0.0.1", port, size=1, pipeline_depth=10)
+            # Open the connection first, so the batch runs on a reused one
+            first = await pool.send(email("u0@example.com"))
+            results = await asyncio.gather(*(pool.send(email(f"u{n}@example.com")) for n in range(1, 6)))
+            await pool.close()
+            await server.stop()
+            return server, [first, *results]
+
+        for pipelining in (True, False):
+            server, results = asyncio.run(scenario(pipelining))
+
+            assert all(result.ok for result in results)
+            delivered = [recipients[0] for _, recipients, _ in server.messages]
+            assert sorted(delivered) == [f"u{n}@example.com" for n in range(6)]
+            assert server.connections == 2
+
+    def test_empty_recipient_list_is_rejected(self):
+        """A message without recipients is refused before it reaches SMTP."""
+        with pytest.raises(ValueError):
+            OutgoingEmail(sender="noreply@fittwin.com", recipients=[], data=b"hi")
+
+    def test_dot_stuffing_round_trips(self):
+        """Lines starting with a dot survive the DATA terminator."""
+        async def scenario():
+            server = FakeSMTPServer()
+            port = await server.start()
+            pool = SMTPPool("127.0.0.1", port, size=1)
+            await pool.send(email("a@example.com", b"Subject: x\n\n.hidden\n..two\n"))
+            await pool.close()
+            await server.stop()
+            return server
+
+        server = asyncio.run(scenario())
+
+        assert server.messages[0][2] == b"Subject: x\r\n\r\n.hidden\r\n..two\r\n"
+
+    def test_unreachable_server_is_transient(self):
+        """Connection failures come back as retryable results."""
+        async def scenario():
+            server = FakeSMTPServer()
+            port = await server.start()
+            await server.stop()
+            pool = SMTPPool("127.0.0.1", port, size=1, timeout=1.0)
+            result = await pool.send(email("a@example.com"))
+            await pool.close()
+            return result
+
+        result = asyncio.run(scenario())
+
+        assert not result.ok
+        assert result.transient
+
+
+class RecordingPushProvider(PushProvider):
+    max_batch_size = 50
+
+    def __init__(self):
+        self.batches = []
+
+    async def send_batch(self, notifications):
+        self.batches.append([n.user_id for n in notifications])
+        return [not n.user_id.startswith("bad") for n in notifications]
+
+
+class TestPushBatcher:
+    """Test push batching."""
+
+    def test_concurrent_sends_are_batched(self):
+        """Concurrent pushes share provider calls capped at the batch size."""
+        provider = RecordingPushProvider()
+
+        async def scenario():
+            batcher = PushBatcher(provider, max_batch=100, linger=0.02, senders=1)
+            users = [f"user{n}" for n in range(120)] + ["bad-user"]
+            results = await asyncio.gather(*(batcher.send(PushNotification(u, "t", "b")) for u in users))
+            await batcher.close()
+            return results
+
+        results = asyncio.run(scenario())
+
+        assert results == [True] * 120 + [False]
+        assert [len(batch) for batch in provider.batches] == [50, 50, 21]
+
+
+class TestRecipientRateLimiter:
+    """Test the per-recipient token bucket."""
+
+    def test_limits_each_recipient_independently(self):
+        """A recipient over its burst waits; other recipients do not."""
+        now = {"t": 0.0}
+        limiter = RecipientRateLimiter(rate=60, per=60, burst=2, clock=lambda: now["t"])
+
+        assert limiter.reserve("alice") == 0.0
+        assert limiter.reserve("alice") == 0.0
+        assert limiter.reserve("alice") == 1.0
+        assert limiter.reserve("alice") == 2.0
+        assert limiter.reserve("bob") == 0.0
+
+        now["t"] = 10.0
+        assert limiter.reserve("alice") == 0.0
+
+    def test_acquire_sleeps_for_the_reserved_wait(self):
+        """acquire() waits out the bucket deficit."""
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+
+        limiter = RecipientRateLimiter(rate=30, per=60, burst=1, clock=lambda: 0.0, sleep=fake_sleep)
+
+        async def scenario():
+            for _ in range(3):
+                await limiter.acquire("email:a@example.com")
+
+        asyncio.run(scenario())
+
+        assert slept == [2.0, 4.0]
+
+
+class TestNotificationCoalescer:
+    """Test per-recipient coalescing and status supersession."""
+
+    def test_status_updates_collapse_into_one_digest(self):
+        """PAID -> SENT_TO_BRAND -> FULFILLED sends only the last, in one digest."""
+        delivered = []
+
+        async def deliver(job):
+            delivered.append(job)
+            return {"job_id": job["job_id"], "status": "completed"}
+
+        def job(job_id, status=None, order_id="o1", to="alice@example.com"):
+            return {"job_id": job_id, "type": "email", "to_email": to, "subject": job_id,
+                    "body": f"body {job_id}", "order_id": order_id if status else None,
+                    "order_status": status}
+
+        async def scenario():
+            coalescer = NotificationCoalescer(deliver, window=0.05)
+            jobs = [
+                job("paid", "paid"),
+                job("sent", "sent_to_brand"),
+                job("referral"),
+                job("fulfilled", "fulfilled"),
+                job("other", "paid", to="bob@example.com"),
+            ]
+            return coalescer, await asyncio.gather(*(coalescer.submit(j) for j in jobs))
+
+        coalescer, results = asyncio.run(scenario())
+
+        by_id = {result["job_id"]: result for result in results}
+        assert by_id["paid"] == {"job_id": "paid", "status": "coalesced", "superseded_by": "fulfilled"}
+        assert by_id["sent"]["superseded_by"] == "fulfilled"
+        assert by_id["referral"]["status"] == by_id["fulfilled"]["status"] == "completed"
+        assert by_id["fulfilled"]["digest_size"] == 2
+        assert len(delivered) == 2
+        digest = next(j for j in delivered if j["to_email"] == "alice@example.com")
+        assert digest["subject"] == "You have 2 updates from FitTwin"
+        assert "body referral" in digest["body"] and "body fulfilled" in digest["body"]
+        assert "body paid" not in digest["body"]
+        assert coalescer.digests_sent == 1
+
+    def test_out_of_order_status_keeps_the_later_state(self):
+        """A stale status arriving late does not override a newer one."""
+        delivered = []
+
+        async def deliver(job):
+            delivered.append(job["job_id"])
+            return {"job_id": job["job_id"], "status": "completed"}
+
+        async def scenario():
+            coalescer = NotificationCoalescer(deliver, window=0.02)
+            jobs = [
+                {"job_id": "fulfilled", "type": "push", "user_id": "u1", "title": "t",
+                 "order_id": "o1", "order_status": "fulfilled"},
+                {"job_id": "paid", "type": "push", "user_id": "u1", "title": "t",
+                 "order_id": "o1", "order_status": "paid"},
+            ]
+            return await asyncio.gather(*(coalescer.submit(j) for j in jobs))
+
+        results = asyncio.run(scenario())
+
+        assert delivered == ["fulfilled"]
+        assert results[1]["status"] == "coalesced"
+
+    def test_failures_propagate_and_opt_out_skips_window(self):
+        """Delivery errors reach every held job; coalesce=False sends at once."""
+        async def deliver(job):
+            if job.get("coalesce") is False:
+                return {"job_id": job["job_id"], "status": "completed"}
+            raise ConnectionError("smtp down")
+
+        async def scenario():
+            coalescer = NotificationCoalescer(deliver, window=60, max_pending=2)
+            urgent = await asyncio.wait_for(coalescer.submit(
+                {"job_id": "reset", "type": "email", "to_email": "a@example.com", "coalesce": False}), 1)
+            held = [{"job_id": n, "type": "email", "to_email": "a@example.com"} for n in range(2)]
+            results = await asyncio.wait_for(
+                asyncio.gather(*(coalescer.submit(j) for j in held), return_exceptions=True), 1)
+            await coalescer.close()
+            return urgent, results
+
+        urgent, results = asyncio.run(scenario())
+
+        assert urgent["status"] == "completed"
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def load_worker_module():
+    spec = importlib.util.spec_from_file_location("notification_worker", WORKER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestNotificationWorker:
+    """Test the worker end to end against the fake server."""
+
+    def test_process_jobs_concurrently(self):
+        """Email and push jobs complete; permanent rejections are 'failed'."""
+        module = load_worker_module()
+        provider = RecordingPushProvider()
+
+        async def scenario():
+            server = FakeSMTPServer()
+            port = await server.start()
+            worker = module.NotificationWorker(
+                smtp=SMTPPool("127.0.0.1", port, size=2),
+                push_provider=provider,
+                rate_limiter=RecipientRateLimiter(rate=60, per=60, burst=5),
+                coalesce_window=0,
+            )
+            jobs = [
+                {"job_id": n, "type": "email", "to_email": f"user{n}@example.com",
+                 "subject": "Order confirmed", "body": "<p>Thanks!</p>"}
+                for n in range(50)
+            ]
+            jobs.append({"job_id": "bad", "type": "email", "to_email": "bad@example.com",
+                         "subject": "x", "body": "y"})
+            jobs.append({"job_id": "push", "type": "push", "user_id": "u1", "title": "t", "body": "b"})
+            results = await asyncio.gather(*(worker.process_job(job) for job in jobs))
+            await worker.close()
+            await server.stop()
+            return server, results
+
+        server, results = asyncio.run(scenario())
+
+        statuses = {result["job_id"]: result["status"] for result in results}
+        assert statuses["bad"] == "failed"
+        assert statuses["push"] == "completed"
+        assert sum(status == "completed" for status in statuses.values()) == 51
+        assert len(server.messages) == 50
+        parsed = message_from_bytes(server.messages[0][2])
+        assert parsed["Subject"] == "Order confirmed"
+        assert parsed.get_content_type() == "text/html"
+        assert provider.batches == [["u1"]]
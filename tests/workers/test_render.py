@@ -0,0 +1,362 @@
+"""
+Tests for the tile-based try-on renderer and fit heatmaps.
+"""
+
+import importlib.util
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from workers.avatar import fit_body
+from workers.avatar.body import REGIONS, resolve_measurements
+from workers.render import (
+    SPECULATIVE,
+    USER,
+    InFlight,
+    RenderCache,
+    RenderScheduler,
+    bin_triangles,
+    decode_png,
+    drape,
+    encode_png,
+    neighbor_sizes,
+    rank_sizes,
+    region_ease,
+    render_tiles,
+    render_tryon,
+)
+
+
+WORKER_PATH = Path(__file__).resolve().parents[2] / "workers" / "render-worker" / "worker.py"
+
+BODY = {"height_cm": 175.0, "chest_cm": 96.0, "waist_natural_cm": 82.0, "hip_low_cm": 98.0}
+SIZES = {
+    "S": {"chest_cm": 90.0, "waist_cm": 78.0},
+    "M": {"chest_cm": 102.0, "waist_cm": 88.0},
+    "L": {"chest_cm": 110.0, "waist_cm": 98.0},
+}
+
+
+def render_job(size="M", **garment):
+    return {
+        "job_id": f"r-{size}",
+        "user_id": "u1",
+        "garment_id": "g1",
+        "size": size,
+        "measurements": BODY,
+        "garment": {"category": "top", "sizes": SIZES, **garment},
+    }
+
+
+def scene(triangles, depths, values):
+    xy = np.asarray(triangles, dtype=np.float32)
+    depth = np.asarray(depths, dtype=np.float32)
+    attributes = np.asarray(values, dtype=np.float32)[:, None, None].repeat(3, axis=1)
+    return xy, depth, attributes
+
+
+class TestRaster:
+    """Test binning and tile rasterization."""
+
+    def test_triangle_coverage_matches_area(self):
+        """A large triangle covers about its area in pixels, split over tiles."""
+        xy, depth, attributes = scene([[(4, 4), (120, 4), (4, 90)]], [[0, 0, 0]], [1.0])
+        tasks = bin_triangles(xy, depth, attributes, 128, 96, tile=32)
+        frame = render_tiles(tasks, 128, 96, 1)
+
+        assert len(tasks) > 1
+        assert abs(frame.covered.sum() - 116 * 86 / 2) < 116 + 86
+        assert np.allclose(frame.attributes[frame.covered], 1.0)
+
+    def test_nearest_triangle_wins(self):
+        """Overlapping triangles resolve by depth, whichever order they arrive in."""
+        triangles = [[(0, 0), (64, 0), (0, 64)], [(0, 0), (64, 0), (0, 64)]]
+        for depths, expected in (([[0] * 3, [1] * 3], 2.0), ([[1] * 3, [0] * 3], 1.0)):
+            xy, depth, attributes = scene(triangles, depths, [1.0, 2.0])
+            frame = render_tiles(bin_triangles(xy, depth, attributes, 64, 64, tile=16), 64, 64, 1)
+            assert np.allclose(frame.attributes[frame.covered], expected)
+
+    def test_tile_size_does_not_change_the_frame(self):
+        """Stitched tiles reproduce a single-tile render exactly."""
+        rng = np.random.default_rng(3)
+        xy = rng.uniform(0, 200, size=(300, 3, 2)).astype(np.float32)
+        depth = rng.uniform(0, 1, size=(300, 3)).astype(np.float32)
+        attributes = rng.uniform(0, 1, size=(300, 3, 2)).astype(np.float32)
+
+        whole = render_tiles(bin_triangles(xy, depth, attributes, 200, 160, tile=256), 200, 160, 2)
+        tiled = render_tiles(bin_triangles(xy, depth, attributes, 200, 160, tile=24), 200, 160, 2)
+
+        assert np.array_equal(whole.covered, tiled.covered)
+        assert np.allclose(whole.attributes, tiled.attributes)
+
+
+class TestFit:
+    """Test ease, fit labels and draping."""
+
+    def test_region_ease_labels_and_ranking(self):
+        """Ease follows garment minus body; sizes rank by how close they are to ideal."""
+        body = resolve_measurements(BODY)
+        small = region_ease(body, SIZES["S"], "top")
+        large = region_ease(body, SIZES["L"], "top")
+
+        assert small["chest"]["ease_cm"] == -6.0 and small["chest"]["fit"] == "tight"
+        assert large["waist"]["fit"] == "relaxed"
+        assert small["upper_arm"]["estimated"] and not small["chest"]["estimated"]
+        assert [entry["size"] for entry in rank_sizes(body, SIZES, "top")] == ["M", "L", "S"]
+
+    def test_drape_covers_only_garment_regions_outside_the_body(self):
+        """A top covers the chest but not the legs, and sits off the skin."""
+        body = fit_body(BODY)
+        regions = region_ease(resolve_measurements(BODY), SIZES["L"], "top")
+        garment, ease = drape(body, regions)
+
+        labels = {REGIONS[index] for index in np.unique(garment.regions)}
+        assert labels == {"chest", "waist", "upper_arm"}
+        chest = body.regions == REGIONS.index("chest")
+        garment_chest = garment.regions == REGIONS.index("chest")
+        radius = lambda points: np.hypot(points[:, 0], points[:, 2]).mean()  # noqa: E731
+        assert radius(garment.positions[garment_chest]) > radius(body.positions[chest])
+        assert np.allclose(ease[garment_chest], regions["chest"]["ease_pct"])
+
+
+class TestRenderTryon:
+    """Test the end-to-end renderer and worker."""
+
+    def test_writes_render_and_heatmap(self, tmp_path):
+        """Both PNGs are written, the garment is visible and fit is reported per region."""
+        result = render_tryon(render_job(color="#ff0000"), str(tmp_path), base_url="https://cdn.example.com/r/")
+
+        assert result["render_url"] == "https://cdn.example.com/r/u1/r-M.png"
+        render = decode_png((tmp_path / "u1" / "r-M.png").read_bytes())
+        heatmap = decode_png((tmp_path / "u1" / "r-M.heatmap.png").read_bytes())
+        assert render.shape == heatmap.shape == (1024, 512, 3)
+        red = (render[..., 0] > 120) & (render[..., 1] < 40) & (render[..., 2] < 40)
+        assert red.mean() > 0.02
+
+        analysis = result["fit_analysis"]
+        assert analysis["chest_fit"] == "good" and analysis["overall_score"] > 0.8
+        assert set(analysis["regions"]) == {"chest", "waist", "upper_arm"}
+        assert [entry["size"] for entry in result["alternative_sizes"]] == ["L", "S"]
+        assert set(result["metadata"]["timings_ms"]) == {"lookup", "fit", "drape", "bin", "raster", "shade", "encode"}
+
+    def test_heatmap_turns_red_when_tight(self, tmp_path):
+        """A garment smaller than the body shows tight (red) ease in the heatmap."""
+        render_tryon(render_job("S"), str(tmp_path))
+        render_tryon(render_job("M"), str(tmp_path))
+
+        def reddish(name):
+            image = decode_png((tmp_path / "u1" / name).read_bytes()).astype(int)
+            return ((image[..., 0] - image[..., 1] > 60) & (image[..., 0] > 120)).sum()
+
+        assert reddish("r-S.heatmap.png") > 10 * max(reddish("r-M.heatmap.png"), 1)
+
+    def test_pool_render_matches_serial(self, tmp_path):
+        """Tiles rasterized across processes stitch to the same image."""
+        serial = render_tryon(render_job(), str(tmp_path / "serial"))
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("fork")) as pool:
+            pooled = render_tryon(render_job(), str(tmp_path / "pool"), map_fn=pool.map)
+
+        assert pooled["metadata"]["tiles"] == serial["metadata"]["tiles"] > 1
+        rendered = [(tmp_path / run / "u1" / "r-M.png").read_bytes() for run in ("serial", "pool")]
+        assert rendered[0] == rendered[1]
+
+    def test_worker_process_job(self, tmp_path, monkeypatch):
+        """The worker renders through the pipeline with its configured output."""
+        monkeypatch.setenv("RENDER_OUTPUT_DIR", str(tmp_path))
+        monkeypatch.setenv("RENDER_WIDTH", "256")
+        monkeypatch.setenv("RENDER_HEIGHT", "512")
+        spec = importlib.util.spec_from_file_location("render_worker", WORKER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "render_worker", module)
+        spec.loader.exec_module(module)
+
+        result = module.RenderWorker().process_job(render_job("L"))
+
+        assert result["status"] == "completed"
+        assert result["fit_analysis"]["waist_fit"] == "relaxed"
+        assert decode_png((tmp_path / "u1" / "r-L.png").read_bytes()).shape == (512, 256, 3)
+
+
+class TestRenderCache:
+    """Test the render cache and in-flight deduplication."""
+
+    def test_repeat_render_is_linked_from_cache(self, tmp_path):
+        """The same avatar, garment and size is rendered once; a new size misses."""
+        cache = RenderCache(str(tmp_path / "cache"))
+        first = render_tryon(render_job(), str(tmp_path), cache=cache)
+        repeat = render_tryon({**render_job(), "job_id": "again"}, str(tmp_path), cache=cache)
+        other = render_tryon(render_job("L"), str(tmp_path), cache=cache)
+
+        assert [r["metadata"]["cache_hit"] for r in (first, repeat, other)] == [False, True, False]
+        assert set(repeat["metadata"]["timings_ms"]) == {"lookup", "link"}
+        assert repeat["fit_analysis"] == first["fit_analysis"]
+        assert repeat["render_url"].endswith("u1/again.png")
+        assert (tmp_path / "u1" / "again.png").read_bytes() == (tmp_path / "u1" / "r-M.png").read_bytes()
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+        assert round(cache.hit_rate, 3) == 0.333
+
+    def test_near_identical_bodies_share_a_render(self, tmp_path):
+        """Bodies within the quantization step hit each other's renders."""
+        cache = RenderCache(str(tmp_path / "cache"))
+        render_tryon(render_job(), str(tmp_path), cache=cache)
+        nudged = {**render_job(), "measurements": {**BODY, "chest_cm": BODY["chest_cm"] + 0.1}}
+
+        assert render_tryon(nudged, str(tmp_path), cache=cache)["metadata"]["cache_hit"]
+
+    def test_eviction_keeps_the_cache_bounded(self, tmp_path):
+        """Past the cap, least recently used files go first."""
+        cache = RenderCache(str(tmp_path / "cache"), max_bytes=1)
+        cache.put("a" * 64, b"x" * 100, b"y" * 100, {"fit_analysis": {}})
+
+        assert cache.get("a" * 64) is None
+        assert cache.stats()["evicted_bytes"] > 0
+
+    def test_in_flight_runs_once_per_key(self):
+        """Concurrent callers for a key share the first caller's result."""
+        in_flight = InFlight()
+        release = threading.Event()
+        calls = []
+
+        def render():
+            calls.append(1)
+            release.wait(5)
+            return {"render_url": "x"}
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(in_flight.run, "k", render) for _ in range(3)]
+            while in_flight.followers < 2:
+                time.sleep(0.01)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True]
+        assert len(in_flight) == 0
+
+    def test_in_flight_shares_failures(self):
+        """A failing render raises for every waiter and frees the key."""
+        in_flight = InFlight()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            in_flight.run("k", fail)
+        assert in_flight.run("k", lambda: 1) == (1, False)
+
+    def test_worker_deduplicates_concurrent_jobs(self, tmp_path, monkeypatch):
+        """Identical jobs arriving together render once and keep their own job ids."""
+        monkeypatch.setenv("RENDER_OUTPUT_DIR", str(tmp_path))
+        spec = importlib.util.spec_from_file_location("render_worker", WORKER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "render_worker", module)
+        spec.loader.exec_module(module)
+        worker = module.RenderWorker()
+        rendered = []
+        render = worker.render
+
+        def slow_render(job_data):
+            rendered.append(job_data["job_id"])
+            time.sleep(0.2)
+            return render(job_data)
+
+        worker.render = slow_render
+        jobs = [{**render_job(), "job_id": f"j{n}"} for n in range(3)]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(worker.process_job, jobs))
+
+        assert len(rendered) == 1
+        assert [result["job_id"] for result in results] == ["j0", "j1", "j2"]
+        assert sum(bool(result["metadata"].get("deduplicated")) for result in results) == 2
+
+
+class TestSpeculation:
+    """Test priority scheduling and speculative pre-rendering."""
+
+    def test_neighbor_sizes(self):
+        assert neighbor_sizes(["XS", "S", "M", "L", "XL"], "M") == ["S", "L"]
+        assert neighbor_sizes(["XS", "S", "M", "L", "XL"], "XS", distance=2) == ["S", "M"]
+        assert neighbor_sizes(["S", "M"], "XXL") == []
+
+    def test_speculative_work_waits_for_user_renders(self):
+        """Speculative calls start only once no user render is queued or running."""
+        scheduler = RenderScheduler(workers=1, speculative_slots=1)
+        release = threading.Event()
+        order = []
+
+        def user(name, block=False):
+            def run():
+                if block:
+                    release.wait(5)
+                order.append(name)
+            return run
+
+        first = scheduler.submit(user("user-1", block=True))
+        while scheduler.running(USER) == 0:
+            time.sleep(0.01)
+        speculative = scheduler.submit(lambda: order.append("speculative"), priority=SPECULATIVE)
+        second = scheduler.submit(user("user-2"))
+        time.sleep(0.05)
+        assert "speculative" not in order
+        release.set()
+        for future in (first, second, speculative):
+            future.result(timeout=5)
+        scheduler.close()
+
+        assert order[-1] == "speculative"
+
+    def test_speculative_backlog_drops_oldest(self):
+        """Queued speculation beyond the limit is shed oldest first."""
+        scheduler = RenderScheduler(workers=1, speculative_slots=1, max_speculative_pending=2)
+        release = threading.Event()
+        blocker = scheduler.submit(lambda: release.wait(5))
+        futures = [scheduler.submit(lambda n=n: n, priority=SPECULATIVE) for n in range(4)]
+        release.set()
+        blocker.result(timeout=5)
+
+        assert [future.cancelled() for future in futures] == [True, True, False, False]
+        assert [future.result(timeout=5) for future in futures[2:]] == [2, 3]
+        assert scheduler.dropped == 2
+        scheduler.close()
+
+    def test_worker_prerenders_neighbouring_sizes(self, tmp_path, monkeypatch):
+        """After rendering M, S and L are cached, and requesting L counts as a speculation hit."""
+        monkeypatch.setenv("RENDER_OUTPUT_DIR", str(tmp_path))
+        monkeypatch.setenv("RENDER_SPECULATIVE", "true")
+        monkeypatch.setenv("RENDER_WIDTH", "128")
+        monkeypatch.setenv("RENDER_HEIGHT", "256")
+        spec = importlib.util.spec_from_file_location("render_worker", WORKER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, "render_worker", module)
+        spec.loader.exec_module(module)
+        worker = module.RenderWorker()
+
+        first = worker.process_job(render_job("M"))
+        deadline = time.monotonic() + 10
+        while worker.speculation.rendered < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        toggled = worker.process_job(render_job("L"))
+        worker.scheduler.close()
+
+        assert first["metadata"]["speculation_hit"] is False
+        assert not (tmp_path / "u1" / "r-M~S.png").exists()
+        assert toggled["metadata"]["cache_hit"] and toggled["metadata"]["speculation_hit"]
+        assert (tmp_path / "u1" / "r-L.png").exists()
+        stats = worker.stats()["speculation"]
+        assert stats["rendered"] == 2 and stats["hits"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_png_round_trip():
+    """RGB and RGBA images survive encode/decode; other dtypes are rejected."""
+    rng = np.random.default_rng(0)
+    for channels in (3, 4):
+        image = rng.integers(0, 256, size=(7, 5, channels), dtype=np.uint8)
+        assert np.array_equal(decode_png(encode_png(image)), image)
+    with pytest.raises(ValueError):
+        encode_png(np.zeros((4, 4, 3), dtype=np.float32))
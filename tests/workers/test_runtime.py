@@ -0,0 +1,314 @@
+"""
+Tests for the shared worker runtime and its queue backends.
+"""
+
+import asyncio
+
+import pytest
+
+from workers.runtime import (
+    MemoryQueue,
+    RedisQueue,
+    RetryPolicy,
+    SQLiteQueue,
+    WorkerConfig,
+    WorkerRuntime,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Just the Redis commands (and Lua scripts) RedisQueue uses, in memory."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.lists = {}
+
+    def register_script(self, script):
+        # Scripts run atomically: emulate each one without awaiting in between
+        if script == RedisQueue.CLAIM_SCRIPT:
+            return self._claim
+        if script == RedisQueue.RETRY_SCRIPT:
+            return self._retry
+        raise AssertionError("unexpected script")
+
+    async def _claim(self, keys, args):
+        ready, inflight = (self.zsets.setdefault(key, {}) for key in keys)
+        now, deadline, limit = args
+        for member in [m for m, score in inflight.items() if score <= now]:
+            del inflight[member]
+            ready[member] = now
+        ids = [m for _, m in sorted((score, m) for m, score in ready.items() if score <= now)][:limit]
+        for member in ids:
+            del ready[member]
+            inflight[member] = deadline
+        return ids
+
+    async def _retry(self, keys, args):
+        inflight, ready = (self.zsets.setdefault(key, {}) for key in keys)
+        member, score = args
+        if inflight.pop(member, None) is not None:
+            ready[member] = score
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hdel(self, name, key):
+        return int(self.hashes.get(name, {}).pop(key, None) is not None)
+
+    async def hlen(self, name):
+        return len(self.hashes.get(name, {}))
+
+    async def zadd(self, name, mapping, xx=False):
+        zset = self.zsets.setdefault(name, {})
+        for member, score in mapping.items():
+            if not xx or member in zset:
+                zset[member] = score
+
+    async def zrem(self, name, member):
+        return int(self.zsets.get(name, {}).pop(member, None) is not None)
+
+    async def zrangebyscore(self, name, low, high, start=None, num=None):
+        high = float(high)
+        members = sorted((score, member) for member, score in self.zsets.get(name, {}).items() if score <= high)
+        members = [member for _, member in members]
+        return members[start:start + num] if num is not None else members
+
+    async def rpush(self, name, value):
+        self.lists.setdefault(name, []).append(value)
+
+    async def lrange(self, name, start, end):
+        return self.lists.get(name, [])[start:end + 1]
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend_factory(request, tmp_path):
+    def make(clock):
+        if request.param == "memory":
+            return MemoryQueue(clock=clock)
+        if request.param == "sqlite":
+            return SQLiteQueue(str(tmp_path / "queue.sqlite3"), clock=clock)
+        return RedisQueue(FakeRedis(), clock=clock)
+    return make
+
+
+class TestBackendContract:
+    """Every backend honours the same delivery semantics."""
+
+    def test_reserve_ack(self, backend_factory):
+        """Reserved messages are hidden and acked messages are gone."""
+        async def scenario():
+            backend = backend_factory(FakeClock())
+            await backend.enqueue("q", {"n": 1})
+            await backend.enqueue("q", {"n": 2})
+
+            first = await backend.reserve("q", 1, 30)
+            second = await backend.reserve("q", 5, 30)
+            assert sorted(m.body["n"] for m in first + second) == [1, 2]
+            assert await backend.reserve("q", 5, 30) == []
+
+            await backend.ack(first[0])
+            assert await backend.size("q") == 1
+
+        asyncio.run(scenario())
+
+    def test_visibility_timeout_redelivers(self, backend_factory):
+        """Unacked messages come back after the visibility timeout."""
+        async def scenario():
+            clock = FakeClock()
+            backend = backend_factory(clock)
+            await backend.enqueue("q", {"n": 1})
+
+            message = (await backend.reserve("q", 1, 30))[0]
+            clock.now += 10
+            await backend.extend(message, 30)
+            clock.now += 25
+            assert await backend.reserve("q", 1, 30) == []
+
+            clock.now += 10
+            redelivered = await backend.reserve("q", 1, 30)
+            assert redelivered[0].id == message.id
+            assert redelivered[0].attempts == 2
+
+        asyncio.run(scenario())
+
+    def test_retry_delay_and_dead_letter(self, backend_factory):
+        """Retried messages wait out their delay; dead letters are kept."""
+        async def scenario():
+            clock = FakeClock()
+            backend = backend_factory(clock)
+            await backend.enqueue("q", {"n": 1})
+
+            message = (await backend.reserve("q", 1, 30))[0]
+            await backend.retry(message, 5)
+            assert await backend.reserve("q", 1, 30) == []
+
+            clock.now += 5
+            message = (await backend.reserve("q", 1, 30))[0]
+            await backend.dead_letter(message, "boom")
+
+            assert await backend.size("q") == 0
+            dead = await backend.dead_letters("q")
+            assert [(d.body, d.attempts, d.error) for d in dead] == [({"n": 1}, 2, "boom")]
+
+        asyncio.run(scenario())
+
+
+def fast_config(**kwargs):
+    kwargs.setdefault("poll_interval", 0.01)
+    kwargs.setdefault("retry", RetryPolicy(max_attempts=3, base_delay=0.0, jitter=0.0))
+    return WorkerConfig(**kwargs)
+
+
+class TestWorkerRuntime:
+    """Test concurrency, retries and heartbeats."""
+
+    def test_concurrency_limit(self):
+        """At most ``concurrency`` handlers run at once."""
+        active = {"now": 0, "peak": 0}
+
+        async def handler(body):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+
+        async def scenario():
+            backend = MemoryQueue()
+            for n in range(20):
+                await backend.enqueue("q", {"n": n})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config(concurrency=5, prefetch=5))
+            return await runtime.drain()
+
+        stats = asyncio.run(scenario())
+
+        assert stats.succeeded == 20
+        assert active["peak"] == 5
+
+    def test_failures_retry_then_dead_letter(self):
+        """A failing message is retried up to max_attempts, then dead-lettered."""
+        calls = []
+
+        def handler(body):
+            calls.append(body["n"])
+            raise ValueError("bad payload")
+
+        async def scenario():
+            backend = MemoryQueue()
+            await backend.enqueue("q", {"n": 1})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config())
+            stats = await runtime.drain()
+            return stats, await backend.dead_letters("q")
+
+        stats, dead = asyncio.run(scenario())
+
+        assert calls == [1, 1, 1]
+        assert stats.retried == 2
+        assert stats.dead_lettered == 1
+        assert dead[0].error == "ValueError: bad payload"
+
+    def test_heartbeat_keeps_long_jobs_invisible(self):
+        """Jobs longer than the visibility timeout are not redelivered."""
+        calls = []
+
+        async def handler(body):
+            calls.append(body["n"])
+            await asyncio.sleep(0.15)
+
+        async def scenario():
+            backend = MemoryQueue()
+            await backend.enqueue("q", {"n": 1})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config(concurrency=2, visibility_timeout=0.05))
+            return await runtime.drain()
+
+        stats = asyncio.run(scenario())
+
+        assert calls == [1]
+        assert stats.succeeded == 1
+
+    def test_heartbeat_survives_backend_errors(self):
+        """A failed extend is logged and the heartbeat keeps the job invisible."""
+        calls = []
+
+        class FlakyExtend(MemoryQueue):
+            extends = 0
+
+            async def extend(self, message, visibility_timeout):
+                FlakyExtend.extends += 1
+                if FlakyExtend.extends == 1:
+                    raise ConnectionError("backend down")
+                await super().extend(message, visibility_timeout)
+
+        async def handler(body):
+            calls.append(body["n"])
+            await asyncio.sleep(0.25)
+
+        async def scenario():
+            backend = FlakyExtend()
+            await backend.enqueue("q", {"n": 1})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config(concurrency=2, visibility_timeout=0.1))
+            return await runtime.drain()
+
+        stats = asyncio.run(scenario())
+
+        assert calls == [1]
+        assert stats.succeeded == 1
+        assert FlakyExtend.extends >= 3
+
+    def test_zero_prefetch_still_reserves(self):
+        """prefetch=0 keeps a one-message buffer instead of an unbounded one."""
+        async def handler(body):
+            pass
+
+        async def scenario():
+            backend = MemoryQueue()
+            for n in range(3):
+                await backend.enqueue("q", {"n": n})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config(prefetch=0))
+            return await asyncio.wait_for(runtime.drain(), 5)
+
+        assert asyncio.run(scenario()).succeeded == 3
+
+    def test_backend_errors_do_not_kill_consumers(self):
+        """A failing ack is logged; the consumer moves on to the next message."""
+        class FlakyAck(MemoryQueue):
+            failures = 0
+
+            async def ack(self, message):
+                if message.body["n"] == 0:
+                    FlakyAck.failures += 1
+                    raise ConnectionError("backend down")
+                await super().ack(message)
+
+        handled = []
+
+        async def handler(body):
+            handled.append(body["n"])
+
+        async def scenario():
+            backend = FlakyAck()
+            for n in range(4):
+                await backend.enqueue("q", {"n": n})
+            runtime = WorkerRuntime(backend, "q", handler, fast_config(concurrency=1))
+            stop = asyncio.Event()
+            runner = asyncio.create_task(runtime.run(stop))
+            while len(set(handled)) < 4:
+                await asyncio.sleep(0.01)
+            stop.set()
+            await runner
+
+        asyncio.run(asyncio.wait_for(scenario(), 5))
+
+        assert set(handled) == {0, 1, 2, 3}
+        assert FlakyAck.failures >= 1
@@ -3,13 +3,29 @@ Avatar Processor Worker
 
 Generates 3D avatar meshes from MediaPipe pose landmarks.
 Processes jobs from a queue and stores results in Supabase.
+
+Mesh generation is CPU-bound, so jobs run in a process pool sized to the
+host's cores (``AVATAR_PROCESSES``) and the runtime keeps that many in flight.
+Bodies that quantize to an already-built mesh are served from the on-disk
+mesh cache without generating anything. Each pool process opens the cache
+once (pool ``initializer``) and keeps its size accounting across jobs.
 """
 
 import os
-import json
-import time
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from workers.avatar import generate_avatar, process_cache  # noqa: E402
+from workers.runtime import WorkerConfig, run_worker  # noqa: E402
+
+
+AVATAR_QUEUE = os.getenv("AVATAR_QUEUE", "avatar")
+
 
 class AvatarProcessor:
     """Processes avatar generation jobs."""
@@ -18,54 +34,65 @@ class AvatarProcessor:
         """Initialize the avatar processor."""
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        self.output_dir = os.getenv("AVATAR_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "fittwin-avatars"))
+        self.base_url = os.getenv("AVATAR_BASE_URL") or None
+        self.segments = int(os.getenv("AVATAR_MESH_SEGMENTS", "48"))
+        self.detail = float(os.getenv("AVATAR_MESH_DETAIL", "1.0"))
+        self.processes = int(os.getenv("AVATAR_PROCESSES") or os.cpu_count() or 1)
+        self.cache_quantum_cm = float(os.getenv("AVATAR_CACHE_QUANTUM_CM", "0.5"))
+        self.cache_angle_step = float(os.getenv("AVATAR_CACHE_ANGLE_STEP", "5"))
+        self.lod_faces = tuple(
+            int(faces) for faces in os.getenv("AVATAR_LOD_FACES", "10000,2500,600").split(",") if faces.strip()
+        )
 
     def process_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process an avatar generation job.
 
+        Runs inside a pool process; the instance only carries plain settings
+        so it pickles cheaply, and the mesh cache is the pool process's own.
+
         Args:
-            job_data: Job data containing landmarks and user info
+            job_data: Job data containing measurements, landmarks and user info
 
         Returns:
-            Result with avatar mesh URL and metadata
+            Result with avatar mesh URLs per level of detail (smallest
+            first) and metadata (counts and timings)
         """
         print(f"Processing avatar job: {job_data.get('job_id')}")
 
-        # Extract landmarks from job data
-        landmarks = job_data.get("landmarks", [])
-        user_id = job_data.get("user_id")
-
-        # TODO: Implement actual avatar mesh generation
-        # This is a placeholder for Phase 3 implementation
-        
-        # Simulate processing time
-        time.sleep(2)
-
-        # Return mock result
-        result = {
-            "job_id": job_data.get("job_id"),
-            "status": "completed",
-            "avatar_url": f"https://storage.example.com/avatars/{user_id}.glb",
-            "metadata": {
-                "vertices": 10000,
-                "faces": 20000,
-                "processing_time_ms": 2000
-            }
-        }
-
-        print(f"Avatar generation completed: {result['avatar_url']}")
+        cache = process_cache(self.output_dir)
+        result = generate_avatar(
+            job_data,
+            output_dir=self.output_dir,
+            base_url=self.base_url,
+            segments=self.segments,
+            detail=self.detail,
+            cache=cache,
+            quantum_cm=self.cache_quantum_cm,
+            angle_step=self.cache_angle_step,
+            lod_faces=self.lod_faces,
+        )
+
+        metadata = result["metadata"]
+        if cache is not None:
+            metadata["process_cache"] = cache.stats()
+        print(f"Avatar generation completed: {result['avatar_url']} "
+              f"({metadata['vertices']} vertices, {metadata['faces']} faces, "
+              f"{metadata['processing_time_ms']} ms, cache {'hit' if metadata['cache_hit'] else 'miss'})")
         return result
 
     def run(self):
         """Run the worker to process jobs from queue."""
         print("Avatar Processor Worker started...")
-        print("Waiting for jobs...")
-
-        # TODO: Implement actual queue integration (e.g., BullMQ, Celery)
-        # This is a placeholder for Phase 3 implementation
-
-        while True:
-            time.sleep(5)
+        print(f"Consuming queue: {AVATAR_QUEUE} ({self.processes} processes)")
+
+        config = WorkerConfig.from_env()
+        config.concurrency = self.processes
+        with ProcessPoolExecutor(
+            max_workers=self.processes, initializer=process_cache, initargs=(self.output_dir,)
+        ) as pool:
+            run_worker(AVATAR_QUEUE, self.process_job, config=config, executor=pool)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+"""
+Avatar mesh generation for the avatar processor.
+
+Fits a parametric body template to measurements and pose landmarks with
+vectorized NumPy, decimates it to several levels of detail and streams each
+to binary glTF, reusing meshes from a content-addressed cache for
+near-identical bodies.
+"""
+
+from .body import AvatarMesh, body_parameters, build_body, fit_body, resolve_measurements, vertex_normals
+from .cache import MeshCache, mesh_key, process_cache, quantize_parameters
+from .gltf import encode_glb, parse_glb, read_accessor, read_glb_document, save_glb, write_glb
+from .lod import DEFAULT_LOD_FACES, build_lods, decimate
+from .pipeline import generate_avatar
+
+__all__ = [
+    "AvatarMesh",
+    "body_parameters",
+    "build_body",
+    "fit_body",
+    "resolve_measurements",
+    "vertex_normals",
+    "MeshCache",
+    "mesh_key",
+    "process_cache",
+    "quantize_parameters",
+    "DEFAULT_LOD_FACES",
+    "build_lods",
+    "decimate",
+    "encode_glb",
+    "parse_glb",
+    "read_accessor",
+    "read_glb_document",
+    "save_glb",
+    "write_glb",
+    "generate_avatar",
+]
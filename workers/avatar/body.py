@@ -0,0 +1,453 @@
+"""
+Parametric body template fitted to measurements and pose landmarks.
+
+The body is six generalized cylinders (torso, head, two arms, two legs).
+Each part is described by keyframes along its axis giving a circumference
+(as a multiple of one body measurement) and a depth/width ratio. Fitting
+interpolates the keyframes to ``rings`` cross-sections, turns each
+circumference into an ellipse, places ring centres along the joint
+polyline taken from the landmarks, and sweeps every ring in one broadcast.
+
+Units are metres, +Y up, +Z forward (the glTF convention), so the avatar's
+left is +X.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+NUM_LANDMARKS = 33
+
+# MediaPipe Pose landmark indices
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+MIN_VISIBILITY = 0.5
+
+# Measurement defaults as a fraction of height, for anything not supplied
+DEFAULT_RATIOS: Dict[str, float] = {
+    "neck": 0.22,
+    "shoulder": 0.235,
+    "chest": 0.54,
+    "underbust": 0.46,
+    "waist_natural": 0.45,
+    "sleeve": 0.35,
+    "bicep": 0.17,
+    "forearm": 0.15,
+    "hip_low": 0.565,
+    "thigh": 0.32,
+    "knee": 0.22,
+    "calf": 0.21,
+    "ankle": 0.13,
+    "inseam": 0.46,
+    "head": 0.335,
+}
+DEFAULT_HEIGHT_CM = 170.0
+
+# Keyframes per part: (t along the axis, measurement, circumference factor, depth/width)
+# Limb t runs root (0) -> middle joint -> end joint (1); t > 1 extends past the end.
+TEMPLATE: Dict[str, Tuple[Tuple[float, str, float, float], ...]] = {
+    "torso": (
+        (0.00, "hip_low", 0.90, 0.80),
+        (0.12, "hip_low", 1.00, 0.75),
+        (0.38, "waist_natural", 1.00, 0.72),
+        (0.57, "underbust", 1.00, 0.72),
+        (0.65, "chest", 1.00, 0.70),
+        (0.74, "chest", 0.98, 0.62),
+        (0.88, "chest", 0.92, 0.55),
+        (0.94, "neck", 1.25, 0.90),
+        (1.00, "neck", 1.00, 0.95),
+    ),
+    "head": (
+        (0.00, "neck", 1.00, 0.95),
+        (0.15, "head", 0.80, 1.10),
+        (0.45, "head", 1.00, 1.15),
+        (0.75, "head", 0.95, 1.10),
+        (0.95, "head", 0.60, 1.00),
+        (1.00, "head", 0.10, 1.00),
+    ),
+    "leg": (
+        (0.00, "thigh", 1.00, 0.95),
+        (0.20, "thigh", 0.90, 0.95),
+        (0.50, "knee", 1.00, 0.90),
+        (0.68, "calf", 1.00, 0.95),
+        (0.95, "ankle", 1.00, 0.85),
+        (1.00, "ankle", 0.90, 0.80),
+    ),
+    "arm": (
+        (0.00, "bicep", 1.15, 0.95),
+        (0.20, "bicep", 1.00, 1.00),
+        (0.48, "forearm", 1.05, 0.95),
+        (0.62, "forearm", 1.00, 0.90),
+        (0.98, "forearm", 0.65, 0.70),
+        (1.08, "forearm", 0.85, 0.40),
+        (1.20, "forearm", 0.30, 0.40),
+    ),
+}
+# Where the middle joint (knee, elbow) sits along each limb
+MIDDLE_JOINT_T = {"leg": 0.5, "arm": 0.48}
+# Rings per part at detail 1.0
+RINGS = {"torso": 40, "head": 16, "leg": 28, "arm": 24}
+
+# Body regions (for garment coverage and fit), by band of t along each part
+REGIONS = ("head", "neck", "chest", "waist", "hip", "upper_arm", "forearm", "hand", "thigh", "lower_leg")
+REGION_BANDS: Dict[str, Tuple[Tuple[float, str], ...]] = {
+    "torso": ((0.25, "hip"), (0.50, "waist"), (0.90, "chest"), (np.inf, "neck")),
+    "head": ((np.inf, "head"),),
+    "arm": ((0.48, "upper_arm"), (0.98, "forearm"), (np.inf, "hand")),
+    "leg": ((0.50, "thigh"), (np.inf, "lower_leg")),
+}
+
+# Default limb directions (A-pose), as angles from straight down in degrees
+DEFAULT_ARM_ANGLE = 20.0
+DEFAULT_LEG_ANGLE = 4.0
+
+
+@dataclass
+class AvatarMesh:
+    """Triangle mesh with per-vertex normals."""
+
+    positions: np.ndarray  # (V, 3) float32
+    normals: np.ndarray  # (V, 3) float32
+    indices: np.ndarray  # (F, 3) uint32
+    regions: Optional[np.ndarray] = None  # (V,) uint8 index into REGIONS, when built from the template
+
+    @property
+    def vertex_count(self) -> int:
+        return int(self.positions.shape[0])
+
+    @property
+    def face_count(self) -> int:
+        return int(self.indices.shape[0])
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Axis-aligned ``(min, max)`` corners."""
+        return self.positions.min(axis=0), self.positions.max(axis=0)
+
+
+def resolve_measurements(measurements: Optional[Mapping[str, float]]) -> Dict[str, float]:
+    """
+    Fill in missing measurements (cm) from height-based proportions.
+
+    Accepts both ``chest`` and ``chest_cm`` style keys; non-positive values
+    are treated as missing.
+    """
+    given: Dict[str, float] = {}
+    for key, value in (measurements or {}).items():
+        if value is None:
+            continue
+        name = key[:-3] if key.endswith("_cm") else key
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            given[name] = value
+
+    height = given.get("height", DEFAULT_HEIGHT_CM)
+    resolved = {name: height * ratio for name, ratio in DEFAULT_RATIOS.items()}
+    resolved.update(given)
+    resolved["height"] = height
+    return resolved
+
+
+def parse_landmarks(landmarks) -> Tuple[Optional[np.ndarray], float]:
+    """
+    Accept a list of 33 landmarks (dicts or ``[x, y, z, visibility]``) or a
+    ``MediaPipeLandmarks``-shaped dict.
+
+    Returns:
+        ``(33, 4)`` array (or None if unusable) and the image aspect ratio
+    """
+    aspect = 1.0
+    if isinstance(landmarks, Mapping):
+        width, height = landmarks.get("image_width"), landmarks.get("image_height")
+        if width and height:
+            aspect = float(width) / float(height)
+        landmarks = landmarks.get("landmarks")
+    if not landmarks or len(landmarks) < NUM_LANDMARKS:
+        return None, aspect
+
+    rows = []
+    for point in landmarks[:NUM_LANDMARKS]:
+        if isinstance(point, Mapping):
+            rows.append((point.get("x", 0.0), point.get("y", 0.0), point.get("z", 0.0), point.get("visibility", 1.0)))
+        else:
+            rows.append(tuple(point) + (1.0,) * (4 - len(point)))
+    return np.asarray(rows, dtype=np.float64)[:, :4], aspect
+
+
+LIMBS = ("left_arm", "right_arm", "left_leg", "right_leg")
+_LIMB_JOINTS = {
+    "left_arm": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    "right_arm": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    "left_leg": (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    "right_leg": (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+}
+# A-pose fallback per limb (upper, lower), in degrees from straight down toward +X
+DEFAULT_LIMB_ANGLES = np.array([
+    [DEFAULT_ARM_ANGLE, DEFAULT_ARM_ANGLE],
+    [-DEFAULT_ARM_ANGLE, -DEFAULT_ARM_ANGLE],
+    [DEFAULT_LEG_ANGLE, DEFAULT_LEG_ANGLE],
+    [-DEFAULT_LEG_ANGLE, -DEFAULT_LEG_ANGLE],
+])
+
+
+def limb_angles(points: Optional[np.ndarray], aspect: float) -> np.ndarray:
+    """
+    Angles of the upper and lower segment of each limb, shape ``(4, 2)``.
+
+    Rows follow ``LIMBS``; angles are degrees from straight down, positive
+    toward the avatar's left (+X). They come from the front-view landmarks
+    (image plane only; depth is too noisy to pose limbs with). Limbs with a
+    low-visibility or collapsed joint keep the A-pose default.
+    """
+    angles = DEFAULT_LIMB_ANGLES.copy()
+    if points is None:
+        return angles
+    for row, limb in enumerate(LIMBS):
+        joints = points[list(_LIMB_JOINTS[limb])]
+        if joints[:, 3].min() < MIN_VISIBILITY:
+            continue
+        # Image x grows toward the subject's left, image y grows downward
+        dx = np.diff(joints[:, 0]) * aspect
+        dy = np.diff(joints[:, 1])
+        if np.hypot(dx, dy).min() < 1e-6:
+            continue
+        angles[row] = np.degrees(np.arctan2(dx, dy))
+    return angles
+
+
+def _direction(angle_degrees: float) -> np.ndarray:
+    angle = np.radians(angle_degrees)
+    return np.array([np.sin(angle), -np.cos(angle), 0.0])
+
+
+def body_parameters(measurements: Optional[Mapping[str, float]] = None, landmarks=None):
+    """
+    Everything the mesh depends on: resolved measurements and limb angles.
+
+    Returns:
+        ``(measurements in cm, (4, 2) limb angles in degrees)``
+    """
+    points, aspect = parse_landmarks(landmarks)
+    return resolve_measurements(measurements), limb_angles(points, aspect)
+
+
+def ellipse_axes(circumference: np.ndarray, depth_ratio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Semi-axes ``(a, b = k a)`` of ellipses with the given perimeters.
+
+    Inverts Ramanujan's approximation ``C = pi (3(a+b) - sqrt((3a+b)(a+3b)))``.
+    """
+    k = depth_ratio
+    a = circumference / (np.pi * (3 * (1 + k) - np.sqrt((3 + k) * (1 + 3 * k))))
+    return a, a * k
+
+
+def _part_profile(part: str, measurements: Mapping[str, float], rings: int):
+    """Interpolate a part's keyframes to ``rings`` (t, semi-axis a, semi-axis b) samples."""
+    keyframes = TEMPLATE[part]
+    key_t = np.array([frame[0] for frame in keyframes])
+    key_c = np.array([measurements[frame[1]] * frame[2] for frame in keyframes]) / 100.0
+    key_k = np.array([frame[3] for frame in keyframes])
+    t = np.linspace(key_t[0], key_t[-1], rings)
+    a, b = ellipse_axes(np.interp(t, key_t, key_c), np.interp(t, key_t, key_k))
+    return t, a, b
+
+
+def _polyline(t: np.ndarray, joints: np.ndarray, t_middle: float) -> np.ndarray:
+    """Ring centres along root -> middle -> end joints (extrapolating past the end)."""
+    root, middle, end = joints
+    upper = root + (t / t_middle)[:, None] * (middle - root)
+    lower = middle + ((t - t_middle) / (1.0 - t_middle))[:, None] * (end - middle)
+    return np.where((t <= t_middle)[:, None], upper, lower)
+
+
+def _sweep(centers: np.ndarray, a: np.ndarray, b: np.ndarray, segments: int):
+    """
+    Sweep elliptical rings along a centre line.
+
+    Returns:
+        Vertices ``(R * S + 2, 3)`` (ring vertices then two cap centres),
+        faces ``(F, 3)`` and each face's outward reference direction
+    """
+    rings = centers.shape[0]
+    tangent = np.gradient(centers, axis=0)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    u = np.cross(tangent, np.array([0.0, 0.0, 1.0]))
+    u_norm = np.linalg.norm(u, axis=1, keepdims=True)
+    u = np.where(u_norm > 1e-6, u / np.maximum(u_norm, 1e-12), np.array([1.0, 0.0, 0.0]))
+    v = np.cross(u, tangent)
+
+    theta = np.linspace(0.0, 2 * np.pi, segments, endpoint=False)
+    cos, sin = np.cos(theta)[None, :, None], np.sin(theta)[None, :, None]
+    ring_vertices = (
+        centers[:, None, :]
+        + a[:, None, None] * cos * u[:, None, :]
+        + b[:, None, None] * sin * v[:, None, :]
+    ).reshape(-1, 3)
+    vertices = np.vstack([ring_vertices, centers[0], centers[-1]])
+
+    ring = np.arange(rings - 1)[:, None]
+    seg = np.arange(segments)[None, :]
+    nxt = (seg + 1) % segments
+    p0 = ring * segments + seg
+    p1 = ring * segments + nxt
+    p2 = (ring + 1) * segments + nxt
+    p3 = (ring + 1) * segments + seg
+    side = np.concatenate([
+        np.stack([p0, p1, p2], axis=-1).reshape(-1, 3),
+        np.stack([p0, p2, p3], axis=-1).reshape(-1, 3),
+    ])
+    side_ring = np.concatenate([np.repeat(np.arange(rings - 1), segments)] * 2)
+    side_out = vertices[side].mean(axis=1) - (centers[side_ring] + centers[side_ring + 1]) / 2
+
+    start, end = rings * segments, rings * segments + 1
+    last = (rings - 1) * segments
+    start_cap = np.stack([np.full(segments, start), nxt[0], seg[0]], axis=-1)
+    end_cap = np.stack([np.full(segments, end), last + seg[0], last + nxt[0]], axis=-1)
+    faces = np.concatenate([side, start_cap, end_cap])
+    outward = np.concatenate([
+        side_out,
+        np.repeat(-tangent[:1], segments, axis=0),
+        np.repeat(tangent[-1:], segments, axis=0),
+    ])
+    return vertices, faces, outward
+
+
+def _orient(vertices: np.ndarray, faces: np.ndarray, outward: np.ndarray) -> np.ndarray:
+    """Flip faces whose winding points against their outward direction."""
+    p0, p1, p2 = (vertices[faces[:, i]] for i in range(3))
+    normal = np.cross(p1 - p0, p2 - p0)
+    flip = np.einsum("ij,ij->i", normal, outward) < 0
+    faces = faces.copy()
+    faces[flip] = faces[flip][:, ::-1]
+    return faces
+
+
+def vertex_normals(positions: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Area-weighted vertex normals."""
+    p0, p1, p2 = (positions[faces[:, i]] for i in range(3))
+    face_normals = np.cross(p1 - p0, p2 - p0)
+    corners = faces.reshape(-1)
+    repeated = np.repeat(face_normals, 3, axis=0)
+    normals = np.stack(
+        [np.bincount(corners, weights=repeated[:, axis], minlength=len(positions)) for axis in range(3)],
+        axis=1,
+    )
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(length > 0, length, 1.0)
+
+
+def fit_body(
+    measurements: Optional[Mapping[str, float]] = None,
+    landmarks=None,
+    segments: int = 48,
+    detail: float = 1.0,
+) -> AvatarMesh:
+    """
+    Fit the body template to measurements (cm) and optional landmarks.
+
+    Args:
+        measurements: Body measurements; missing values use height proportions
+        landmarks: Front-view MediaPipe landmarks used to pose the limbs
+        segments: Vertices around each ring
+        detail: Multiplier on rings per part
+
+    Returns:
+        The fitted mesh
+    """
+    m, angles = body_parameters(measurements, landmarks)
+    return build_body(m, angles, segments=segments, detail=detail)
+
+
+def build_body(
+    m: Mapping[str, float],
+    angles: np.ndarray,
+    segments: int = 48,
+    detail: float = 1.0,
+) -> AvatarMesh:
+    """
+    Build the mesh from resolved parameters (see ``body_parameters``).
+
+    Args:
+        m: Complete measurements in cm
+        angles: ``(4, 2)`` limb segment angles in degrees
+        segments: Vertices around each ring
+        detail: Multiplier on rings per part
+
+    Returns:
+        The fitted mesh
+    """
+    height = m["height"] / 100.0
+
+    # Vertical layout: crotch from the inseam (plus ankle height), neck at 87% of height
+    ankle_y = 0.04 * height
+    crotch_y = min(m["inseam"] / 100.0 + ankle_y, 0.55 * height)
+    neck_y = 0.87 * height
+
+    parts = []
+
+    t, a, b = _part_profile("torso", m, max(int(RINGS["torso"] * detail), 4))
+    torso_centers = np.stack([np.zeros_like(t), crotch_y + t * (neck_y - crotch_y), np.zeros_like(t)], axis=1)
+    parts.append(("torso", t, torso_centers, a, b))
+    hip_half_width = np.interp(0.12, t, a)
+
+    t, a, b = _part_profile("head", m, max(int(RINGS["head"] * detail), 4))
+    parts.append(("head", t, np.stack([np.zeros_like(t), neck_y + t * (height - neck_y), np.zeros_like(t)], axis=1), a, b))
+
+    shoulder_y = crotch_y + 0.86 * (neck_y - crotch_y)
+    arm_length = m["sleeve"] / 100.0
+    leg_length = crotch_y - ankle_y + 0.03 * height
+    for limb, side in (("left", 1.0), ("right", -1.0)):
+        for part, root, length in (
+            ("arm", np.array([side * m["shoulder"] / 200.0, shoulder_y, 0.0]), arm_length),
+            ("leg", np.array([side * hip_half_width * 0.5, crotch_y + 0.03 * height, 0.0]), leg_length),
+        ):
+            t_middle = MIDDLE_JOINT_T[part]
+            upper, lower = (_direction(angle) for angle in angles[LIMBS.index(f"{limb}_{part}")])
+            middle = root + upper * length * t_middle
+            end = middle + lower * length * (1.0 - t_middle)
+            t, a, b = _part_profile(part, m, max(int(RINGS[part] * detail), 4))
+            parts.append((part, t, _polyline(t, np.stack([root, middle, end]), t_middle), a, b))
+
+    return _assemble(parts, segments)
+
+
+def region_of(part: str, t: np.ndarray) -> np.ndarray:
+    """Index into ``REGIONS`` for each ``t`` along a template part."""
+    bands = REGION_BANDS[part]
+    limits = np.array([limit for limit, _ in bands])
+    ids = np.array([REGIONS.index(name) for _, name in bands], dtype=np.uint8)
+    return ids[np.minimum(np.searchsorted(limits, t, side="right"), len(bands) - 1)]
+
+
+def _assemble(
+    parts: Sequence[Tuple[str, np.ndarray, np.ndarray, np.ndarray, np.ndarray]], segments: int
+) -> AvatarMesh:
+    """Sweep every part and merge them into one indexed mesh."""
+    all_vertices, all_faces, all_regions = [], [], []
+    offset = 0
+    for part, t, centers, a, b in parts:
+        vertices, faces, outward = _sweep(centers, a, b, segments)
+        all_faces.append(_orient(vertices, faces, outward) + offset)
+        all_vertices.append(vertices)
+        ring_regions = region_of(part, t)
+        all_regions.append(np.concatenate([np.repeat(ring_regions, segments), ring_regions[[0, -1]]]))
+        offset += len(vertices)
+    positions = np.vstack(all_vertices)
+    faces = np.vstack(all_faces)
+    return AvatarMesh(
+        positions=positions.astype(np.float32),
+        normals=vertex_normals(positions, faces).astype(np.float32),
+        indices=faces.astype(np.uint32),
+        regions=np.concatenate(all_regions),
+    )
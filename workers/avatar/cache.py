@@ -0,0 +1,204 @@
+"""
+Content-addressed on-disk cache of avatar meshes.
+
+The key is a hash of the quantized body parameters (measurements in
+``quantum_cm`` buckets, limb angles in ``angle_step`` buckets) plus the mesh
+and LOD settings, so users with near-identical profiles share one set of
+GLBs (one file per level of detail). Meshes are
+built from the quantized parameters, so a hit is exactly the mesh a miss
+would have produced.
+
+Entries are plain files written by atomic rename, which keeps the store
+safe to share between pool processes without locks. Recency is the file
+mtime (touched on every hit); when the store grows past ``max_bytes`` the
+least recently used files are deleted.
+
+Size accounting and hit counters live on the ``MeshCache`` instance, so each
+pool process should hold one for its lifetime (``process_cache``) rather
+than unpickle a fresh copy with every task.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .body import AvatarMesh
+from .gltf import save_glb
+from .storage import lod_filename, write_atomic
+
+
+# Bump when the template or encoder changes so stale meshes stop matching
+MESH_VERSION = 2
+
+
+def quantize_parameters(
+    measurements: Mapping[str, float],
+    angles: np.ndarray,
+    quantum_cm: float = 0.5,
+    angle_step: float = 5.0,
+) -> Tuple[dict, np.ndarray]:
+    """Snap measurements to ``quantum_cm`` and limb angles to ``angle_step`` degrees."""
+    snapped = {name: round(round(value / quantum_cm) * quantum_cm, 4) for name, value in measurements.items()}
+    return snapped, np.round(np.asarray(angles) / angle_step) * angle_step
+
+
+def mesh_key(
+    measurements: Mapping[str, float],
+    angles: np.ndarray,
+    segments: int,
+    detail: float,
+    lod_faces: Sequence[int] = (),
+) -> str:
+    """Hex digest identifying the meshes built from (quantized) parameters."""
+    payload = json.dumps(
+        {
+            "v": MESH_VERSION,
+            "m": sorted(measurements.items()),
+            "a": [round(float(a), 4) for a in np.asarray(angles).reshape(-1)],
+            "s": segments,
+            "d": detail,
+            "l": sorted(lod_faces, reverse=True),
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MeshCache:
+    """LRU-by-mtime GLB store with a size cap."""
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024 ** 3, rescan_every: int = 64):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Cache directory
+            max_bytes: Size cap; eviction trims to 90% of it
+            rescan_every: Re-measure the directory after this many local puts,
+                so writes from other processes count toward the cap
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rescan_every = rescan_every
+        self.hits = 0
+        self.misses = 0
+        self.scans = 0
+        self._approx_bytes: Optional[int] = None
+        self._puts_since_scan = 0
+
+    @classmethod
+    def from_env(cls, output_dir: str) -> Optional["MeshCache"]:
+        """``AVATAR_CACHE_DIR`` and ``AVATAR_CACHE_MAX_BYTES`` (0 disables the cache)."""
+        max_bytes = int(os.getenv("AVATAR_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+        if max_bytes <= 0:
+            return None
+        return cls(os.getenv("AVATAR_CACHE_DIR") or os.path.join(output_dir, ".mesh-cache"), max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process's cache instance."""
+        return {
+            "pid": os.getpid(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "scans": self.scans,
+            "approx_bytes": self._approx_bytes,
+        }
+
+    def path(self, key: str, level: int = 0) -> Path:
+        return self.root / key[:2] / lod_filename(key, level)
+
+    def get(self, key: str, levels: int = 1) -> Optional[List[Path]]:
+        """
+        Paths of a cached mesh's LOD files (marking them recently used), or
+        None if any level is missing.
+        """
+        paths = [self.path(key, level) for level in range(levels)]
+        try:
+            for path in paths:
+                os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return paths
+
+    def put(self, key: str, data: bytes, level: int = 0) -> Path:
+        """Store one encoded level, evicting least recently used entries past the cap."""
+        path = self.path(key, level)
+        write_atomic(path, data)
+        self._account(len(data))
+        return path
+
+    def store(self, key: str, meshes: Sequence[AvatarMesh]) -> List[int]:
+        """
+        Stream every LOD of a mesh into the cache.
+
+        Returns:
+            File size per level
+        """
+        sizes = [save_glb(self.path(key, level), mesh) for level, mesh in enumerate(meshes)]
+        self._account(sum(sizes))
+        return sizes
+
+    def _account(self, written: int) -> None:
+        self._puts_since_scan += 1
+        if self._approx_bytes is None or self._puts_since_scan >= self.rescan_every:
+            self._approx_bytes = self._scan_size()
+            self._puts_since_scan = 0
+        else:
+            self._approx_bytes += written
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".glb"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _scan_size(self) -> int:
+        self.scans += 1
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used entries down to 90% of the cap. Returns bytes freed."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        for path, size, _ in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            freed += size
+        self._approx_bytes = total - freed
+        return freed
+
+
+# This process's caches by output directory
+_process_caches: Dict[str, Optional[MeshCache]] = {}
+
+
+def process_cache(output_dir: str) -> Optional[MeshCache]:
+    """
+    This process's ``MeshCache.from_env(output_dir)``, created on first use.
+
+    Also usable as a ``ProcessPoolExecutor`` initializer, so every pool
+    process builds its cache once and keeps it across jobs.
+    """
+    if output_dir not in _process_caches:
+        _process_caches[output_dir] = MeshCache.from_env(output_dir)
+    return _process_caches[output_dir]
@@ -0,0 +1,178 @@
+"""
+Binary glTF 2.0 (.glb) encoding for avatar meshes.
+
+One mesh, one primitive: float32 POSITION and NORMAL, uint32 indices, all
+in a single BIN chunk. ``write_glb`` streams the arrays' buffers directly to
+a file; ``encode_glb`` is the in-memory convenience wrapper.
+"""
+
+import io
+import json
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import numpy as np
+
+from .body import AvatarMesh
+from .storage import atomic_open
+
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A  # "JSON"
+CHUNK_BIN = 0x004E4942  # "BIN\0"
+
+FLOAT = 5126
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+GENERATOR = "FitTwin avatar-processor"
+
+
+def _padding(length: int) -> int:
+    return -length % 4
+
+
+def _layout(mesh: AvatarMesh, name: str) -> Tuple[bytes, List[np.ndarray], int]:
+    """
+    Build the JSON chunk and list the arrays that make up the BIN chunk.
+
+    Only the accessor bounds (six floats) pass through Python objects; the
+    vertex and index data stay in their NumPy buffers.
+    """
+    arrays = [
+        np.ascontiguousarray(mesh.positions, dtype="<f4"),
+        np.ascontiguousarray(mesh.normals, dtype="<f4"),
+        np.ascontiguousarray(mesh.indices, dtype="<u4"),
+    ]
+    targets = (ARRAY_BUFFER, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER)
+    views = []
+    offset = 0
+    for array, target in zip(arrays, targets):
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": array.nbytes, "target": target})
+        offset += array.nbytes + _padding(array.nbytes)
+
+    low, high = mesh.bounds()
+    document: Dict[str, Any] = {
+        "asset": {"version": "2.0", "generator": GENERATOR},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": name}],
+        "meshes": [{
+            "name": name,
+            "primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1}, "indices": 2, "mode": TRIANGLES}],
+        }],
+        "accessors": [
+            {"bufferView": 0, "componentType": FLOAT, "count": mesh.vertex_count, "type": "VEC3",
+             "min": low.tolist(), "max": high.tolist()},
+            {"bufferView": 1, "componentType": FLOAT, "count": mesh.vertex_count, "type": "VEC3"},
+            {"bufferView": 2, "componentType": UNSIGNED_INT, "count": mesh.face_count * 3, "type": "SCALAR"},
+        ],
+        "bufferViews": views,
+        "buffers": [{"byteLength": offset}],
+    }
+    json_chunk = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    return json_chunk + b" " * _padding(len(json_chunk)), arrays, offset
+
+
+def write_glb(stream: BinaryIO, mesh: AvatarMesh, name: str = "avatar") -> int:
+    """
+    Stream a mesh to ``stream`` as a GLB container.
+
+    The layout is computed up front from array sizes, so the header is
+    written first and each array is handed to ``stream.write`` as a
+    zero-copy memoryview, with no intermediate bytes object for the payload.
+
+    Args:
+        stream: Binary file-like object
+        mesh: Mesh to encode
+        name: Node and mesh name
+
+    Returns:
+        Bytes written
+    """
+    json_chunk, arrays, bin_length = _layout(mesh, name)
+    total = 12 + 8 + len(json_chunk) + 8 + bin_length
+    stream.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total))
+    stream.write(struct.pack("<II", len(json_chunk), CHUNK_JSON))
+    stream.write(json_chunk)
+    stream.write(struct.pack("<II", bin_length, CHUNK_BIN))
+    for array in arrays:
+        stream.write(memoryview(array).cast("B"))
+        stream.write(b"\0" * _padding(array.nbytes))
+    return total
+
+
+def encode_glb(mesh: AvatarMesh, name: str = "avatar") -> bytes:
+    """
+    Serialize a mesh as GLB bytes (``write_glb`` into memory).
+
+    Args:
+        mesh: Mesh to encode
+        name: Node and mesh name
+
+    Returns:
+        The .glb file contents
+    """
+    buffer = io.BytesIO()
+    write_glb(buffer, mesh, name)
+    return buffer.getvalue()
+
+
+def save_glb(path: Path, mesh: AvatarMesh, name: str = "avatar") -> int:
+    """Stream a mesh straight to ``path`` (atomically). Returns bytes written."""
+    with atomic_open(path) as handle:
+        return write_glb(handle, mesh, name)
+
+
+def parse_glb(data: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Split a GLB container into its JSON document and BIN chunk.
+
+    Raises:
+        ValueError: If the header or chunk layout is invalid
+    """
+    if len(data) < 20:
+        raise ValueError("GLB too short")
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    if magic != GLB_MAGIC or version != GLB_VERSION or length != len(data):
+        raise ValueError("Not a glTF 2.0 binary")
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    if json_type != CHUNK_JSON:
+        raise ValueError("First GLB chunk must be JSON")
+    document = json.loads(data[20:20 + json_length])
+    binary = b""
+    offset = 20 + json_length
+    if offset < len(data):
+        bin_length, bin_type = struct.unpack_from("<II", data, offset)
+        if bin_type != CHUNK_BIN:
+            raise ValueError("Second GLB chunk must be BIN")
+        binary = data[offset + 8:offset + 8 + bin_length]
+    return document, binary
+
+
+def read_glb_document(path) -> Dict[str, Any]:
+    """Read only the JSON chunk of a GLB file (counts and bounds without the payload)."""
+    with open(path, "rb") as handle:
+        header = handle.read(20)
+        if len(header) < 20:
+            raise ValueError("GLB too short")
+        magic, version, _ = struct.unpack_from("<III", header, 0)
+        json_length, json_type = struct.unpack_from("<II", header, 12)
+        if magic != GLB_MAGIC or version != GLB_VERSION or json_type != CHUNK_JSON:
+            raise ValueError("Not a glTF 2.0 binary")
+        return json.loads(handle.read(json_length))
+
+
+def read_accessor(document: Dict[str, Any], binary: bytes, index: int) -> np.ndarray:
+    """Decode one accessor (FLOAT VEC3 or UNSIGNED_INT SCALAR) from a parsed GLB."""
+    accessor = document["accessors"][index]
+    view = document["bufferViews"][accessor["bufferView"]]
+    dtype = "<f4" if accessor["componentType"] == FLOAT else "<u4"
+    width = 3 if accessor["type"] == "VEC3" else 1
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    array = np.frombuffer(binary, dtype=dtype, count=accessor["count"] * width, offset=start)
+    return array.reshape(-1, 3) if width == 3 else array
@@ -0,0 +1,108 @@
+"""
+Level-of-detail generation by vertex-clustering decimation.
+
+Vertices are bucketed on a uniform grid, and further split by the dominant
+axis of their normal so the front and back of a thin limb never merge.
+Each bucket collapses to the mean of its members; faces that collapse to a
+line or duplicate another face are dropped. The grid cell size is found by
+bisection so the result has as many faces as possible without exceeding
+the target.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .body import AvatarMesh, vertex_normals
+
+
+DEFAULT_LOD_FACES = (10000, 2500, 600)
+
+
+def _collapse(mesh: AvatarMesh, cell: float):
+    """Cluster assignment per vertex and the surviving faces (cluster ids)."""
+    positions = mesh.positions
+    normals = mesh.normals
+    grid = np.floor((positions - positions.min(axis=0)) / cell).astype(np.int64)
+    dims = grid.max(axis=0) + 1
+    axis = np.abs(normals).argmax(axis=1)
+    direction = axis * 2 + (normals[np.arange(len(normals)), axis] < 0)
+    keys = ((grid[:, 0] * dims[1] + grid[:, 1]) * dims[2] + grid[:, 2]) * 6 + direction
+    _, cluster_of = np.unique(keys, return_inverse=True)
+
+    faces = cluster_of[mesh.indices.astype(np.int64)]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    ordered = np.sort(faces, axis=1)
+    n = np.int64(cluster_of.max() + 1)
+    _, first = np.unique((ordered[:, 0] * n + ordered[:, 1]) * n + ordered[:, 2], return_index=True)
+    return cluster_of, faces[np.sort(first)]
+
+
+def cluster(mesh: AvatarMesh, cell: float) -> AvatarMesh:
+    """Collapse all vertices sharing a grid cell and normal direction."""
+    cluster_of, faces = _collapse(mesh, cell)
+    return _rebuild(mesh, cluster_of, faces)
+
+
+def _rebuild(mesh: AvatarMesh, cluster_of: np.ndarray, faces: np.ndarray) -> AvatarMesh:
+    """Average each cluster's vertices and drop clusters no face uses."""
+    positions = mesh.positions.astype(np.float64)
+    counts = np.bincount(cluster_of)
+    centroids = np.stack(
+        [np.bincount(cluster_of, weights=positions[:, i]) for i in range(3)], axis=1
+    ) / counts[:, None]
+    used, faces = np.unique(faces, return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    centroids = centroids[used]
+    return AvatarMesh(
+        positions=centroids.astype(np.float32),
+        normals=vertex_normals(centroids, faces).astype(np.float32),
+        indices=faces.astype(np.uint32),
+    )
+
+
+def decimate(mesh: AvatarMesh, target_faces: int, iterations: int = 16, tolerance: float = 0.02) -> AvatarMesh:
+    """
+    Reduce a mesh to at most ``target_faces`` faces.
+
+    Args:
+        mesh: Source mesh
+        target_faces: Face budget
+        iterations: Maximum bisection steps over the grid cell size
+        tolerance: Stop early once within this fraction below the budget
+
+    Returns:
+        The decimated mesh (``mesh`` itself if already within budget)
+    """
+    if mesh.face_count <= target_faces:
+        return mesh
+    low, high = mesh.bounds()
+    extent = float(np.max(high - low))
+    small, large = extent * 1e-4, extent
+    best = None
+    for _ in range(iterations):
+        cell = float(np.sqrt(small * large))
+        cluster_of, faces = _collapse(mesh, cell)
+        if len(faces) > target_faces:
+            small = cell
+            continue
+        best, large = (cluster_of, faces), cell
+        if len(faces) >= target_faces * (1 - tolerance):
+            break
+    if best is None:
+        best = _collapse(mesh, large)
+    return _rebuild(mesh, *best)
+
+
+def build_lods(mesh: AvatarMesh, targets: Sequence[int] = DEFAULT_LOD_FACES) -> List[AvatarMesh]:
+    """
+    Decimate a mesh to each face budget, finest first.
+
+    Each level is decimated from the previous one, so coarser levels are cheap.
+    """
+    levels = []
+    source = mesh
+    for target in sorted(targets, reverse=True):
+        source = decimate(source, target)
+        levels.append(source)
+    return levels
@@ -0,0 +1,137 @@
+"""
+Avatar generation pipeline: fit the body template, decimate it to each level
+of detail and stream every level to its own GLB (or link cached levels for
+the same quantized body into place).
+
+``generate_avatar`` is a plain module-level function over plain data, so it
+pickles cleanly into ``ProcessPoolExecutor`` workers.
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from .body import body_parameters, build_body
+from .cache import MeshCache, mesh_key, quantize_parameters
+from .gltf import read_glb_document, save_glb
+from .lod import DEFAULT_LOD_FACES, build_lods
+from .storage import link_or_copy, lod_filename
+
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _safe(value: Any, fallback: str) -> str:
+    text = _UNSAFE.sub("_", str(value)) if value not in (None, "") else fallback
+    return text.lstrip(".") or fallback
+
+
+def generate_avatar(
+    job_data: Dict[str, Any],
+    output_dir: str,
+    base_url: Optional[str] = None,
+    segments: int = 48,
+    detail: float = 1.0,
+    cache: Optional[MeshCache] = None,
+    quantum_cm: float = 0.5,
+    angle_step: float = 5.0,
+    lod_faces: Sequence[int] = DEFAULT_LOD_FACES,
+) -> Dict[str, Any]:
+    """
+    Build an avatar mesh for a job and write one GLB per level of detail:
+    ``<user_id>/<job_id>.glb`` (finest) and ``<job_id>.lod<n>.glb``.
+
+    With a cache, body parameters are quantized first and cached meshes for
+    the same bucket are linked into place without generating anything.
+
+    Args:
+        job_data: Job with ``measurements`` (cm) and optional front ``landmarks``
+        output_dir: Root directory for GLB files
+        base_url: Public URL prefix for ``output_dir`` (file path if not set)
+        segments: Vertices around each cross-section
+        detail: Multiplier on cross-sections per body part
+        cache: Shared mesh cache (None disables caching and quantization)
+        quantum_cm: Measurement bucket size for cache keys
+        angle_step: Limb angle bucket size in degrees for cache keys
+        lod_faces: Face budget per level of detail
+
+    Returns:
+        Job result with the full-detail and preview URLs, per-LOD counts and
+        sizes (smallest first, the order clients should download them in)
+        and stage timings
+    """
+    started = time.perf_counter()
+    user = _safe(job_data.get("user_id"), "anonymous")
+    job = _safe(job_data.get("job_id"), "avatar")
+    levels = len(lod_faces)
+    relative = [Path(user) / lod_filename(job, level) for level in range(levels)]
+    destinations = [Path(output_dir) / path for path in relative]
+    timings: Dict[str, float] = {}
+
+    def lap(stage: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = round((now - since) * 1000, 2)
+        return now
+
+    measurements, angles = body_parameters(job_data.get("measurements"), job_data.get("landmarks"))
+    key = None
+    cached = None
+    if cache is not None:
+        measurements, angles = quantize_parameters(measurements, angles, quantum_cm, angle_step)
+        key = mesh_key(measurements, angles, segments, detail, lod_faces)
+        cached = cache.get(key, levels)
+    mark = lap("lookup", started)
+
+    if cached is not None:
+        try:
+            for source, destination in zip(cached, destinations):
+                link_or_copy(source, destination)
+        except FileNotFoundError:
+            cached = None  # evicted by another process since the lookup
+
+    if cached is not None:
+        mark = lap("link", mark)
+        counts = []
+        for destination in destinations:
+            accessors = read_glb_document(destination)["accessors"]
+            counts.append((accessors[0]["count"], accessors[2]["count"] // 3, destination.stat().st_size))
+    else:
+        mesh = build_body(measurements, angles, segments=segments, detail=detail)
+        mark = lap("fit", mark)
+        lods = build_lods(mesh, lod_faces)
+        mark = lap("decimate", mark)
+        if cache is not None:
+            sizes = cache.store(key, lods)
+            for level, destination in enumerate(destinations):
+                link_or_copy(cache.path(key, level), destination)
+        else:
+            sizes = [save_glb(destination, lod) for lod, destination in zip(lods, destinations)]
+        mark = lap("write", mark)
+        counts = [(lod.vertex_count, lod.face_count, size) for lod, size in zip(lods, sizes)]
+
+    def url(path: Path) -> str:
+        return f"{base_url.rstrip('/')}/{path.as_posix()}" if base_url else str(Path(output_dir) / path)
+
+    lod_results = [
+        {"level": level, "vertices": vertices, "faces": faces, "file_size_bytes": size, "url": url(relative[level])}
+        for level, (vertices, faces, size) in enumerate(counts)
+    ]
+    return {
+        "job_id": job_data.get("job_id"),
+        "status": "completed",
+        "avatar_url": lod_results[0]["url"],
+        "preview_url": lod_results[-1]["url"],
+        "lods": lod_results[::-1],
+        "metadata": {
+            "vertices": counts[0][0],
+            "faces": counts[0][1],
+            "file_size_bytes": sum(size for _, _, size in counts),
+            "cache_hit": cached is not None,
+            "mesh_key": key,
+            "processing_time_ms": round((mark - started) * 1000, 2),
+            "timings_ms": timings,
+            "worker_pid": os.getpid(),
+        },
+    }
@@ -0,0 +1,55 @@
+"""
+Atomic file placement for avatar GLBs.
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+
+def lod_filename(stem: str, level: int) -> str:
+    """``<stem>.glb`` for the full-detail level, ``<stem>.lod<n>.glb`` below it."""
+    return f"{stem}.glb" if level == 0 else f"{stem}.lod{level}.glb"
+
+
+@contextmanager
+def atomic_open(path: Path) -> Iterator[BinaryIO]:
+    """
+    Open a temp file beside ``path`` for writing; rename it over ``path`` on
+    success, so readers never see a partial GLB.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            yield handle
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` atomically."""
+    with atomic_open(path) as handle:
+        handle.write(data)
+
+
+def link_or_copy(source: Path, destination: Path) -> None:
+    """Expose ``source`` at ``destination`` (hard link, else copy), atomically."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, destination)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
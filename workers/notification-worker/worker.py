@@ -9,21 +9,89 @@ Sends email and push notifications for various events:
 """
 
 import os
-import json
-import time
-from typing import Dict, Any
+import sys
+from email.message import EmailMessage
+from email.utils import make_msgid
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from workers.notifications import (  # noqa: E402
+    LoggingPushProvider,
+    NotificationCoalescer,
+    OutgoingEmail,
+    PushBatcher,
+    PushNotification,
+    PushProvider,
+    RecipientRateLimiter,
+    SMTPPool,
+)
+from workers.runtime import WorkerConfig, run_worker  # noqa: E402
+
+
+NOTIFICATION_QUEUE = os.getenv("NOTIFICATION_QUEUE", "notifications")
+
+
+class TransientDeliveryError(Exception):
+    """Delivery failed in a way worth retrying (4xx, connection loss)."""
 
 
 class NotificationWorker:
-    """Processes notification jobs."""
+    """
+    Processes notification jobs.
+
+    Jobs run concurrently on the worker runtime; emails share a pool of
+    persistent, pipelining SMTP connections and pushes are coalesced into
+    provider batch calls. Every recipient is rate limited independently, and
+    bursts of jobs for one recipient are coalesced into a digest.
+    """
+
+    def __init__(
+        self,
+        smtp: Optional[SMTPPool] = None,
+        push_provider: Optional[PushProvider] = None,
+        rate_limiter: Optional[RecipientRateLimiter] = None,
+        coalesce_window: Optional[float] = None,
+    ):
+        """
+        Initialize the notification worker.
 
-    def __init__(self):
-        """Initialize the notification worker."""
-        self.smtp_host = os.getenv("SMTP_HOST")
-        self.smtp_user = os.getenv("SMTP_USER")
+        Args:
+            smtp: SMTP pool (default: from ``SMTP_*`` environment variables)
+            push_provider: Push provider (default: logging placeholder)
+            rate_limiter: Per-recipient limiter (default: from ``NOTIFY_*``)
+            coalesce_window: Seconds to hold jobs per recipient (0 disables;
+                default: ``NOTIFY_COALESCE_WINDOW``)
+        """
         self.from_email = os.getenv("FROM_EMAIL", "noreply@fittwin.com")
+        self.smtp = smtp or SMTPPool.from_env()
+        self.push = PushBatcher(
+            push_provider or LoggingPushProvider(),
+            max_batch=int(os.getenv("PUSH_BATCH_SIZE", "500")),
+            linger=float(os.getenv("PUSH_BATCH_LINGER", "0.01")),
+        )
+        self.rate_limiter = rate_limiter or RecipientRateLimiter.from_env()
+        self.coalescer = NotificationCoalescer(
+            self.deliver,
+            window=float(os.getenv("NOTIFY_COALESCE_WINDOW", "5")) if coalesce_window is None else coalesce_window,
+            max_pending=int(os.getenv("NOTIFY_COALESCE_MAX_PENDING", "20")),
+        )
+
+    def build_email(self, to_email: str, subject: str, body: str) -> OutgoingEmail:
+        """Serialize a notification email (HTML bodies get a text/html part)."""
+        message = EmailMessage()
+        message["From"] = self.from_email
+        message["To"] = to_email
+        message["Subject"] = subject
+        message["Message-ID"] = make_msgid(domain=self.from_email.rpartition("@")[2] or None)
+        if body.lstrip().startswith("<"):
+            message.set_content(body, subtype="html")
+        else:
+            message.set_content(body)
+        return OutgoingEmail(sender=self.from_email, recipients=[to_email], data=message.as_bytes())
 
-    def send_email(self, to_email: str, subject: str, body: str) -> bool:
+    async def send_email(self, to_email: str, subject: str, body: str) -> bool:
         """
         Send an email notification.
 
@@ -33,20 +101,21 @@ class NotificationWorker:
             body: Email body (HTML or plain text)
 
         Returns:
-            True if sent successfully
-        """
-        print(f"Sending email to {to_email}: {subject}")
-
-        # TODO: Implement actual email sending
-        # This is a placeholder for Phase 2/5 implementation
-        
-        # Simulate sending
-        time.sleep(1)
-        
-        print(f"Email sent successfully to {to_email}")
-        return True
+            True if sent successfully, False if permanently rejected
 
-    def send_push_notification(self, user_id: str, title: str, body: str) -> bool:
+        Raises:
+            TransientDeliveryError: On temporary failures, so the job is retried
+        """
+        await self.rate_limiter.acquire(f"email:{to_email.lower()}")
+        result = await self.smtp.send(self.build_email(to_email, subject, body or ""))
+        if result.ok:
+            return True
+        if result.transient:
+            raise TransientDeliveryError(f"Email to {to_email} deferred: {result.code} {result.error}")
+        print(f"Email to {to_email} rejected: {result.code} {result.error}")
+        return False
+
+    async def send_push_notification(self, user_id: str, title: str, body: str) -> bool:
         """
         Send a push notification to mobile device.
 
@@ -58,21 +127,28 @@ class NotificationWorker:
         Returns:
             True if sent successfully
         """
-        print(f"Sending push notification to user {user_id}: {title}")
-
-        # TODO: Implement actual push notification (FCM, APNs)
-        # This is a placeholder for Phase 2/5 implementation
-        
-        # Simulate sending
-        time.sleep(1)
-        
-        print(f"Push notification sent to user {user_id}")
-        return True
+        await self.rate_limiter.acquire(f"push:{user_id}")
+        return await self.push.send(PushNotification(user_id=user_id, title=title, body=body))
 
-    def process_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a notification job.
 
+        Jobs are held per recipient for the coalescing window; superseded
+        order-status updates are dropped and the rest go out as one digest.
+
+        Args:
+            job_data: Job data containing notification type and details
+
+        Returns:
+            Result with delivery status ("coalesced" if superseded)
+        """
+        return await self.coalescer.submit(job_data)
+
+    async def deliver(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one notification job (or digest) immediately.
+
         Args:
             job_data: Job data containing notification type and details
 
@@ -82,13 +158,13 @@ class NotificationWorker:
         job_type = job_data.get("type")
         
         if job_type == "email":
-            success = self.send_email(
+            success = await self.send_email(
                 to_email=job_data.get("to_email"),
                 subject=job_data.get("subject"),
                 body=job_data.get("body")
             )
         elif job_type == "push":
-            success = self.send_push_notification(
+            success = await self.send_push_notification(
                 user_id=job_data.get("user_id"),
                 title=job_data.get("title"),
                 body=job_data.get("body")
@@ -102,16 +178,22 @@ class NotificationWorker:
             "status": "completed" if success else "failed"
         }
 
+    async def close(self) -> None:
+        """Drop held jobs (already released to the queue) and close senders."""
+        await self.coalescer.close()
+        await self.smtp.close()
+        await self.push.close()
+
     def run(self):
         """Run the worker to process jobs from queue."""
         print("Notification Worker started...")
-        print("Waiting for jobs...")
-
-        # TODO: Implement actual queue integration
-        # This is a placeholder for Phase 2/5 implementation
+        print(f"Consuming queue: {NOTIFICATION_QUEUE}")
 
-        while True:
-            time.sleep(5)
+        # Sends are I/O-bound and batched downstream, and held jobs occupy a
+        # slot for the whole coalescing window, so run many jobs at once
+        config = WorkerConfig.from_env()
+        config.concurrency = int(os.getenv("NOTIFICATION_CONCURRENCY", "1000"))
+        run_worker(NOTIFICATION_QUEUE, self.process_job, config=config, on_shutdown=self.close)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+"""
+Notification delivery for the notification worker.
+
+A pooled, pipelining SMTP sender, a push batcher, per-recipient rate
+limiting and per-recipient coalescing into digests, all on asyncio.
+"""
+
+from .coalesce import NotificationCoalescer
+from .push import LoggingPushProvider, PushBatcher, PushNotification, PushProvider
+from .rate_limit import RecipientRateLimiter
+from .smtp import OutgoingEmail, SendResult, SMTPConnection, SMTPError, SMTPPool
+
+__all__ = [
+    "NotificationCoalescer",
+    "LoggingPushProvider",
+    "PushBatcher",
+    "PushNotification",
+    "PushProvider",
+    "RecipientRateLimiter",
+    "OutgoingEmail",
+    "SendResult",
+    "SMTPConnection",
+    "SMTPError",
+    "SMTPPool",
+]
@@ -0,0 +1,217 @@
+"""
+Per-recipient notification coalescing.
+
+Jobs for the same recipient and channel are held for ``window`` seconds.
+When the window closes, order-status updates superseded by a later status of
+the same order are dropped and whatever remains goes out as one notification
+(a digest if more than one survived).
+
+Held jobs stay in flight on the worker runtime, which keeps extending their
+visibility, so a crash mid-window redelivers them rather than losing them.
+"""
+
+import asyncio
+import html
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Mirrors backend OrderStatus; a later entry supersedes an earlier one
+ORDER_STATUS_SEQUENCE = [
+    "created",
+    "paid",
+    "sent_to_brand",
+    "fulfilled",
+    "delivered",
+    "return_requested",
+    "closed",
+    "cancelled",
+]
+ORDER_STATUS_RANK = {status: rank for rank, status in enumerate(ORDER_STATUS_SEQUENCE)}
+
+Deliver = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def coalesce_key(job: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Bucket key for a job, or None if it must be sent immediately.
+
+    Jobs opt out with ``"coalesce": false`` (e.g. password resets).
+    """
+    if job.get("coalesce") is False:
+        return None
+    if job.get("type") == "email" and job.get("to_email"):
+        return ("email", job["to_email"].lower())
+    if job.get("type") == "push" and job.get("user_id"):
+        return ("push", str(job["user_id"]))
+    return None
+
+
+def collapse(jobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[int, int]]:
+    """
+    Drop order-status jobs superseded by a later status of the same order.
+
+    Args:
+        jobs: Jobs in arrival order
+
+    Returns:
+        (surviving jobs in arrival order, {superseded index: superseding index})
+    """
+    latest: Dict[str, int] = {}
+    superseded: Dict[int, int] = {}
+    for index, job in enumerate(jobs):
+        order_id = job.get("order_id")
+        rank = ORDER_STATUS_RANK.get(job.get("order_status"))
+        if order_id is None or rank is None:
+            continue
+        current = latest.get(order_id)
+        if current is None:
+            latest[order_id] = index
+        elif rank >= ORDER_STATUS_RANK[jobs[current]["order_status"]]:
+            superseded[current] = index
+            latest[order_id] = index
+        else:
+            superseded[index] = current
+    # Point chains (a -> b -> c) at the final survivor
+    for index, winner in superseded.items():
+        while winner in superseded:
+            winner = superseded[winner]
+        superseded[index] = winner
+    return [job for index, job in enumerate(jobs) if index not in superseded], superseded
+
+
+def build_digest(jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge several jobs for one recipient into a single notification job."""
+    first = jobs[0]
+    digest = {key: first[key] for key in ("type", "to_email", "user_id") if key in first}
+    digest["job_id"] = first.get("job_id")
+    if first["type"] == "push":
+        digest["title"] = f"{len(jobs)} updates"
+        digest["body"] = "; ".join(job.get("title") or "" for job in jobs)
+        return digest
+
+    digest["subject"] = f"You have {len(jobs)} updates from FitTwin"
+    if any((job.get("body") or "").lstrip().startswith("<") for job in jobs):
+        sections = []
+        for job in jobs:
+            body = job.get("body") or ""
+            if not body.lstrip().startswith("<"):
+                body = f"<p>{html.escape(body)}</p>"
+            sections.append(f"<h3>{html.escape(job.get('subject') or '')}</h3>\n{body}")
+        digest["body"] = "<div>\n" + "\n<hr>\n".join(sections) + "\n</div>"
+    else:
+        digest["body"] = "\n\n".join(f"{job.get('subject') or ''}\n\n{job.get('body') or ''}" for job in jobs)
+    return digest
+
+
+@dataclass
+class _Bucket:
+    entries: List[Tuple[Dict[str, Any], asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.Task] = None
+
+
+class NotificationCoalescer:
+    """Buffers notification jobs per recipient and sends one digest per window."""
+
+    def __init__(self, deliver: Deliver, window: float = 5.0, max_pending: int = 20):
+        """
+        Initialize the coalescer.
+
+        Args:
+            deliver: Coroutine that sends one job and returns its result dict
+            window: Seconds to hold a recipient's first job before sending
+            max_pending: Send early once a recipient has this many jobs held
+        """
+        self.deliver = deliver
+        self.window = window
+        self.max_pending = max_pending
+        self.jobs_coalesced = 0
+        self.digests_sent = 0
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._flushing: Set[asyncio.Task] = set()
+
+    async def submit(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hold a job until its recipient's window closes.
+
+        Returns:
+            The job's result: its delivery status, or ``"coalesced"`` if a
+            later status of the same order replaced it
+
+        Raises:
+            Whatever ``deliver`` raised for the notification this job is part of
+        """
+        key = coalesce_key(job)
+        if key is None or self.window <= 0:
+            return await self.deliver(job)
+
+        future = asyncio.get_running_loop().create_future()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            bucket.timer = asyncio.create_task(self._flush_later(key, bucket))
+        bucket.entries.append((job, future))
+        if len(bucket.entries) >= self.max_pending:
+            bucket.timer.cancel()
+            del self._buckets[key]
+            flush = asyncio.create_task(self._flush(key, bucket))
+            self._flushing.add(flush)
+            flush.add_done_callback(self._flushing.discard)
+        return await future
+
+    async def _flush_later(self, key: Tuple[str, str], bucket: _Bucket) -> None:
+        await asyncio.sleep(self.window)
+        await self._flush(key, bucket)
+
+    async def _flush(self, key: Tuple[str, str], bucket: _Bucket) -> None:
+        if self._buckets.get(key) is bucket:
+            del self._buckets[key]
+        # Jobs whose handler was cancelled (worker shutdown) are redelivered
+        entries = [(job, future) for job, future in bucket.entries if not future.done()]
+        if not entries:
+            return
+
+        jobs = [job for job, _ in entries]
+        survivors, superseded = collapse(jobs)
+        for index, winner in superseded.items():
+            entries[index][1].set_result({
+                "job_id": jobs[index].get("job_id"),
+                "status": "coalesced",
+                "superseded_by": jobs[winner].get("job_id"),
+            })
+        self.jobs_coalesced += len(jobs) - 1
+        if len(jobs) > 1:
+            logger.debug("Coalesced %d %s jobs into 1 (%d superseded)", len(jobs), key[0], len(superseded))
+
+        live = [entries[index][1] for index in range(len(entries)) if index not in superseded]
+        outgoing = survivors[0] if len(survivors) == 1 else build_digest(survivors)
+        try:
+            result = await self.deliver(outgoing)
+        except Exception as e:
+            for future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if len(survivors) > 1:
+            self.digests_sent += 1
+        for job, future in zip(survivors, live):
+            if not future.done():
+                future.set_result({**result, "job_id": job.get("job_id"), "digest_size": len(survivors)})
+
+    async def close(self) -> None:
+        """
+        Drop held jobs without sending them.
+
+        Called after the runtime has released in-flight messages back to the
+        queue, so anything still held will be redelivered.
+        """
+        buckets = list(self._buckets.values())
+        self._buckets.clear()
+        for bucket in buckets:
+            bucket.timer.cancel()
+            for _, future in bucket.entries:
+                future.cancel()
+        await asyncio.gather(*(bucket.timer for bucket in buckets), return_exceptions=True)
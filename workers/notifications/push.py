@@ -0,0 +1,128 @@
+"""
+Batched push notification delivery.
+
+``PushBatcher`` collects individual sends and hands them to the provider in
+batches of up to ``max_batch`` (FCM accepts 500 messages per multicast call),
+waiting at most ``linger`` seconds for a batch to fill.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushNotification:
+    """One push notification for a user."""
+
+    user_id: str
+    title: str
+    body: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class PushProvider:
+    """Interface for push providers (FCM, APNs)."""
+
+    max_batch_size = 500
+
+    async def send_batch(self, notifications: List[PushNotification]) -> List[bool]:
+        """Deliver notifications in one provider call; one success flag each."""
+        raise NotImplementedError
+
+
+class LoggingPushProvider(PushProvider):
+    """Placeholder provider that logs instead of delivering."""
+
+    # TODO: Replace with FCM/APNs multicast once device tokens are stored
+
+    async def send_batch(self, notifications: List[PushNotification]) -> List[bool]:
+        logger.info("Push batch of %d notifications", len(notifications))
+        return [True] * len(notifications)
+
+
+class PushBatcher:
+    """Coalesces concurrent push sends into provider batch calls."""
+
+    def __init__(
+        self,
+        provider: PushProvider,
+        max_batch: Optional[int] = None,
+        linger: float = 0.01,
+        senders: int = 2,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            provider: Push provider
+            max_batch: Notifications per provider call (capped by the provider)
+            linger: Seconds to wait for a batch to fill
+            senders: Provider calls in flight at once
+        """
+        self.provider = provider
+        self.max_batch = min(max_batch or provider.max_batch_size, provider.max_batch_size)
+        self.linger = linger
+        self.senders = senders
+        self.batches_sent = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._sender()) for _ in range(self.senders)]
+
+    async def send(self, notification: PushNotification) -> bool:
+        """Queue a notification and wait for its delivery flag."""
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((notification, future))
+        return await future
+
+    async def _sender(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            futures = [future for _, future in batch]
+            try:
+                results = await self.provider.send_batch([notification for notification, _ in batch])
+            except asyncio.CancelledError:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(False)
+                raise
+            except Exception as e:
+                logger.warning("Push batch of %d failed: %s", len(batch), e)
+                results = [False] * len(batch)
+            self.batches_sent += 1
+            for future, ok in zip(futures, results):
+                if not future.done():
+                    future.set_result(ok)
+
+    async def close(self) -> None:
+        """Stop senders and fail anything still queued."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result(False)
+            self._queue = None
@@ -0,0 +1,80 @@
+"""
+Per-recipient token-bucket rate limiting for outbound notifications.
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Tuple
+
+
+class RecipientRateLimiter:
+    """
+    Token bucket per recipient key (e.g. ``email:alice@example.com``).
+
+    ``acquire`` waits until the recipient has a token, so batching and
+    concurrency never let one recipient exceed ``rate`` messages per
+    ``per`` seconds beyond the initial ``burst``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        per: float = 60.0,
+        burst: int = 1,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Tokens added per ``per`` seconds
+            per: Refill window in seconds
+            burst: Bucket capacity
+            max_keys: Idle full buckets are pruned beyond this many keys
+            clock: Monotonic time source (injectable for tests)
+            sleep: Async sleep (injectable for tests)
+        """
+        self.refill_per_second = rate / per
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    @classmethod
+    def from_env(cls) -> "RecipientRateLimiter":
+        """``NOTIFY_RECIPIENT_RATE_PER_MINUTE`` and ``NOTIFY_RECIPIENT_BURST``."""
+        return cls(
+            rate=float(os.getenv("NOTIFY_RECIPIENT_RATE_PER_MINUTE", "10")),
+            per=60.0,
+            burst=int(os.getenv("NOTIFY_RECIPIENT_BURST", "5")),
+        )
+
+    def reserve(self, key: str) -> float:
+        """
+        Take a token for ``key`` now, possibly borrowing from the future.
+
+        Returns:
+            Seconds the caller must wait before sending (0 if allowed now)
+        """
+        now = self._clock()
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.refill_per_second) - 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return 0.0 if tokens >= 0 else -tokens / self.refill_per_second
+
+    async def acquire(self, key: str) -> None:
+        """Wait until ``key`` may receive another message."""
+        wait = self.reserve(key)
+        if wait > 0:
+            await self._sleep(wait)
+
+    def _prune(self, now: float) -> None:
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.refill_per_second >= self.burst:
+                del self._buckets[key]
@@ -0,0 +1,436 @@
+"""
+Pooled, pipelining SMTP sender on asyncio streams.
+
+``SMTPPool`` keeps ``size`` persistent connections. Each connection runs a
+sender task that pulls up to ``pipeline_depth`` queued messages at a time
+and sends them as one pipelined batch (RFC 2920): a message's content, its
+end-of-data dot and the next message's MAIL/RCPT/DATA commands go out in a
+single write, so each message costs about one round trip instead of four.
+"""
+
+import asyncio
+import base64
+import logging
+import os
+import ssl
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+CRLF = b"\r\n"
+
+
+class SMTPError(Exception):
+    """An SMTP reply outside the expected range."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+    @property
+    def transient(self) -> bool:
+        """4xx replies (and connection failures, code 0) are worth retrying."""
+        return self.code < 500
+
+
+class SMTPBatchInterrupted(Exception):
+    """A connection failure part-way through a batch."""
+
+    def __init__(self, cause: Exception, results: List[Optional["SendResult"]]):
+        super().__init__(str(cause))
+        self.cause = cause
+        # Final result per message; None where the outcome is unknown
+        self.results = results
+
+
+@dataclass
+class OutgoingEmail:
+    """A serialized message ready for SMTP."""
+
+    sender: str
+    recipients: List[str]
+    data: bytes
+
+    def __post_init__(self):
+        if not self.recipients:
+            raise ValueError("OutgoingEmail needs at least one recipient")
+
+
+@dataclass
+class SendResult:
+    """Outcome of sending one message."""
+
+    ok: bool
+    code: int = 250
+    error: Optional[str] = None
+    rejected: List[str] = field(default_factory=list)
+
+    @property
+    def transient(self) -> bool:
+        return not self.ok and self.code < 500
+
+
+def _dot_stuff(data: bytes) -> bytes:
+    """Normalize line endings, escape leading dots and terminate DATA."""
+    lines = data.replace(b"\r\n", b"\n").split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    return b"".join((b"." + line if line.startswith(b".") else line) + CRLF for line in lines) + b"." + CRLF
+
+
+class SMTPConnection:
+    """One persistent SMTP session."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        starttls: bool = False,
+        timeout: float = 30.0,
+        local_hostname: str = "fittwin.local",
+        tls_context: Optional[ssl.SSLContext] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.starttls = starttls
+        self.timeout = timeout
+        self.local_hostname = local_hostname
+        self.tls_context = tls_context
+        self.extensions: set = set()
+        self.messages_sent = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def pipelining(self) -> bool:
+        return "PIPELINING" in self.extensions
+
+    @property
+    def closed(self) -> bool:
+        return self._writer is None or self._writer.is_closing()
+
+    async def connect(self) -> None:
+        """Open the session: greeting, EHLO, optional STARTTLS and AUTH."""
+        context = self.tls_context or ssl.create_default_context()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context if self.use_tls else None),
+            self.timeout,
+        )
+        await self._expect(220)
+        await self._ehlo()
+
+        if self.starttls:
+            await self.command("STARTTLS", expect=220)
+            await self._writer.start_tls(context)
+            await self._ehlo()
+
+        if self.username:
+            token = base64.b64encode(f"\0{self.username}\0{self.password or ''}".encode()).decode()
+            await self.command(f"AUTH PLAIN {token}", expect=235)
+
+    async def _ehlo(self) -> None:
+        _, lines = await self.command(f"EHLO {self.local_hostname}", expect=250)
+        self.extensions = {line.split(" ", 1)[0].upper() for line in lines[1:]}
+
+    async def _read_reply(self) -> Tuple[int, List[str]]:
+        lines = []
+        while True:
+            raw = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            if not raw:
+                raise ConnectionError("SMTP server closed the connection")
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(line[4:])
+            if len(line) < 4 or line[3] != "-":
+                return int(line[:3]), lines
+
+    async def _expect(self, *codes: int) -> Tuple[int, List[str]]:
+        code, lines = await self._read_reply()
+        if code not in codes:
+            raise SMTPError(code, " ".join(lines))
+        return code, lines
+
+    async def command(self, line: str, expect: int) -> Tuple[int, List[str]]:
+        """Send one command and check its reply code."""
+        self._writer.write(line.encode() + CRLF)
+        await self._writer.drain()
+        return await self._expect(expect)
+
+    async def send_batch(self, emails: List[OutgoingEmail]) -> List[SendResult]:
+        """
+        Send messages over this connection, pipelined when supported.
+
+        Per-message SMTP rejections are returned as failed results. A
+        connection error raises ``SMTPBatchInterrupted`` carrying the results
+        already final (accepted or rejected) so only the rest are resent.
+        """
+        results: List[Optional[SendResult]] = [None] * len(emails)
+        try:
+            if self.pipelining:
+                await self._send_pipelined(emails, results)
+            else:
+                for index, email in enumerate(emails):
+                    results[index] = await self._send_one(email)
+        except (OSError, ConnectionError, SMTPError, asyncio.TimeoutError) as e:
+            raise SMTPBatchInterrupted(e, results) from e
+        return results
+
+    async def _send_pipelined(self, emails: List[OutgoingEmail], results: List[Optional[SendResult]]) -> None:
+        pending: Optional[Tuple[int, SendResult]] = None  # message whose content is in flight
+        needs_reset = False
+
+        for index, email in enumerate(emails):
+            group = b""
+            if pending is not None:
+                group += _dot_stuff(emails[pending[0]].data)
+            if needs_reset:
+                group += b"RSET" + CRLF
+            group += f"MAIL FROM:<{email.sender}>".encode() + CRLF
+            group += b"".join(f"RCPT TO:<{rcpt}>".encode() + CRLF for rcpt in email.recipients)
+            group += b"DATA" + CRLF
+            self._writer.write(group)
+            await self._writer.drain()
+
+            if pending is not None:
+                results[pending[0]] = await self._finish_data(pending[1])
+                pending = None
+            if needs_reset:
+                await self._expect(250)
+                needs_reset = False
+
+            result, accepted = await self._read_envelope(email)
+            if accepted:
+                pending = (index, result)
+            else:
+                results[index] = result
+                needs_reset = True  # MAIL may have been accepted; clear the transaction
+
+        if pending is not None:
+            self._writer.write(_dot_stuff(emails[pending[0]].data))
+            await self._writer.drain()
+            results[pending[0]] = await self._finish_data(pending[1])
+
+        self.messages_sent += sum(1 for result in results if result and result.ok)
+
+    async def _read_envelope(self, email: OutgoingEmail) -> Tuple[SendResult, bool]:
+        """Read MAIL, RCPT and DATA replies. Returns (result, DATA accepted)."""
+        mail_code, mail_text = await self._read_reply()
+        rejected = []
+        rcpt_error = None
+        for rcpt in email.recipients:
+            code, text = await self._read_reply()
+            if code >= 300:
+                rejected.append(rcpt)
+                rcpt_error = (code, " ".join(text))
+        data_code, data_text = await self._read_reply()
+
+        if data_code == 354:
+            return SendResult(ok=True, rejected=rejected), True
+        if mail_code >= 300:
+            return SendResult(ok=False, code=mail_code, error=" ".join(mail_text)), False
+        if rcpt_error is not None:
+            return SendResult(ok=False, code=rcpt_error[0], error=rcpt_error[1], rejected=rejected), False
+        return SendResult(ok=False, code=data_code, error=" ".join(data_text)), False
+
+    async def _finish_data(self, result: SendResult) -> SendResult:
+        code, text = await self._read_reply()
+        if code != 250:
+            return SendResult(ok=False, code=code, error=" ".join(text), rejected=result.rejected)
+        return result
+
+    async def _send_one(self, email: OutgoingEmail) -> SendResult:
+        try:
+            await self.command(f"MAIL FROM:<{email.sender}>", expect=250)
+            rejected = []
+            for rcpt in email.recipients:
+                self._writer.write(f"RCPT TO:<{rcpt}>".encode() + CRLF)
+                await self._writer.drain()
+                code, text = await self._read_reply()
+                if code >= 300:
+                    rejected.append(rcpt)
+                    last_error = SMTPError(code, " ".join(text))
+            if len(rejected) == len(email.recipients):
+                raise last_error
+            await self.command("DATA", expect=354)
+            self._writer.write(_dot_stuff(email.data))
+            await self._writer.drain()
+            await self._expect(250)
+        except SMTPError as e:
+            await self.command("RSET", expect=250)
+            return SendResult(ok=False, code=e.code, error=e.message)
+        self.messages_sent += 1
+        return SendResult(ok=True, rejected=rejected)
+
+    async def close(self) -> None:
+        """QUIT politely, then close the socket."""
+        if self.closed:
+            return
+        try:
+            self._writer.write(b"QUIT" + CRLF)
+            await asyncio.wait_for(self._writer.drain(), 1.0)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        self._writer.close()
+        self._writer = None
+
+
+class SMTPPool:
+    """A fixed set of persistent SMTP connections fed from one queue."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        starttls: bool = False,
+        size: int = 8,
+        pipeline_depth: int = 50,
+        max_messages_per_connection: int = 1000,
+        timeout: float = 30.0,
+        tls_context: Optional[ssl.SSLContext] = None,
+    ):
+        """
+        Initialize the pool (connections open lazily).
+
+        Args:
+            host, port, username, password: SMTP server and credentials
+            use_tls: Implicit TLS (port 465)
+            starttls: Upgrade with STARTTLS (port 587)
+            size: Persistent connections
+            pipeline_depth: Messages sent per pipelined batch
+            max_messages_per_connection: Reconnect after this many messages
+            timeout: Socket timeout in seconds
+            tls_context: Custom SSL context
+        """
+        self._connection_args = dict(
+            host=host, port=port, username=username, password=password,
+            use_tls=use_tls, starttls=starttls, timeout=timeout, tls_context=tls_context,
+        )
+        self.size = size
+        self.pipeline_depth = pipeline_depth
+        self.max_messages_per_connection = max_messages_per_connection
+        self.connections_opened = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._senders: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "SMTPPool":
+        """Build a pool from ``SMTP_*`` environment variables."""
+        port = int(os.getenv("SMTP_PORT", "587"))
+        return cls(
+            host=os.getenv("SMTP_HOST", "localhost"),
+            port=port,
+            username=os.getenv("SMTP_USER") or None,
+            password=os.getenv("SMTP_PASSWORD") or None,
+            use_tls=os.getenv("SMTP_USE_TLS", str(port == 465)).lower() == "true",
+            starttls=os.getenv("SMTP_STARTTLS", str(port == 587)).lower() == "true",
+            size=int(os.getenv("SMTP_POOL_SIZE", "8")),
+            pipeline_depth=int(os.getenv("SMTP_PIPELINE_DEPTH", "50")),
+            max_messages_per_connection=int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "1000")),
+        )
+
+    def _start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._senders = [asyncio.create_task(self._sender()) for _ in range(self.size)]
+
+    async def send(self, email: OutgoingEmail) -> SendResult:
+        """Queue a message and wait for its result."""
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((email, future))
+        return await future
+
+    async def _connect(self) -> SMTPConnection:
+        connection = SMTPConnection(**self._connection_args)
+        await connection.connect()
+        self.connections_opened += 1
+        return connection
+
+    async def _sender(self) -> None:
+        connection: Optional[SMTPConnection] = None
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.pipeline_depth and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                emails = [email for email, _ in batch]
+                futures = [future for _, future in batch]
+                try:
+                    connection, results = await self._send_batch(connection, emails)
+                except asyncio.CancelledError:
+                    for future in futures:
+                        if not future.done():
+                            future.set_result(SendResult(ok=False, code=0, error="SMTP sender stopped"))
+                    raise
+                for future, result in zip(futures, results):
+                    if not future.done():
+                        future.set_result(result)
+
+                if connection is not None and connection.messages_sent >= self.max_messages_per_connection:
+                    await connection.close()
+                    connection = None
+        finally:
+            if connection is not None:
+                await connection.close()
+
+    async def _send_batch(
+        self, connection: Optional[SMTPConnection], emails: List[OutgoingEmail]
+    ) -> Tuple[Optional[SMTPConnection], List[SendResult]]:
+        """
+        Send a batch, reconnecting as needed. Returns the connection to keep.
+
+        After a connection failure only messages without a final reply are
+        resent; a message whose end-of-data reply was lost may be delivered
+        twice (SMTP is at-least-once).
+        """
+        results: List[Optional[SendResult]] = [None] * len(emails)
+        failed: Optional[SendResult] = None
+        # A reused connection may have been dropped while idle: retry once fresh
+        for _ in range(2):
+            todo = [index for index, result in enumerate(results) if result is None]
+            reused = connection is not None and not connection.closed
+            try:
+                if not reused:
+                    connection = await self._connect()
+                sent = await connection.send_batch([emails[index] for index in todo])
+                for index, result in zip(todo, sent):
+                    results[index] = result
+                return connection, results
+            except (OSError, ConnectionError, SMTPError, asyncio.TimeoutError, SMTPBatchInterrupted) as e:
+                if isinstance(e, SMTPBatchInterrupted):
+                    for index, result in zip(todo, e.results):
+                        results[index] = result
+                    e = e.cause
+                logger.warning("SMTP batch failed on %s connection: %s", "reused" if reused else "new", e)
+                if connection is not None:
+                    await connection.close()
+                connection = None
+                code = e.code if isinstance(e, SMTPError) else 0
+                failed = SendResult(ok=False, code=code, error=str(e))
+                if not reused:
+                    break
+        return None, [result or failed for result in results]
+
+    async def close(self) -> None:
+        """Stop senders, close connections and fail anything still queued."""
+        for task in self._senders:
+            task.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        self._senders = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result(SendResult(ok=False, code=0, error="SMTP pool closed"))
+            self._queue = None
@@ -3,13 +3,47 @@ Render Worker
 
 Generates virtual try-on renders by overlaying garments on avatars.
 Processes rendering jobs from a queue.
+
+Each job is rasterized in image tiles spread across a process pool sized to
+the host's cores (``RENDER_PROCESSES``); the runtime keeps a few jobs in
+flight so the pool stays busy while one job shades and encodes its PNGs.
+
+Jobs for the same (avatar, garment, size) are rendered once: a job that
+arrives while an identical one is rendering waits for that result, and
+finished renders are served from the on-disk render cache.
+
+With ``RENDER_SPECULATIVE`` on, finishing a render queues the garment's
+neighbouring sizes at low priority, so the next size toggle is a cache hit.
+All renders go through one priority scheduler: speculative renders wait
+while any user render is queued or running, use a thread reserved for them
+and rasterize in-process, leaving the tile pool to user renders.
 """
 
 import os
-import json
-import time
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Dict, Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from workers.render import (  # noqa: E402
+    SPECULATIVE,
+    InFlight,
+    RenderCache,
+    RenderScheduler,
+    SpeculationTracker,
+    job_render_key,
+    neighbor_sizes,
+    render_parameters,
+    render_tryon,
+)
+from workers.runtime import WorkerConfig, run_worker  # noqa: E402
+
+
+RENDER_QUEUE = os.getenv("RENDER_QUEUE", "render")
+
 
 class RenderWorker:
     """Processes virtual try-on rendering jobs."""
@@ -18,58 +52,141 @@ class RenderWorker:
         """Initialize the render worker."""
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        self.output_dir = os.getenv("RENDER_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "fittwin-renders"))
+        self.base_url = os.getenv("RENDER_BASE_URL") or None
+        self.width = int(os.getenv("RENDER_WIDTH", "512"))
+        self.height = int(os.getenv("RENDER_HEIGHT", "1024"))
+        self.tile = int(os.getenv("RENDER_TILE_SIZE", "128"))
+        self.processes = int(os.getenv("RENDER_PROCESSES") or os.cpu_count() or 1)
+        self.concurrency = int(os.getenv("RENDER_CONCURRENCY", "2"))
+        self.cache = RenderCache.from_env(self.output_dir)
+        self.cache_quantum_cm = float(os.getenv("RENDER_CACHE_QUANTUM_CM", "0.5"))
+        self.cache_angle_step = float(os.getenv("RENDER_CACHE_ANGLE_STEP", "5"))
+        self.in_flight = InFlight()
+        self.speculative = os.getenv("RENDER_SPECULATIVE", "false").lower() in ("1", "true", "yes")
+        self.speculative_distance = int(os.getenv("RENDER_SPECULATIVE_NEIGHBORS", "1"))
+        self.scheduler = RenderScheduler(
+            self.concurrency,
+            speculative_slots=int(os.getenv("RENDER_SPECULATIVE_SLOTS", "1")) if self.speculative else 0,
+            max_speculative_pending=int(os.getenv("RENDER_SPECULATIVE_MAX_PENDING", "32")),
+        )
+        self.speculation = SpeculationTracker()
+        self.pool = None
 
     def process_job(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a rendering job.
 
+        Runs on a runtime thread; tiles go to ``self.pool`` when one is
+        running, otherwise they are rasterized in this process. A job whose
+        (avatar hash, garment_id, size) is already rendering waits for that
+        render and reports it as its own.
+
         Args:
-            job_data: Job data containing avatar and garment info
+            job_data: Job data containing body measurements, garment and size
 
         Returns:
-            Result with render image URL and fit analysis
+            Result with render and heatmap image URLs, per-region fit
+            analysis and alternative sizes
         """
         print(f"Processing render job: {job_data.get('job_id')}")
 
-        avatar_url = job_data.get("avatar_url")
-        garment_id = job_data.get("garment_id")
-        size = job_data.get("size")
-
-        # TODO: Implement actual rendering pipeline
-        # This is a placeholder for Phase 3 implementation
-        
-        # Simulate rendering time
-        time.sleep(3)
-
-        # Return mock result
-        result = {
-            "job_id": job_data.get("job_id"),
-            "status": "completed",
-            "render_url": f"https://storage.example.com/renders/{garment_id}_{size}.png",
-            "fit_analysis": {
-                "waist_fit": "good",
-                "hip_fit": "tight",
-                "overall_score": 0.75
-            },
-            "alternative_sizes": [
-                {"size": "M", "score": 0.85},
-                {"size": "L", "score": 0.65}
-            ]
-        }
+        measurements, angles = render_parameters(job_data, True, self.cache_quantum_cm, self.cache_angle_step)
+        key = job_render_key(job_data, measurements, angles, self.width, self.height)
+        result, shared = self.in_flight.run(key, lambda: self.scheduler.submit(lambda: self.render(job_data)).result())
+        if shared and result["render_url"] is None:
+            # Joined a speculative render, which only filled the cache: link it in now
+            result, shared = self.scheduler.submit(lambda: self.render(job_data)).result(), False
+        if shared:
+            result = {
+                **result,
+                "job_id": job_data.get("job_id"),
+                "metadata": {**result["metadata"], "deduplicated": True},
+            }
+        speculated = self.speculation.claim(key)
+        result["metadata"] = {**result["metadata"], "speculation_hit": speculated}
+        if self.speculative and self.cache is not None:
+            self.speculate(job_data, measurements, angles)
+
+        cache = f", cache hit rate {self.cache.hit_rate:.0%}" if self.cache is not None else ""
+        print(f"Rendering completed: {result['render_url']} "
+              f"(score {result['fit_analysis']['overall_score']}, "
+              f"{result['metadata']['processing_time_ms']} ms"
+              f"{', shared' if shared else ''}{', speculated' if speculated else ''}{cache})")
+        return result
+
+    def render(self, job_data: Dict[str, Any], publish: bool = True) -> Dict[str, Any]:
+        """Render one job through the cache (tiles on the pool for published renders)."""
+        return render_tryon(
+            job_data,
+            output_dir=self.output_dir,
+            base_url=self.base_url,
+            width=self.width,
+            height=self.height,
+            tile=self.tile,
+            map_fn=self.pool.map if self.pool is not None and publish else None,
+            cache=self.cache,
+            quantum_cm=self.cache_quantum_cm,
+            angle_step=self.cache_angle_step,
+            publish=publish,
+        )
+
+    def speculate(self, job_data: Dict[str, Any], measurements, angles) -> None:
+        """
+        Queue low-priority cache-only renders of the sizes next to the one
+        just rendered (skipping any already cached or rendering).
 
-        print(f"Rendering completed: {result['render_url']}")
+        Args:
+            job_data: The user job that finished
+            measurements: Its quantized body measurements
+            angles: Its quantized limb angles
+        """
+        chart = (job_data.get("garment") or {}).get("sizes") or {}
+        for size in neighbor_sizes(list(chart), job_data.get("size"), self.speculative_distance):
+            speculative_job = {**job_data, "size": size, "job_id": f"{job_data.get('job_id')}~{size}"}
+            key = job_render_key(speculative_job, measurements, angles, self.width, self.height)
+            if key in self.in_flight or self.cache.contains(key):
+                self.speculation.skipped += 1
+                continue
+            self.speculation.submitted += 1
+            self.scheduler.submit(
+                lambda key=key, job=speculative_job: self.in_flight.run(key, lambda: self._prerender(key, job)),
+                priority=SPECULATIVE,
+            )
+
+    def _prerender(self, key: str, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.render(job_data, publish=False)
+        self.speculation.record(key)
         return result
 
+    def stats(self) -> Dict[str, Any]:
+        """Cache, deduplication and speculation counters."""
+        return {
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "deduplicated": self.in_flight.followers,
+            "speculation": self.speculation.stats(dropped=self.scheduler.dropped),
+        }
+
     def run(self):
         """Run the worker to process jobs from queue."""
         print("Render Worker started...")
-        print("Waiting for jobs...")
-
-        # TODO: Implement actual queue integration
-        # This is a placeholder for Phase 3 implementation
-
-        while True:
-            time.sleep(5)
+        print(f"Consuming queue: {RENDER_QUEUE} ({self.processes} processes)")
+
+        config = WorkerConfig.from_env()
+        config.concurrency = self.concurrency
+        try:
+            if self.processes <= 1:
+                run_worker(RENDER_QUEUE, self.process_job, config=config)
+                return
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                self.pool = pool
+                try:
+                    run_worker(RENDER_QUEUE, self.process_job, config=config)
+                finally:
+                    self.pool = None
+        finally:
+            self.scheduler.close()
+            print(f"Render Worker stopped: {self.stats()}")
 
 
 if __name__ == "__main__":
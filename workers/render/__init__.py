@@ -0,0 +1,48 @@
+"""
+CPU try-on rendering for the render worker.
+
+Drapes a garment over the fitted body template by per-region ease, then
+rasterizes body and garment with a tile-parallel NumPy rasterizer into a
+shaded try-on image and a fit heatmap, both encoded as PNG. Finished
+renders are kept in a content-addressed cache, and identical jobs in
+flight at the same time are rendered once. Neighbouring sizes can be
+pre-rendered into the cache at a priority below user renders.
+"""
+
+from .cache import RenderCache, render_key
+from .dedup import InFlight
+from .fit import COVERAGE, drape, fit_label, fit_score, overall_score, rank_sizes, region_ease
+from .pipeline import job_render_key, render_parameters, render_tryon
+from .png import decode_png, encode_png
+from .raster import Frame, TileTask, bin_triangles, orthographic, rasterize_tile, render_tiles
+from .scheduler import SPECULATIVE, USER, RenderScheduler
+from .speculation import SpeculationTracker, neighbor_sizes
+
+__all__ = [
+    "RenderCache",
+    "render_key",
+    "InFlight",
+    "COVERAGE",
+    "drape",
+    "fit_label",
+    "fit_score",
+    "overall_score",
+    "rank_sizes",
+    "region_ease",
+    "job_render_key",
+    "render_parameters",
+    "render_tryon",
+    "decode_png",
+    "encode_png",
+    "Frame",
+    "TileTask",
+    "bin_triangles",
+    "orthographic",
+    "rasterize_tile",
+    "render_tiles",
+    "SPECULATIVE",
+    "USER",
+    "RenderScheduler",
+    "SpeculationTracker",
+    "neighbor_sizes",
+]
@@ -0,0 +1,178 @@
+"""
+Content-addressed on-disk cache of finished try-on renders.
+
+The key hashes the avatar (the quantized body parameters, as in the avatar
+mesh cache), the garment, the size and the render settings, so a user
+toggling back to a size, or several users whose bodies quantize to the
+same avatar, get the stored images. Each entry is the try-on PNG, the
+heatmap PNG and the JSON fit analysis.
+
+Like ``MeshCache``, entries are plain files written by atomic rename,
+recency is the file mtime (touched on every hit) and the least recently
+used files are deleted once the store grows past ``max_bytes``. An entry
+with any file missing is a miss.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from workers.avatar.cache import mesh_key
+from workers.avatar.storage import write_atomic
+
+
+# Bump when the renderer or fit model changes so stale renders stop matching
+RENDER_VERSION = 1
+
+ENTRY_FILES = {"render": "png", "heatmap": "heatmap.png", "analysis": "json"}
+
+
+def render_key(
+    measurements: Mapping[str, float],
+    angles: np.ndarray,
+    garment_id: Any,
+    size: Any,
+    garment: Mapping[str, Any],
+    width: int,
+    height: int,
+    segments: int,
+    detail: float,
+) -> str:
+    """Hex digest identifying one render of a garment size on an avatar."""
+    payload = json.dumps(
+        {
+            "v": RENDER_VERSION,
+            "avatar": mesh_key(measurements, angles, segments, detail),
+            "garment_id": garment_id,
+            "size": size,
+            "garment": garment,
+            "w": width,
+            "h": height,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """LRU-by-mtime render store with a size cap and hit-rate counters."""
+
+    def __init__(self, root: str, max_bytes: int = 1024 ** 3, rescan_every: int = 64):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Cache directory
+            max_bytes: Size cap; eviction trims to 90% of it
+            rescan_every: Re-measure the directory after this many local puts,
+                so writes from other processes count toward the cap
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rescan_every = rescan_every
+        self.hits = 0
+        self.misses = 0
+        self.evicted_bytes = 0
+        self._approx_bytes: Optional[int] = None
+        self._puts_since_scan = 0
+
+    @classmethod
+    def from_env(cls, output_dir: str) -> Optional["RenderCache"]:
+        """``RENDER_CACHE_DIR`` and ``RENDER_CACHE_MAX_BYTES`` (0 disables the cache)."""
+        max_bytes = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(1024 ** 3)))
+        if max_bytes <= 0:
+            return None
+        return cls(os.getenv("RENDER_CACHE_DIR") or os.path.join(output_dir, ".render-cache"), max_bytes)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+    def path(self, key: str, part: str) -> Path:
+        return self.root / key[:2] / f"{key}.{ENTRY_FILES[part]}"
+
+    def contains(self, key: str) -> bool:
+        """Whether a complete entry exists (without counting a lookup or touching it)."""
+        return all(self.path(key, part).exists() for part in ENTRY_FILES)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored analysis of a render (marking its files recently used),
+        or None if any of its files is missing.
+        """
+        try:
+            for part in ENTRY_FILES:
+                os.utime(self.path(key, part))
+            analysis = json.loads(self.path(key, "analysis").read_text())
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return analysis
+
+    def put(self, key: str, render: bytes, heatmap: bytes, analysis: Mapping[str, Any]) -> None:
+        """Store a render, evicting least recently used files past the cap."""
+        document = json.dumps(analysis, separators=(",", ":"), default=str).encode("utf-8")
+        write_atomic(self.path(key, "render"), render)
+        write_atomic(self.path(key, "heatmap"), heatmap)
+        # The analysis goes last: its presence marks the entry complete
+        write_atomic(self.path(key, "analysis"), document)
+        self._account(len(render) + len(heatmap) + len(document))
+
+    def _account(self, written: int) -> None:
+        self._puts_since_scan += 1
+        if self._approx_bytes is None or self._puts_since_scan >= self.rescan_every:
+            self._approx_bytes = self._scan_size()
+            self._puts_since_scan = 0
+        else:
+            self._approx_bytes += written
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith((".png", ".json")):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used files down to 90% of the cap. Returns bytes freed."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        for path, size, _ in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            freed += size
+        self._approx_bytes = total - freed
+        self.evicted_bytes += freed
+        return freed
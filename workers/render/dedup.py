@@ -0,0 +1,65 @@
+"""
+In-flight deduplication of identical render jobs.
+
+The render worker runs sync handlers on runtime threads, so this is a
+thread-safe map of key -> ``concurrent.futures.Future``: the first caller
+for a key renders, and later callers block on its future instead of
+rendering the same image again.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class InFlight:
+    """Single-flight execution per key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def run(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight, in which
+        case wait for that call's result (or exception) instead.
+
+        Returns:
+            ``(result, shared)``: ``shared`` is True when another caller's
+            result was reused
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            leader = future is None
+            if leader:
+                future = self._pending[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._pending[key]
@@ -0,0 +1,180 @@
+"""
+Garment-vs-body ease per body region.
+
+Ease is garment circumference minus body circumference at the same region
+(positive means room to spare). It drives three things: the fit label and
+score per region, the heatmap colour, and how far the garment surface sits
+off the body when it is draped.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from workers.avatar.body import REGIONS, AvatarMesh, vertex_normals
+
+
+# Body measurement and accepted garment measurement keys per region
+REGION_MEASUREMENTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "chest": ("chest", ("chest_cm", "chest")),
+    "waist": ("waist_natural", ("waist_cm", "waist_natural_cm", "waist")),
+    "hip": ("hip_low", ("hip_cm", "hip_low_cm", "hip")),
+    "upper_arm": ("bicep", ("bicep_cm", "sleeve_width_cm", "bicep")),
+    "forearm": ("forearm", ("forearm_cm", "forearm")),
+    "thigh": ("thigh", ("thigh_cm", "thigh")),
+    "lower_leg": ("calf", ("calf_cm", "leg_opening_cm", "calf")),
+}
+
+# Regions each garment category covers
+COVERAGE: Dict[str, Tuple[str, ...]] = {
+    "top": ("chest", "waist", "upper_arm"),
+    "shirt": ("chest", "waist", "upper_arm", "forearm"),
+    "outerwear": ("chest", "waist", "hip", "upper_arm", "forearm"),
+    "dress": ("chest", "waist", "hip", "thigh"),
+    "bottom": ("waist", "hip", "thigh", "lower_leg"),
+    "shorts": ("waist", "hip", "thigh"),
+    "skirt": ("waist", "hip", "thigh"),
+}
+DEFAULT_CATEGORY = "top"
+
+# Ease assumed where the garment has no measurement for a region ("regular" fit)
+DEFAULT_EASE_PCT = 0.08
+# Most comfortable ease, and how quickly the score falls away from it
+IDEAL_EASE_PCT = 0.06
+EASE_TOLERANCE = 0.08
+
+# Upper bound of ease (fraction of body circumference) for each label
+FIT_LABELS: Tuple[Tuple[float, str], ...] = (
+    (0.0, "tight"),
+    (0.03, "snug"),
+    (0.12, "good"),
+    (0.25, "relaxed"),
+    (np.inf, "loose"),
+)
+
+# Garment surface clearance so a zero-ease garment still draws over the skin (m)
+CLEARANCE_M = 0.004
+
+
+def fit_label(ease_pct: float) -> str:
+    for limit, label in FIT_LABELS:
+        if ease_pct < limit:
+            return label
+    return FIT_LABELS[-1][1]
+
+
+def fit_score(ease_pct: np.ndarray) -> np.ndarray:
+    """1.0 at the ideal ease, falling off as a Gaussian either side."""
+    return np.exp(-(((np.asarray(ease_pct) - IDEAL_EASE_PCT) / EASE_TOLERANCE) ** 2))
+
+
+def coverage(category: Optional[str]) -> Tuple[str, ...]:
+    return COVERAGE.get((category or DEFAULT_CATEGORY).lower(), COVERAGE[DEFAULT_CATEGORY])
+
+
+def _garment_value(garment: Mapping[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
+    for key in keys:
+        value = garment.get(key)
+        try:
+            if value is not None and float(value) > 0:
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def region_ease(
+    body: Mapping[str, float],
+    garment: Mapping[str, Any],
+    category: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Ease for every region the garment covers.
+
+    Args:
+        body: Resolved body measurements in cm
+        garment: Garment measurements in cm (``chest_cm`` etc.)
+        category: Garment category (see ``COVERAGE``)
+
+    Returns:
+        Per region: ``ease_cm``, ``ease_pct`` (of body circumference),
+        ``fit`` label, ``score`` and whether the ease was ``estimated``
+    """
+    regions = {}
+    for region in coverage(category):
+        measurement, keys = REGION_MEASUREMENTS[region]
+        body_cm = body[measurement]
+        garment_cm = _garment_value(garment, keys)
+        estimated = garment_cm is None
+        if estimated:
+            garment_cm = body_cm * (1 + DEFAULT_EASE_PCT)
+        ease_pct = (garment_cm - body_cm) / body_cm
+        regions[region] = {
+            "ease_cm": round(garment_cm - body_cm, 1),
+            "ease_pct": round(ease_pct, 4),
+            "fit": fit_label(ease_pct),
+            "score": round(float(fit_score(ease_pct)), 3),
+            "estimated": estimated,
+        }
+    return regions
+
+
+def overall_score(regions: Mapping[str, Mapping[str, Any]]) -> float:
+    """Mean region score, measured regions counting double estimated ones."""
+    if not regions:
+        return 0.0
+    weights = np.array([0.5 if info["estimated"] else 1.0 for info in regions.values()])
+    scores = np.array([info["score"] for info in regions.values()])
+    return round(float((weights * scores).sum() / weights.sum()), 3)
+
+
+def rank_sizes(
+    body: Mapping[str, float],
+    sizes: Mapping[str, Mapping[str, Any]],
+    category: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Score every size in a size chart, best first."""
+    ranked = [
+        {"size": label, "score": overall_score(region_ease(body, chart, category))}
+        for label, chart in sizes.items()
+        if isinstance(chart, Mapping)
+    ]
+    return sorted(ranked, key=lambda entry: entry["score"], reverse=True)
+
+
+def drape(body: AvatarMesh, regions: Mapping[str, Mapping[str, Any]]) -> Tuple[AvatarMesh, np.ndarray]:
+    """
+    Garment surface over the covered regions of a template body.
+
+    Covered vertices move out along their normal by the radius the ease adds
+    (``ease / 2 pi``, loose fabric only; tight fabric sits at the clearance).
+    The garment reuses the body's topology, so region boundaries stay
+    watertight.
+
+    Returns:
+        The garment mesh and its per-vertex ease fraction
+    """
+    if body.regions is None:
+        raise ValueError("Body mesh has no region labels")
+    ease_by_region = np.full(len(REGIONS), np.nan, dtype=np.float32)
+    offset_by_region = np.zeros(len(REGIONS), dtype=np.float32)
+    for region, info in regions.items():
+        index = REGIONS.index(region)
+        ease_by_region[index] = info["ease_pct"]
+        offset_by_region[index] = max(info["ease_cm"], 0.0) / (2 * np.pi) / 100.0 + CLEARANCE_M
+
+    ease = ease_by_region[body.regions]
+    covered = ~np.isnan(ease)
+    faces = body.indices[covered[body.indices].all(axis=1)]
+    used, faces = np.unique(faces, return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    positions = (
+        body.positions[used] + body.normals[used] * offset_by_region[body.regions[used]][:, None]
+    ).astype(np.float32)
+    mesh = AvatarMesh(
+        positions=positions,
+        normals=vertex_normals(positions, faces).astype(np.float32),
+        indices=faces.astype(np.uint32),
+        regions=body.regions[used],
+    )
+    return mesh, ease[used]
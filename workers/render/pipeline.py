@@ -0,0 +1,293 @@
+"""
+Try-on render pipeline: fit the body template, drape the garment over the
+regions it covers, rasterize both in tiles and shade two images from the
+same frame — the try-on render and a fit heatmap colouring the garment by
+its ease over the body. Renders already in the cache are linked into place
+without drawing anything.
+
+``render_tryon`` takes a ``map_fn`` (such as ``ProcessPoolExecutor.map``)
+to spread tiles across processes; everything else is whole-frame NumPy.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+
+from workers.avatar.body import body_parameters, build_body
+from workers.avatar.cache import quantize_parameters
+from workers.avatar.pipeline import _safe
+from workers.avatar.storage import link_or_copy, write_atomic
+
+from .cache import RenderCache, render_key
+from .fit import coverage, drape, overall_score, rank_sizes, region_ease
+from .png import encode_png
+from .raster import Frame, bin_triangles, front_facing, orthographic, render_tiles
+
+
+# Per-vertex attributes carried through the rasterizer
+NORMAL, EASE, LAYER = slice(0, 3), 3, 4
+CHANNELS = 5
+
+BACKGROUND = (242, 242, 242)
+SKIN = (224, 188, 158)
+HEATMAP_BODY = (196, 196, 196)
+DEFAULT_GARMENT_COLOR = "#3b6ea5"
+LIGHT = np.array([-0.35, 0.45, 1.0]) / np.linalg.norm([-0.35, 0.45, 1.0])
+
+# Heatmap colour stops over ease (fraction of body circumference)
+HEAT_STOPS = np.array([-0.05, 0.0, 0.06, 0.15, 0.30])
+HEAT_COLORS = np.array([
+    (200, 30, 45),  # too small
+    (240, 125, 40),  # no ease
+    (60, 170, 80),  # ideal
+    (70, 160, 205),  # relaxed
+    (50, 70, 190),  # loose
+], dtype=np.float32)
+
+
+def parse_color(value: Optional[str], default: str = DEFAULT_GARMENT_COLOR) -> Tuple[int, int, int]:
+    """``#rrggbb`` (or ``rrggbb``) to an RGB tuple, falling back to ``default``."""
+    text = (value or default).lstrip("#")
+    try:
+        if len(text) != 6:
+            raise ValueError(text)
+        return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return parse_color(default)
+
+
+def heat_colors(ease: np.ndarray) -> np.ndarray:
+    """Map ease fractions to RGB (float, 0-255) along ``HEAT_STOPS``."""
+    return np.stack([np.interp(ease, HEAT_STOPS, HEAT_COLORS[:, i]) for i in range(3)], axis=-1)
+
+
+def shade(frame: Frame, garment_color: Tuple[int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lambert-shade a rasterized frame (covered pixels only; the rest is background).
+
+    Returns:
+        The try-on image and the fit heatmap, both ``(H, W, 3)`` uint8
+    """
+    covered = frame.covered
+    tryon = np.empty(frame.depth.shape + (3,), dtype=np.uint8)
+    tryon[:] = BACKGROUND
+    heatmap = tryon.copy()
+
+    pixels = frame.attributes[covered]
+    normals = pixels[:, NORMAL]
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-6)
+    diffuse = np.clip(normals @ LIGHT, 0.0, 1.0)[:, None].astype(np.float32)
+    garment = pixels[:, LAYER] > 0.5
+
+    base = np.where(garment[:, None], np.asarray(garment_color, np.float32), np.asarray(SKIN, np.float32))
+    tryon[covered] = np.clip(base * (0.3 + 0.7 * diffuse), 0, 255).astype(np.uint8)
+
+    heat = np.empty_like(base)
+    heat[:] = HEATMAP_BODY
+    heat[garment] = heat_colors(pixels[garment, EASE])
+    heatmap[covered] = np.clip(heat * (0.55 + 0.45 * diffuse), 0, 255).astype(np.uint8)
+    return tryon, heatmap
+
+
+def _scene(body, garment, garment_ease):
+    """Merge body and garment into per-triangle screen arrays (front faces only)."""
+    positions = np.vstack([body.positions, garment.positions])
+    faces = np.vstack([body.indices, garment.indices.astype(np.int64) + body.vertex_count])
+    faces = faces[front_facing(positions, faces)]
+    attributes = np.zeros((len(positions), CHANNELS), dtype=np.float32)
+    attributes[:, NORMAL] = np.vstack([body.normals, garment.normals])
+    attributes[body.vertex_count:, EASE] = garment_ease
+    attributes[body.vertex_count:, LAYER] = 1.0
+    return positions, faces, attributes
+
+
+def _garment_spec(job_data: Mapping[str, Any]):
+    """``(garment spec, category, size, size chart, garment measurements)`` for a job."""
+    spec: Mapping[str, Any] = job_data.get("garment") or {}
+    size = job_data.get("size") or spec.get("size")
+    sizes = spec.get("sizes") or {}
+    return spec, spec.get("category"), size, sizes, spec.get("measurements") or sizes.get(size) or {}
+
+
+def render_parameters(
+    job_data: Mapping[str, Any],
+    quantize: bool = False,
+    quantum_cm: float = 0.5,
+    angle_step: float = 5.0,
+):
+    """Body parameters for a job, snapped to cache buckets when ``quantize`` is set."""
+    measurements, angles = body_parameters(job_data.get("measurements"), job_data.get("landmarks"))
+    if quantize:
+        measurements, angles = quantize_parameters(measurements, angles, quantum_cm, angle_step)
+    return measurements, angles
+
+
+def job_render_key(
+    job_data: Mapping[str, Any],
+    measurements: Mapping[str, float],
+    angles: np.ndarray,
+    width: int = 512,
+    height: int = 1024,
+    segments: int = 48,
+    detail: float = 1.0,
+) -> str:
+    """Cache and deduplication key for rendering a job's garment size on these body parameters."""
+    spec, _, size, _, _ = _garment_spec(job_data)
+    return render_key(measurements, angles, job_data.get("garment_id"), size, spec, width, height, segments, detail)
+
+
+def render_tryon(
+    job_data: Dict[str, Any],
+    output_dir: str,
+    base_url: Optional[str] = None,
+    width: int = 512,
+    height: int = 1024,
+    tile: int = 128,
+    segments: int = 48,
+    detail: float = 1.0,
+    map_fn: Optional[Callable[[Callable, Iterable], Iterator]] = None,
+    cache: Optional[RenderCache] = None,
+    quantum_cm: float = 0.5,
+    angle_step: float = 5.0,
+    publish: bool = True,
+) -> Dict[str, Any]:
+    """
+    Render a garment on a user's body and analyse its fit per region.
+
+    Writes ``<user_id>/<job_id>.png`` (try-on) and ``<job_id>.heatmap.png``.
+    With a cache, body parameters are quantized first and a stored render
+    of the same avatar, garment and size is linked into place instead.
+    Without ``publish`` the render only goes into the cache (to warm it).
+
+    Args:
+        job_data: Job with body ``measurements`` (cm), optional ``landmarks``,
+            ``garment_id``, ``size`` and ``garment`` (``category``, ``color``,
+            ``measurements`` and/or a ``sizes`` chart of measurements per size label)
+        output_dir: Root directory for PNG files
+        base_url: Public URL prefix for ``output_dir`` (file path if not set)
+        width: Image width in pixels
+        height: Image height in pixels
+        tile: Tile edge in pixels
+        segments: Vertices around each body cross-section
+        detail: Multiplier on cross-sections per body part
+        map_fn: ``map``-like callable used to rasterize tiles (built-in map if not set)
+        cache: Shared render cache (None disables caching and quantization)
+        quantum_cm: Measurement bucket size for cache keys
+        angle_step: Limb angle bucket size in degrees for cache keys
+        publish: Write the job's own files (URLs are None when False)
+
+    Returns:
+        Job result with render and heatmap URLs, per-region fit analysis,
+        alternative sizes and stage timings
+
+    Raises:
+        ValueError: If ``publish`` is False without a cache
+    """
+    if not publish and cache is None:
+        raise ValueError("An unpublished render needs a cache to go into")
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    def lap(stage: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = round((now - since) * 1000, 2)
+        return now
+
+    spec, category, size, sizes, garment_measurements = _garment_spec(job_data)
+    user = _safe(job_data.get("user_id"), "anonymous")
+    job = _safe(job_data.get("job_id"), "render")
+    relative = {"render": Path(user) / f"{job}.png", "heatmap": Path(user) / f"{job}.heatmap.png"}
+    destinations = {name: Path(output_dir) / path for name, path in relative.items()} if publish else {}
+
+    measurements, angles = render_parameters(job_data, cache is not None, quantum_cm, angle_step)
+    key = None
+    analysis = None
+    if cache is not None:
+        key = job_render_key(job_data, measurements, angles, width, height, segments, detail)
+        analysis = cache.get(key)
+    mark = lap("lookup", started)
+
+    if analysis is not None:
+        try:
+            for name, destination in destinations.items():
+                link_or_copy(cache.path(key, name), destination)
+        except FileNotFoundError:
+            analysis = None  # evicted by another process since the lookup
+        else:
+            mark = lap("link", mark)
+
+    cache_hit = analysis is not None
+    if not cache_hit:
+        body = build_body(measurements, angles, segments=segments, detail=detail)
+        mark = lap("fit", mark)
+
+        regions = region_ease(measurements, garment_measurements, category)
+        garment, garment_ease = drape(body, regions)
+        mark = lap("drape", mark)
+
+        positions, faces, attributes = _scene(body, garment, garment_ease)
+        low = np.minimum(body.bounds()[0], garment.bounds()[0])
+        high = np.maximum(body.bounds()[1], garment.bounds()[1])
+        xy, depth = orthographic(positions, low, high, width, height)
+        tasks = bin_triangles(xy[faces], depth[faces], attributes[faces], width, height, tile)
+        mark = lap("bin", mark)
+
+        frame = render_tiles(tasks, width, height, CHANNELS, map_fn)
+        mark = lap("raster", mark)
+
+        tryon, heatmap = shade(frame, parse_color(spec.get("color")))
+        mark = lap("shade", mark)
+
+        images = {name: encode_png(image, level=3) for name, image in (("render", tryon), ("heatmap", heatmap))}
+        fit_analysis: Dict[str, Any] = {f"{region}_fit": info["fit"] for region, info in regions.items()}
+        fit_analysis["overall_score"] = overall_score(regions)
+        fit_analysis["regions"] = regions
+        alternatives = [entry for entry in rank_sizes(measurements, sizes, category) if entry["size"] != size]
+        analysis = {
+            "fit_analysis": fit_analysis,
+            "alternative_sizes": alternatives[:3],
+            "tiles": len(tasks),
+            "triangles": int(len(faces)),
+            "file_size_bytes": {name: len(data) for name, data in images.items()},
+        }
+        if cache is not None:
+            cache.put(key, images["render"], images["heatmap"], analysis)
+            for name, destination in destinations.items():
+                link_or_copy(cache.path(key, name), destination)
+        else:
+            for name, destination in destinations.items():
+                write_atomic(destination, images[name])
+        mark = lap("encode", mark)
+
+    def url(path: Path) -> Optional[str]:
+        if not publish:
+            return None
+        return f"{base_url.rstrip('/')}/{path.as_posix()}" if base_url else str(Path(output_dir) / path)
+
+    return {
+        "job_id": job_data.get("job_id"),
+        "status": "completed",
+        "render_url": url(relative["render"]),
+        "heatmap_url": url(relative["heatmap"]),
+        "fit_analysis": analysis["fit_analysis"],
+        "alternative_sizes": analysis["alternative_sizes"],
+        "metadata": {
+            "garment_id": job_data.get("garment_id"),
+            "size": size,
+            "category": (category or "").lower() or None,
+            "covered_regions": list(coverage(category)),
+            "width": width,
+            "height": height,
+            "tiles": analysis["tiles"],
+            "triangles": analysis["triangles"],
+            "file_size_bytes": analysis["file_size_bytes"],
+            "cache_hit": cache_hit,
+            "render_key": key,
+            "processing_time_ms": round((mark - started) * 1000, 2),
+            "timings_ms": timings,
+            "worker_pid": os.getpid(),
+        },
+    }
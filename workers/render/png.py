@@ -0,0 +1,75 @@
+"""
+Minimal PNG encoder (8-bit RGB/RGBA, no filtering) on zlib.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {3: 2, 4: 6}  # channels -> PNG colour type (RGB, RGBA)
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(image: np.ndarray, level: int = 6) -> bytes:
+    """
+    Encode an ``(H, W, 3|4)`` uint8 image as PNG.
+
+    Args:
+        image: RGB or RGBA pixels
+        level: zlib compression level
+
+    Returns:
+        The .png file contents
+
+    Raises:
+        ValueError: If the array is not 8-bit RGB or RGBA
+    """
+    if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] not in COLOR_TYPES:
+        raise ValueError("Expected an (H, W, 3|4) uint8 image")
+    height, width, channels = image.shape
+    rows = np.zeros((height, 1 + width * channels), dtype=np.uint8)  # filter byte 0 per row
+    rows[:, 1:] = image.reshape(height, -1)
+    header = struct.pack(">IIBBBBB", width, height, 8, COLOR_TYPES[channels], 0, 0, 0)
+    return b"".join([
+        PNG_SIGNATURE,
+        _chunk(b"IHDR", header),
+        _chunk(b"IDAT", zlib.compress(rows.tobytes(), level)),
+        _chunk(b"IEND", b""),
+    ])
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode a PNG written by ``encode_png`` (unfiltered, non-interlaced).
+
+    Raises:
+        ValueError: If the file is not such a PNG
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG")
+    offset = len(PNG_SIGNATURE)
+    header, compressed = None, []
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            compressed.append(body)
+        offset += 12 + length
+    if header is None:
+        raise ValueError("PNG has no IHDR")
+    width, height, depth, color_type = header[:4]
+    channels = {value: key for key, value in COLOR_TYPES.items()}.get(color_type)
+    if depth != 8 or channels is None:
+        raise ValueError("Unsupported PNG format")
+    rows = np.frombuffer(zlib.decompress(b"".join(compressed)), dtype=np.uint8).reshape(height, -1)
+    if rows[:, 0].any():
+        raise ValueError("Filtered PNG rows are not supported")
+    return rows[:, 1:].reshape(height, width, channels)
@@ -0,0 +1,244 @@
+"""
+Tile-based triangle rasterizer in NumPy.
+
+The frame is cut into square tiles and every triangle is binned into the
+tiles its screen bounds overlap. Each tile is then rasterized on its own
+(``rasterize_tile`` is a module-level function over plain arrays, so tiles
+can be mapped across a process pool) and the results are stitched back.
+
+Within a tile there is no per-triangle Python loop: triangles are grouped
+by the power-of-two width and height of their pixel bounds, each group
+samples its candidate pixels in one broadcast, and the nearest fragment per
+pixel wins by a single argsort on a packed (pixel, depth) key. Projection is orthographic along -Z (the
+camera looks at the avatar's front), so depth is just +Z.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+DEPTH_STEPS = 2 ** 31 - 1
+
+
+@dataclass
+class TileTask:
+    """One tile's share of the scene."""
+
+    x0: int
+    y0: int
+    x1: int  # exclusive
+    y1: int  # exclusive
+    xy: np.ndarray  # (N, 3, 2) float32 screen coordinates
+    depth: np.ndarray  # (N, 3) float32
+    attributes: np.ndarray  # (N, 3, K) float32, interpolated per pixel
+
+
+@dataclass
+class Frame:
+    """Rasterized buffers for a whole image."""
+
+    depth: np.ndarray  # (H, W) float32, -inf where nothing was drawn
+    attributes: np.ndarray  # (H, W, K) float32
+
+    @property
+    def covered(self) -> np.ndarray:
+        return np.isfinite(self.depth)
+
+
+def orthographic(
+    positions: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    width: int,
+    height: int,
+    margin: float = 0.04,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project points onto the image so the ``low``/``high`` box fits inside it.
+
+    Returns:
+        Pixel coordinates ``(V, 2)`` (x right, y down) and depth ``(V,)``
+    """
+    extent = np.maximum(high[:2] - low[:2], 1e-6)
+    scale = min(width * (1 - 2 * margin) / extent[0], height * (1 - 2 * margin) / extent[1])
+    center = (low[:2] + high[:2]) / 2
+    x = (positions[:, 0] - center[0]) * scale + width / 2
+    y = height / 2 - (positions[:, 1] - center[1]) * scale
+    return np.stack([x, y], axis=1).astype(np.float32), positions[:, 2].astype(np.float32)
+
+
+def front_facing(positions: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Mask of faces whose normal points toward the camera (+Z)."""
+    p0, p1, p2 = (positions[faces[:, i]] for i in range(3))
+    e1, e2 = p1 - p0, p2 - p0
+    return (e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]) > 0
+
+
+def _pixel_bounds(xy: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Inclusive pixel index range each triangle's samples (pixel centres) can hit."""
+    low = np.ceil(xy.min(axis=1) - 0.5).astype(np.int64)
+    high = np.floor(xy.max(axis=1) - 0.5).astype(np.int64)
+    return low[:, 0], low[:, 1], high[:, 0], high[:, 1]
+
+
+def bin_triangles(
+    xy: np.ndarray,
+    depth: np.ndarray,
+    attributes: np.ndarray,
+    width: int,
+    height: int,
+    tile: int = 128,
+) -> List[TileTask]:
+    """
+    Split a scene into per-tile tasks.
+
+    A triangle spanning several tiles is copied into each of them; triangles
+    that cover no pixel centre (or are degenerate) are dropped here.
+
+    Args:
+        xy: ``(N, 3, 2)`` screen coordinates per triangle corner
+        depth: ``(N, 3)`` depth per corner (larger is nearer)
+        attributes: ``(N, 3, K)`` values to interpolate per corner
+        width: Image width in pixels
+        height: Image height in pixels
+        tile: Tile edge in pixels
+
+    Returns:
+        Tasks for the non-empty tiles, in row-major order
+    """
+    x0, y0, x1, y1 = _pixel_bounds(xy)
+    x0, y0 = np.maximum(x0, 0), np.maximum(y0, 0)
+    x1, y1 = np.minimum(x1, width - 1), np.minimum(y1, height - 1)
+    a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    keep = (x1 >= x0) & (y1 >= y0) & (np.abs(area) > 1e-9)
+    index = np.flatnonzero(keep)
+    tx0, ty0 = x0[keep] // tile, y0[keep] // tile
+    span_x = x1[keep] // tile - tx0 + 1
+    span_y = y1[keep] // tile - ty0 + 1
+    counts = span_x * span_y
+
+    copies = np.repeat(np.arange(len(index)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tiles_x = -(-width // tile)
+    tile_id = (ty0[copies] + local // span_x[copies]) * tiles_x + tx0[copies] + local % span_x[copies]
+
+    order = np.argsort(tile_id, kind="stable")
+    tile_id, triangles = tile_id[order], index[copies[order]]
+    ids, starts = np.unique(tile_id, return_index=True)
+    tasks = []
+    for tile_index, start, stop in zip(ids, starts, np.append(starts[1:], len(tile_id))):
+        row, column = divmod(int(tile_index), tiles_x)
+        chosen = triangles[start:stop]
+        tasks.append(TileTask(
+            x0=column * tile,
+            y0=row * tile,
+            x1=min((column + 1) * tile, width),
+            y1=min((row + 1) * tile, height),
+            xy=xy[chosen],
+            depth=depth[chosen],
+            attributes=attributes[chosen],
+        ))
+    return tasks
+
+
+def _fragments(xy, depth, attributes, x0, y0, size_x, size_y):
+    """Covered samples of triangles whose bounds fit in ``size_x x size_y`` pixels."""
+    px = (x0[:, None, None] + np.arange(size_x)[None, None, :]).astype(np.float32) + np.float32(0.5)
+    py = (y0[:, None, None] + np.arange(size_y)[None, :, None]).astype(np.float32) + np.float32(0.5)
+    a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+
+    def edge(p, q):
+        return ((q[:, 0] - p[:, 0])[:, None, None] * (py - p[:, 1, None, None])
+                - (q[:, 1] - p[:, 1])[:, None, None] * (px - p[:, 0, None, None]))
+
+    inverse = (np.float32(1.0) / area)[:, None, None]
+    w0 = edge(b, c) * inverse
+    w1 = edge(c, a) * inverse
+    w2 = np.float32(1.0) - w0 - w1
+    inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+    triangle, row, column = np.nonzero(inside)
+    weights = np.stack([w0[inside], w1[inside], w2[inside]], axis=1)
+    return (
+        (x0[triangle] + column, y0[triangle] + row),
+        np.einsum("ij,ij->i", weights, depth[triangle]),
+        np.einsum("ij,ijk->ik", weights, attributes[triangle]),
+    )
+
+
+def rasterize_tile(task: TileTask) -> Tuple[int, int, np.ndarray, np.ndarray]:
+    """
+    Rasterize one tile with a depth test (larger depth wins).
+
+    Returns:
+        ``(x0, y0, depth (h, w), attributes (h, w, K))``
+    """
+    width, height = task.x1 - task.x0, task.y1 - task.y0
+    channels = task.attributes.shape[2]
+    depth_buffer = np.full(height * width, -np.inf, dtype=np.float32)
+    attribute_buffer = np.zeros((height * width, channels), dtype=np.float32)
+
+    xy = task.xy
+    x0, y0, x1, y1 = _pixel_bounds(xy)
+    x0, y0 = np.maximum(x0, task.x0), np.maximum(y0, task.y0)
+    x1, y1 = np.minimum(x1, task.x1 - 1), np.minimum(y1, task.y1 - 1)
+    valid = (x1 >= x0) & (y1 >= y0)
+    class_x = np.ceil(np.log2(np.maximum(x1 - x0 + 1, 1))).astype(np.int64)
+    class_y = np.ceil(np.log2(np.maximum(y1 - y0 + 1, 1))).astype(np.int64)
+    size_class = class_x * 64 + class_y
+
+    pixels, depths, values = [], [], []
+    for level in np.unique(size_class[valid]):
+        chosen = valid & (size_class == level)
+        size_x, size_y = 1 << int(level // 64), 1 << int(level % 64)
+        (px, py), depth, value = _fragments(
+            xy[chosen], task.depth[chosen], task.attributes[chosen], x0[chosen], y0[chosen], size_x, size_y
+        )
+        inside = (px <= task.x1 - 1) & (py <= task.y1 - 1)
+        pixels.append((py[inside] - task.y0) * width + (px[inside] - task.x0))
+        depths.append(depth[inside])
+        values.append(value[inside])
+
+    pixel = np.concatenate(pixels) if pixels else np.empty(0, dtype=np.int64)
+    if len(pixel):
+        depth = np.concatenate(depths)
+        # One sort on (pixel, nearest first): depth quantized into the low 31 bits
+        near, far = depth.max(), depth.min()
+        rank = ((near - depth) * (DEPTH_STEPS / max(float(near - far), 1e-12))).astype(np.int64)
+        order = np.argsort((pixel.astype(np.int64) << 32) | rank)
+        pixel = pixel[order]
+        first = np.empty(len(pixel), dtype=bool)
+        first[0] = True
+        np.not_equal(pixel[1:], pixel[:-1], out=first[1:])
+        pixel, nearest = pixel[first], order[first]
+        depth_buffer[pixel] = depth[nearest]
+        attribute_buffer[pixel] = np.concatenate(values)[nearest]
+    return (
+        task.x0,
+        task.y0,
+        depth_buffer.reshape(height, width),
+        attribute_buffer.reshape(height, width, channels),
+    )
+
+
+def render_tiles(
+    tasks: List[TileTask],
+    width: int,
+    height: int,
+    channels: int,
+    map_fn: Optional[Callable[[Callable, Iterable[TileTask]], Iterator]] = None,
+) -> Frame:
+    """
+    Rasterize every tile (with ``map_fn``, e.g. a pool's ``map``) and stitch
+    the results into one frame.
+    """
+    depth = np.full((height, width), -np.inf, dtype=np.float32)
+    attributes = np.zeros((height, width, channels), dtype=np.float32)
+    for x0, y0, tile_depth, tile_attributes in (map_fn or map)(rasterize_tile, tasks):
+        h, w = tile_depth.shape
+        depth[y0:y0 + h, x0:x0 + w] = tile_depth
+        attributes[y0:y0 + h, x0:x0 + w] = tile_attributes
+    return Frame(depth=depth, attributes=attributes)
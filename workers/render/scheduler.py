@@ -0,0 +1,133 @@
+"""
+Priority dispatch of render calls onto a fixed set of threads.
+
+User-initiated renders (``USER``) always go first. Speculative renders
+(``SPECULATIVE``) only start when no user render is queued or running, at
+most ``speculative_slots`` at a time, on threads reserved on top of the
+user ones, so a speculative render never holds the thread a user render
+needs. Speculative work that piles up is shed oldest first: the newest
+guesses are the likeliest to be requested next.
+"""
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+
+USER = 0
+SPECULATIVE = 1
+
+
+class RenderScheduler:
+    """Two-level priority queue drained by worker threads."""
+
+    def __init__(self, workers: int, speculative_slots: int = 1, max_speculative_pending: int = 32):
+        """
+        Initialize the scheduler (threads start on first submit).
+
+        Args:
+            workers: Threads for user renders
+            speculative_slots: Speculative renders allowed at once (extra threads)
+            max_speculative_pending: Queued speculative renders kept before
+                the oldest are dropped
+        """
+        self.workers = max(workers, 1)
+        self.speculative_slots = speculative_slots
+        self.max_speculative_pending = max_speculative_pending
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, Callable[[], Any], Future]] = []
+        self._sequence = itertools.count()
+        self._running: Dict[int, int] = {USER: 0, SPECULATIVE: 0}
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def pending(self, priority: int) -> int:
+        with self._cond:
+            return sum(1 for entry in self._heap if entry[0] == priority)
+
+    def running(self, priority: int) -> int:
+        with self._cond:
+            return self._running[priority]
+
+    def submit(self, fn: Callable[[], Any], priority: int = USER) -> Future:
+        """
+        Queue ``fn`` at ``priority``.
+
+        Returns:
+            Future for its result (cancelled if dropped or the scheduler closes)
+
+        Raises:
+            RuntimeError: If the scheduler is closed
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            if not self._threads:
+                self._start()
+            if priority == SPECULATIVE:
+                self._shed(self.max_speculative_pending - 1)
+            heapq.heappush(self._heap, (priority, next(self._sequence), fn, future))
+            self._cond.notify_all()
+        return future
+
+    def close(self) -> None:
+        """Cancel queued work and stop the threads once running calls finish."""
+        with self._cond:
+            self._closed = True
+            for _, _, _, future in self._heap:
+                future.cancel()
+            self._heap.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _start(self) -> None:
+        for n in range(self.workers + self.speculative_slots):
+            thread = threading.Thread(target=self._loop, name=f"render-scheduler-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _shed(self, keep: int) -> None:
+        """Drop the oldest queued speculative calls beyond ``keep`` (lock held)."""
+        speculative = sorted(entry for entry in self._heap if entry[0] == SPECULATIVE)
+        excess = speculative[:max(len(speculative) - max(keep, 0), 0)]
+        if not excess:
+            return
+        dropped = {id(entry) for entry in excess}
+        self._heap = [entry for entry in self._heap if id(entry) not in dropped]
+        heapq.heapify(self._heap)
+        for _, _, _, future in excess:
+            future.cancel()
+        self.dropped += len(excess)
+
+    def _runnable(self) -> bool:
+        if not self._heap:
+            return False
+        if self._heap[0][0] == USER:
+            return True
+        # Head is speculative, so no user render is queued
+        return self._running[USER] == 0 and self._running[SPECULATIVE] < self.speculative_slots
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._runnable():
+                    self._cond.wait()
+                if self._closed:
+                    return
+                priority, _, fn, future = heapq.heappop(self._heap)
+                self._running[priority] += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn())
+                    except BaseException as exc:
+                        future.set_exception(exc)
+            finally:
+                with self._cond:
+                    self._running[priority] -= 1
+                    self._cond.notify_all()
@@ -0,0 +1,82 @@
+"""
+Speculative pre-rendering of neighbouring sizes.
+
+After a user renders size M, the next request is very likely S or L of the
+same garment. The worker renders those into the cache at low priority;
+``SpeculationTracker`` remembers which keys were rendered speculatively so
+it can report how many were later requested (the speculation hit rate).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def neighbor_sizes(chart: Sequence[Any], size: Any, distance: int = 1) -> List[Any]:
+    """
+    Sizes within ``distance`` places of ``size`` in a size chart's order,
+    nearest first (the smaller size before the larger at equal distance).
+    """
+    sizes = list(chart)
+    if size not in sizes:
+        return []
+    index = sizes.index(size)
+    neighbors = []
+    for step in range(1, distance + 1):
+        for candidate in (index - step, index + step):
+            if 0 <= candidate < len(sizes):
+                neighbors.append(sizes[candidate])
+    return neighbors
+
+
+class SpeculationTracker:
+    """Counts speculative renders and how many of them users went on to request."""
+
+    def __init__(self, max_keys: int = 10000):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_keys: Speculative keys remembered (oldest forgotten first)
+        """
+        self.max_keys = max_keys
+        self.submitted = 0
+        self.skipped = 0
+        self.rendered = 0
+        self.hits = 0
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.rendered if self.rendered else 0.0
+
+    def record(self, key: str) -> None:
+        """Note a finished speculative render."""
+        with self._lock:
+            self.rendered += 1
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+    def claim(self, key: str) -> bool:
+        """Note a user request for ``key``; True the first time it was speculated."""
+        with self._lock:
+            if key not in self._keys:
+                return False
+            del self._keys[key]
+            self.hits += 1
+            return True
+
+    def stats(self, dropped: Optional[int] = None) -> Dict[str, Any]:
+        stats = {
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "rendered": self.rendered,
+            "hits": self.hits,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+        if dropped is not None:
+            stats["dropped"] = dropped
+        return stats
@@ -0,0 +1,35 @@
+"""
+Shared runtime for FitTwin background workers.
+
+Queue backends (in-memory, SQLite, Postgres SKIP LOCKED, Redis) and an
+asyncio runtime with bounded concurrency, prefetch, visibility timeouts,
+retries with backoff and a dead-letter queue.
+"""
+
+from .backends import (
+    DeadLetter,
+    MemoryQueue,
+    Message,
+    PostgresQueue,
+    QueueBackend,
+    RedisQueue,
+    SQLiteQueue,
+    backend_from_env,
+)
+from .runtime import RetryPolicy, WorkerConfig, WorkerRuntime, WorkerStats, run_worker
+
+__all__ = [
+    "DeadLetter",
+    "MemoryQueue",
+    "Message",
+    "PostgresQueue",
+    "QueueBackend",
+    "RedisQueue",
+    "SQLiteQueue",
+    "backend_from_env",
+    "RetryPolicy",
+    "WorkerConfig",
+    "WorkerRuntime",
+    "WorkerStats",
+    "run_worker",
+]
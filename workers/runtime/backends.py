@@ -0,0 +1,512 @@
+"""
+Queue backends for the worker runtime.
+
+Every backend implements the same at-least-once contract:
+
+- ``reserve`` hands out up to ``n`` visible messages and hides them for the
+  visibility timeout; a message that is not acked before the timeout
+  becomes visible again (its worker is presumed dead).
+- ``attempts`` counts deliveries, including the current one.
+- ``retry`` makes a message visible again after a delay; ``dead_letter``
+  moves it to the queue's dead-letter store for inspection.
+
+Backends:
+    MemoryQueue   -- in-process, for tests and single-process deployments
+    SQLiteQueue   -- durable single-host queue (atomic UPDATE ... RETURNING claims)
+    PostgresQueue -- shared ``job_queue`` table claimed with FOR UPDATE SKIP LOCKED
+    RedisQueue    -- Redis (or any server speaking the same sorted-set/hash commands)
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Message:
+    """A reserved queue message."""
+
+    id: str
+    queue: str
+    body: Dict[str, Any]
+    attempts: int = 1
+    enqueued_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class DeadLetter:
+    """A message that exhausted its retries."""
+
+    id: str
+    queue: str
+    body: Dict[str, Any]
+    attempts: int
+    error: str
+    failed_at: float
+
+
+class QueueBackend(ABC):
+    """Interface shared by all queue backends."""
+
+    @abstractmethod
+    async def enqueue(self, queue: str, body: Dict[str, Any], delay: float = 0.0) -> str:
+        """Add a message, visible after ``delay`` seconds. Returns its ID."""
+
+    @abstractmethod
+    async def reserve(self, queue: str, max_messages: int, visibility_timeout: float) -> List[Message]:
+        """Claim up to ``max_messages`` visible messages."""
+
+    @abstractmethod
+    async def ack(self, message: Message) -> None:
+        """Delete a successfully processed message."""
+
+    @abstractmethod
+    async def retry(self, message: Message, delay: float) -> None:
+        """Make a reserved message visible again after ``delay`` seconds."""
+
+    @abstractmethod
+    async def extend(self, message: Message, visibility_timeout: float) -> None:
+        """Push back the visibility deadline of a message still being processed."""
+
+    @abstractmethod
+    async def dead_letter(self, message: Message, error: str) -> None:
+        """Move a message to the dead-letter store."""
+
+    @abstractmethod
+    async def dead_letters(self, queue: str, limit: int = 100) -> List[DeadLetter]:
+        """List dead-lettered messages, oldest first."""
+
+    @abstractmethod
+    async def size(self, queue: str) -> int:
+        """Number of messages waiting or in flight."""
+
+    async def close(self) -> None:
+        """Release connections."""
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+class MemoryQueue(QueueBackend):
+    """
+    In-process queue.
+
+    Each queue is a heap of ``(visible_at, seq, id)``; ``_visible`` holds the
+    authoritative visible time per message, so heap entries superseded by a
+    reserve, retry or extend are skipped when popped.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._ready: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._messages: Dict[str, Message] = {}
+        self._visible: Dict[str, float] = {}
+        self._dead: Dict[str, List[DeadLetter]] = {}
+        self._seq = itertools.count()
+
+    def _schedule(self, queue: str, message_id: str, visible_at: float) -> None:
+        self._visible[message_id] = visible_at
+        heapq.heappush(self._ready.setdefault(queue, []), (visible_at, next(self._seq), message_id))
+
+    async def enqueue(self, queue: str, body: Dict[str, Any], delay: float = 0.0) -> str:
+        message_id = _new_id()
+        now = self._clock()
+        self._messages[message_id] = Message(message_id, queue, body, attempts=0, enqueued_at=now)
+        self._schedule(queue, message_id, now + delay)
+        return message_id
+
+    async def reserve(self, queue: str, max_messages: int, visibility_timeout: float) -> List[Message]:
+        now = self._clock()
+        heap = self._ready.setdefault(queue, [])
+        reserved = []
+        while heap and len(reserved) < max_messages and heap[0][0] <= now:
+            visible_at, _, message_id = heapq.heappop(heap)
+            message = self._messages.get(message_id)
+            if message is None or self._visible.get(message_id) != visible_at:
+                continue
+            message.attempts += 1
+            # Redelivered automatically if not acked by the deadline
+            self._schedule(queue, message_id, now + visibility_timeout)
+            reserved.append(Message(message_id, queue, message.body, message.attempts, message.enqueued_at))
+        return reserved
+
+    async def ack(self, message: Message) -> None:
+        self._messages.pop(message.id, None)
+        self._visible.pop(message.id, None)
+
+    async def retry(self, message: Message, delay: float) -> None:
+        if message.id in self._messages:
+            self._schedule(message.queue, message.id, self._clock() + delay)
+
+    async def extend(self, message: Message, visibility_timeout: float) -> None:
+        await self.retry(message, visibility_timeout)
+
+    async def dead_letter(self, message: Message, error: str) -> None:
+        await self.ack(message)
+        self._dead.setdefault(message.queue, []).append(
+            DeadLetter(message.id, message.queue, message.body, message.attempts, error, self._clock())
+        )
+
+    async def dead_letters(self, queue: str, limit: int = 100) -> List[DeadLetter]:
+        return self._dead.get(queue, [])[:limit]
+
+    async def size(self, queue: str) -> int:
+        return sum(1 for message in self._messages.values() if message.queue == queue)
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    visible_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_queue_visible ON job_queue(queue, visible_at);
+CREATE TABLE IF NOT EXISTS job_queue_dead (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteQueue(QueueBackend):
+    """
+    Durable single-host queue in a SQLite table.
+
+    A message is visible while ``visible_at <= now``; reserving it pushes
+    ``visible_at`` to the visibility deadline in the same UPDATE, so claims
+    are atomic across processes sharing the database file.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SQLITE_SCHEMA)
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def enqueue(self, queue: str, body: Dict[str, Any], delay: float = 0.0) -> str:
+        message_id = _new_id()
+        now = self._clock()
+        await self._run(
+            "INSERT INTO job_queue (id, queue, body, enqueued_at, visible_at) VALUES (?, ?, ?, ?, ?)",
+            (message_id, queue, json.dumps(body), now, now + delay),
+        )
+        return message_id
+
+    async def reserve(self, queue: str, max_messages: int, visibility_timeout: float) -> List[Message]:
+        now = self._clock()
+        rows = await self._run(
+            "UPDATE job_queue SET visible_at = ?, attempts = attempts + 1"
+            " WHERE id IN (SELECT id FROM job_queue WHERE queue = ? AND visible_at <= ?"
+            " ORDER BY visible_at LIMIT ?)"
+            " RETURNING id, queue, body, attempts, enqueued_at",
+            (now + visibility_timeout, queue, now, max_messages),
+        )
+        return [
+            Message(row["id"], row["queue"], json.loads(row["body"]), row["attempts"], row["enqueued_at"])
+            for row in rows
+        ]
+
+    async def ack(self, message: Message) -> None:
+        await self._run("DELETE FROM job_queue WHERE id = ?", (message.id,))
+
+    async def retry(self, message: Message, delay: float) -> None:
+        await self._run("UPDATE job_queue SET visible_at = ? WHERE id = ?", (self._clock() + delay, message.id))
+
+    async def extend(self, message: Message, visibility_timeout: float) -> None:
+        await self.retry(message, visibility_timeout)
+
+    async def dead_letter(self, message: Message, error: str) -> None:
+        def move() -> None:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.execute("DELETE FROM job_queue WHERE id = ?", (message.id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO job_queue_dead (id, queue, body, attempts, error, failed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (message.id, message.queue, json.dumps(message.body), message.attempts, error, self._clock()),
+                )
+                self._conn.execute("COMMIT")
+
+        await asyncio.to_thread(move)
+
+    async def dead_letters(self, queue: str, limit: int = 100) -> List[DeadLetter]:
+        rows = await self._run(
+            "SELECT * FROM job_queue_dead WHERE queue = ? ORDER BY failed_at LIMIT ?", (queue, limit)
+        )
+        return [
+            DeadLetter(row["id"], row["queue"], json.loads(row["body"]), row["attempts"], row["error"], row["failed_at"])
+            for row in rows
+        ]
+
+    async def size(self, queue: str) -> int:
+        rows = await self._run("SELECT COUNT(*) AS n FROM job_queue WHERE queue = ?", (queue,))
+        return rows[0]["n"]
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PostgresQueue(QueueBackend):
+    """
+    Shared queue in the ``job_queue`` table (``009_job_queue.sql``).
+
+    Workers on any host claim rows with ``FOR UPDATE SKIP LOCKED``, so
+    concurrent reservers never block on or double-claim the same message.
+    Requires ``asyncpg``.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    async def _get_pool(self):
+        if self._pool is None:
+            try:
+                import asyncpg
+            except ImportError as e:
+                raise RuntimeError("PostgresQueue requires asyncpg (pip install asyncpg)") from e
+            self._pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    async def enqueue(self, queue: str, body: Dict[str, Any], delay: float = 0.0) -> str:
+        pool = await self._get_pool()
+        return str(await pool.fetchval(
+            "INSERT INTO job_queue (queue, body, visible_at)"
+            " VALUES ($1, $2::jsonb, NOW() + make_interval(secs => $3)) RETURNING id",
+            queue, json.dumps(body), delay,
+        ))
+
+    async def reserve(self, queue: str, max_messages: int, visibility_timeout: float) -> List[Message]:
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "UPDATE job_queue SET visible_at = NOW() + make_interval(secs => $3), attempts = attempts + 1"
+            " WHERE id IN ("
+            "   SELECT id FROM job_queue WHERE queue = $1 AND visible_at <= NOW()"
+            "   ORDER BY visible_at LIMIT $2 FOR UPDATE SKIP LOCKED"
+            " ) RETURNING id, queue, body, attempts, extract(epoch FROM enqueued_at) AS enqueued_at",
+            queue, max_messages, visibility_timeout,
+        )
+        return [
+            Message(str(row["id"]), row["queue"], json.loads(row["body"]), row["attempts"], float(row["enqueued_at"]))
+            for row in rows
+        ]
+
+    async def ack(self, message: Message) -> None:
+        pool = await self._get_pool()
+        await pool.execute("DELETE FROM job_queue WHERE id = $1::uuid", message.id)
+
+    async def retry(self, message: Message, delay: float) -> None:
+        pool = await self._get_pool()
+        await pool.execute(
+            "UPDATE job_queue SET visible_at = NOW() + make_interval(secs => $2) WHERE id = $1::uuid",
+            message.id, delay,
+        )
+
+    async def extend(self, message: Message, visibility_timeout: float) -> None:
+        await self.retry(message, visibility_timeout)
+
+    async def dead_letter(self, message: Message, error: str) -> None:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM job_queue WHERE id = $1::uuid", message.id)
+                await conn.execute(
+                    "INSERT INTO job_queue_dead (id, queue, body, attempts, error)"
+                    " VALUES ($1::uuid, $2, $3::jsonb, $4, $5) ON CONFLICT (id) DO NOTHING",
+                    message.id, message.queue, json.dumps(message.body), message.attempts, error,
+                )
+
+    async def dead_letters(self, queue: str, limit: int = 100) -> List[DeadLetter]:
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "SELECT id, queue, body, attempts, error, extract(epoch FROM failed_at) AS failed_at"
+            " FROM job_queue_dead WHERE queue = $1 ORDER BY failed_at LIMIT $2",
+            queue, limit,
+        )
+        return [
+            DeadLetter(str(row["id"]), row["queue"], json.loads(row["body"]), row["attempts"], row["error"],
+                       float(row["failed_at"]))
+            for row in rows
+        ]
+
+    async def size(self, queue: str) -> int:
+        pool = await self._get_pool()
+        return await pool.fetchval("SELECT COUNT(*) FROM job_queue WHERE queue = $1", queue)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class RedisQueue(QueueBackend):
+    """
+    Queue on a Redis-compatible server.
+
+    Keys per queue: ``<prefix>:<queue>:ready`` (sorted set scored by visible
+    time), ``:inflight`` (scored by visibility deadline), ``:messages`` (hash
+    of JSON envelopes) and ``:dead`` (list). Claiming moves ids from
+    ``:ready`` to ``:inflight`` (and expired ids back) in one Lua script, so
+    a crash can never leave a message in neither set and two workers can
+    never both claim it.
+
+    ``client`` is a ``redis.asyncio.Redis`` instance or anything exposing the
+    same coroutine methods.
+    """
+
+    # KEYS: ready, inflight; ARGV: now, visibility deadline, max messages
+    CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], ARGV[1], id)
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], ARGV[2], id)
+end
+return ids
+"""
+
+    # KEYS: inflight, ready; ARGV: id, visible time
+    RETRY_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+end
+"""
+
+    def __init__(self, client: Any, prefix: str = "fittwin:queue", clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+        self._claim = client.register_script(self.CLAIM_SCRIPT)
+        self._retry = client.register_script(self.RETRY_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisQueue":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("RedisQueue requires redis (pip install redis)") from e
+        return cls(redis_asyncio.from_url(url, decode_responses=True), **kwargs)
+
+    def _key(self, queue: str, suffix: str) -> str:
+        return f"{self.prefix}:{queue}:{suffix}"
+
+    async def enqueue(self, queue: str, body: Dict[str, Any], delay: float = 0.0) -> str:
+        message_id = _new_id()
+        now = self._clock()
+        envelope = {"body": body, "attempts": 0, "enqueued_at": now}
+        await self.client.hset(self._key(queue, "messages"), message_id, json.dumps(envelope))
+        await self.client.zadd(self._key(queue, "ready"), {message_id: now + delay})
+        return message_id
+
+    async def reserve(self, queue: str, max_messages: int, visibility_timeout: float) -> List[Message]:
+        now = self._clock()
+        messages_key = self._key(queue, "messages")
+        claimed = await self._claim(
+            keys=[self._key(queue, "ready"), self._key(queue, "inflight")],
+            args=[now, now + visibility_timeout, max_messages],
+        )
+        reserved = []
+        for message_id in claimed:
+            raw = await self.client.hget(messages_key, message_id)
+            if raw is None:
+                # Acked or dead-lettered meanwhile; nothing left to deliver
+                await self.client.zrem(self._key(queue, "inflight"), message_id)
+                continue
+            envelope = json.loads(raw)
+            envelope["attempts"] += 1
+            await self.client.hset(messages_key, message_id, json.dumps(envelope))
+            reserved.append(Message(message_id, queue, envelope["body"], envelope["attempts"], envelope["enqueued_at"]))
+        return reserved
+
+    async def ack(self, message: Message) -> None:
+        await self.client.zrem(self._key(message.queue, "inflight"), message.id)
+        await self.client.hdel(self._key(message.queue, "messages"), message.id)
+
+    async def retry(self, message: Message, delay: float) -> None:
+        await self._retry(
+            keys=[self._key(message.queue, "inflight"), self._key(message.queue, "ready")],
+            args=[message.id, self._clock() + delay],
+        )
+
+    async def extend(self, message: Message, visibility_timeout: float) -> None:
+        await self.client.zadd(
+            self._key(message.queue, "inflight"), {message.id: self._clock() + visibility_timeout}, xx=True
+        )
+
+    async def dead_letter(self, message: Message, error: str) -> None:
+        await self.ack(message)
+        record = {
+            "id": message.id, "body": message.body, "attempts": message.attempts,
+            "error": error, "failed_at": self._clock(),
+        }
+        await self.client.rpush(self._key(message.queue, "dead"), json.dumps(record))
+
+    async def dead_letters(self, queue: str, limit: int = 100) -> List[DeadLetter]:
+        records = [json.loads(raw) for raw in await self.client.lrange(self._key(queue, "dead"), 0, limit - 1)]
+        return [
+            DeadLetter(r["id"], queue, r["body"], r["attempts"], r["error"], r["failed_at"]) for r in records
+        ]
+
+    async def size(self, queue: str) -> int:
+        return await self.client.hlen(self._key(queue, "messages"))
+
+    async def close(self) -> None:
+        close = getattr(self.client, "aclose", None) or getattr(self.client, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+
+def backend_from_env() -> QueueBackend:
+    """
+    Build the backend selected by ``QUEUE_BACKEND``.
+
+    ``memory`` (default), ``sqlite`` (``QUEUE_SQLITE_PATH``), ``postgres``
+    (``QUEUE_DATABASE_URL``) or ``redis`` (``QUEUE_REDIS_URL``). ``memory``
+    is private to one process: producers and workers running as separate
+    processes need one of the shared backends.
+    """
+    kind = os.getenv("QUEUE_BACKEND", "memory").lower()
+    if kind == "memory":
+        return MemoryQueue()
+    if kind == "sqlite":
+        return SQLiteQueue(os.getenv("QUEUE_SQLITE_PATH", "fittwin-queue.sqlite3"))
+    if kind == "postgres":
+        return PostgresQueue(os.environ["QUEUE_DATABASE_URL"])
+    if kind == "redis":
+        return RedisQueue.from_url(os.getenv("QUEUE_REDIS_URL", "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown QUEUE_BACKEND: {kind}")
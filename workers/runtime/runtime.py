@@ -0,0 +1,302 @@
+"""
+Worker runtime.
+
+Consumes one queue with a fixed number of concurrent handlers:
+
+- a fetcher reserves messages ahead of time, keeping at most ``prefetch``
+  reserved-but-unstarted messages in a local buffer;
+- ``concurrency`` consumers run the handler; async handlers run on the event
+  loop, sync handlers on an executor (threads by default, or a process pool);
+- while a handler runs its message's visibility is extended every
+  ``visibility_timeout / 2`` seconds, so only dead workers lose messages;
+- failures are retried with exponential backoff and dead-lettered after
+  ``max_attempts`` deliveries.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import random
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .backends import MemoryQueue, Message, QueueBackend, backend_from_env
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter."""
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 300.0
+    multiplier: float = 2.0
+    jitter: float = 0.1
+
+    def delay(self, attempts: int) -> float:
+        """Backoff before the next delivery, given deliveries so far."""
+        delay = min(self.base_delay * self.multiplier ** max(attempts - 1, 0), self.max_delay)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter)) if self.jitter else delay
+
+
+@dataclass
+class WorkerConfig:
+    """Runtime tuning knobs."""
+
+    concurrency: int = 4
+    prefetch: Optional[int] = None
+    visibility_timeout: float = 30.0
+    poll_interval: float = 0.5
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+
+    @property
+    def buffer_size(self) -> int:
+        # Never 0: asyncio.Queue(maxsize=0) is unbounded and would reserve nothing
+        return max(self.prefetch if self.prefetch is not None else self.concurrency, 1)
+
+    @classmethod
+    def from_env(cls, prefix: str = "WORKER") -> "WorkerConfig":
+        """
+        Read ``<PREFIX>_CONCURRENCY``, ``_PREFETCH``, ``_VISIBILITY_TIMEOUT``,
+        ``_POLL_INTERVAL``, ``_MAX_ATTEMPTS``, ``_RETRY_BASE_DELAY`` and
+        ``_RETRY_MAX_DELAY``.
+        """
+        def env(name: str, default: str) -> str:
+            return os.getenv(f"{prefix}_{name}", default)
+
+        prefetch = env("PREFETCH", "")
+        return cls(
+            concurrency=int(env("CONCURRENCY", "4")),
+            prefetch=int(prefetch) if prefetch else None,
+            visibility_timeout=float(env("VISIBILITY_TIMEOUT", "30")),
+            poll_interval=float(env("POLL_INTERVAL", "0.5")),
+            retry=RetryPolicy(
+                max_attempts=int(env("MAX_ATTEMPTS", "5")),
+                base_delay=float(env("RETRY_BASE_DELAY", "1")),
+                max_delay=float(env("RETRY_MAX_DELAY", "300")),
+            ),
+        )
+
+
+@dataclass
+class WorkerStats:
+    """Counters exposed by a running worker."""
+
+    processed: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    in_flight: int = 0
+    started_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "in_flight": self.in_flight,
+            "throughput_per_second": round(self.succeeded / elapsed, 2),
+        }
+
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class WorkerRuntime:
+    """Runs a handler over a queue with bounded concurrency and prefetch."""
+
+    def __init__(
+        self,
+        backend: QueueBackend,
+        queue: str,
+        handler: Handler,
+        config: Optional[WorkerConfig] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the runtime.
+
+        Args:
+            backend: Queue backend
+            queue: Queue name
+            handler: Callable receiving the message body; may be async
+            config: Concurrency, prefetch, visibility and retry settings
+            executor: Executor for sync handlers (default: the loop's thread pool)
+        """
+        self.backend = backend
+        self.queue = queue
+        self.handler = handler
+        self.config = config or WorkerConfig()
+        self.executor = executor
+        self.stats = WorkerStats()
+        self._is_async = inspect.iscoroutinefunction(handler)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Process messages until ``stop`` is set (forever if not given).
+
+        Reserved but unstarted messages are released on shutdown.
+        """
+        stop = stop or asyncio.Event()
+        buffer: asyncio.Queue = asyncio.Queue(maxsize=self.config.buffer_size)
+        consumers = [asyncio.create_task(self._consume(buffer)) for _ in range(self.config.concurrency)]
+        try:
+            await self._fetch(buffer, stop)
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            while not buffer.empty():
+                await self._settle(self.backend.retry, buffer.get_nowait(), 0.0)
+
+    async def drain(self, idle_timeout: float = 0.0) -> WorkerStats:
+        """
+        Process until the queue is empty and all handlers have finished.
+
+        Messages waiting on a retry delay keep the queue non-empty, so this
+        also waits out backoffs. Useful for batch jobs and tests.
+        """
+        stop = asyncio.Event()
+        runner = asyncio.create_task(self.run(stop))
+        while True:
+            await asyncio.sleep(self.config.poll_interval)
+            if await self.backend.size(self.queue) == 0 and self.stats.in_flight == 0:
+                if idle_timeout <= 0:
+                    break
+                await asyncio.sleep(idle_timeout)
+                if await self.backend.size(self.queue) == 0:
+                    break
+        stop.set()
+        await runner
+        return self.stats
+
+    async def _fetch(self, buffer: asyncio.Queue, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            room = buffer.maxsize - buffer.qsize()
+            messages: List[Message] = []
+            if room > 0:
+                messages = await self.backend.reserve(self.queue, room, self.config.visibility_timeout)
+                for message in messages:
+                    buffer.put_nowait(message)
+            if not messages:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.config.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _consume(self, buffer: asyncio.Queue) -> None:
+        while True:
+            message = await buffer.get()
+            self.stats.in_flight += 1
+            try:
+                await self._process(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Never let one message take a consumer down
+                logger.exception("%s message %s could not be processed", self.queue, message.id)
+            finally:
+                self.stats.in_flight -= 1
+
+    async def _settle(self, action: Callable[..., Awaitable[None]], message: Message, *args: Any) -> bool:
+        """
+        Run a backend ack/retry/dead-letter/extend call, logging instead of raising.
+
+        A message whose settle call fails becomes visible again once its
+        visibility timeout lapses, so it is redelivered rather than lost.
+        """
+        try:
+            await action(message, *args)
+        except Exception:
+            logger.exception("%s message %s: %s failed", self.queue, message.id, action.__name__)
+            return False
+        return True
+
+    async def _process(self, message: Message) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(message))
+        try:
+            await self._call(message.body)
+        except asyncio.CancelledError:
+            # Shutdown mid-job: hand the message straight back
+            await self._settle(self.backend.retry, message, 0.0)
+            raise
+        except Exception as e:
+            self.stats.processed += 1
+            error = f"{type(e).__name__}: {e}"
+            if message.attempts >= self.config.retry.max_attempts:
+                logger.error("%s message %s dead-lettered after %d attempts: %s",
+                             self.queue, message.id, message.attempts, error)
+                if await self._settle(self.backend.dead_letter, message, error):
+                    self.stats.dead_lettered += 1
+            else:
+                if await self._settle(self.backend.retry, message, self.config.retry.delay(message.attempts)):
+                    self.stats.retried += 1
+        else:
+            self.stats.processed += 1
+            self.stats.succeeded += 1
+            await self._settle(self.backend.ack, message)
+        finally:
+            heartbeat.cancel()
+
+    async def _call(self, body: Dict[str, Any]) -> Any:
+        if self._is_async:
+            return await self.handler(body)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self.handler, body))
+
+    async def _heartbeat(self, message: Message) -> None:
+        interval = self.config.visibility_timeout / 2
+        delay = interval
+        while True:
+            await asyncio.sleep(delay)
+            extended = await self._settle(self.backend.extend, message, self.config.visibility_timeout)
+            # Retry a failed extend sooner, before the current deadline lapses
+            delay = interval if extended else interval / 2
+
+
+def run_worker(
+    queue: str,
+    handler: Handler,
+    backend: Optional[QueueBackend] = None,
+    config: Optional[WorkerConfig] = None,
+    executor: Optional[Executor] = None,
+    on_shutdown: Optional[Callable[[], Awaitable[None]]] = None,
+) -> None:
+    """
+    Blocking entry point for worker scripts.
+
+    Backend and config default to ``QUEUE_BACKEND`` / ``WORKER_*`` environment
+    variables. ``on_shutdown`` is awaited on the worker's event loop after the
+    runtime stops, for closing handler-owned connections.
+    """
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    runtime = WorkerRuntime(
+        backend or backend_from_env(), queue, handler, config or WorkerConfig.from_env(), executor
+    )
+    logger.info("Worker for queue %r started (concurrency=%d, prefetch=%d)",
+                queue, runtime.config.concurrency, runtime.config.buffer_size)
+    if isinstance(runtime.backend, MemoryQueue):
+        logger.warning("QUEUE_BACKEND=memory: this worker only sees messages enqueued in its own "
+                       "process; set QUEUE_BACKEND to sqlite, postgres or redis to share a queue")
+
+    async def main() -> None:
+        try:
+            await runtime.run()
+        finally:
+            if on_shutdown is not None:
+                await on_shutdown()
+            await runtime.backend.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass